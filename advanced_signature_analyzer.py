@@ -12,7 +12,11 @@ import os
 from typing import Dict, Any, Optional, Tuple, List
 from datetime import datetime
 
-def analyze_signature(image_path: str, real_width_mm: float, real_height_mm: float) -> Dict[str, Any]:
+# Il motore di estrazione (grafo di intermedi e parametri) è condiviso con l'analizzatore del server
+from server.feature_engine import FeatureGraph
+
+def analyze_signature(image_path: str, real_width_mm: float, real_height_mm: float,
+                      features: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Analizza una firma utilizzando parametri avanzati
     
@@ -20,6 +24,8 @@ def analyze_signature(image_path: str, real_width_mm: float, real_height_mm: flo
         image_path: Percorso dell'immagine della firma
         real_width_mm: Larghezza reale in mm
         real_height_mm: Altezza reale in mm
+        features: Lista dei parametri da calcolare, es. ["inclination", "pressureMean"]
+            (None = tutti); gli intermedi non necessari non vengono calcolati
         
     Returns:
         Dizionario con parametri avanzati estratti
@@ -48,72 +54,21 @@ def analyze_signature(image_path: str, real_width_mm: float, real_height_mm: flo
         _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
         
         # === PARAMETRI AVANZATI ===
-        
-        # 1. Proporzione geometrica
-        proportion = real_height_mm / real_width_mm
-        
-        # 2. Inclinazione media
-        inclination = calculate_inclination(binary)
-        
-        # 3. Analisi pressione (da intensità pixel)
-        pressure_mean, pressure_std = analyze_pressure(gray, binary)
-        
-        # 4. Curvatura media
-        avg_curvature = calculate_average_curvature(binary, pixels_per_mm)
-        
-        # 5. Stile di scrittura
-        writing_style = classify_writing_style(binary, inclination, avg_curvature)
-        
-        # 6. Leggibilità
-        readability = assess_readability(binary, pixels_per_mm)
-        
-        # 7. Analisi delle asole
-        avg_asola_size = analyze_loops(binary, pixels_per_mm)
-        
-        # 8. Spaziatura media
-        avg_spacing = calculate_spacing(binary, pixels_per_mm)
-        
-        # 9. Velocità di esecuzione
-        velocity = estimate_writing_velocity(binary, avg_spacing, avg_curvature)
-        
-        # 10. Sovrapposizione tratti
-        overlap_ratio = calculate_overlap_ratio(binary)
-        
-        # 11. Connessioni tra lettere
-        letter_connections = count_letter_connections(binary)
-        
-        # 12. Deviazione baseline
-        baseline_std_mm = calculate_baseline_deviation(binary, pixels_per_mm)
-        
-        # 13. Componenti connesse
-        num_components = calculate_connected_components(binary)
-        
-        # 14. Complessità del tratto
-        stroke_complexity = calculate_stroke_complexity(binary, pixels_per_mm)
-        
-        result = {
-            # Parametri base
-            "proportion": float(proportion),
-            "inclination": float(inclination),
-            "pressureMean": float(pressure_mean),
-            "pressureStd": float(pressure_std),
-            "avgCurvature": float(avg_curvature),
-            "writingStyle": writing_style,
-            "readability": readability,
-            "avgAsolaSize": float(avg_asola_size),
-            "avgSpacing": float(avg_spacing),
-            "velocity": float(velocity),
-            "overlapRatio": float(overlap_ratio),
-            "letterConnections": int(letter_connections),
-            "baselineStdMm": float(baseline_std_mm),
-            "connectedComponents": int(num_components),
-            "strokeComplexity": float(stroke_complexity),
-            
-            # Metadati
+        # Ogni intermedio (scheletro, componenti connesse, contorni) è calcolato una sola volta
+        result = ADVANCED_FEATURES.run({
+            "gray": gray,
+            "binary": binary,
+            "real_width_mm": real_width_mm,
+            "real_height_mm": real_height_mm,
+            "pixels_per_mm": pixels_per_mm,
+        }, features)
+        
+        # Metadati
+        result.update({
             "timestamp": datetime.now().isoformat(),
             "imageSize": f"{width}x{height}",
             "calibration": f"{pixels_per_mm:.2f}px/mm"
-        }
+        })
         
         print(f"[PYTHON] Analisi completata con {len(result)} parametri", file=sys.stderr)
         return result
@@ -122,11 +77,12 @@ def analyze_signature(image_path: str, real_width_mm: float, real_height_mm: flo
         print(f"[PYTHON] Errore nell'analisi: {str(e)}", file=sys.stderr)
         return {"error": str(e), "timestamp": datetime.now().isoformat()}
 
-def calculate_inclination(binary: np.ndarray) -> float:
+def calculate_inclination(binary: np.ndarray, contours: Optional[list] = None) -> float:
     """Calcola l'inclinazione media della scrittura"""
     try:
-        # Trova contorni
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Trova contorni (se non già calcolati)
+        if contours is None:
+            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         if not contours:
             return 0.0
         
@@ -164,54 +120,90 @@ def analyze_pressure(gray: np.ndarray, binary: np.ndarray) -> Tuple[float, float
     except Exception:
         return 0.0, 0.0
 
-def calculate_average_curvature(binary: np.ndarray, pixels_per_mm: float) -> float:
-    """Calcola la curvatura media"""
+def compute_skeleton(binary: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Calcola lo scheletro della firma (thinning), condiviso dai parametri che lo usano
+    
+    Returns:
+        Scheletro binario, oppure None se il thinning non è disponibile
+    """
+    try:
+        return cv2.ximgproc.thinning(binary)
+    except Exception:
+        return None
+
+def skeleton_junctions(skeleton: np.ndarray) -> np.ndarray:
+    """
+    Mappa dei punti di giunzione dello scheletro
+    
+    Il numero di vicini (8-connessi) di ogni pixel è calcolato con un filtro 3x3
+    su tutta l'immagine; i pixel di bordo sono esclusi
+    
+    Returns:
+        Maschera booleana dei pixel dello scheletro con più di 2 vicini
+    """
+    active = (skeleton > 0).astype(np.float32)
+    kernel = np.ones((3, 3), np.float32)
+    kernel[1, 1] = 0
+    neighbor_count = cv2.filter2D(active, -1, kernel, borderType=cv2.BORDER_CONSTANT)
+    
+    interior = np.zeros(skeleton.shape, dtype=bool)
+    interior[1:-1, 1:-1] = True
+    return (active > 0) & interior & (neighbor_count > 2)
+
+def calculate_average_curvature(binary: np.ndarray, pixels_per_mm: float,
+                                skeleton: Optional[np.ndarray] = None) -> float:
+    """Calcola la curvatura media (lo scheletro, se non fornito, è calcolato qui)"""
+    if skeleton is None:
+        skeleton = compute_skeleton(binary)
+    return skeleton_curvature(skeleton, pixels_per_mm)
+
+def skeleton_curvature(skeleton: Optional[np.ndarray], pixels_per_mm: float) -> float:
+    """Curvatura media di uno scheletro già calcolato (0 se il thinning non è disponibile)"""
+    if skeleton is None:
+        return 0.0
     try:
-        # Trova scheletro
-        skeleton = cv2.ximgproc.thinning(binary)
-        
         # Trova punti di contorno dello scheletro
         contours, _ = cv2.findContours(skeleton, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
         if not contours:
             return 0.0
         
-        total_curvature = 0.0
-        total_points = 0
+        # Almeno 10 punti per calcolare curvatura: i contorni validi vengono concatenati
+        # e gli angoli calcolati per tutti i punti (p[i-5], p[i], p[i+5]) insieme
+        selected = [contour.reshape(-1, 2) for contour in contours if len(contour) > 10]
+        if not selected:
+            return 0.0
         
-        for contour in contours:
-            if len(contour) > 10:  # Almeno 10 punti per calcolare curvatura
-                # Calcola curvatura per segmenti
-                for i in range(5, len(contour) - 5):
-                    p1 = contour[i-5][0]
-                    p2 = contour[i][0]  
-                    p3 = contour[i+5][0]
-                    
-                    # Calcola angolo
-                    v1 = p1 - p2
-                    v2 = p3 - p2
-                    
-                    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
-                    cos_angle = np.clip(cos_angle, -1, 1)
-                    angle = np.arccos(cos_angle)
-                    
-                    total_curvature += angle
-                    total_points += 1
-        
-        if total_points == 0:
+        lengths = np.array([len(points) for points in selected])
+        points = np.concatenate(selected).astype(np.float64)
+        offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        local_index = np.arange(len(points)) - offsets
+        contour_lengths = np.repeat(lengths, lengths)
+        centers = np.nonzero((local_index >= 5) & (local_index < contour_lengths - 5))[0]
+        if len(centers) == 0:
             return 0.0
-            
+        
+        # Calcola angolo
+        v1 = points[centers - 5] - points[centers]
+        v2 = points[centers + 5] - points[centers]
+        dot = np.einsum('ij,ij->i', v1, v2)
+        norms = np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1)
+        angles = np.arccos(np.clip(dot / (norms + 1e-6), -1, 1))
+        
         # Converte in curvatura per mm
-        avg_curvature_per_pixel = total_curvature / total_points
+        avg_curvature_per_pixel = np.sum(angles) / len(angles)
         return float(avg_curvature_per_pixel * pixels_per_mm)
         
     except Exception:
         return 0.0
 
-def classify_writing_style(binary: np.ndarray, inclination: float, curvature: float) -> str:
+def classify_writing_style(binary: np.ndarray, inclination: float, curvature: float,
+                           contours: Optional[list] = None) -> str:
     """Classifica lo stile di scrittura"""
     try:
         # Calcola alcuni parametri di stile
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if contours is None:
+            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         if not contours:
             return "Sconosciuto"
@@ -236,11 +228,13 @@ def classify_writing_style(binary: np.ndarray, inclination: float, curvature: fl
     except Exception:
         return "Sconosciuto"
 
-def assess_readability(binary: np.ndarray, pixels_per_mm: float) -> str:
+def assess_readability(binary: np.ndarray, pixels_per_mm: float, components: Optional[tuple] = None) -> str:
     """Valuta la leggibilità"""
     try:
         # Conta componenti connessi
-        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary)
+        if components is None:
+            components = cv2.connectedComponentsWithStats(binary)
+        num_labels, labels, stats, centroids = components
         
         if num_labels < 2:
             return "Bassa"
@@ -266,11 +260,12 @@ def assess_readability(binary: np.ndarray, pixels_per_mm: float) -> str:
     except Exception:
         return "Media"
 
-def analyze_loops(binary: np.ndarray, pixels_per_mm: float) -> float:
+def analyze_loops(binary: np.ndarray, pixels_per_mm: float, contours: Optional[list] = None) -> float:
     """Analizza le asole (loop chiusi)"""
     try:
-        # Trova contorni
-        contours, _ = cv2.findContours(binary, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        # Trova contorni (tutti, anche interni: RETR_LIST)
+        if contours is None:
+            contours, _ = cv2.findContours(binary, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
         
         loop_areas = []
         for contour in contours:
@@ -291,29 +286,86 @@ def analyze_loops(binary: np.ndarray, pixels_per_mm: float) -> float:
     except Exception:
         return 0.0
 
-def calculate_spacing(binary: np.ndarray, pixels_per_mm: float) -> float:
-    """Calcola la spaziatura media"""
+def writing_direction_order(points: np.ndarray) -> np.ndarray:
+    """
+    Ordina i punti (centroidi) lungo la direzione di scrittura
+    
+    La direzione è l'asse principale della distribuzione dei punti (autovettore della
+    covarianza con autovalore massimo), orientato da sinistra a destra
+    
+    Returns:
+        Indici dei punti ordinati per proiezione sull'asse di scrittura
+    """
+    if len(points) < 2:
+        return np.arange(len(points))
+    
+    centered = points - points.mean(axis=0)
+    covariance = centered.T @ centered
+    _, eigenvectors = np.linalg.eigh(covariance)
+    direction = eigenvectors[:, -1]
+    if direction[0] < 0:
+        direction = -direction
+    return np.argsort(centered @ direction, kind='stable')
+
+def neighbor_gaps(points: np.ndarray) -> np.ndarray:
+    """Distanze tra punti consecutivi lungo la direzione di scrittura (O(n log n))"""
+    ordered = points[writing_direction_order(points)]
+    return np.linalg.norm(np.diff(ordered, axis=0), axis=1)
+
+def mean_pairwise_distance(points: np.ndarray, block_size: int = 256) -> float:
+    """
+    Media delle distanze euclidee tra tutte le coppie di punti
+    
+    Il calcolo è vettorizzato a blocchi di righe per limitare la memoria:
+    resta quadratico nel numero di punti, ma senza cicli Python per coppia
+    """
+    n = len(points)
+    if n < 2:
+        return 0.0
+    
+    total = 0.0
+    for start in range(0, n - 1, block_size):
+        block = points[start:start + block_size]
+        delta = block[:, None, :] - points[None, start:, :]
+        distances = np.sqrt(np.einsum('ijk,ijk->ij', delta, delta))
+        # Solo le coppie (i, j) con j > i
+        total += float(np.sum(np.triu(distances, k=1)))
+    return total / (n * (n - 1) / 2)
+
+def calculate_spacing(binary: np.ndarray, pixels_per_mm: float, components: Optional[tuple] = None,
+                      method: str = "all_pairs") -> float:
+    """
+    Calcola la spaziatura media tra le componenti connesse
+    
+    Args:
+        binary: Immagine binaria della firma
+        pixels_per_mm: Fattore di calibrazione
+        components: Risultato di cv2.connectedComponentsWithStats (opzionale)
+        method: "all_pairs" = distanza media tra tutte le coppie di centroidi (la metrica
+            di avgSpacing, su cui sono tarate la velocità e i testi dei report; vettorizzata
+            a blocchi); "neighbors" = distanza media tra componenti consecutive lungo la
+            direzione di scrittura (tempo quasi lineare, valori circa 3 volte più piccoli)
+        
+    Returns:
+        Spaziatura media in mm
+    """
     try:
         # Trova componenti connessi
-        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary)
+        if components is None:
+            components = cv2.connectedComponentsWithStats(binary)
+        num_labels, labels, stats, centroids = components
         
         if num_labels < 3:  # Almeno 2 componenti + background
             return 0.0
         
-        # Calcola distanze tra centroidi
+        # Distanze tra centroidi
         valid_centroids = centroids[1:]  # Esclude background
-        distances = []
-        
-        for i in range(len(valid_centroids)):
-            for j in range(i+1, len(valid_centroids)):
-                dist = np.linalg.norm(valid_centroids[i] - valid_centroids[j])
-                distances.append(dist)
-        
-        if not distances:
-            return 0.0
+        if method == "neighbors":
+            avg_spacing_pixels = float(np.mean(neighbor_gaps(valid_centroids)))
+        else:
+            avg_spacing_pixels = mean_pairwise_distance(valid_centroids)
         
         # Converte in mm
-        avg_spacing_pixels = np.mean(distances)
         return float(avg_spacing_pixels / pixels_per_mm)
         
     except Exception:
@@ -364,39 +416,30 @@ def calculate_overlap_ratio(binary: np.ndarray) -> float:
     except Exception:
         return 0.0
 
-def count_letter_connections(binary: np.ndarray) -> int:
-    """Conta le connessioni tra lettere"""
+def count_letter_connections(binary: np.ndarray, skeleton: Optional[np.ndarray] = None) -> int:
+    """Conta le connessioni tra lettere (lo scheletro, se non fornito, è calcolato qui)"""
+    if skeleton is None:
+        skeleton = compute_skeleton(binary)
+    return count_skeleton_junctions(skeleton)
+
+def count_skeleton_junctions(skeleton: Optional[np.ndarray]) -> int:
+    """Connessioni tra lettere di uno scheletro già calcolato (0 se il thinning non è disponibile)"""
+    if skeleton is None:
+        return 0
     try:
-        # Applica thinning per ottenere lo scheletro
-        skeleton = cv2.ximgproc.thinning(binary)
-        
-        # Trova punti di giunzione (punti con più di 2 vicini)
-        kernel = np.ones((3,3), np.uint8)
-        
-        connections = 0
-        h, w = skeleton.shape
-        
-        for y in range(1, h-1):
-            for x in range(1, w-1):
-                if skeleton[y,x] > 0:
-                    # Conta i vicini
-                    neighborhood = skeleton[y-1:y+2, x-1:x+2]
-                    neighbor_count = np.sum(neighborhood > 0) - 1  # Esclude il punto centrale
-                    
-                    # Se ha più di 2 vicini, è un punto di giunzione
-                    if neighbor_count > 2:
-                        connections += 1
-        
-        return connections
+        # Punti di giunzione: pixel dello scheletro con più di 2 vicini
+        return int(np.count_nonzero(skeleton_junctions(skeleton)))
         
     except Exception:
         return 0
 
-def calculate_baseline_deviation(binary: np.ndarray, pixels_per_mm: float) -> float:
+def calculate_baseline_deviation(binary: np.ndarray, pixels_per_mm: float, components: Optional[tuple] = None) -> float:
     """Calcola la deviazione della baseline"""
     try:
         # Trova componenti connessi
-        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary)
+        if components is None:
+            components = cv2.connectedComponentsWithStats(binary)
+        num_labels, labels, stats, centroids = components
         
         if num_labels < 3:
             return 0.0
@@ -414,11 +457,13 @@ def calculate_baseline_deviation(binary: np.ndarray, pixels_per_mm: float) -> fl
     except Exception:
         return 0.0
 
-def calculate_connected_components(binary: np.ndarray) -> int:
+def calculate_connected_components(binary: np.ndarray, components: Optional[tuple] = None) -> int:
     """Calcola il numero di componenti connesse nella firma"""
     try:
         # Trova componenti connesse
-        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary)
+        if components is None:
+            components = cv2.connectedComponentsWithStats(binary)
+        num_labels, labels, stats, centroids = components
         
         # Sottrae 1 per escludere il background
         valid_components = 0
@@ -432,11 +477,12 @@ def calculate_connected_components(binary: np.ndarray) -> int:
     except Exception:
         return 1
 
-def calculate_stroke_complexity(binary: np.ndarray, pixels_per_mm: float) -> float:
+def calculate_stroke_complexity(binary: np.ndarray, pixels_per_mm: float, contours: Optional[list] = None) -> float:
     """Calcola la complessità del tratto basata su contorni e curvature"""
     try:
         # Trova contorni
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if contours is None:
+            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         if not contours:
             return 0.0
         
@@ -468,10 +514,114 @@ def calculate_stroke_complexity(binary: np.ndarray, pixels_per_mm: float) -> flo
     except Exception:
         return 0.0
 
+# === REGISTRO DEI PARAMETRI ===
+# Ogni parametro dichiara gli intermedi da cui dipende: l'esecutore calcola ciascun
+# intermedio una sola volta e solo se serve ai parametri richiesti
+ADVANCED_FEATURES = FeatureGraph(inputs=("gray", "binary", "real_width_mm", "real_height_mm", "pixels_per_mm"))
+
+# None (thinning non disponibile senza opencv-contrib) è anch'esso un risultato condiviso:
+# i parametri che usano lo scheletro non ritentano il calcolo
+ADVANCED_FEATURES.intermediate("skeleton", "binary")(compute_skeleton)
+
+@ADVANCED_FEATURES.intermediate("components", "binary")
+def _components(binary: np.ndarray) -> tuple:
+    # (num_labels, labels, stats, centroids)
+    return cv2.connectedComponentsWithStats(binary)
+
+@ADVANCED_FEATURES.intermediate("contours", "binary")
+def _external_contours(binary: np.ndarray) -> list:
+    return cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+
+@ADVANCED_FEATURES.intermediate("all_contours", "binary")
+def _all_contours(binary: np.ndarray) -> list:
+    return cv2.findContours(binary, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)[0]
+
+@ADVANCED_FEATURES.intermediate("pressure", "gray", "binary")
+def _pressure(gray: np.ndarray, binary: np.ndarray) -> Tuple[float, float]:
+    return analyze_pressure(gray, binary)
+
+# 1. Proporzione geometrica
+@ADVANCED_FEATURES.feature("proportion", "real_width_mm", "real_height_mm")
+def _feature_proportion(real_width_mm: float, real_height_mm: float) -> float:
+    return float(real_height_mm / real_width_mm)
+
+# 2. Inclinazione media
+@ADVANCED_FEATURES.feature("inclination", "binary", "contours")
+def _feature_inclination(binary: np.ndarray, contours: list) -> float:
+    return float(calculate_inclination(binary, contours))
+
+# 3. Analisi pressione (da intensità pixel)
+@ADVANCED_FEATURES.feature("pressureMean", "pressure")
+def _feature_pressure_mean(pressure: Tuple[float, float]) -> float:
+    return float(pressure[0])
+
+@ADVANCED_FEATURES.feature("pressureStd", "pressure")
+def _feature_pressure_std(pressure: Tuple[float, float]) -> float:
+    return float(pressure[1])
+
+# 4. Curvatura media
+@ADVANCED_FEATURES.feature("avgCurvature", "pixels_per_mm", "skeleton")
+def _feature_curvature(pixels_per_mm: float, skeleton: Optional[np.ndarray]) -> float:
+    return float(skeleton_curvature(skeleton, pixels_per_mm))
+
+# 5. Stile di scrittura
+@ADVANCED_FEATURES.feature("writingStyle", "binary", "inclination", "avgCurvature", "contours")
+def _feature_writing_style(binary: np.ndarray, inclination: float, curvature: float, contours: list) -> str:
+    return classify_writing_style(binary, inclination, curvature, contours)
+
+# 6. Leggibilità
+@ADVANCED_FEATURES.feature("readability", "binary", "pixels_per_mm", "components")
+def _feature_readability(binary: np.ndarray, pixels_per_mm: float, components: tuple) -> str:
+    return assess_readability(binary, pixels_per_mm, components)
+
+# 7. Analisi delle asole
+@ADVANCED_FEATURES.feature("avgAsolaSize", "binary", "pixels_per_mm", "all_contours")
+def _feature_asola_size(binary: np.ndarray, pixels_per_mm: float, all_contours: list) -> float:
+    return float(analyze_loops(binary, pixels_per_mm, all_contours))
+
+# 8. Spaziatura media
+@ADVANCED_FEATURES.feature("avgSpacing", "binary", "pixels_per_mm", "components")
+def _feature_spacing(binary: np.ndarray, pixels_per_mm: float, components: tuple) -> float:
+    return float(calculate_spacing(binary, pixels_per_mm, components))
+
+# 9. Velocità di esecuzione
+@ADVANCED_FEATURES.feature("velocity", "binary", "avgSpacing", "avgCurvature")
+def _feature_velocity(binary: np.ndarray, spacing: float, curvature: float) -> float:
+    return float(estimate_writing_velocity(binary, spacing, curvature))
+
+# 10. Sovrapposizione tratti
+@ADVANCED_FEATURES.feature("overlapRatio", "binary")
+def _feature_overlap_ratio(binary: np.ndarray) -> float:
+    return float(calculate_overlap_ratio(binary))
+
+# 11. Connessioni tra lettere
+@ADVANCED_FEATURES.feature("letterConnections", "skeleton")
+def _feature_letter_connections(skeleton: Optional[np.ndarray]) -> int:
+    return int(count_skeleton_junctions(skeleton))
+
+# 12. Deviazione baseline
+@ADVANCED_FEATURES.feature("baselineStdMm", "binary", "pixels_per_mm", "components")
+def _feature_baseline_std(binary: np.ndarray, pixels_per_mm: float, components: tuple) -> float:
+    return float(calculate_baseline_deviation(binary, pixels_per_mm, components))
+
+# 13. Componenti connesse
+@ADVANCED_FEATURES.feature("connectedComponents", "binary", "components")
+def _feature_connected_components(binary: np.ndarray, components: tuple) -> int:
+    return int(calculate_connected_components(binary, components))
+
+# 14. Complessità del tratto
+@ADVANCED_FEATURES.feature("strokeComplexity", "binary", "pixels_per_mm", "contours")
+def _feature_stroke_complexity(binary: np.ndarray, pixels_per_mm: float, contours: list) -> float:
+    return float(calculate_stroke_complexity(binary, pixels_per_mm, contours))
+
 def main():
     """Funzione principale CLI"""
-    if len(sys.argv) != 5:
-        print("Uso: python3 advanced_signature_analyzer.py analyze <image_path> <width_mm> <height_mm>")
+    # Sottoinsieme opzionale di parametri: --features inclination,pressureMean
+    features = None
+    if len(sys.argv) == 7 and sys.argv[5] == "--features":
+        features = [name.strip() for name in sys.argv[6].split(",") if name.strip()]
+    elif len(sys.argv) != 5:
+        print("Uso: python3 advanced_signature_analyzer.py analyze <image_path> <width_mm> <height_mm> [--features <nome,nome,...>]")
         sys.exit(1)
     
     command = sys.argv[1]
@@ -488,7 +638,7 @@ def main():
         sys.exit(1)
     
     # Analizza la firma
-    result = analyze_signature(image_path, width_mm, height_mm)
+    result = analyze_signature(image_path, width_mm, height_mm, features)
     
     # Output JSON per Node.js
     print(json.dumps(result, indent=2))
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+"""
+Moduli Python del server (motore dei parametri, cache, servizio di analisi)
+Gli script in questa directory li importano direttamente; dalla radice del progetto
+sono importabili come package (es. from server.feature_engine import FeatureGraph)
+"""
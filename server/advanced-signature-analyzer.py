@@ -6,6 +6,9 @@ Advanced Signature Analyzer - Modulo di integrazione per GrapholexInsight
 Adattato da firma_analyzer.py originale per l'uso in un'applicazione web
 """
 
+import time
+_IMPORT_START = time.perf_counter()
+
 import cv2
 import numpy as np
 import os
@@ -13,25 +16,131 @@ import math
 import json
 import sys
 import tempfile
+import importlib
+import inspect
 from datetime import datetime
+from functools import cached_property
 import base64
-import io
 from io import BytesIO
-from skimage.metrics import structural_similarity as ssim
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-from docx import Document
-from PIL import Image
-import PyPDF2
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as ReportlabImage, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch, cm
+import compatibility_engine
+import contour_kernels
+import feature_engine
+import reference_profiles
+import signature_features
+from feature_store import FeatureStore
+from parameter_schema import normalize_parameters
+from signature_features import SignatureFeatures
+from feature_cache import FeatureCache, DEFAULT_MAX_BYTES, DEFAULT_TTL_SECONDS, ensure_private_directory, hash_bytes, source_fingerprint
+from compatibility_engine import KEY_PARAMETERS
+from ssim_backends import DEFAULT_BACKEND as DEFAULT_SSIM_BACKEND, get_ssim_backend
+from chart_renderers import DEFAULT_RENDERER as DEFAULT_CHART_RENDERER, NATURALNESS_LABELS, comparison_chart_data, get_chart_renderer, naturalness_chart_data
+from chart_cache import DEFAULT_CHART_DISK_MAX_BYTES, DEFAULT_CHART_ENTRIES, ChartCache, normalize_series
+
+# Solo cv2 e numpy servono all'analisi: matplotlib, skimage e reportlab vengono
+# importati nei percorsi che li usano (grafici, SSIM con backend skimage, report PDF)
+_CORE_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+# Backend senza GUI: matplotlib non deve mai cercare un display
+os.environ['MPLBACKEND'] = 'Agg'
+
+# Moduli del report PDF, caricati su richiesta
+REPORT_MODULES = ["PIL.Image", "reportlab.platypus", "reportlab.lib.styles", "reportlab.lib.colors"]
 
 # DPI di default se non specificato
 DEFAULT_DPI = 300
 
+# Formato dei grafici nei risultati dei confronti: "png" (immagini base64 in comparison_chart
+# e naturalness_chart) oppure "data" (serie strutturate in comparison_chart_data e
+# naturalness_chart_data, disegnate dal client: nessun PNG nel percorso interattivo)
+CHART_OUTPUTS = ("png", "data")
+DEFAULT_CHART_OUTPUT = "png"
+
+def backend_modules(label, lookup, fallback):
+    """
+    Moduli del backend configurato, risolti solo quando servono: un nome non valido
+    nella variabile d'ambiente non deve impedire l'import del modulo né l'avvio del worker
+
+    Args:
+        label: Nome del gruppo per il log
+        lookup: Funzione che restituisce il backend (get_ssim_backend, ...)
+        fallback: Nome del backend di default da usare se quello configurato non esiste
+
+    Returns:
+        Lista dei nomi dei moduli
+    """
+    try:
+        return list(lookup().modules)
+    except ValueError as e:
+        print(f"[STARTUP] {label}: {str(e)} - uso {fallback}", file=sys.stderr)
+        return list(lookup(fallback).modules)
+
+def lazy_import_groups():
+    """
+    Moduli caricati su richiesta, raggruppati per percorso di codice
+    (SSIM: solo con il backend skimage, vedi SIGNATURE_SSIM_BACKEND; grafici: moduli del
+    renderer di SIGNATURE_CHART_RENDERER)
+
+    Returns:
+        Lista di coppie (etichetta, moduli), senza i gruppi vuoti
+    """
+    groups = [
+        ("SSIM", backend_modules("SSIM", get_ssim_backend, DEFAULT_SSIM_BACKEND)),
+        ("Grafici", backend_modules("Grafici", get_chart_renderer, DEFAULT_CHART_RENDERER)),
+        ("Report PDF", REPORT_MODULES),
+    ]
+    return [(label, modules) for label, modules in groups if modules]
+
+def warm_up_worker():
+    """
+    Importa in anticipo i moduli caricati su richiesta, così i processi worker
+    persistenti non pagano l'import alla prima richiesta di confronto o report
+    """
+    for _, modules in lazy_import_groups():
+        for module in modules:
+            importlib.import_module(module)
+
+def print_startup_profile():
+    """
+    Stampa su stderr la ripartizione dei tempi di import (--startup-profile):
+    import di base usati da ogni analisi e costo di ciascun gruppo caricato su richiesta
+    """
+    print(f"[STARTUP] Import di base (cv2, numpy): {_CORE_IMPORT_SECONDS * 1000:.1f} ms", file=sys.stderr)
+    total = _CORE_IMPORT_SECONDS
+    for label, modules in lazy_import_groups():
+        start = time.perf_counter()
+        for module in modules:
+            importlib.import_module(module)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        print(f"[STARTUP] {label} ({', '.join(modules)}): {elapsed * 1000:.1f} ms", file=sys.stderr)
+    print(f"[STARTUP] Totale con tutti i moduli: {total * 1000:.1f} ms", file=sys.stderr)
+
+def start_command_profile(label):
+    """
+    Profilo di un avvio a freddo reale (--startup-profile su analyze / --analyze-dimensions):
+    stampa subito su stderr gli import di base e il caricamento del modulo, poi all'uscita
+    del processo il tempo del comando e i moduli caricati su richiesta durante l'esecuzione
+    
+    Args:
+        label: Nome del comando per il log
+    """
+    import atexit
+    
+    loaded_before = set(sys.modules)
+    start = time.perf_counter()
+    print(f"[STARTUP] Import di base (cv2, numpy): {_CORE_IMPORT_SECONDS * 1000:.1f} ms", file=sys.stderr)
+    print(f"[STARTUP] Caricamento del modulo: {(start - _IMPORT_START) * 1000:.1f} ms", file=sys.stderr)
+    
+    def report():
+        end = time.perf_counter()
+        lazy = [module for _, modules in lazy_import_groups() for module in modules
+                if module in sys.modules and module not in loaded_before]
+        print(f"[STARTUP] Comando {label}: {(end - start) * 1000:.1f} ms", file=sys.stderr)
+        print(f"[STARTUP] Moduli caricati su richiesta dal comando: {', '.join(lazy) or 'nessuno'}", file=sys.stderr)
+        print(f"[STARTUP] Totale (import + comando): {(end - _IMPORT_START) * 1000:.1f} ms", file=sys.stderr)
+    
+    atexit.register(report)
+
 def pixels_to_mm(pixels, dpi=DEFAULT_DPI):
     """
     Converte i pixel in millimetri basandosi sul DPI
@@ -121,20 +230,70 @@ def preprocess_image(image, resize=True):
     _, thresh = cv2.threshold(image, 150, 255, cv2.THRESH_BINARY_INV)
     return thresh
 
+class SignatureImageContext:
+    """
+    Immagine di una firma letta e decodificata una sola volta, con gli intermedi
+    (sogliature, contorni, gerarchia) calcolati solo quando servono e poi riutilizzati
+    da tutte le fasi: hash per la cache, SSIM, analisi dei parametri e report PDF
+    """
+    
+    def __init__(self, image_path, data=None):
+        self.image_path = image_path
+        self._data = data
+    
+    @property
+    def data(self):
+        """Byte del file immagine, letti una sola volta (None se non leggibile)"""
+        if self._data is None:
+            try:
+                with open(self.image_path, 'rb') as f:
+                    self._data = f.read()
+            except OSError:
+                self._data = b''
+        return self._data or None
+    
+    @cached_property
+    def gray(self):
+        """Immagine in scala di grigi, equivalente a cv2.imread(path, cv2.IMREAD_GRAYSCALE)"""
+        if not self.data:
+            return None
+        return cv2.imdecode(np.frombuffer(self.data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    
+    @cached_property
+    def processed(self):
+        """Immagine binaria ridimensionata a 300x150 (SSIM e parametri)"""
+        return preprocess_image(self.gray, resize=True)
+    
+    @cached_property
+    def processed_original(self):
+        """Immagine binaria alla risoluzione originale (dimensioni reali)"""
+        return preprocess_image(self.gray, resize=False)
+    
+    @cached_property
+    def contours(self):
+        """Contorni esterni dell'immagine ridimensionata"""
+        return cv2.findContours(self.processed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+    
+    @cached_property
+    def contours_original(self):
+        """Contorni esterni dell'immagine originale"""
+        return cv2.findContours(self.processed_original, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+    
+    @cached_property
+    def contour_tree(self):
+        """Tupla (contorni, gerarchia) RETR_TREE dell'immagine ridimensionata"""
+        return cv2.findContours(self.processed, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    
+    @cached_property
+    def file_size(self):
+        """Dimensioni (larghezza, altezza) dichiarate nel file, come le legge PIL"""
+        from PIL import Image
+        with Image.open(BytesIO(self.data)) as img:
+            return img.size
+
 def calculate_curvature(contour):
     """Calcola la curvatura del contorno di una firma"""
-    angles = []
-    for i in range(2, len(contour)):
-        pt1 = contour[i - 2][0]
-        pt2 = contour[i - 1][0]
-        pt3 = contour[i][0]
-        v1 = pt1 - pt2
-        v2 = pt3 - pt2
-        angle = math.degrees(math.acos(
-            np.clip(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-5), -1.0, 1.0)
-        ))
-        angles.append(angle)
-    return np.mean(angles) if angles else 0
+    return contour_kernels.mean_turning_angle_degrees(contour)
 
 def calculate_circularity(cnt):
     """Calcola la circolarità di un contorno"""
@@ -144,155 +303,205 @@ def calculate_circularity(cnt):
         return 0
     return 4 * math.pi * area / (perimeter ** 2)
 
-def calculate_signature_inclination(contours):
+# Numero di classi dell'istogramma delle direzioni dei tratti (diagnostica), tra -45° e +45°
+INCLINATION_HISTOGRAM_BINS = 18
+
+def _segment_direction_means(contours):
     """
-    Calcola l'inclinazione della firma rispetto alla verticale
+    Direzione media dei tratti di ogni contorno (metodo 3 dell'inclinazione)
+    
+    Per ogni contorno si campionano fino a ~20 segmenti equidistanti p[i] -> p[i+step];
+    gli angoli rispetto alla verticale dei segmenti non troppo corti vengono filtrati
+    attorno alla mediana del contorno (±20°) e mediati. Il calcolo è vettorizzato su
+    tutti i contorni insieme
+    
+    Returns:
+        Tupla (medie per contorno, angoli di tutti i segmenti validi)
+    """
+    if not contours:
+        return np.empty(0), np.empty(0)
+    
+    points = np.concatenate([contour.reshape(-1, 2) for contour in contours])
+    lengths = np.array([len(contour) for contour in contours])
+    offsets = np.cumsum(lengths) - lengths
+    steps = np.maximum(1, lengths // 20)
+    samples = -(-(lengths - steps) // steps)  # len(range(0, n - step, step))
+    
+    owner = np.repeat(np.arange(len(contours)), samples)
+    sample_index = np.arange(owner.size) - np.repeat(np.cumsum(samples) - samples, samples)
+    starts = offsets[owner] + sample_index * steps[owner]
+    delta = points[starts + steps[owner]] - points[starts]
+    dx, dy = delta[:, 0], delta[:, 1]
+    
+    # Evita segmenti troppo piccoli; angolo rispetto alla verticale limitato a ±45°
+    long_enough = (np.abs(dx) > 2) | (np.abs(dy) > 2)
+    owner = owner[long_enough]
+    angles = np.clip(np.degrees(np.arctan2(dx[long_enough], dy[long_enough])), -45, 45)
+    
+    # Mediana per contorno: np.median non ha una forma per gruppi, quindi si ordina per
+    # (contorno, angolo) e si prende la media dei due elementi centrali di ogni gruppo,
+    # che è esattamente il valore calcolato da np.median su ciascun contorno
+    order = np.lexsort((angles, owner))
+    sorted_angles = angles[order]
+    counts = np.bincount(owner, minlength=len(contours))
+    present = np.nonzero(counts)[0]
+    group_starts = (np.cumsum(counts) - counts)[present]
+    group_counts = counts[present]
+    lower = sorted_angles[group_starts + (group_counts - 1) // 2]
+    upper = sorted_angles[group_starts + group_counts // 2]
+    medians = np.zeros(len(contours))
+    medians[present] = (lower + upper) / 2
+    
+    # Filtra le direzioni vicine alla mediana e ne calcola la media
+    near = np.abs(angles - medians[owner]) < 20
+    near_counts = np.bincount(owner[near], minlength=len(contours))
+    near_sums = np.bincount(owner[near], weights=angles[near], minlength=len(contours))
+    valid = near_counts > 0
+    return near_sums[valid] / near_counts[valid], angles
+
+def estimate_signature_inclination(contours):
+    """
+    Stima l'inclinazione della firma rispetto alla verticale con tre metodi
+    (PCA dei punti, rettangoli di area minima, direzione dei tratti) e ne restituisce
+    la mediana robusta insieme ai valori dei singoli metodi
+    
+    I contorni sono filtrati una sola volta (area calcolata una volta per contorno)
+    e i punti raccolti in un unico array
     
     Args:
         contours: Lista dei contorni della firma
         
     Returns:
-        Angolo di inclinazione in gradi (-45 a +45, dove 0=verticale, +15=inclinata destra)
+        Tupla (inclinazione in gradi, diagnostica per metodo)
     """
-    print(f"[INCLINATION-DEBUG] Funzione chiamata con {len(contours) if contours else 0} contorni", file=sys.stderr)
-    
+    diagnostics = {
+        'pca': None,
+        'min_area_rect': [],
+        'segment_directions': [],
+        'direction_histogram': [],
+        'measurements': 0,
+        'valid_measurements': 0
+    }
     if not contours:
-        print("[INCLINATION-DEBUG] Nessun contorno fornito, ritorno 0.0", file=sys.stderr)
-        return 0.0
+        return 0.0, diagnostics
+    
+    # Filtro unico: numero di punti e area di ogni contorno
+    lengths = np.array([len(contour) for contour in contours])
+    areas = np.array([cv2.contourArea(contour) for contour in contours])
     
     inclinations = []
     
     # Metodo 1: Analisi orientamento principale usando Principal Component Analysis
     try:
-        # Combina tutti i punti dei contorni principali
-        all_points = []
-        for contour in contours:
-            if len(contour) >= 5 and cv2.contourArea(contour) > 50:  # Solo contorni significativi
-                points = contour.reshape(-1, 2)
-                all_points.extend(points)
-        
-        if len(all_points) > 20:
-            all_points = np.array(all_points, dtype=np.float32)
-            
-            # Normalizza i punti (centro in 0,0)
-            mean_point = np.mean(all_points, axis=0)
-            centered_points = all_points - mean_point
+        selected = np.nonzero((lengths >= 5) & (areas > 50))[0]
+        if lengths[selected].sum() > 20:
+            all_points = np.concatenate([contours[i].reshape(-1, 2) for i in selected]).astype(np.float32)
             
-            # PCA per trovare la direzione principale
+            # PCA per trovare la direzione principale (centro in 0,0)
+            centered_points = all_points - np.mean(all_points, axis=0)
             cov_matrix = np.cov(centered_points.T)
             eigenvalues, eigenvectors = np.linalg.eigh(cov_matrix)
-            
-            # Il primo eigenvector è la direzione principale
             principal_direction = eigenvectors[:, -1]  # Ultimo eigenvalue (maggiore)
             
-            # Calcola l'angolo rispetto alla verticale (asse Y)
-            # Angolo tra vettore principale e asse Y (0, 1)
-            vertical_vector = np.array([0, 1])
-            dot_product = np.dot(principal_direction, vertical_vector)
-            angle_rad = np.arccos(np.clip(dot_product, -1.0, 1.0))
-            angle_deg = np.degrees(angle_rad)
+            # Angolo tra vettore principale e asse Y (0, 1): 0° = verticale, positivo = inclinato a destra
+            angle_deg = np.degrees(np.arccos(np.clip(principal_direction[1], -1.0, 1.0)))
+            inclination = -angle_deg if principal_direction[0] < 0 else angle_deg
             
-            # Converti in inclinazione: 0° = verticale, positivo = inclinato a destra
-            if principal_direction[0] < 0:  # Inclinato a sinistra
-                inclination = -angle_deg
-            else:  # Inclinato a destra
-                inclination = angle_deg
-                
             # Limita tra -45° e +45°
             inclination = np.clip(inclination, -45, 45)
+            diagnostics['pca'] = float(inclination)
             inclinations.append(inclination)
-                
     except Exception as e:
         print(f"Errore PCA inclinazione: {e}", file=sys.stderr)
-        pass
     
     # Metodo 2: Analisi boundingRect inclinato per contorni principali
     try:
-        for contour in contours:
-            if len(contour) >= 5 and cv2.contourArea(contour) > 100:
-                rect = cv2.minAreaRect(contour)
-                angle = rect[2]  # Angolo della rotazione in gradi
-                
-                # minAreaRect restituisce angoli tra -90 e 0
-                # Convertiamo in inclinazione rispetto alla verticale
-                if angle < -45:
-                    inclination = angle + 90  # Da [-90,-45] a [0,45]
-                else:
-                    inclination = angle  # Da [-45,0] a [-45,0]
-                
-                # Limita il range
-                inclination = np.clip(inclination, -45, 45)
-                inclinations.append(inclination)
-                
+        selected = np.nonzero((lengths >= 5) & (areas > 100))[0]
+        if len(selected):
+            angles = np.array([cv2.minAreaRect(contours[i])[2] for i in selected])
+            # Angoli tra -90 e 0 convertiti in inclinazione rispetto alla verticale
+            rect_inclinations = np.clip(np.where(angles < -45, angles + 90, angles), -45, 45)
+            diagnostics['min_area_rect'] = rect_inclinations.tolist()
+            inclinations.extend(rect_inclinations)
     except Exception as e:
         print(f"Errore minAreaRect inclinazione: {e}", file=sys.stderr)
-        pass
     
     # Metodo 3: Analisi direzione tratti principali
     try:
-        for contour in contours:
-            if len(contour) >= 10 and cv2.contourArea(contour) > 50:
-                # Prendi punti equidistanti lungo il contorno
-                contour_points = contour.reshape(-1, 2)
-                if len(contour_points) >= 4:
-                    # Calcola direzioni tra punti consecutivi
-                    directions = []
-                    step = max(1, len(contour_points) // 20)  # Massimo 20 campioni
-                    
-                    for i in range(0, len(contour_points) - step, step):
-                        p1 = contour_points[i]
-                        p2 = contour_points[i + step]
-                        
-                        # Calcola angolo del segmento rispetto alla verticale
-                        dx = p2[0] - p1[0]
-                        dy = p2[1] - p1[1]
-                        
-                        if abs(dx) > 2 or abs(dy) > 2:  # Evita segmenti troppo piccoli
-                            angle_rad = np.arctan2(dx, dy)  # Rispetto alla verticale
-                            angle_deg = np.degrees(angle_rad)
-                            
-                            # Limita tra -45° e +45°
-                            angle_deg = np.clip(angle_deg, -45, 45)
-                            directions.append(angle_deg)
-                    
-                    if directions:
-                        # Media pesata delle direzioni (rimuovi outliers)
-                        directions = np.array(directions)
-                        median_dir = np.median(directions)
-                        
-                        # Filtra direzioni vicine alla mediana
-                        valid_directions = directions[np.abs(directions - median_dir) < 20]
-                        
-                        if len(valid_directions) > 0:
-                            inclinations.append(np.mean(valid_directions))
-                
+        selected = np.nonzero((lengths >= 10) & (areas > 50))[0]
+        direction_means, segment_angles = _segment_direction_means([contours[i] for i in selected])
+        diagnostics['segment_directions'] = direction_means.tolist()
+        bins = np.minimum(((segment_angles + 45) * (INCLINATION_HISTOGRAM_BINS / 90)).astype(np.int64), INCLINATION_HISTOGRAM_BINS - 1)
+        diagnostics['direction_histogram'] = np.bincount(bins, minlength=INCLINATION_HISTOGRAM_BINS).tolist()
+        inclinations.extend(direction_means)
     except Exception as e:
         print(f"Errore analisi direzioni: {e}", file=sys.stderr)
-        pass
     
     # Se abbiamo misurazioni, usa la mediana per robustezza
-    if inclinations:
-        inclinations = np.array(inclinations)
+    inclinations = np.array(inclinations, dtype=np.float64)
+    diagnostics['measurements'] = len(inclinations)
+    
+    # Filtra outliers estremi (oltre ±40° sono improbabili)
+    valid_inclinations = inclinations[np.abs(inclinations) <= 40]
+    diagnostics['valid_measurements'] = len(valid_inclinations)
+    if len(valid_inclinations) == 0:
+        # Fallback: scrittura verticale
+        return 0.0, diagnostics
+    
+    # Usa mediana per robustezza contro outliers, nel range corretto
+    return float(np.clip(np.median(valid_inclinations), -45, 45)), diagnostics
+
+def calculate_signature_inclination(contours):
+    """
+    Calcola l'inclinazione della firma rispetto alla verticale
+    
+    Args:
+        contours: Lista dei contorni della firma
         
-        # Filtra outliers estremi (oltre ±40° sono improbabili)
-        valid_inclinations = inclinations[np.abs(inclinations) <= 40]
+    Returns:
+        Angolo di inclinazione in gradi (-45 a +45, dove 0=verticale, +15=inclinata destra)
+    """
+    return estimate_signature_inclination(contours)[0]
+
+# Kernel dei filtri usati per individuare i punti di giunzione
+JUNCTION_NEIGHBORHOOD_KERNEL = np.ones((5, 5), dtype=np.float32)
+JUNCTION_HORIZONTAL_KERNEL = np.ones((1, 5), dtype=np.float32)
+JUNCTION_VERTICAL_KERNEL = np.ones((5, 1), dtype=np.float32)
+
+def count_junction_points(binary: np.ndarray, step: int = 3) -> int:
+    """
+    Conta i punti di giunzione: pixel attivi campionati ogni step pixel con un vicinato
+    5x5 denso (più di 12 pixel attivi) che non giacciono su una linea orizzontale o
+    verticale (meno di 4 pixel attivi nella riga e nella colonna di 5 pixel centrate)
+    
+    I conteggi dei vicinati sono calcolati per tutta l'immagine con cv2.filter2D
+    invece che pixel per pixel, poi campionati sulla stessa griglia
+    
+    Args:
+        binary: Immagine binaria della firma
+        step: Passo di campionamento della griglia
         
-        if len(valid_inclinations) > 0:
-            # Usa mediana per robustezza contro outliers
-            final_inclination = np.median(valid_inclinations)
-            
-            # Assicurati che sia nel range corretto
-            final_inclination = np.clip(final_inclination, -45, 45)
-            
-            print(f"[INCLINATION] Calcolate {len(inclinations)} misure, {len(valid_inclinations)} valide, risultato: {final_inclination:.1f}°", file=sys.stderr)
-            return float(final_inclination)
-        else:
-            print(f"[INCLINATION] Tutte le {len(inclinations)} misure sono outliers, uso fallback", file=sys.stderr)
-            return 0.0
+    Returns:
+        Numero di punti di giunzione
+    """
+    h, w = binary.shape
+    if h < 5 or w < 5:
+        return 0
     
-    # Fallback: scrittura verticale
-    print("[INCLINATION] Nessuna misura disponibile, uso fallback 0°", file=sys.stderr)
-    return 0.0  # Scrittura verticale
+    active = (binary > 0).astype(np.float32)
+    neighborhood = cv2.filter2D(active, -1, JUNCTION_NEIGHBORHOOD_KERNEL, borderType=cv2.BORDER_CONSTANT)
+    horizontal_line = cv2.filter2D(active, -1, JUNCTION_HORIZONTAL_KERNEL, borderType=cv2.BORDER_CONSTANT)
+    vertical_line = cv2.filter2D(active, -1, JUNCTION_VERTICAL_KERNEL, borderType=cv2.BORDER_CONSTANT)
+    
+    # Griglia di campionamento: pixel (y, x) con y, x = 2, 2+step, ... < dimensione-2
+    grid = (slice(2, h - 2, step), slice(2, w - 2, step))
+    junctions = (
+        (active[grid] > 0)
+        & (neighborhood[grid] > 12)
+        & (horizontal_line[grid] < 4)
+        & (vertical_line[grid] < 4)
+    )
+    return int(np.count_nonzero(junctions))
 
 def count_letter_connections(binary: np.ndarray) -> int:
     """Conta le connessioni tra lettere usando algoritmi alternativi"""
@@ -326,27 +535,7 @@ def count_letter_connections(binary: np.ndarray) -> int:
                     connections += int(complexity_ratio / 4.0)
         
         # Conta anche i punti di curvatura estrema come indicatori di connessioni
-        h, w = binary.shape
-        junction_points = 0
-        
-        for y in range(2, h-2, 3):  # Campiona ogni 3 pixel per efficienza
-            for x in range(2, w-2, 3):
-                if binary[y,x] > 0:
-                    # Analizza il vicinato 5x5 per trovare pattern di connessione
-                    neighborhood = binary[y-2:y+3, x-2:x+3]
-                    
-                    # Conta i pixel attivi nel vicinato
-                    active_pixels = np.sum(neighborhood > 0)
-                    
-                    # Se ci sono molti pixel attivi in un'area piccola, potrebbe essere una connessione
-                    if active_pixels > 12:  # Soglia per area densa
-                        # Verifica che non sia solo una linea dritta
-                        horizontal_line = np.sum(binary[y, x-2:x+3] > 0)
-                        vertical_line = np.sum(binary[y-2:y+3, x] > 0)
-                        
-                        # Se non è una linea dritta, potrebbe essere una connessione complessa
-                        if horizontal_line < 4 and vertical_line < 4:
-                            junction_points += 1
+        junction_points = count_junction_points(binary)
         
         # Combina i due metodi per un risultato più accurato
         total_connections = connections + min(junction_points // 3, 10)  # Normalizza i junction points
@@ -366,183 +555,149 @@ def analyze_signature_deprecated_dpi_removed():
     """
     return {"error": "Funzione rimossa - utilizzare analyze_signature_with_dimensions con dimensioni reali"}
 
-def create_naturalness_chart(verifica_data, comp_data):
+def render_chart(kind, series, chart_renderer=None):
     """
-    Crea un grafico specifico per i parametri di naturalezza (anti-dissimulazione)
-    
+    PNG di un grafico dalle sue serie, passando per la cache dei grafici (get_chart_cache):
+    le serie sono arrotondate alla precisione di visualizzazione, così lo stesso grafico
+    richiesto dal confronto e poi dal report viene renderizzato una sola volta
+
+    Args:
+        kind: "comparison" o "naturalness"
+        series: Serie del grafico (comparison_chart_series / naturalness_chart_series)
+        chart_renderer: Renderer dei grafici, nome o istanza (default: SIGNATURE_CHART_RENDERER)
+
+    Returns:
+        Byte del PNG
+    """
+    renderer = get_chart_renderer(chart_renderer)
+    cache = get_chart_cache()
+    if cache is None:
+        return getattr(renderer, f"render_{kind}")(normalize_series(kind, series))
+    return cache.render(renderer, kind, series)
+
+def naturalness_chart_series(verifica_data, comp_data):
+    """
+    Serie del grafico di naturalezza (anti-dissimulazione)
+
     Args:
         verifica_data: Parametri della firma da verificare
         comp_data: Parametri della firma comparativa (riferimento)
-    
+
     Returns:
-        String base64 dell'immagine del grafico di naturalezza
+        Dizionario con parameters, labels, verifica_values e reference_values (liste vuote
+        se nessun parametro di naturalezza è presente in entrambe le firme)
+    """
+    # Parametri specifici per la naturalezza
+    naturalness_params = ['FluidityScore', 'PressureConsistency', 'CoordinationIndex']
+
+    series = {"parameters": [], "labels": [], "verifica_values": [], "reference_values": []}
+    for param in naturalness_params:
+        if param in verifica_data and param in comp_data:
+            series["parameters"].append(param)
+            series["labels"].append(NATURALNESS_LABELS.get(param, param))
+            series["verifica_values"].append(verifica_data[param])
+            series["reference_values"].append(comp_data[param])
+    return series
+
+def naturalness_chart_png(verifica_data, comp_data, chart_renderer=None):
+    """
+    Grafico di naturalezza come byte PNG (dalla cache dei grafici se già renderizzato)
+
+    Args:
+        verifica_data: Parametri della firma da verificare
+        comp_data: Parametri della firma comparativa (riferimento)
+        chart_renderer: Renderer dei grafici, nome o istanza (default: SIGNATURE_CHART_RENDERER)
+
+    Returns:
+        Byte del PNG (un'immagine con il messaggio di errore se il grafico non è disegnabile)
     """
+    renderer = get_chart_renderer(chart_renderer)
     try:
-        # Parametri specifici per la naturalezza
-        naturalness_params = ['FluidityScore', 'PressureConsistency', 'CoordinationIndex']
-        
-        # Estrai i valori per entrambe le firme
-        verifica_values = []
-        comp_values = []
-        labels = []
-        
-        for param in naturalness_params:
-            if param in verifica_data and param in comp_data:
-                verifica_values.append(verifica_data[param])
-                comp_values.append(comp_data[param])
-                
-                # Etichette personalizzate
-                if param == 'FluidityScore':
-                    labels.append('🧠 Fluidità')
-                elif param == 'PressureConsistency':
-                    labels.append('🔄 Consistenza')
-                elif param == 'CoordinationIndex':
-                    labels.append('🎯 Coordinazione')
-                else:
-                    labels.append(param)
-        
-        if not verifica_values or not comp_values:
-            # Crea un grafico vuoto se non ci sono dati
-            fig = Figure(figsize=(10, 6))
-            ax = fig.add_subplot(111)
-            ax.text(0.5, 0.5, 'Dati di naturalezza non disponibili', 
-                   ha='center', va='center', fontsize=16)
-            ax.set_xlim(0, 1)
-            ax.set_ylim(0, 1)
-            ax.axis('off')
-        else:
-            # Crea il grafico a barre per i parametri di naturalezza
-            fig = Figure(figsize=(12, 7))
-            ax = fig.add_subplot(111)
-            
-            x = np.arange(len(labels))
-            width = 0.35
-            
-            # Colori specifici per naturalezza
-            bars1 = ax.bar(x - width/2, verifica_values, width, 
-                          label='Firma in Verifica', color='#3b82f6', alpha=0.8)
-            bars2 = ax.bar(x + width/2, comp_values, width,
-                          label='Firma di Riferimento', color='#10b981', alpha=0.8)
-            
-            # Personalizzazione del grafico
-            ax.set_xlabel('Parametri di Naturalezza', fontweight='bold', fontsize=12)
-            ax.set_ylabel('Punteggio (%)', fontweight='bold', fontsize=12)
-            ax.set_title('🧠 Analisi Naturalezza (Anti-Dissimulazione)', fontweight='bold', fontsize=14)
-            ax.set_xticks(x)
-            ax.set_xticklabels(labels, fontsize=10)
-            ax.legend()
-            ax.grid(True, alpha=0.3, axis='y')
-            ax.set_ylim(0, 100)
-            
-            # Aggiungi valori sulle barre
-            def add_value_labels(bars):
-                for bar in bars:
-                    height = bar.get_height()
-                    ax.annotate(f'{height:.1f}%',
-                               xy=(bar.get_x() + bar.get_width() / 2, height),
-                               xytext=(0, 3),  # offset
-                               textcoords="offset points",
-                               ha='center', va='bottom', fontsize=9)
-            
-            add_value_labels(bars1)
-            add_value_labels(bars2)
-        
-        # Salva in buffer e converti in base64
-        buffer = io.BytesIO()
-        fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        
-        # Converti in base64
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        buffer.close()
-        
-        return image_base64
-        
+        return render_chart("naturalness", naturalness_chart_series(verifica_data, comp_data), renderer)
     except Exception as e:
         print(f"[ERROR] Errore nella creazione del grafico naturalezza: {str(e)}", file=sys.stderr)
         # Ritorna un grafico di errore
-        fig = Figure(figsize=(10, 6))
-        ax = fig.add_subplot(111)
-        ax.text(0.5, 0.5, f'Errore grafico naturalezza:\n{str(e)}', 
-               ha='center', va='center', fontsize=14, color='red')
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        buffer = io.BytesIO()
-        fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        buffer.close()
-        
-        return image_base64
+        return renderer.render_message(f'Errore grafico naturalezza:\n{str(e)}', error=True)
 
-def create_comparison_chart(verifica_data, comp_data, forensic_compatibilities=None):
+def create_naturalness_chart(verifica_data, comp_data, chart_renderer=None):
     """
-    Crea un grafico di confronto tra i parametri di due firme
-    
+    Crea un grafico specifico per i parametri di naturalezza (anti-dissimulazione)
+
     Args:
         verifica_data: Parametri della firma da verificare
-        comp_data: Parametri della firma di riferimento
+        comp_data: Parametri della firma comparativa (riferimento)
+        chart_renderer: Renderer dei grafici, nome o istanza (default: SIGNATURE_CHART_RENDERER)
+
+    Returns:
+        String base64 dell'immagine del grafico di naturalezza
+    """
+    return base64.b64encode(naturalness_chart_png(verifica_data, comp_data, chart_renderer)).decode('utf-8')
+
+def comparison_chart_series(verifica_data, comp_data, forensic_compatibilities=None):
+    """
+    Serie del grafico di confronto tra i parametri di due firme
+
+    Args:
+        verifica_data: Parametri della firma da verificare, con i nomi canonici (normalize_parameters)
+        comp_data: Parametri della firma di riferimento, con i nomi canonici
         forensic_compatibilities: Compatibilità forensi già calcolate (opzionale)
-        
+
     Returns:
-        Base64-encoded PNG immagine del grafico
+        Dizionario con parameters, labels (etichette delle barre con il valore della firma
+        in verifica), verifica_values, reference_values e compatibilities (%)
     """
-    # Normalizza le chiavi per compatibilità
-    verifica_data = normalize_parameter_keys(verifica_data)
-    comp_data = normalize_parameter_keys(comp_data)
     # LISTA COMPLETA DI TUTTI I PARAMETRI POSSIBILI (21+ parametri)
     parametri_numerici = [
         # Parametri Python avanzati (14 parametri principali)
         'Proportion', 'Inclination', 'PressureMean', 'PressureStd',
-        'AvgCurvature', 'Curvature', 'Readability', 
+        'AvgCurvature', 'Curvature', 'Readability',
         'AvgAsolaSize', 'AvgSpacing', 'Velocity',
         'OverlapRatio', 'LetterConnections', 'BaselineStd', 'BaselineStdMm',
-        
+
         # Parametri tradizionali aggiuntivi
         'StrokeWidth', 'StrokeComplexity', 'ConnectedComponents',
         'AspectRatio', 'Area', 'Perimeter',
-        
-        # Parametri dimensionali 
+
+        # Parametri dimensionali
         'Width', 'Height', 'DiagonalLength'
     ]
-    
+
     # Filtra solo i parametri che esistono effettivamente nei dati
     parametri_disponibili = []
     for param in parametri_numerici:
         if (param in verifica_data and isinstance(verifica_data.get(param), (int, float))) or \
            (param in comp_data and isinstance(comp_data.get(param), (int, float))):
             parametri_disponibili.append(param)
-    
+
     # Se abbiamo le dimensioni come array, aggiungiamole
     if 'Dimensions' in verifica_data and isinstance(verifica_data['Dimensions'], list):
         if len(verifica_data['Dimensions']) >= 2:
-            # Aggiungi larghezza e altezza come parametri separati
-            verifica_data['Width'] = verifica_data['Dimensions'][0]
-            verifica_data['Height'] = verifica_data['Dimensions'][1]
+            # Aggiungi larghezza e altezza come parametri separati (su una copia: i dati
+            # del chiamante non vengono modificati)
+            verifica_data = {**verifica_data, 'Width': verifica_data['Dimensions'][0], 'Height': verifica_data['Dimensions'][1]}
             parametri_disponibili.extend(['Width', 'Height'])
-    
+
     if 'Dimensions' in comp_data and isinstance(comp_data['Dimensions'], list):
         if len(comp_data['Dimensions']) >= 2:
-            comp_data['Width'] = comp_data['Dimensions'][0]
-            comp_data['Height'] = comp_data['Dimensions'][1]
-    
+            comp_data = {**comp_data, 'Width': comp_data['Dimensions'][0], 'Height': comp_data['Dimensions'][1]}
+
     # Usa i parametri disponibili
     parametri_numerici = parametri_disponibili
 
     differenze = []
     etichette = []
-    
+    valori_verifica = []
+    valori_riferimento = []
+
     for parametro in parametri_numerici:
         valore_v = verifica_data.get(parametro, 0)
         valore_c = comp_data.get(parametro, 0)
-        
+        valori_verifica.append(valore_v)
+        valori_riferimento.append(valore_c)
 
-        
         differenza = abs(valore_v - valore_c)
         differenze.append(differenza)
-        
+
         # Crea etichetta che mostra il valore per la firma da verificare
         if valore_v != 0:
             etichette.append(f"{parametro} {valore_v:.1f}")
@@ -551,7 +706,7 @@ def create_comparison_chart(verifica_data, comp_data, forensic_compatibilities=N
 
     # Calcola la compatibilità percentuale per ogni parametro
     compatibilita_percentuale = []
-    
+
     # === NUOVO: USA COMPATIBILITÀ FORENSI SE DISPONIBILI ===
     if forensic_compatibilities:
         print(f"[CHART] 🎯 Uso compatibilità forensi per il grafico: {len(forensic_compatibilities)} parametri", file=sys.stderr)
@@ -569,20 +724,20 @@ def create_comparison_chart(verifica_data, comp_data, forensic_compatibilities=N
         for i, diff in enumerate(differenze):
             valore_v = verifica_data.get(parametri_numerici[i], 0)
             valore_c = comp_data.get(parametri_numerici[i], 0)
-            
+
             # Se entrambi i valori sono 0, assegna 50% (nessun dato disponibile)
             if valore_v == 0 and valore_c == 0:
                 print(f"[WARNING] Parametro {parametri_numerici[i]} non trovato nei dati - valore_v: {valore_v}, valore_c: {valore_c}", file=sys.stderr)
                 compatibilita_percentuale.append(50)  # Compatibilità neutra per dati mancanti
                 continue
-                
+
             # USA LA STESSA LOGICA INTELLIGENTE DEL FRONTEND per la compatibilità
             parametro_nome = parametri_numerici[i]
-            
+
             # Per parametri con valori molto piccoli (es. asole), usa soglie assolute
             if parametro_nome in ['AvgAsolaSize', 'BaselineStdMm']:
                 if diff <= 0.05:
-                    compatibilita = 95  # Entrambi molto piccoli = alta compatibilità  
+                    compatibilita = 95  # Entrambi molto piccoli = alta compatibilità
                 elif diff <= 0.10:
                     compatibilita = 85
                 elif diff <= 0.20:
@@ -608,129 +763,99 @@ def create_comparison_chart(verifica_data, comp_data, forensic_compatibilities=N
                         compatibilita = 50
                     else:
                         compatibilita = max(0, 100 - diff_percentuale)
-                
+
             compatibilita_percentuale.append(compatibilita)
 
-    # Crea l'immagine del grafico - dimensioni più grandi per tutti i parametri
-    fig = Figure(figsize=(14, max(10, len(parametri_numerici) * 0.6)))
-    ax = fig.add_subplot(111)
-    
-    bars = ax.barh(etichette, compatibilita_percentuale, color='skyblue')
-    ax.set_xlabel('Compatibilità (%)')
-    ax.set_title('Grafico Compatibilità Parametri Firma')
-    ax.set_xlim(0, 100)
-    ax.grid(axis='x')
-    fig.tight_layout()
-    
-    # Aggiungi etichette con i valori
-    for i, bar in enumerate(bars):
-        ax.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2, 
-                f'{compatibilita_percentuale[i]:.1f}%', 
-                va='center')
-    
-    # Converti il grafico in base64 - DPI più alto per migliore qualità
-    buf = BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    
-    return img_base64
+    return {
+        "parameters": parametri_numerici,
+        "labels": etichette,
+        "verifica_values": valori_verifica,
+        "reference_values": valori_riferimento,
+        "compatibilities": compatibilita_percentuale,
+    }
 
-def normalize_parameter_keys(data):
+def comparison_chart_png(verifica_data, comp_data, forensic_compatibilities=None, chart_renderer=None):
     """
-    Normalizza le chiavi dei parametri per garantire compatibilità tra versioni database/Python
-    
+    Grafico di confronto come byte PNG (dalla cache dei grafici se già renderizzato)
+
     Args:
-        data: Dizionario con parametri della firma
-        
+        verifica_data: Parametri della firma da verificare, con i nomi canonici (normalize_parameters)
+        comp_data: Parametri della firma di riferimento, con i nomi canonici
+        forensic_compatibilities: Compatibilità forensi già calcolate (opzionale)
+        chart_renderer: Renderer dei grafici, nome o istanza (default: SIGNATURE_CHART_RENDERER)
+
+    Returns:
+        Byte del PNG
+    """
+    series = comparison_chart_series(verifica_data, comp_data, forensic_compatibilities)
+    return render_chart("comparison", series, chart_renderer)
+
+def create_comparison_chart(verifica_data, comp_data, forensic_compatibilities=None, chart_renderer=None):
+    """
+    Crea un grafico di confronto tra i parametri di due firme
+
+    Args:
+        verifica_data: Parametri della firma da verificare, con i nomi canonici (normalize_parameters)
+        comp_data: Parametri della firma di riferimento, con i nomi canonici
+        forensic_compatibilities: Compatibilità forensi già calcolate (opzionale)
+        chart_renderer: Renderer dei grafici, nome o istanza (default: SIGNATURE_CHART_RENDERER)
+
+    Returns:
+        Base64-encoded PNG immagine del grafico
+    """
+    return base64.b64encode(comparison_chart_png(verifica_data, comp_data, forensic_compatibilities, chart_renderer)).decode('utf-8')
+
+def chart_output_mode(chart_output=None):
+    """
+    Verifica il formato dei grafici richiesto
+
+    Args:
+        chart_output: "png" o "data" (default: png)
+
+    Returns:
+        Formato normalizzato
+    """
+    chart_output = (chart_output or DEFAULT_CHART_OUTPUT).strip().lower()
+    if chart_output not in CHART_OUTPUTS:
+        raise ValueError(f"Formato dei grafici sconosciuto: {chart_output} (disponibili: {', '.join(CHART_OUTPUTS)})")
+    return chart_output
+
+def create_chart_output(verifica_data, comp_data, forensic_compatibilities=None, chart_output=None, chart_renderer=None):
+    """
+    Grafici di un confronto nel formato richiesto
+
+    Args:
+        verifica_data: Parametri della firma da verificare, con i nomi canonici
+        comp_data: Parametri della firma di riferimento, con i nomi canonici
+        forensic_compatibilities: Compatibilità forensi già calcolate (opzionale)
+        chart_output: "png" (immagini base64) o "data" (serie strutturate, senza PNG)
+        chart_renderer: Renderer dei grafici per il formato png (opzionale)
+
     Returns:
-        Dizionario con chiavi normalizzate
-    """
-    if not isinstance(data, dict):
-        return data
-        
-    normalized = {}
-    
-    # Mapping delle chiavi per compatibilità
-    key_mapping = {
-        'inclination': 'Inclination',
-        'Inclination': 'Inclination',
-        'pressureMean': 'PressureMean', 
-        'pressure_mean': 'PressureMean',
-        'PressureMean': 'PressureMean',
-        'pressureStd': 'PressureStd',
-        'pressure_std': 'PressureStd', 
-        'PressureStd': 'PressureStd',
-        'proportion': 'Proportion',
-        'Proportion': 'Proportion',
-        'avgSpacing': 'AvgSpacing',
-        'avg_spacing': 'AvgSpacing',
-        'AvgSpacing': 'AvgSpacing',
-        'velocity': 'Velocity',
-        'Velocity': 'Velocity',
-        'avgCurvature': 'AvgCurvature',
-        'avg_curvature': 'AvgCurvature',
-        'AvgCurvature': 'AvgCurvature',
-        'curvature': 'Curvature',
-        'Curvature': 'Curvature',
-        'avgAsolaSize': 'AvgAsolaSize',
-        'avg_asola_size': 'AvgAsolaSize',
-        'AvgAsolaSize': 'AvgAsolaSize',
-        'overlapRatio': 'OverlapRatio',
-        'overlap_ratio': 'OverlapRatio',
-        'OverlapRatio': 'OverlapRatio',
-        'letterConnections': 'LetterConnections',
-        'letter_connections': 'LetterConnections',
-        'LetterConnections': 'LetterConnections',
-        'baselineStd': 'BaselineStd',
-        'baseline_std': 'BaselineStd',
-        'BaselineStd': 'BaselineStd',
-        'baselineStdMm': 'BaselineStdMm',
-        'baseline_std_mm': 'BaselineStdMm',
-        'BaselineStdMm': 'BaselineStdMm'
+        Dizionario {comparison_chart, naturalness_chart} oppure
+        {comparison_chart_data, naturalness_chart_data}
+    """
+    if chart_output_mode(chart_output) == "data":
+        return {
+            "comparison_chart_data": comparison_chart_data(comparison_chart_series(verifica_data, comp_data, forensic_compatibilities)),
+            "naturalness_chart_data": naturalness_chart_data(naturalness_chart_series(verifica_data, comp_data)),
+        }
+    return {
+        "comparison_chart": create_comparison_chart(verifica_data, comp_data, forensic_compatibilities, chart_renderer),
+        "naturalness_chart": create_naturalness_chart(verifica_data, comp_data, chart_renderer),  # === NUOVO GRAFICO DI NATURALEZZA ===
     }
-    
-    # DEBUG: Stampa i dati in ingresso
-    
-    # Applica il mapping
-    for key, value in data.items():
-        normalized_key = key_mapping.get(key, key)
-        normalized[normalized_key] = value
-        
-        # DEBUG: Verifica specifica per avgAsolaSize rimossa
-        if key == 'avgAsolaSize':
-            pass  # Debug rimosso
-        
-        # Assicura che abbiamo anche la versione alternativa per retrocompatibilità
-        if normalized_key in key_mapping.values():
-            # Cerca tutte le chiavi che mappano a questo valore
-            for orig_key, norm_key in key_mapping.items():
-                if norm_key == normalized_key and orig_key != key:
-                    normalized[orig_key] = value
-    
-    # DEBUG: Verifica che AvgAsolaSize sia presente - rimossa
-    if 'AvgAsolaSize' in normalized:
-        pass  # Debug rimosso
-    else:
-        pass  # Debug rimosso
-    
-    return normalized
 
 def create_descriptive_report(verifica_data, comp_data):
     """
     Crea un report descrittivo basato sul confronto tra due firme
     
     Args:
-        verifica_data: Parametri della firma da verificare
-        comp_data: Parametri della firma di riferimento
+        verifica_data: Parametri della firma da verificare, con i nomi canonici (normalize_parameters)
+        comp_data: Parametri della firma di riferimento, con i nomi canonici
         
     Returns:
         Testo del report descrittivo
     """
-    # Normalizza le chiavi per compatibilità
-    verifica_data = normalize_parameter_keys(verifica_data)
-    comp_data = normalize_parameter_keys(comp_data)
-    
     descrizione = ""
 
     if verifica_data['Velocity'] > comp_data['Velocity'] + 0.2:
@@ -770,7 +895,8 @@ def create_descriptive_report(verifica_data, comp_data):
 
     return descrizione
 
-def generate_pdf_report(verifica_path, comp_path, verifica_data, comp_data, similarity, output_path, case_info=None, project_id=None, verifica_real_dims=None, reference_real_dims=None):
+def generate_pdf_report(verifica_path, comp_path, verifica_data, comp_data, similarity, output_path, case_info=None, project_id=None, verifica_real_dims=None, reference_real_dims=None,
+                        verifica_context=None, comp_context=None, chart_renderer=None, forensic_compatibilities=None):
     # Debug info
     
     """
@@ -785,10 +911,21 @@ def generate_pdf_report(verifica_path, comp_path, verifica_data, comp_data, simi
         output_path: Percorso dove salvare il report (verrà convertito in .pdf)
         case_info: Informazioni sul caso (opzionale)
         project_id: ID del progetto per garantire l'isolamento dei dati (opzionale)
+        verifica_context: SignatureImageContext della firma da verificare (opzionale)
+        comp_context: SignatureImageContext della firma di riferimento (opzionale)
+        chart_renderer: Renderer dei grafici, nome o istanza (opzionale)
+        forensic_compatibilities: Compatibilità forensi già calcolate dal confronto (opzionale:
+            il grafico è lo stesso del risultato JSON e arriva dalla cache dei grafici)
         
     Returns:
         Path del file PDF generato
     """
+    from PIL import Image
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as ReportlabImage, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    
     # Assicura che il percorso di output sia corretto
     pdf_output_path = output_path
     if not pdf_output_path.endswith('.pdf'):
@@ -836,27 +973,29 @@ def generate_pdf_report(verifica_path, comp_path, verifica_data, comp_data, simi
     
     # INVERTITO ORDINE: Prima mostriamo la firma in esame, poi quella di riferimento
     # Firma in esame (prima)
+    # Riusa i byte già letti per il confronto invece di riaprire i file
+    verifica_context = verifica_context or SignatureImageContext(verifica_path)
+    comp_context = comp_context or SignatureImageContext(comp_path)
+    
     elements.append(Paragraph("Firma in esame:", bold_style))
-    img = Image.open(verifica_path)
-    img_width, img_height = img.size
+    img_width, img_height = verifica_context.file_size
     aspect = img_height / float(img_width)
     max_width = 400  # Massima larghezza in punti
     max_height = 250  # Massima altezza per evitare "Flowable too large"
     img_width = min(max_width, img_width)
     img_height = min(max_height, img_width * aspect)
     
-    elements.append(ReportlabImage(verifica_path, width=img_width, height=img_height))
+    elements.append(ReportlabImage(BytesIO(verifica_context.data), width=img_width, height=img_height))
     elements.append(Spacer(1, 12))
     
     # Firma di riferimento (seconda)
     elements.append(Paragraph("Firma di riferimento:", bold_style))
-    img = Image.open(comp_path)
-    img_width, img_height = img.size
+    img_width, img_height = comp_context.file_size
     aspect = img_height / float(img_width)
     img_width = min(max_width, img_width)
     img_height = min(max_height, img_width * aspect)
     
-    elements.append(ReportlabImage(comp_path, width=img_width, height=img_height))
+    elements.append(ReportlabImage(BytesIO(comp_context.data), width=img_width, height=img_height))
     elements.append(Spacer(1, 12))
     
     # PARAMETRI ANALIZZATI - Sezione dettagliata
@@ -1241,14 +1380,12 @@ generateInterpretation();
     # CRITICAL: Usa sempre parametri RICALCOLATI (non dal database) per garantire consistenza
     print(f"[CRITICAL] Generazione grafico PDF con parametri ricalcolati", file=sys.stderr)
     
-    # Normalizza i parametri per garantire chiavi corrette nel grafico
-    verifica_data_normalized = normalize_parameter_keys(verifica_data)
-    comp_data_normalized = normalize_parameter_keys(comp_data)
-    chart_img_base64 = create_comparison_chart(verifica_data_normalized, comp_data_normalized, None)
+    # I parametri ricalcolati hanno già i nomi canonici richiesti dal grafico
+    # PNG dalla cache dei grafici: quelli appena renderizzati dal confronto non vengono ridisegnati
+    chart_data = comparison_chart_png(verifica_data, comp_data, forensic_compatibilities, chart_renderer)
     
     # === NUOVO: GRAFICO DI NATURALEZZA ===
-    naturalness_chart_base64 = create_naturalness_chart(verifica_data_normalized, comp_data_normalized)
-    chart_data = base64.b64decode(chart_img_base64)
+    naturalness_chart_data = naturalness_chart_png(verifica_data, comp_data, chart_renderer)
     
     # Salva temporaneamente l'immagine del grafico
     chart_temp_path = os.path.join(tempfile.gettempdir(), f"chart_{os.path.basename(pdf_output_path)}.png")
@@ -1313,9 +1450,8 @@ generateInterpretation();
     
     # Decodifica e salva il grafico di naturalezza
     naturalness_chart_temp_path = None
-    if naturalness_chart_base64:
+    if naturalness_chart_data:
         try:
-            naturalness_chart_data = base64.b64decode(naturalness_chart_base64)
             naturalness_chart_temp_path = os.path.join(tempfile.gettempdir(), f"naturalness_chart_{os.path.basename(pdf_output_path)}.png")
             
             with open(naturalness_chart_temp_path, 'wb') as f:
@@ -1460,54 +1596,235 @@ generateInterpretation();
         print(f"Errore nella generazione del PDF: {str(e)}", file=sys.stderr)
         return None
 
-def compare_signatures_with_dimensions(verifica_path, comp_path, verifica_dims, reference_dims, generate_report=False, case_info=None, project_id=None):
+# ==============================================
+# PUNTEGGIO DI UNA COPPIA DI FIRME
+# ==============================================
+
+def calculate_parameter_compatibility(ref_val, ver_val, param_name):
     """
-    Funzione principale per confrontare firme con dimensioni reali specifiche
-    
+    Calcola compatibilità di un singolo parametro con logica migliorata
+    (forma scalare di compatibility_engine.compatibility_matrix, che dà gli stessi valori)
+    """
+    if ref_val is None or ver_val is None:
+        return 0.5  # Compatibilità neutra se mancano dati
+
+    # Gestione parametri qualitativi (stringhe)
+    if param_name in ['WritingStyle', 'Readability']:
+        if isinstance(ref_val, str) and isinstance(ver_val, str):
+            if ref_val.lower() == ver_val.lower():
+                return 1.0  # Identico = 100%
+            elif param_name == 'Readability':
+                # Alta-Media-Bassa: compatibilità graduale
+                levels = {'alta': 3, 'media': 2, 'bassa': 1}
+                ref_level = levels.get(ref_val.lower(), 2)
+                ver_level = levels.get(ver_val.lower(), 2)
+                diff_levels = abs(ref_level - ver_level)
+                return max(0.3, 1 - (diff_levels * 0.35))  # 65% se diff=1, 30% se diff=2
+            else:
+                return 0.5  # WritingStyle diverso = 50%
+        return 0.5
+
+    # Gestione parametri numerici
+    diff = abs(ref_val - ver_val)
+    max_val = max(abs(ref_val), abs(ver_val))
+
+    # === NUOVO: ALGORITMO FORENSE SPECIFICO PER INCLINAZIONE ===
+    if param_name == 'Inclination':
+        # Usa normalizzazione forense su 45° come nel JavaScript analyzer
+        inclination_diff = abs(ref_val - ver_val)
+        compatibility = 1 - min(1, inclination_diff / 45.0)  # Normalizza su 45° max
+        return max(0.1, compatibility)  # Minimo 10% per robustezza
+
+    # Per parametri con valori molto piccoli (asole, baseline), usa soglie assolute
+    if param_name in ['AvgAsolaSize', 'BaselineStdMm']:
+        if diff <= 0.05: return 0.95
+        elif diff <= 0.1: return 0.80
+        elif diff <= 0.2: return 0.60
+        else: return max(0, 1 - (diff * 2))  # Scala lineare
+
+    # Per altri parametri, usa logica relativa migliorata
+    if max_val > 0:
+        relative_diff = diff / max_val
+        if relative_diff <= 0.05: return 0.98
+        elif relative_diff <= 0.1: return 0.90
+        elif relative_diff <= 0.15: return 0.80
+        elif relative_diff <= 0.25: return 0.60  # === NUOVO: soglia intermedia ===
+        elif relative_diff <= 0.50: return 0.30  # === NUOVO: soglia per grandi differenze ===
+        else: return max(0.10, 1 - relative_diff)  # === CORRETTO: minimo 10% invece di 0% ===
+    else:
+        return 1.0  # Entrambi zero = perfetta compatibilità
+
+# Classificazione a matrice 2D (Similarità vs Naturalezza)
+def classify_signature_intelligent(similarity_pct, naturalness_pct, thresholds=None):
+    """
+    Classificazione intelligente basata su matrice 2D
+
     Args:
-        verifica_path: Percorso della firma da verificare
-        comp_path: Percorso della firma di riferimento
-        verifica_dims: Tupla (width_mm, height_mm) per la firma da verificare
-        reference_dims: Tupla (width_mm, height_mm) per la firma di riferimento
-        generate_report: Se True, genera anche un report PDF
-        case_info: Informazioni sul caso per il report
-        project_id: ID del progetto per garantire l'isolamento dei dati
-        
+        similarity_pct: Percentuale di similarità (0-100)
+        naturalness_pct: Percentuale di naturalezza (0-100)
+        thresholds: Soglie della matrice (default: compatibility_engine.CLASSIFICATION_THRESHOLDS)
+
     Returns:
-        Dizionario con i risultati dell'analisi
+        Tupla (verdict, confidence, explanation)
     """
-    try:
-        # Carica e analizza le immagini
-        verifica_img = cv2.imread(verifica_path, cv2.IMREAD_GRAYSCALE)
-        comp_img = cv2.imread(comp_path, cv2.IMREAD_GRAYSCALE)
-        
-        if verifica_img is None or comp_img is None:
-            raise ValueError("Impossibile leggere una o entrambe le immagini")
-        
-        # Preprocessa le immagini
-        processed_verifica = preprocess_image(verifica_img)
-        processed_comp = preprocess_image(comp_img)
-        
-        # Calcola le metriche SSIM
-        similarity, _ = ssim(processed_verifica, processed_comp, full=True)
-        
-        # Analizza le firme con dimensioni reali specifiche - SEMPRE ricalcola per avere parametri freschi
-        verifica_data = analyze_signature_with_dimensions(verifica_path, verifica_dims[0], verifica_dims[1])
-        comp_data = analyze_signature_with_dimensions(comp_path, reference_dims[0], reference_dims[1])
-        
-        if not verifica_data or not comp_data:
+    t = thresholds or compatibility_engine.CLASSIFICATION_THRESHOLDS
+    
+    # Converti in percentuali per chiarezza
+    sim = similarity_pct * 100  # similarity_pct è 0-1, convertire in 0-100
+    nat = naturalness_pct        # naturalness_pct è già 0-100
+
+    # MATRICE DI CLASSIFICAZIONE 2D
+
+    # REGOLA PRIORITARIA: Similarità quasi perfetta = Autentica (indipendentemente dalla naturalezza)
+    if sim >= t['identical_similarity']:
+        return ("Autentica", 98, "Similarità quasi perfetta - firma identica")
+
+    # Caso 1: Alta similarità + Alta naturalezza = AUTENTICA
+    if sim >= t['high_similarity'] and nat >= t['high_naturalness']:
+        return ("Autentica", 95, "Alta similarità e movimenti naturali")
+
+    # Caso 2: Alta similarità + Bassa naturalezza = POSSIBILE COPIA ABILE
+    elif sim >= t['high_similarity'] and nat < t['low_naturalness']:
+        return ("Possibile copia abile", 70, "Alta similarità ma movimenti innaturali")
+
+    # Caso 3: Similarità intermedia + Alta naturalezza = AUTENTICA DISSIMULATA ⭐
+    elif t['dissimulated_similarity'] <= sim < t['medium_similarity'] and nat >= t['high_naturalness']:
+        return ("Autentica dissimulata", 85, "Modificata intenzionalmente ma autentica")
+
+    # Caso 4A: Similarità molto bassa + Alta naturalezza = SOSPETTA (possibile imitazione naturale)
+    elif sim < t['dissimulated_similarity'] and nat >= t['high_naturalness']:
+        return ("Sospetta", 75, "Similarità troppo bassa - possibile imitazione naturale")
+
+    # Caso 4B: Bassa similarità + Bassa naturalezza = PROBABILMENTE FALSA
+    elif sim < t['medium_similarity'] and nat < t['low_naturalness']:
+        return ("Probabilmente falsa", 90, "Bassa similarità e movimenti innaturali")
+
+    # Casi intermedi: similarità media
+    elif t['medium_similarity'] <= sim < t['high_similarity']:
+        if nat >= t['accepted_naturalness']:
+            return ("Probabilmente autentica", 75, "Similarità accettabile e movimenti naturali")
+        elif nat < t['poor_naturalness']:
+            return ("Sospetta", 60, "Similarità media ma movimenti innaturali")
+        else:
+            return ("Incerta", 50, "Similarità e naturalezza intermedie")
+
+    # Casi intermedi: naturalezza media
+    elif t['low_naturalness'] <= nat < t['high_naturalness']:
+        if sim >= t['probable_similarity']:
+            return ("Probabilmente autentica", 75, "Alta similarità e naturalezza accettabile")
+        else:
+            return ("Sospetta", 65, "Parametri nel range intermedio")
+
+    # Fallback
+    else:
+        return ("Incerta", 50, "Parametri nel range intermedio")
+
+def score_signature_pair(similarity, verifica_data, comp_data, config=None):
+    """
+    Combina SSIM e compatibilità dei parametri in punteggio finale e verdetto
+    
+    Args:
+        similarity: SSIM medio tra le immagini preprocessate (0-1)
+        verifica_data: Parametri della firma da verificare
+        comp_data: Parametri della firma di riferimento
+        config: compatibility_engine.ScoringConfig (default: configurazione predefinita)
+        
+    Returns:
+        Dizionario con similarity (finale, 0-1), parameters_score (0-1), naturalness (0-100),
+        compatibilities (percentuali per parametro), verdict, confidence ed explanation
+    """
+    # Calcola punteggio parametri pesato E salva compatibilità individuali (motore vettoriale, M=1)
+    config = config or compatibility_engine.DEFAULT_SCORING_CONFIG
+    score = compatibility_engine.score_candidates(verifica_data, [comp_data], similarity, config)
+    individual_compatibilities = {
+        param_name: round(float(compatibility) * 100, 1)  # Converte in percentuale
+        for param_name, compatibility in zip(compatibility_engine.PARAMETER_NAMES, score["compatibilities"][0])
+        if not np.isnan(compatibility)
+    }
+    parameters_score = float(score["parameters_score"][0])
+    
+    # Combina SSIM (60%) + Parametri (40%) per punteggio finale - più peso all'analisi visuale
+    final_similarity = float(score["similarity"][0])
+    
+    # Estrai l'Indice di Naturalezza dalle firme analizzate
+    verifica_naturalness = verifica_data.get('NaturalnessIndex', 50.0)  # Default neutro
+    reference_naturalness = comp_data.get('NaturalnessIndex', 50.0)     # Default neutro
+    
+    # Calcola la naturalezza media (considerando entrambe le firme)
+    avg_naturalness = (verifica_naturalness + reference_naturalness) / 2.0
+    
+    verdict, confidence, explanation = classify_signature_intelligent(final_similarity, avg_naturalness, config.thresholds)
+    return {
+        "similarity": final_similarity,
+        "parameters_score": parameters_score,
+        "naturalness": avg_naturalness,
+        "compatibilities": individual_compatibilities,
+        "verdict": verdict,
+        "confidence": confidence,
+        "explanation": explanation
+    }
+
+def compare_signatures_with_dimensions(verifica_path, comp_path, verifica_dims, reference_dims, generate_report=False, case_info=None, project_id=None,
+                                       chart_renderer=None, chart_output=None):
+    """
+    Funzione principale per confrontare firme con dimensioni reali specifiche
+    
+    Args:
+        verifica_path: Percorso della firma da verificare
+        comp_path: Percorso della firma di riferimento
+        verifica_dims: Tupla (width_mm, height_mm) per la firma da verificare
+        reference_dims: Tupla (width_mm, height_mm) per la firma di riferimento
+        generate_report: Se True, genera anche un report PDF
+        case_info: Informazioni sul caso per il report
+        project_id: ID del progetto per garantire l'isolamento dei dati
+        chart_renderer: Renderer dei grafici, "matplotlib" o "opencv" (default: SIGNATURE_CHART_RENDERER)
+        chart_output: Formato dei grafici, "png" (default) o "data" (serie strutturate; i PNG
+            sono generati solo per il report)
+        
+    Returns:
+        Dizionario con i risultati dell'analisi
+    """
+    try:
+        chart_output = chart_output_mode(chart_output)
+        
+        # Carica le immagini una sola volta: i contesti condividono decodifica e intermedi
+        # tra SSIM, analisi dei parametri e report
+        verifica_context = SignatureImageContext(verifica_path)
+        comp_context = SignatureImageContext(comp_path)
+        
+        if verifica_context.gray is None or comp_context.gray is None:
+            raise ValueError("Impossibile leggere una o entrambe le immagini")
+        
+        # Calcola l'SSIM medio sulle immagini preprocessate (senza mappa completa)
+        similarity = get_ssim_backend().score(verifica_context.processed, comp_context.processed)
+        
+        # Analizza le firme con dimensioni reali specifiche - la cache è legata alla versione
+        # dell'algoritmo, quindi i parametri restituiti sono sempre quelli del codice corrente
+        verifica_data = analyze_signature_cached(verifica_path, verifica_dims[0], verifica_dims[1], project_id, verifica_context)
+        comp_data = analyze_signature_cached(comp_path, reference_dims[0], reference_dims[1], project_id, comp_context)
+        
+        if not verifica_data or not comp_data:
             raise ValueError("Errore nell'analisi di una o entrambe le firme")
         
             
-        # NORMALIZZA per il grafico - garantisce che le chiavi siano nella forma corretta (maiuscole)
-        verifica_data_normalized = normalize_parameter_keys(verifica_data)
-        comp_data_normalized = normalize_parameter_keys(comp_data)
+        # I risultati dell'analisi hanno già i nomi canonici (parameter_schema): nessuna normalizzazione
+        
+        # ⚠️ GRAFICI CREATI DOPO IL CALCOLO DELLE COMPATIBILITÀ ⚠️
         
+        # Calcola il punteggio finale pesato combinando SSIM e parametri graphologici
+        score = score_signature_pair(similarity, verifica_data, comp_data)
+        final_similarity = score["similarity"]
+        avg_naturalness = score["naturalness"]
+        individual_compatibilities = score["compatibilities"]
+        verdict, confidence, explanation = score["verdict"], score["confidence"], score["explanation"]
         
-        # ⚠️ GRAFICO SPOSTATO DOPO IL CALCOLO DELLE COMPATIBILITÀ ⚠️
+        print(f"[CLASSIFICAZIONE] Similarity: {final_similarity*100:.1f}%, Naturalness: {avg_naturalness:.1f}%", file=sys.stderr)
+        print(f"[CLASSIFICAZIONE] Risultato: {verdict} (confidenza: {confidence}%) - {explanation}", file=sys.stderr)
         
-        # === NUOVO: GRAFICO DI NATURALEZZA ===
-        naturalness_chart_img = create_naturalness_chart(verifica_data_normalized, comp_data_normalized)
+        # 🎯 CREA I GRAFICI CON LE COMPATIBILITÀ FORENSI CALCOLATE (PNG oppure solo dati);
+        # prima del report, che riusa gli stessi PNG dalla cache dei grafici
+        charts = create_chart_output(verifica_data, comp_data, individual_compatibilities, chart_output, chart_renderer)
+        print(f"[CHART] 🎯 Grafico creato con {len(individual_compatibilities)} compatibilità forensi ({chart_output})", file=sys.stderr)
         
         # Crea il report descrittivo
         description = create_descriptive_report(verifica_data, comp_data)
@@ -1529,206 +1846,25 @@ def compare_signatures_with_dimensions(verifica_path, comp_path, verifica_dims,
                     print(f"Report path aggiornato con project_id={project_id}: {report_pdf_path}", file=sys.stderr)
                 
                 # Passiamo l'ID del progetto e le dimensioni reali alla funzione di generazione del report
-                report_path = generate_pdf_report(verifica_path, comp_path, verifica_data, comp_data, similarity, report_pdf_path, case_info, project_id, verifica_dims, reference_dims)
+                report_path = generate_pdf_report(verifica_path, comp_path, verifica_data, comp_data, similarity, report_pdf_path, case_info, project_id, verifica_dims, reference_dims,
+                                                  verifica_context=verifica_context, comp_context=comp_context,
+                                                  chart_renderer=chart_renderer, forensic_compatibilities=individual_compatibilities)
                 # Nessun output qui per evitare problemi con JSON
             except Exception as e:
                 print(f"Errore nella generazione del report: {str(e)}", file=sys.stderr)
         
-        # Calcola il punteggio finale pesato combinando SSIM e parametri graphologici
-        def calculate_parameter_compatibility(ref_val, ver_val, param_name):
-            """Calcola compatibilità di un singolo parametro con logica migliorata"""
-            if ref_val is None or ver_val is None:
-                return 0.5  # Compatibilità neutra se mancano dati
-                
-            # Gestione parametri qualitativi (stringhe)
-            if param_name in ['WritingStyle', 'Readability']:
-                if isinstance(ref_val, str) and isinstance(ver_val, str):
-                    if ref_val.lower() == ver_val.lower():
-                        return 1.0  # Identico = 100%
-                    elif param_name == 'Readability':
-                        # Alta-Media-Bassa: compatibilità graduale
-                        levels = {'alta': 3, 'media': 2, 'bassa': 1}
-                        ref_level = levels.get(ref_val.lower(), 2)
-                        ver_level = levels.get(ver_val.lower(), 2)
-                        diff_levels = abs(ref_level - ver_level)
-                        return max(0.3, 1 - (diff_levels * 0.35))  # 65% se diff=1, 30% se diff=2
-                    else:
-                        return 0.5  # WritingStyle diverso = 50%
-                return 0.5
-                
-            # Gestione parametri numerici
-            diff = abs(ref_val - ver_val)
-            max_val = max(abs(ref_val), abs(ver_val))
-            
-            # === NUOVO: ALGORITMO FORENSE SPECIFICO PER INCLINAZIONE ===
-            if param_name == 'Inclination':
-                # Usa normalizzazione forense su 45° come nel JavaScript analyzer
-                inclination_diff = abs(ref_val - ver_val)
-                compatibility = 1 - min(1, inclination_diff / 45.0)  # Normalizza su 45° max
-                return max(0.1, compatibility)  # Minimo 10% per robustezza
-            
-            # Per parametri con valori molto piccoli (asole, baseline), usa soglie assolute
-            if param_name in ['AvgAsolaSize', 'BaselineStdMm']:
-                if diff <= 0.05: return 0.95
-                elif diff <= 0.1: return 0.80
-                elif diff <= 0.2: return 0.60
-                else: return max(0, 1 - (diff * 2))  # Scala lineare
-            
-            # Per altri parametri, usa logica relativa migliorata
-            if max_val > 0:
-                relative_diff = diff / max_val
-                if relative_diff <= 0.05: return 0.98
-                elif relative_diff <= 0.1: return 0.90
-                elif relative_diff <= 0.15: return 0.80
-                elif relative_diff <= 0.25: return 0.60  # === NUOVO: soglia intermedia ===
-                elif relative_diff <= 0.50: return 0.30  # === NUOVO: soglia per grandi differenze ===
-                else: return max(0.10, 1 - relative_diff)  # === CORRETTO: minimo 10% invece di 0% ===
-            else:
-                return 1.0  # Entrambi zero = perfetta compatibilità
-        
-        # Lista parametri chiave per il calcolo pesato - usa TUTTI i parametri disponibili
-        key_parameters = [
-            ('PressureMean', 0.16),     # 16% - pressione media (molto stabile)
-            ('AvgCurvature', 0.14),     # 14% - curvatura (caratteristica distintiva) 
-            ('Proportion', 0.12),       # 12% - proporzioni (aspect ratio)
-            ('Velocity', 0.10),         # 10% - velocità 
-            ('PressureStd', 0.08),      # 8%  - variazione pressione (importante!)
-            ('AvgAsolaSize', 0.08),     # 8%  - dimensione asole
-            ('AvgSpacing', 0.06),       # 6%  - spaziatura
-            ('Inclination', 0.05),      # 5%  - inclinazione
-            ('OverlapRatio', 0.05),     # 5%  - sovrapposizioni
-            ('LetterConnections', 0.05), # 5%  - connessioni
-            ('BaselineStdMm', 0.04),    # 4%  - baseline 
-            ('StrokeComplexity', 0.04), # 4%  - complessità del tratto
-            ('ConnectedComponents', 0.02), # 2%  - numero componenti
-            ('WritingStyle', 0.01),     # 1%  - stile (qualitativo)
-            ('Readability', 0.00),      # 0%  - leggibilità (qualitativo, rimosso per spazio)
-        ]
-        
-        # Calcola punteggio parametri pesato E salva compatibilità individuali
-        total_weight = 0
-        weighted_score = 0
-        individual_compatibilities = {}  # === NUOVO: salva compatibilità parametro per parametro ===
-        
-        for param_name, weight in key_parameters:
-            ref_val = comp_data.get(param_name)
-            ver_val = verifica_data.get(param_name) 
-            
-            if ref_val is not None and ver_val is not None:
-                compatibility = calculate_parameter_compatibility(ref_val, ver_val, param_name)
-                individual_compatibilities[param_name] = round(compatibility * 100, 1)  # Converte in percentuale
-                weighted_score += compatibility * weight
-                total_weight += weight
-        
-        # Normalizza il punteggio parametri
-        if total_weight > 0:
-            parameters_score = weighted_score / total_weight
-        else:
-            parameters_score = 0.5  # Fallback se nessun parametro disponibile
-            
-        # Combina SSIM (60%) + Parametri (40%) per punteggio finale - più peso all'analisi visuale
-        final_similarity = (similarity * 0.6) + (parameters_score * 0.4)
-        
-
-        # ==============================================
-        # NUOVA CLASSIFICAZIONE INTELLIGENTE CON NATURALEZZA
-        # ==============================================
-        
-        # Estrai l'Indice di Naturalezza dalle firme analizzate
-        verifica_naturalness = verifica_data.get('NaturalnessIndex', 50.0)  # Default neutro
-        reference_naturalness = comp_data.get('NaturalnessIndex', 50.0)     # Default neutro
-        
-        # Calcola la naturalezza media (considerando entrambe le firme)
-        avg_naturalness = (verifica_naturalness + reference_naturalness) / 2.0
-        
-        print(f"[CLASSIFICAZIONE] Similarity: {final_similarity*100:.1f}%, Naturalness: {avg_naturalness:.1f}%", file=sys.stderr)
-        
-        # Implementa classificazione a matrice 2D (Similarità vs Naturalezza)
-        def classify_signature_intelligent(similarity_pct, naturalness_pct):
-            """
-            Classificazione intelligente basata su matrice 2D
-            
-            Args:
-                similarity_pct: Percentuale di similarità (0-100)
-                naturalness_pct: Percentuale di naturalezza (0-100)
-                
-            Returns:
-                Tupla (verdict, confidence, explanation)
-            """
-            # Converti in percentuali per chiarezza
-            sim = similarity_pct * 100  # similarity_pct è 0-1, convertire in 0-100
-            nat = naturalness_pct        # naturalness_pct è già 0-100
-            
-            # MATRICE DI CLASSIFICAZIONE 2D
-            
-            # REGOLA PRIORITARIA: Similarità quasi perfetta = Autentica (indipendentemente dalla naturalezza)
-            if sim >= 98:
-                return ("Autentica", 98, "Similarità quasi perfetta - firma identica")
-            
-            # Caso 1: Alta similarità + Alta naturalezza = AUTENTICA
-            if sim >= 85 and nat >= 80:
-                return ("Autentica", 95, "Alta similarità e movimenti naturali")
-            
-            # Caso 2: Alta similarità + Bassa naturalezza = POSSIBILE COPIA ABILE
-            elif sim >= 85 and nat < 60:
-                return ("Possibile copia abile", 70, "Alta similarità ma movimenti innaturali")
-            
-            # Caso 3: Similarità intermedia + Alta naturalezza = AUTENTICA DISSIMULATA ⭐
-            elif 55 <= sim < 65 and nat >= 80:
-                return ("Autentica dissimulata", 85, "Modificata intenzionalmente ma autentica")
-                
-            # Caso 4A: Similarità molto bassa + Alta naturalezza = SOSPETTA (possibile imitazione naturale)
-            elif sim < 55 and nat >= 80:
-                return ("Sospetta", 75, "Similarità troppo bassa - possibile imitazione naturale")
-                
-            # Caso 4B: Bassa similarità + Bassa naturalezza = PROBABILMENTE FALSA
-            elif sim < 65 and nat < 60:
-                return ("Probabilmente falsa", 90, "Bassa similarità e movimenti innaturali")
-            
-            # Casi intermedi: similarità media
-            elif 65 <= sim < 85:
-                if nat >= 75:
-                    return ("Probabilmente autentica", 75, "Similarità accettabile e movimenti naturali")
-                elif nat < 50:
-                    return ("Sospetta", 60, "Similarità media ma movimenti innaturali")
-                else:
-                    return ("Incerta", 50, "Similarità e naturalezza intermedie")
-            
-            # Casi intermedi: naturalezza media
-            elif 60 <= nat < 80:
-                if sim >= 75:
-                    return ("Probabilmente autentica", 75, "Alta similarità e naturalezza accettabile")
-                else:
-                    return ("Sospetta", 65, "Parametri nel range intermedio")
-            
-            # Fallback
-            else:
-                return ("Incerta", 50, "Parametri nel range intermedio")
-        
-        # Applica la nuova classificazione
-        verdict, confidence, explanation = classify_signature_intelligent(final_similarity, avg_naturalness)
-        
-        print(f"[CLASSIFICAZIONE] Risultato: {verdict} (confidenza: {confidence}%) - {explanation}", file=sys.stderr)
-        
-        # ==============================================
-        # FINE NUOVA CLASSIFICAZIONE
-        # ==============================================
-        
-        # 🎯 CREA IL GRAFICO CON LE COMPATIBILITÀ FORENSI CALCOLATE
-        chart_img = create_comparison_chart(verifica_data_normalized, comp_data_normalized, individual_compatibilities)
-        print(f"[CHART] 🎯 Grafico creato con {len(individual_compatibilities)} compatibilità forensi", file=sys.stderr)
-        
         # Prepara il risultato con la nuova classificazione
         result = {
             "similarity": final_similarity,  # Punteggio tradizionale per compatibilità
+            "ssim": similarity,  # SSIM grezzo, per ricalcolare il punteggio senza rianalisi (rescore)
+            "scoring_version": compatibility_engine.DEFAULT_SCORING_CONFIG.version,
             "naturalness": avg_naturalness / 100.0,  # Nuovo: Indice di naturalezza (0-1)
             "verdict": verdict,  # Nuova classificazione intelligente
             "confidence": confidence,  # Nuovo: Livello di confidenza
             "explanation": explanation,  # Nuovo: Spiegazione del risultato
             "verifica_parameters": verifica_data,
             "reference_parameters": comp_data,
-            "comparison_chart": chart_img,
-            "naturalness_chart": naturalness_chart_img,  # === NUOVO GRAFICO DI NATURALEZZA ===
+            **charts,
             "compatibilities": individual_compatibilities,  # === NUOVO: compatibilità parametri individuali ===
             "description": description,
             "report_path": report_path if report_path else None
@@ -1759,43 +1895,20 @@ def calculate_fluidity_score(binary: np.ndarray, contours: list) -> float:
         if not contours:
             return 0.0
         
-        # Analizza la smoothness di ogni contorno
-        smoothness_scores = []
+        # Deviazione della derivata seconda (accelerazione) e lunghezza di ogni contorno,
+        # calcolate in un'unica passata vettorizzata sui contorni con almeno 10 punti
+        acceleration_std, counts, contour_lengths = contour_kernels.fluidity_statistics(contours, min_points=10)
         
-        for contour in contours:
-            if len(contour) < 10:  # Salta contorni troppo piccoli
-                continue
-                
-            # Calcola la derivata seconda per misurare le irregolarità
-            points = contour.reshape(-1, 2)
-            if len(points) < 10:
-                continue
-                
-            # Calcola le differenze tra punti consecutivi (velocità)
-            dx = np.diff(points[:, 0])
-            dy = np.diff(points[:, 1])
-            
-            # Calcola la derivata seconda (accelerazione)
-            ddx = np.diff(dx)
-            ddy = np.diff(dy)
-            
-            # Calcola l'accelerazione totale
-            acceleration = np.sqrt(ddx**2 + ddy**2)
-            
-            # La fluidità è inversamente proporzionale alle variazioni di accelerazione
-            if len(acceleration) > 0:
-                # Normalizza rispetto alla lunghezza del contorno
-                contour_length = cv2.arcLength(contour, False)
-                if contour_length > 0:
-                    irregularity = np.std(acceleration) / contour_length
-                    # Converti in score di fluidità (0-100)
-                    smoothness = max(0.0, 100.0 - (irregularity * 1000))
-                    smoothness_scores.append(min(100.0, smoothness))
-        
-        if not smoothness_scores:
+        # La fluidità è inversamente proporzionale alle variazioni di accelerazione
+        valid = (counts > 0) & (contour_lengths > 0)
+        if not np.any(valid):
             return 50.0  # Valore neutro se non ci sono contorni validi
         
-        # Media pesata dei punteggi di fluidità
+        # Normalizza rispetto alla lunghezza del contorno e converte in score (0-100)
+        irregularity = acceleration_std[valid] / contour_lengths[valid]
+        smoothness_scores = np.minimum(100.0, np.maximum(0.0, 100.0 - (irregularity * 1000)))
+        
+        # Media dei punteggi di fluidità
         return float(np.mean(smoothness_scores))
         
     except Exception as e:
@@ -1876,65 +1989,34 @@ def calculate_coordination_index(contours: list, binary: np.ndarray) -> float:
         if not contours:
             return 0.0
         
-        coordination_scores = []
-        
-        for contour in contours:
-            if len(contour) < 20:  # Serve un contorno sufficientemente lungo
-                continue
-                
-            # Analizza la regolarità delle curve
-            points = contour.reshape(-1, 2)
-            
-            # Calcola gli angoli di curvatura
-            angles = []
-            for i in range(2, len(points) - 2):
-                p1 = points[i-2]
-                p2 = points[i]
-                p3 = points[i+2]
-                
-                # Vettori
-                v1 = p1 - p2
-                v2 = p3 - p2
-                
-                # Calcola angolo
-                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
-                cos_angle = np.clip(cos_angle, -1, 1)
-                angle = np.arccos(cos_angle)
-                angles.append(angle)
-            
-            if len(angles) < 5:
-                continue
-            
-            # Analizza la distribuzione degli angoli
-            angles = np.array(angles)
-            
-            # Una scrittura naturale ha angoli che seguono pattern fluidi
-            # Calcola la regolarità (bassa deviazione standard = più regolare)
-            angle_std = np.std(angles)
-            angle_mean = np.mean(angles)
-            
-            # Normalizza rispetto alla lunghezza del contorno
-            contour_length = cv2.arcLength(contour, False)
-            if contour_length > 0:
-                normalized_variation = angle_std / (angle_mean + 1e-6)
-                
-                # Score di coordinazione basato su regolarità ottimale
-                if 0.3 <= normalized_variation <= 0.8:
-                    # Range naturale di variazione
-                    coord_score = 85 + (15 * (1 - abs(normalized_variation - 0.55) / 0.25))
-                elif 0.1 <= normalized_variation <= 1.2:
-                    # Range accettabile
-                    coord_score = 60 + (25 * (1 - abs(normalized_variation - 0.55) / 0.45))
-                else:
-                    # Troppo rigido o troppo caotico
-                    coord_score = max(0, 40 - (abs(normalized_variation - 0.55) * 50))
-                
-                coordination_scores.append(min(100.0, max(0.0, coord_score)))
+        # Angoli di curvatura (p[i-2], p[i], p[i+2]) di tutti i contorni sufficientemente
+        # lunghi in un'unica passata vettorizzata, ridotti a media/deviazione per contorno
+        angle_mean, angle_std, angle_counts, contour_lengths = contour_kernels.coordination_statistics(contours, min_points=20)
         
-        if not coordination_scores:
+        valid = (angle_counts >= 5) & (contour_lengths > 0)
+        if not np.any(valid):
             return 50.0  # Valore neutro
         
-        # Media pesata degli score di coordinazione
+        # Una scrittura naturale ha angoli che seguono pattern fluidi:
+        # regolarità = deviazione standard relativa alla media degli angoli
+        normalized_variation = angle_std[valid] / (angle_mean[valid] + 1e-6)
+        distance = np.abs(normalized_variation - 0.55)
+        
+        # Score di coordinazione basato su regolarità ottimale
+        coordination_scores = np.select(
+            [
+                (normalized_variation >= 0.3) & (normalized_variation <= 0.8),  # Range naturale di variazione
+                (normalized_variation >= 0.1) & (normalized_variation <= 1.2),  # Range accettabile
+            ],
+            [
+                85 + (15 * (1 - distance / 0.25)),
+                60 + (25 * (1 - distance / 0.45)),
+            ],
+            default=np.maximum(0, 40 - (distance * 50))  # Troppo rigido o troppo caotico
+        )
+        coordination_scores = np.minimum(100.0, np.maximum(0.0, coordination_scores))
+        
+        # Media degli score di coordinazione
         return float(np.mean(coordination_scores))
         
     except Exception as e:
@@ -1977,7 +2059,178 @@ def calculate_naturalness_index(fluidity: float, pressure_consistency: float, co
 # FINE FUNZIONI INDICE DI NATURALEZZA  
 # ==============================================
 
-def analyze_signature_with_dimensions(image_path, real_width_mm, real_height_mm):
+# Grafo dei parametri estratti da analyze_signature_with_dimensions: gli input sono forniti
+# dall'analisi, intermedi e parametri sono calcolati una sola volta e solo se richiesti
+SIGNATURE_FEATURES = feature_engine.FeatureGraph(inputs=("context", "gray", "real_width_mm", "real_height_mm", "calibration"))
+
+@SIGNATURE_FEATURES.intermediate("processed", "context")
+def _processed(context):
+    # Per i parametri usa l'immagine ridimensionata per omogeneità
+    return context.processed
+
+@SIGNATURE_FEATURES.intermediate("contours", "context")
+def _contours(context):
+    return context.contours
+
+@SIGNATURE_FEATURES.intermediate("contours_original", "context")
+def _contours_original(context):
+    # Per le dimensioni reali usa l'immagine originale senza ridimensionamento
+    return context.contours_original
+
+@SIGNATURE_FEATURES.intermediate("contour_tree", "context")
+def _contour_tree(context):
+    return context.contour_tree
+
+@SIGNATURE_FEATURES.intermediate("pixel_values", "gray")
+def _pixel_values(gray):
+    return gray.flatten().astype(np.float64)
+
+@SIGNATURE_FEATURES.intermediate("main_contour", "contours")
+def _main_contour(contours):
+    # Contorno principale (il più grande)
+    return max(contours, key=cv2.contourArea)
+
+@SIGNATURE_FEATURES.intermediate("bounding_box", "main_contour")
+def _bounding_box(main_contour):
+    return cv2.boundingRect(main_contour)
+
+@SIGNATURE_FEATURES.intermediate("bounding_box_original", "contours_original")
+def _bounding_box_original(contours_original):
+    # Bounding box del contorno principale nell'immagine originale (None se non ci sono contorni)
+    if not contours_original:
+        return None
+    return cv2.boundingRect(max(contours_original, key=cv2.contourArea))
+
+@SIGNATURE_FEATURES.feature("Proportion", "real_width_mm", "real_height_mm")
+def _feature_proportion(real_width_mm, real_height_mm):
+    # IMPORTANTE: Usa le dimensioni reali dell'immagine (calibrate dall'utente), non del bounding box della firma
+    return real_width_mm / real_height_mm if real_height_mm > 0 else 1
+
+@SIGNATURE_FEATURES.feature("Inclination", "main_contour")
+def _feature_inclination(main_contour):
+    # Calcola l'inclinazione usando l'algoritmo robusto
+    try:
+        inclination = calculate_signature_inclination([main_contour])
+    except Exception as e:
+        print(f"[ERROR] Errore nel calcolo inclinazione: {e}", file=sys.stderr)
+        inclination = 0.0
+    return inclination
+
+@SIGNATURE_FEATURES.feature("PressureMean", "pixel_values")
+def _feature_pressure_mean(pixel_values):
+    return float(np.mean(pixel_values))
+
+@SIGNATURE_FEATURES.feature("PressureStd", "pixel_values")
+def _feature_pressure_std(pixel_values):
+    return float(np.std(pixel_values))
+
+@SIGNATURE_FEATURES.feature("AvgCurvature", "main_contour")
+def _feature_curvature(main_contour):
+    return calculate_curvature(main_contour) if len(main_contour) >= 3 else 0
+
+@SIGNATURE_FEATURES.feature("Readability", "PressureMean")
+def _feature_readability(pressure_mean):
+    return "Alta" if pressure_mean > 90 else "Media" if pressure_mean > 60 else "Bassa"
+
+@SIGNATURE_FEATURES.feature("WritingStyle", "Proportion")
+def _feature_writing_style(proportion):
+    return "Corsivo" if proportion > 2 else "Stampatello" if proportion < 1.2 else "Misto"
+
+@SIGNATURE_FEATURES.feature("AvgAsolaSize", "contour_tree", "calibration")
+def _feature_asola_size(contour_tree, calibration):
+    # Trova le asole (loops), area media in mm²
+    pixels_per_mm = calibration[2]
+    internal_contours, _ = contour_tree
+    asole = [cnt for cnt in internal_contours if 20 < cv2.contourArea(cnt) < 500 and calculate_circularity(cnt) > 0.5]
+    return (np.mean([cv2.contourArea(a) for a in asole]) / (pixels_per_mm * pixels_per_mm)) if asole else 0
+
+@SIGNATURE_FEATURES.feature("AvgSpacing", "contours", "calibration")
+def _feature_spacing(contours, calibration):
+    # Calcola la spaziatura in mm
+    x_positions = [cv2.boundingRect(cnt)[0] for cnt in contours]
+    x_positions.sort()
+    spacings = [x_positions[i+1] - x_positions[i] for i in range(len(x_positions)-1)] if len(x_positions) > 1 else [0]
+    return (np.mean(spacings) / calibration[0]) if spacings else 0
+
+@SIGNATURE_FEATURES.feature("Velocity", "contours", "bounding_box", "bounding_box_original")
+def _feature_velocity(contours, bounding_box, bounding_box_original):
+    # Calcola la velocità stimata: lunghezza totale dei tratti rispetto alla diagonale della firma
+    total_length = sum([cv2.arcLength(cnt, False) for cnt in contours])
+    _, _, w, h = bounding_box_original if bounding_box_original is not None else bounding_box
+    straight_distance = math.hypot(w, h)
+    return total_length / (straight_distance + 1e-5)
+
+@SIGNATURE_FEATURES.feature("OverlapRatio", "processed", "bounding_box")
+def _feature_overlap_ratio(processed, bounding_box):
+    _, _, w, h = bounding_box
+    return np.sum(processed > 0) / (w * h) if w * h > 0 else 0
+
+@SIGNATURE_FEATURES.feature("LetterConnections", "processed")
+def _feature_letter_connections(processed):
+    return count_letter_connections(processed)
+
+@SIGNATURE_FEATURES.feature("BaselineStdMm", "contours", "calibration")
+def _feature_baseline_std(contours, calibration):
+    # Deviazione della linea di base in mm
+    pixels_per_mm_y = calibration[1]
+    baseline_y_positions = [pt[0][1] for cnt in contours for pt in cnt]
+    baseline_std_px = np.std(baseline_y_positions) if baseline_y_positions else 0
+    return baseline_std_px / pixels_per_mm_y if pixels_per_mm_y > 0 else 0
+
+@SIGNATURE_FEATURES.feature("StrokeComplexity", "contours", "bounding_box")
+def _feature_stroke_complexity(contours, bounding_box):
+    # Densità dei punti del contorno
+    _, _, w, h = bounding_box
+    total_contour_points = sum([len(cnt) for cnt in contours])
+    return total_contour_points / (w * h) if w * h > 0 else 0
+
+@SIGNATURE_FEATURES.feature("ConnectedComponents", "contours")
+def _feature_connected_components(contours):
+    return len(contours) if contours else 0
+
+@SIGNATURE_FEATURES.feature("Dimensions", "bounding_box_original", "gray", "real_width_mm", "real_height_mm", "calibration")
+def _feature_dimensions(bounding_box_original, gray, real_width_mm, real_height_mm, calibration):
+    if bounding_box_original is None:
+        # Fallback se non ci sono contorni nell'immagine originale
+        print(f"Fallback: usando dimensioni totali immagine: {real_width_mm}x{real_height_mm}mm", file=sys.stderr)
+        return (real_width_mm, real_height_mm)
+    
+    # Calcola le dimensioni reali del bounding box della firma
+    pixels_per_mm_x, pixels_per_mm_y, _ = calibration
+    original_height, original_width = gray.shape
+    _, _, w_orig, h_orig = bounding_box_original
+    actual_width_mm = w_orig / pixels_per_mm_x
+    actual_height_mm = h_orig / pixels_per_mm_y
+    print(f"Bounding box firma: {w_orig}x{h_orig}px, {actual_width_mm:.2f}x{actual_height_mm:.2f}mm ({(w_orig/original_width)*100:.1f}% x {(h_orig/original_height)*100:.1f}% dell'immagine)", file=sys.stderr)
+    return (actual_width_mm, actual_height_mm)
+
+# Parametri di naturalezza (anti-dissimulazione)
+
+@SIGNATURE_FEATURES.feature("FluidityScore", "processed", "contours")
+def _feature_fluidity(processed, contours):
+    fluidity_score = calculate_fluidity_score(processed, contours)
+    print(f"[NATURALEZZA] Fluidity Score: {fluidity_score:.2f}", file=sys.stderr)
+    return fluidity_score
+
+@SIGNATURE_FEATURES.feature("PressureConsistency", "gray", "processed")
+def _feature_pressure_consistency(gray, processed):
+    pressure_consistency = calculate_pressure_consistency(gray, processed)
+    print(f"[NATURALEZZA] Pressure Consistency: {pressure_consistency:.2f}", file=sys.stderr)
+    return pressure_consistency
+
+@SIGNATURE_FEATURES.feature("CoordinationIndex", "contours", "processed")
+def _feature_coordination(contours, processed):
+    coordination_index = calculate_coordination_index(contours, processed)
+    print(f"[NATURALEZZA] Coordination Index: {coordination_index:.2f}", file=sys.stderr)
+    return coordination_index
+
+@SIGNATURE_FEATURES.feature("NaturalnessIndex", "FluidityScore", "PressureConsistency", "CoordinationIndex")
+def _feature_naturalness(fluidity_score, pressure_consistency, coordination_index):
+    naturalness_index = calculate_naturalness_index(fluidity_score, pressure_consistency, coordination_index)
+    print(f"[NATURALEZZA] Naturalness Index FINALE: {naturalness_index:.2f}", file=sys.stderr)
+    return naturalness_index
+
+def analyze_signature_with_dimensions(image_path, real_width_mm, real_height_mm, context=None, features=None):
     """
     Analizza una firma utilizzando dimensioni reali specifiche invece del DPI
     
@@ -1985,14 +2238,19 @@ def analyze_signature_with_dimensions(image_path, real_width_mm, real_height_mm)
         image_path: Percorso dell'immagine della firma
         real_width_mm: Larghezza reale in mm
         real_height_mm: Altezza reale in mm
+        context: SignatureImageContext già aperto per l'immagine (opzionale)
+        features: Lista dei parametri da calcolare, es. ["Inclination", "PressureMean"]
+            (None = tutti); gli intermedi non necessari non vengono calcolati
         
     Returns:
-        Dizionario con i parametri estratti dalla firma
+        SignatureFeatures con i parametri estratti dalla firma (interfaccia di un dizionario
+        in sola lettura), oppure dizionario {"error": ...}
     """
     print(f"[DEBUG-START] Inizio analyze_signature_with_dimensions: {image_path}", file=sys.stderr)
     try:
-        # Carica l'immagine
-        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        # Carica l'immagine (una sola decodifica, condivisa con le altre fasi)
+        context = context or SignatureImageContext(image_path)
+        image = context.gray
         if image is None:
             raise ValueError(f"Impossibile leggere l'immagine: {image_path}")
             
@@ -2005,258 +2263,1394 @@ def analyze_signature_with_dimensions(image_path, real_width_mm, real_height_mm)
         pixels_per_mm = (pixels_per_mm_x + pixels_per_mm_y) / 2  # Media per uniformità
         
         print(f"Calibrazione con dimensioni reali: {original_width}x{original_height}px -> {real_width_mm}x{real_height_mm}mm ({pixels_per_mm:.2f}px/mm)", file=sys.stderr)
-            
-        # Crea due versioni: una per l'analisi delle dimensioni reali e una per gli altri parametri
-        # Per le dimensioni reali, usa l'immagine originale senza ridimensionamento
-        processed_original = preprocess_image(image, resize=False)
-        
-        # Per gli altri parametri, usa l'immagine ridimensionata per omogeneità
-        processed = preprocess_image(image, resize=True)
         
         # Trova i contorni principali
-        contours, _ = cv2.findContours(processed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if not contours:
+        if not context.contours:
             return {"error": "Nessun contorno trovato nell'immagine"}
         
-        # Trova il contorno principale (il più grande)
-        main_contour = max(contours, key=cv2.contourArea)
-        
-        # Calcola il bounding box del contorno principale
-        x, y, w, h = cv2.boundingRect(main_contour)
-        
-        # Usa l'immagine originale per calcolare le dimensioni reali effettive
-        contours_orig, _ = cv2.findContours(processed_original, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        if contours_orig:
-            main_contour_orig = max(contours_orig, key=cv2.contourArea)
-            x_orig, y_orig, w_orig, h_orig = cv2.boundingRect(main_contour_orig)
-            
-            # Calcola le dimensioni reali del bounding box della firma
-            actual_width_mm = w_orig / pixels_per_mm_x
-            actual_height_mm = h_orig / pixels_per_mm_y
-            
-            print(f"Bounding box firma: {w_orig}x{h_orig}px, {actual_width_mm:.2f}x{actual_height_mm:.2f}mm ({(w_orig/original_width)*100:.1f}% x {(h_orig/original_height)*100:.1f}% dell'immagine)", file=sys.stderr)
-        else:
-            # Fallback se non ci sono contorni nell'immagine originale
-            actual_width_mm = real_width_mm
-            actual_height_mm = real_height_mm
-            print(f"Fallback: usando dimensioni totali immagine: {real_width_mm}x{real_height_mm}mm", file=sys.stderr)
-        
-        # NUOVO APPROCCIO: Analisi completa con dimensioni reali invece di DPI
-        # Non richiamare analyze_signature che usa DPI - implementa l'analisi diretta
-        
-        # Calcola tutti i parametri usando le dimensioni reali calibrate
-        # IMPORTANTE: Usa le dimensioni reali dell'immagine (calibrate dall'utente), non del bounding box della firma
-        proportion = real_width_mm / real_height_mm if real_height_mm > 0 else 1
-        
-        # Calcola l'inclinazione usando l'algoritmo robusto
-        print(f"[DEBUG] Chiamando calculate_signature_inclination con contorno principale", file=sys.stderr)
-        try:
-            inclination = calculate_signature_inclination([main_contour])
-            print(f"[DEBUG] Inclinazione calcolata: {inclination}°", file=sys.stderr)
-        except Exception as e:
-            print(f"[ERROR] Errore nel calcolo inclinazione: {e}", file=sys.stderr)
-            inclination = 0.0
-        
-        # Calcola la pressione media e deviazione standard
-        image_flat = image.flatten().astype(np.float64)
-        pressure_mean = float(np.mean(image_flat))
-        pressure_std = float(np.std(image_flat))
-        
-        # Calcola la curvatura
-        curvature = calculate_curvature(main_contour) if len(main_contour) >= 3 else 0
-        
-        # Determina la leggibilità e lo stile
-        readability = "Alta" if pressure_mean > 90 else "Media" if pressure_mean > 60 else "Bassa"
-        style = "Corsivo" if proportion > 2 else "Stampatello" if proportion < 1.2 else "Misto"
-        
-        # Trova le asole (loops)
-        internal_contours, _ = cv2.findContours(processed, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        asole = [cnt for cnt in internal_contours if 20 < cv2.contourArea(cnt) < 500 and calculate_circularity(cnt) > 0.5]
-        avg_asola_size_mm = (np.mean([cv2.contourArea(a) for a in asole]) / (pixels_per_mm * pixels_per_mm)) if asole else 0
-        
-        # Calcola la spaziatura in mm
-        x_positions = [cv2.boundingRect(cnt)[0] for cnt in contours]
-        x_positions.sort()
-        spacings = [x_positions[i+1] - x_positions[i] for i in range(len(x_positions)-1)] if len(x_positions) > 1 else [0]
-        avg_spacing_mm = (np.mean(spacings) / pixels_per_mm_x) if spacings else 0
-        
-        # Calcola la velocità stimata
-        total_length = sum([cv2.arcLength(cnt, False) for cnt in contours])
-        try:
-            if contours_orig and w_orig is not None and h_orig is not None:
-                straight_distance = math.hypot(w_orig, h_orig)
-            else:
-                straight_distance = math.hypot(w, h)
-        except NameError:
-            straight_distance = math.hypot(w, h)
-        velocity = total_length / (straight_distance + 1e-5)
-        
-        # Calcola il rapporto di sovrapposizione
-        overlap_ratio = np.sum(processed > 0) / (w * h) if w * h > 0 else 0
-        
-        # Calcola le connessioni tra lettere usando l'analisi dello scheletro e la deviazione della linea di base in mm
-        letter_connections = count_letter_connections(processed)
-        baseline_y_positions = [pt[0][1] for cnt in contours for pt in cnt]
-        baseline_std_px = np.std(baseline_y_positions) if baseline_y_positions else 0
-        baseline_std_mm = baseline_std_px / pixels_per_mm_y if pixels_per_mm_y > 0 else 0
-        
-        # Calcola la complessità del tratto (stroke complexity)
-        total_contour_points = sum([len(cnt) for cnt in contours])
-        stroke_complexity = total_contour_points / (w * h) if w * h > 0 else 0
-        
-        # Calcola il numero di componenti connesse
-        num_components = len(contours) if contours else 0
-        
-        # ==============================================
-        # CALCOLA PARAMETRI DI NATURALEZZA
-        # ==============================================
-        
-        print(f"[NATURALEZZA] Inizio calcolo parametri di naturalezza...", file=sys.stderr)
-        
-        # 1. Calcola il Fluidity Score (Punteggio di Fluidità)
-        fluidity_score = calculate_fluidity_score(processed, contours)
-        print(f"[NATURALEZZA] Fluidity Score: {fluidity_score:.2f}", file=sys.stderr)
-        
-        # 2. Calcola la Pressure Consistency (Consistenza della Pressione) 
-        pressure_consistency = calculate_pressure_consistency(image, processed)
-        print(f"[NATURALEZZA] Pressure Consistency: {pressure_consistency:.2f}", file=sys.stderr)
-        
-        # 3. Calcola il Coordination Index (Indice di Coordinazione)
-        coordination_index = calculate_coordination_index(contours, processed)
-        print(f"[NATURALEZZA] Coordination Index: {coordination_index:.2f}", file=sys.stderr)
-        
-        # 4. Calcola l'Indice di Naturalezza Combinato
-        naturalness_index = calculate_naturalness_index(fluidity_score, pressure_consistency, coordination_index)
-        print(f"[NATURALEZZA] Naturalness Index FINALE: {naturalness_index:.2f}", file=sys.stderr)
-        
-        # ==============================================
-        # FINE CALCOLI NATURALEZZA
-        # ==============================================
-        
-        # Costruisci il risultato con i parametri calibrati alle dimensioni reali
-        result = {
+        # Calcola i parametri richiesti usando le dimensioni reali calibrate
+        parameters = SIGNATURE_FEATURES.run({
+            "context": context,
+            "gray": image,
+            "real_width_mm": real_width_mm,
+            "real_height_mm": real_height_mm,
+            "calibration": (pixels_per_mm_x, pixels_per_mm_y, pixels_per_mm),
+        }, features)
+        
+        # Costruisci il risultato con i parametri calibrati alle dimensioni reali; le stringhe
+        # del display PDF sono formattate solo quando vengono lette
+        return SignatureFeatures.from_parameters({
             'real_width_mm': real_width_mm,
             'real_height_mm': real_height_mm,
             'pixels_per_mm': pixels_per_mm,
             'original_width': original_width,
             'original_height': original_height,
-            'Proportion': proportion,
-            'Inclination': inclination,
-            'PressureMean': pressure_mean,
-            'PressureStd': pressure_std,
-            'AvgCurvature': curvature,
-            'Readability': readability,
-            'WritingStyle': style,
-            'AvgAsolaSize': avg_asola_size_mm,  # In mm²
-            'AvgSpacing': avg_spacing_mm,      # In mm
-            'Velocity': velocity,
-            'OverlapRatio': overlap_ratio,
-            'LetterConnections': letter_connections,
-            'BaselineStdMm': baseline_std_mm,  # In mm
-            'StrokeComplexity': stroke_complexity,  # Densità dei punti del contorno
-            'ConnectedComponents': num_components,  # Numero di componenti separate
-            'Dimensions': (actual_width_mm, actual_height_mm),
-            
-            # ==============================================
-            # NUOVI PARAMETRI DI NATURALEZZA
-            # ==============================================
-            'FluidityScore': fluidity_score,          # Punteggio di fluidità (0-100)
-            'PressureConsistency': pressure_consistency,  # Consistenza della pressione (0-100)
-            'CoordinationIndex': coordination_index,   # Indice di coordinazione (0-100)  
-            'NaturalnessIndex': naturalness_index,     # Indice di naturalezza finale (0-100)
-            
-            # ==============================================
-            # VALORI PRE-FORMATTATI PER IL DISPLAY PDF
-            # ==============================================
-            'display': {
-                'dimensions_px': f"{original_width}x{original_height} px",
-                'dimensions_mm': f"{real_width_mm:.1f}x{real_height_mm:.1f} mm",
-                'pressure_mean': f"{pressure_mean:.1f}",
-                'pressure_std': f"{pressure_std:.2f}",
-                'proportion': f"{proportion:.3f}",
-                'inclination': f"{inclination:.1f}°",
-                'curvature': f"{curvature:.3f}",
-                'velocity': f"{velocity:.2f}/5",
-                'asola_size': f"{avg_asola_size_mm:.2f} mm²",
-                'spacing': f"{avg_spacing_mm:.2f} mm",
-                'overlap_ratio': f"{overlap_ratio * 100:.1f}%",
-                'letter_connections': f"{letter_connections:.2f}",
-                'baseline_std': f"{baseline_std_mm:.2f} mm",
-                'fluidity_score': f"{fluidity_score:.1f}%",
-                'pressure_consistency': f"{pressure_consistency:.1f}%",
-                'coordination_index': f"{coordination_index:.1f}%",
-                'naturalness_index': f"{naturalness_index:.1f}%"
-            }
-        }
-            
-        return result
+            **parameters
+        })
         
     except Exception as e:
         print(f"Errore nell'analisi della firma con dimensioni: {str(e)}", file=sys.stderr)
         return {"error": str(e)}
 
-def compare_signatures_deprecated(verifica_path, comp_path, generate_report=False, case_info=None, project_id=None, dpi=DEFAULT_DPI):
+# Versione dell'algoritmo di estrazione: incrementarla invalida la cache dei parametri
+FEATURE_ALGORITHM_VERSION = "1"
+
+# Funzioni e moduli che determinano i parametri estratti: anche il loro sorgente entra nella
+# versione, così qualsiasi modifica al codice delle feature invalida automaticamente la cache
+FEATURE_FUNCTIONS = [
+    contour_kernels,
+    feature_engine,
+    preprocess_image,
+    SignatureImageContext,
+    calculate_curvature,
+    calculate_circularity,
+    _segment_direction_means,
+    estimate_signature_inclination,
+    calculate_signature_inclination,
+    count_junction_points,
+    count_letter_connections,
+    calculate_fluidity_score,
+    calculate_pressure_consistency,
+    calculate_coordination_index,
+    calculate_naturalness_index,
+    analyze_signature_with_dimensions,
+    *SIGNATURE_FEATURES.functions(),
+    signature_features,
+]
+
+_feature_algorithm_version = None
+
+def get_feature_algorithm_version():
     """
-    FUNZIONE DEPRECATA - utilizzare compare_signatures_with_dimensions
-    Questa funzione è mantenuta solo per compatibilità temporanea
+    Restituisce il tag di versione dell'algoritmo usato nelle chiavi della cache
+    
+    Returns:
+        Stringa "<versione>-<impronta del sorgente delle funzioni di estrazione>"
     """
-    print(f"ATTENZIONE: Uso di funzione deprecata che usa DPI. Utilizzare sempre dimensioni reali.", file=sys.stderr)
-    return {"error": "Funzione deprecata - utilizzare sempre dimensioni reali invece di DPI"}
+    global _feature_algorithm_version
+    if _feature_algorithm_version is None:
+        sources = [inspect.getsource(function) for function in FEATURE_FUNCTIONS]
+        _feature_algorithm_version = f"{FEATURE_ALGORITHM_VERSION}-{source_fingerprint(sources)}"
+    return _feature_algorithm_version
 
-def adapt_parameters_for_json(params):
+def default_feature_cache_root():
+    """Directory di default della cache, distinta per utente (creata privata da FeatureCache)"""
+    user = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "default")
+    return os.path.join(tempfile.gettempdir(), f"grapholex-feature-cache-{user}")
+
+def get_feature_cache(project_id=None):
     """
-    Adatta i parametri estratti per la serializzazione JSON
+    Restituisce la cache dei parametri per il progetto indicato
+    
+    Configurazione tramite variabili d'ambiente:
+        SIGNATURE_CACHE_DIR: directory della cache ("off" per disabilitarla; deve appartenere
+            all'utente corrente e non essere scrivibile da altri)
+        SIGNATURE_CACHE_MAX_MB: dimensione massima per progetto
+        SIGNATURE_CACHE_TTL_DAYS: validità delle voci
     
     Args:
-        params: Dizionario di parametri estratti dall'analisi
+        project_id: ID del progetto (partizione della cache)
         
     Returns:
-        Dizionario adattato per JSON
+        FeatureCache oppure None se la cache è disabilitata
     """
-    result = {}
-    for key, value in params.items():
-        if isinstance(value, (list, tuple)) and len(value) == 2:
-            # Converte tuple e liste di dimensione 2 in oggetti e arrotonda a 1 decimale per chiarezza
-            # Questo è particolarmente importante per le dimensioni
-            result[key] = {"width": round(value[0], 1), "height": round(value[1], 1)}
-        elif isinstance(value, np.ndarray):
-            # Converte array NumPy in liste
-            result[key] = value.tolist()
-        elif isinstance(value, (np.int32, np.int64, np.float32, np.float64)):
-            # Converte tipi NumPy in tipi Python nativi
-            result[key] = float(value) if "float" in str(type(value)) else int(value)
-        else:
-            result[key] = value
-    return result
+    root = os.environ.get("SIGNATURE_CACHE_DIR", default_feature_cache_root())
+    if root.strip().lower() in ("", "off", "none"):
+        return None
+    max_mb = os.environ.get("SIGNATURE_CACHE_MAX_MB")
+    ttl_days = os.environ.get("SIGNATURE_CACHE_TTL_DAYS")
+    try:
+        return FeatureCache(
+            root,
+            get_feature_algorithm_version(),
+            project_id,
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES,
+            ttl_seconds=float(ttl_days) * 24 * 3600 if ttl_days else DEFAULT_TTL_SECONDS
+        )
+    except OSError as e:
+        print(f"[CACHE] Cache non disponibile in {root}: {str(e)}", file=sys.stderr)
+        return None
 
-# Funzione principale per l'esecuzione come script
-if __name__ == "__main__":
-    # Supporto per analisi singola chiamata dal TypeScript
-    if len(sys.argv) >= 4 and sys.argv[1] == "analyze":
-        try:
-            image_path = sys.argv[2]
-            width_mm = float(sys.argv[3])
-            height_mm = float(sys.argv[4])
-            
-            print(f"[PYTHON] Analisi: {image_path} -> {width_mm}x{height_mm}mm", file=sys.stderr)
-            result = analyze_signature_with_dimensions(image_path, width_mm, height_mm)
-            
-            print(f"[PYTHON] Analisi completata con {len(result) if result and 'error' not in result else 0} parametri", file=sys.stderr)
-            print(json.dumps(result))
-            sys.exit(0)
-        except Exception as e:
-            print(f"[ERROR] Errore nell'analisi: {str(e)}", file=sys.stderr)
-            print(f"[ERROR] Stack trace: {repr(e)}", file=sys.stderr)
-            # Invece di uscire, restituisco un errore JSON
-            print(json.dumps({"error": str(e)}))
-            sys.exit(1)
+_chart_cache = None
+_chart_cache_settings = None
+
+def get_chart_cache():
+    """
+    Restituisce la cache dei grafici del processo (condivisa tra le richieste del worker)
     
-    # Supporto per test di analisi singola con dimensioni
-    if len(sys.argv) >= 4 and sys.argv[1] == "--analyze-dimensions":
+    Configurazione tramite variabili d'ambiente:
+        SIGNATURE_CHART_CACHE: "off" per disabilitarla (default: attiva in memoria)
+        SIGNATURE_CHART_CACHE_ENTRIES: numero massimo di grafici in memoria
+        SIGNATURE_CHART_CACHE_DIR: directory del livello su disco (se assente solo memoria)
+        SIGNATURE_CHART_CACHE_MAX_MB: dimensione massima del livello su disco
+        
+    Returns:
+        ChartCache oppure None se la cache è disabilitata
+    """
+    global _chart_cache, _chart_cache_settings
+    if os.environ.get("SIGNATURE_CHART_CACHE", "").strip().lower() in ("off", "none", "0"):
+        return None
+    settings = tuple(os.environ.get(name) for name in
+                     ("SIGNATURE_CHART_CACHE_ENTRIES", "SIGNATURE_CHART_CACHE_DIR", "SIGNATURE_CHART_CACHE_MAX_MB"))
+    if _chart_cache is None or settings != _chart_cache_settings:
+        entries, directory, max_mb = settings
         try:
-            image_path = sys.argv[2]
-            width_mm = float(sys.argv[3])
+            _chart_cache = ChartCache(
+                max_entries=int(entries) if entries else DEFAULT_CHART_ENTRIES,
+                directory=directory if directory and directory.strip().lower() not in ("off", "none") else None,
+                disk_max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_CHART_DISK_MAX_BYTES
+            )
+        except OSError as e:
+            print(f"[CHART-CACHE] Livello su disco non disponibile in {directory}: {str(e)}", file=sys.stderr)
+            _chart_cache = ChartCache(max_entries=int(entries) if entries else DEFAULT_CHART_ENTRIES)
+        _chart_cache_settings = settings
+    return _chart_cache
+
+def get_feature_store():
+    """
+    Restituisce l'archivio dei parametri numerici per le ricerche su tutte le firme analizzate
+    
+    Configurazione tramite variabili d'ambiente:
+        SIGNATURE_STORE_DIR: directory dell'archivio (se assente l'archivio è disabilitato)
+        
+    Returns:
+        FeatureStore oppure None se l'archivio è disabilitato o non disponibile
+    """
+    root = os.environ.get("SIGNATURE_STORE_DIR", "")
+    if root.strip().lower() in ("", "off", "none"):
+        return None
+    try:
+        return FeatureStore(root)
+    except (OSError, ValueError) as e:
+        print(f"[STORE] Archivio non disponibile in {root}: {str(e)}", file=sys.stderr)
+        return None
+
+def store_signature_features(store, result, image_hash, real_width_mm, real_height_mm, project_id=None):
+    """Registra nell'archivio una firma analizzata, se non è già presente (controllo sotto il lock)"""
+    algorithm_version = get_feature_algorithm_version()
+    try:
+        store.append(result, image_hash, real_width_mm, real_height_mm, algorithm_version, project_id)
+    except OSError as e:
+        print(f"[STORE] Errore nella registrazione della firma {image_hash[:12]}: {str(e)}", file=sys.stderr)
+
+def analyze_signature_cached(image_path, real_width_mm, real_height_mm, project_id=None, context=None, features=None):
+    """
+    Come analyze_signature_with_dimensions, ma consulta prima la cache su disco
+    (chiave: hash dei byte dell'immagine + dimensioni reali + versione algoritmo)
+    
+    Args:
+        image_path: Percorso dell'immagine della firma
+        real_width_mm: Larghezza reale in mm
+        real_height_mm: Altezza reale in mm
+        project_id: ID del progetto (partizione della cache)
+        context: SignatureImageContext già aperto per l'immagine (opzionale)
+        features: Sottoinsieme di parametri da calcolare (None = tutti); le analisi
+            parziali non passano dalla cache, che contiene solo risultati completi
+        
+    Returns:
+        Dizionario con i parametri estratti dalla firma
+    """
+    context = context or SignatureImageContext(image_path)
+    if features is not None:
+        return analyze_signature_with_dimensions(image_path, real_width_mm, real_height_mm, context, features)
+    
+    cache = get_feature_cache(project_id)
+    store = get_feature_store()
+    if (cache is None and store is None) or context.data is None:
+        # Senza cache (o senza file leggibile) l'analisi produce il consueto risultato/errore
+        return analyze_signature_with_dimensions(image_path, real_width_mm, real_height_mm, context)
+    
+    # L'hash usa gli stessi byte che verranno decodificati per l'analisi
+    image_hash = hash_bytes(context.data)
+    if cache is not None:
+        key = cache.make_key(image_hash, real_width_mm, real_height_mm)
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"[CACHE] Parametri in cache per {image_path} ({key[:12]})", file=sys.stderr)
+            # Registrata anche dagli hit: la cache può essere stata popolata con l'archivio
+            # disattivato o in un'altra directory (append non crea duplicati)
+            if store is not None:
+                store_signature_features(store, cached, image_hash, real_width_mm, real_height_mm, project_id)
+            return cached
+    
+    result = analyze_signature_with_dimensions(image_path, real_width_mm, real_height_mm, context)
+    if result and "error" not in result:
+        if cache is not None:
+            cache.put(key, result)
+        if store is not None:
+            store_signature_features(store, result, image_hash, real_width_mm, real_height_mm, project_id)
+    return result
+
+def parse_scan_ranges(value):
+    """
+    Converte gli intervalli della CLI "Inclination=-5:5,PressureMean=120:140"
+    
+    Returns:
+        Dizionario {parametro: (minimo, massimo)}
+    """
+    ranges = {}
+    for condition in value.split(","):
+        name, _, bounds = condition.partition("=")
+        low, _, high = bounds.partition(":")
+        if not name.strip() or not low.strip() or not high.strip():
+            raise ValueError(f"Intervallo non valido: {condition} (formato: Parametro=minimo:massimo)")
+        ranges[name.strip()] = (float(low), float(high))
+    return ranges
+
+def scan_signature_features(ranges, project_id=None, limit=None, all_versions=False):
+    """
+    Cerca nell'archivio le firme con i parametri entro gli intervalli indicati
+    
+    Args:
+        ranges: Dizionario {parametro: (minimo, massimo)}
+        project_id: Se indicato, solo le firme del progetto
+        limit: Numero massimo di firme restituite (il conteggio resta completo)
+        all_versions: Se True include le firme analizzate con versioni precedenti dell'algoritmo
+        
+    Returns:
+        Dizionario con il numero di firme trovate e i loro parametri
+    """
+    try:
+        store = get_feature_store()
+        if store is None:
+            raise ValueError("Archivio dei parametri non configurato (SIGNATURE_STORE_DIR)")
+        algorithm_version = None if all_versions else get_feature_algorithm_version()
+        start = time.perf_counter()
+        ids = store.scan({name: tuple(bounds) for name, bounds in ranges.items()}, project_id, algorithm_version)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"[STORE] {len(ids)} firme su {len(store)} in {elapsed_ms:.1f} ms", file=sys.stderr)
+        return {
+            "signatures": len(store),
+            "matches": len(ids),
+            "results": store.records(ids[:limit] if limit else ids)
+        }
+    except Exception as e:
+        print(f"Errore nella ricerca nell'archivio dei parametri: {str(e)}", file=sys.stderr)
+        return {"error": str(e)}
+
+def compare_signatures_deprecated(verifica_path, comp_path, generate_report=False, case_info=None, project_id=None, dpi=DEFAULT_DPI):
+    """
+    FUNZIONE DEPRECATA - utilizzare compare_signatures_with_dimensions
+    Questa funzione è mantenuta solo per compatibilità temporanea
+    """
+    print(f"ATTENZIONE: Uso di funzione deprecata che usa DPI. Utilizzare sempre dimensioni reali.", file=sys.stderr)
+    return {"error": "Funzione deprecata - utilizzare sempre dimensioni reali invece di DPI"}
+
+def adapt_parameters_for_json(params):
+    """
+    Adatta i parametri estratti per la serializzazione JSON
+    
+    Args:
+        params: Dizionario di parametri estratti dall'analisi
+        
+    Returns:
+        Dizionario adattato per JSON
+    """
+    result = {}
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)) and len(value) == 2:
+            # Converte tuple e liste di dimensione 2 in oggetti e arrotonda a 1 decimale per chiarezza
+            # Questo è particolarmente importante per le dimensioni
+            result[key] = {"width": round(value[0], 1), "height": round(value[1], 1)}
+        elif isinstance(value, np.ndarray):
+            # Converte array NumPy in liste
+            result[key] = value.tolist()
+        elif isinstance(value, (np.int32, np.int64, np.float32, np.float64)):
+            # Converte tipi NumPy in tipi Python nativi
+            result[key] = float(value) if "float" in str(type(value)) else int(value)
+        else:
+            result[key] = value
+    return result
+
+def get_cli_option(name, default=None):
+    """
+    Restituisce il valore che segue un'opzione della riga di comando
+    
+    Args:
+        name: Nome dell'opzione (es. "--workers")
+        default: Valore restituito se l'opzione è assente
+        
+    Returns:
+        Stringa del valore oppure default
+    """
+    if name in sys.argv:
+        idx = sys.argv.index(name)
+        if idx + 1 < len(sys.argv):
+            return sys.argv[idx + 1]
+    return default
+
+def parse_dimensions(value):
+    """
+    Converte le dimensioni reali nel formato della CLI ("80x30") o come lista [80, 30]
+    
+    Args:
+        value: Stringa "larghezzaxaltezza" oppure lista/tupla di due numeri
+        
+    Returns:
+        Tupla (width_mm, height_mm) oppure None se non valide
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split('x')
+    if isinstance(value, dict):
+        value = (value.get('width'), value.get('height'))
+    if len(value) != 2:
+        return None
+    return (float(value[0]), float(value[1]))
+
+def compare_signatures_for_json(verifica_path, comp_path, verifica_dims, reference_dims, generate_report=False, case_info=None, project_id=None,
+                                chart_renderer=None, chart_output=None):
+    """
+    Confronta due firme e restituisce il risultato pronto per la serializzazione JSON,
+    con lo stesso formato prodotto dalla CLI
+    
+    Args:
+        verifica_path: Percorso della firma da verificare
+        comp_path: Percorso della firma di riferimento
+        verifica_dims: Tupla (width_mm, height_mm) per la firma da verificare
+        reference_dims: Tupla (width_mm, height_mm) per la firma di riferimento
+        generate_report: Se True, genera anche un report PDF
+        case_info: Informazioni sul caso per il report
+        project_id: ID del progetto per garantire l'isolamento dei dati
+        chart_renderer: Renderer dei grafici, "matplotlib" o "opencv" (default: SIGNATURE_CHART_RENDERER)
+        chart_output: Formato dei grafici, "png" (default) o "data"
+        
+    Returns:
+        Dizionario con i risultati del confronto
+    """
+    # Solo dimensioni reali sono supportate - no fallback ai DPI
+    if verifica_dims and reference_dims:
+        print(f"Confronto tra firme con dimensioni reali - verifica={verifica_dims[0]}x{verifica_dims[1]}mm, reference={reference_dims[0]}x{reference_dims[1]}mm", file=sys.stderr)
+        result = compare_signatures_with_dimensions(verifica_path, comp_path, verifica_dims, reference_dims, generate_report, case_info, project_id,
+                                                    chart_renderer, chart_output)
+    else:
+        print(f"ERRORE: Dimensioni reali obbligatorie per entrambe le firme - no DPI fallback", file=sys.stderr)
+        result = {"error": "Dimensioni reali obbligatorie per entrambe le firme"}
+    
+    # Adatta i parametri per JSON
+    if "verifica_parameters" in result:
+        result["verifica_parameters"] = adapt_parameters_for_json(result["verifica_parameters"])
+    if "reference_parameters" in result:
+        result["reference_parameters"] = adapt_parameters_for_json(result["reference_parameters"])
+    
+    return result
+
+def read_batch_manifest(manifest_path):
+    """
+    Legge il manifest per l'analisi batch: una firma per riga, come CSV
+    "image_path,width_mm,height_mm" oppure come oggetto JSON con le stesse chiavi.
+    Righe vuote, commenti (#) e l'eventuale intestazione CSV vengono ignorati
+    
+    Args:
+        manifest_path: Percorso del manifest ("-" per leggere da stdin)
+        
+    Returns:
+        Lista di tuple (indice, image_path, width_mm, height_mm)
+    """
+    stream = sys.stdin if manifest_path == "-" else open(manifest_path, encoding="utf-8")
+    rows = []
+    try:
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                fields = (entry["image_path"], entry["width_mm"], entry["height_mm"])
+            else:
+                fields = [field.strip() for field in line.rsplit(",", 2)]
+                if fields[0] == "image_path":
+                    continue
+            rows.append((len(rows), fields[0], float(fields[1]), float(fields[2])))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return rows
+
+def analyze_manifest_row(row, project_id=None):
+    """
+    Analizza una riga del manifest batch (eseguita nei processi del pool)
+    
+    Args:
+        row: Tupla (indice, image_path, width_mm, height_mm)
+        project_id: ID del progetto (partizione della cache dei parametri)
+        
+    Returns:
+        Dizionario con indice, percorso e risultato JSON oppure errore
+    """
+    index, image_path, width_mm, height_mm = row
+    entry = {"index": index, "image_path": image_path}
+    try:
+        result = analyze_signature_cached(image_path, width_mm, height_mm, project_id)
+        if not result or "error" in result:
+            entry["error"] = result.get("error") if result else "Analisi fallita"
+        else:
+            entry["result"] = adapt_parameters_for_json(result)
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+def batch_analyze(manifest_path, workers=None, ordered=False, output_stream=None, project_id=None):
+    """
+    Analizza tutte le firme del manifest con un pool di processi, scrivendo una riga
+    JSON per firma appena la sua analisi termina
+    
+    Args:
+        manifest_path: Percorso del manifest ("-" per stdin)
+        workers: Numero di processi (default: numero di CPU)
+        ordered: Se True mantiene l'ordine del manifest, altrimenti emette in ordine di completamento
+        output_stream: Stream di output (default stdout)
+        project_id: ID del progetto (partizione della cache dei parametri)
+        
+    Returns:
+        Numero di firme analizzate con errore
+    """
+    import multiprocessing
+    from functools import partial
+    
+    output_stream = output_stream or sys.stdout
+    rows = read_batch_manifest(manifest_path)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(rows) or 1))
+    print(f"[BATCH] {len(rows)} firme da analizzare con {workers} processi ({'ordinato' if ordered else 'non ordinato'})", file=sys.stderr)
+    
+    errors = 0
+    with multiprocessing.Pool(workers) as pool:
+        analyze_row = partial(analyze_manifest_row, project_id=project_id)
+        results = pool.imap(analyze_row, rows) if ordered else pool.imap_unordered(analyze_row, rows)
+        for entry in results:
+            if "error" in entry:
+                errors += 1
+            output_stream.write(json.dumps(entry) + "\n")
+            output_stream.flush()
+    
+    print(f"[BATCH] Completato: {len(rows) - errors} analisi riuscite, {errors} errori", file=sys.stderr)
+    return errors
+
+# Firma da verificare condivisa dai processi del pool di compare_against_references:
+# immagine preparata per l'SSIM e parametri già estratti
+_questioned_signature = None
+
+def _init_reference_worker(questioned_ssim, verifica_data):
+    global _questioned_signature
+    _questioned_signature = (questioned_ssim, verifica_data)
+
+def read_reference_list(references):
+    """
+    Normalizza l'elenco dei riferimenti in righe (indice, image_path, width_mm, height_mm)
+    
+    Args:
+        references: Lista di dizionari {"image_path"|"path", "width_mm", "height_mm"}
+            oppure {"image_path"|"path", "dimensions": "80x30"}, o di tuple (path, width_mm, height_mm)
+        
+    Returns:
+        Lista di tuple nello stesso formato di read_batch_manifest
+    """
+    rows = []
+    for reference in references:
+        if isinstance(reference, dict):
+            image_path = reference.get("image_path") or reference.get("path")
+            if "dimensions" in reference:
+                width_mm, height_mm = parse_dimensions(reference["dimensions"])
+            else:
+                width_mm, height_mm = reference["width_mm"], reference["height_mm"]
+        else:
+            image_path, width_mm, height_mm = reference
+        rows.append((len(rows), image_path, float(width_mm), float(height_mm)))
+    return rows
+
+def compare_reference_row(row, project_id=None):
+    """
+    Confronta un riferimento con la firma da verificare condivisa (eseguita nei processi del pool)
+    
+    Args:
+        row: Tupla (indice, image_path, width_mm, height_mm) del riferimento
+        project_id: ID del progetto (partizione della cache dei parametri)
+        
+    Returns:
+        Dizionario con SSIM, punteggio, compatibilità, verdetto e parametri del riferimento, oppure errore
+    """
+    index, image_path, width_mm, height_mm = row
+    entry = {"index": index, "image_path": image_path, "dimensions": [width_mm, height_mm]}
+    try:
+        questioned_ssim, verifica_data = _questioned_signature
+        context = SignatureImageContext(image_path)
+        if context.gray is None:
+            raise ValueError(f"Impossibile leggere l'immagine: {image_path}")
+        
+        reference_data = analyze_signature_cached(image_path, width_mm, height_mm, project_id, context)
+        if not reference_data or "error" in reference_data:
+            entry["error"] = reference_data.get("error") if reference_data else "Analisi fallita"
+            return entry
+        
+        # Solo i termini incrociati dell'SSIM: la firma da verificare è già preparata
+        backend = get_ssim_backend()
+        ssim_value = backend.score_prepared(questioned_ssim, backend.prepare(context.processed))
+        entry.update(score_signature_pair(ssim_value, verifica_data, reference_data))
+        entry["ssim"] = ssim_value
+        entry["reference_parameters"] = reference_data
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+def compare_against_references(verifica_path, verifica_dims, references, top_k=3, workers=None, project_id=None, chart_renderer=None,
+                               chart_output=None):
+    """
+    Confronta una firma in verifica con molti riferimenti: la firma in verifica è analizzata
+    una sola volta, le analisi dei riferimenti (o le letture dalla cache) sono distribuite su
+    un pool di processi e i grafici sono generati solo per i primi top_k risultati
+    
+    Args:
+        verifica_path: Percorso della firma da verificare
+        verifica_dims: Tupla (width_mm, height_mm) della firma da verificare
+        references: Riferimenti nel formato accettato da read_reference_list
+        top_k: Numero di risultati migliori per cui generare i grafici
+        workers: Numero di processi (default: numero di CPU)
+        project_id: ID del progetto (partizione della cache dei parametri)
+        chart_renderer: Renderer dei grafici, "matplotlib" o "opencv" (default: SIGNATURE_CHART_RENDERER)
+        chart_output: Formato dei grafici, "png" (default) o "data"
+        
+    Returns:
+        Dizionario con i parametri della firma in verifica e la classifica dei riferimenti
+        per similarità finale decrescente; i riferimenti non analizzabili sono in "errors"
+    """
+    import multiprocessing
+    from functools import partial
+    
+    try:
+        chart_output = chart_output_mode(chart_output)
+        rows = read_reference_list(references)
+        verifica_context = SignatureImageContext(verifica_path)
+        if verifica_context.gray is None:
+            raise ValueError(f"Impossibile leggere l'immagine: {verifica_path}")
+        
+        verifica_data = analyze_signature_cached(verifica_path, verifica_dims[0], verifica_dims[1], project_id, verifica_context)
+        if not verifica_data or "error" in verifica_data:
+            raise ValueError(verifica_data.get("error") if verifica_data else "Errore nell'analisi della firma da verificare")
+        questioned_ssim = get_ssim_backend().prepare(verifica_context.processed)
+        
+        # I processi daemon (worker del servizio) non possono avere figli: confronto in linea
+        workers = max(1, min(workers or os.cpu_count() or 1, len(rows) or 1))
+        if multiprocessing.current_process().daemon:
+            workers = 1
+        print(f"[COMPARE-MANY] {len(rows)} riferimenti con {workers} processi", file=sys.stderr)
+        
+        compare_row = partial(compare_reference_row, project_id=project_id)
+        if workers == 1:
+            _init_reference_worker(questioned_ssim, verifica_data)
+            entries = [compare_row(row) for row in rows]
+        else:
+            with multiprocessing.Pool(workers, initializer=_init_reference_worker, initargs=(questioned_ssim, verifica_data)) as pool:
+                entries = list(pool.imap_unordered(compare_row, rows))
+        
+        errors = sorted((entry for entry in entries if "error" in entry), key=lambda entry: entry["index"])
+        ranked = sorted((entry for entry in entries if "error" not in entry), key=lambda entry: (-entry["similarity"], entry["index"]))
+        
+        results = []
+        for rank, entry in enumerate(ranked, start=1):
+            reference_data = entry["reference_parameters"]
+            result = {
+                "rank": rank,
+                "index": entry["index"],
+                "image_path": entry["image_path"],
+                "dimensions": entry["dimensions"],
+                "similarity": entry["similarity"],
+                "ssim": entry["ssim"],
+                "naturalness": entry["naturalness"] / 100.0,
+                "verdict": entry["verdict"],
+                "confidence": entry["confidence"],
+                "explanation": entry["explanation"],
+                "compatibilities": entry["compatibilities"],
+                "reference_parameters": adapt_parameters_for_json(reference_data)
+            }
+            # Grafici solo per i migliori top_k riferimenti
+            if rank <= top_k:
+                result.update(create_chart_output(verifica_data, reference_data, entry["compatibilities"], chart_output, chart_renderer))
+            results.append(result)
+        
+        print(f"[COMPARE-MANY] Completato: {len(results)} riferimenti confrontati, {len(errors)} errori", file=sys.stderr)
+        return {
+            "verifica_parameters": adapt_parameters_for_json(verifica_data),
+            "references": len(rows),
+            "top_k": top_k,
+            "results": results,
+            "errors": [{"index": entry["index"], "image_path": entry["image_path"], "error": entry["error"]} for entry in errors]
+        }
+    
+    except Exception as e:
+        print(f"Errore durante il confronto con i riferimenti: {str(e)}", file=sys.stderr)
+        return {"error": str(e)}
+
+# Firme condivise dai processi del pool di similarity_matrix: (immagine preparata per l'SSIM, parametri)
+_matrix_signatures = None
+
+def _init_matrix_worker(signatures):
+    global _matrix_signatures
+    _matrix_signatures = signatures
+
+def prepare_matrix_row(row, project_id=None):
+    """
+    Analizza una firma (tramite cache) e ne prepara i dati SSIM per la matrice di similarità
+    
+    Args:
+        row: Tupla (indice, image_path, width_mm, height_mm)
+        project_id: ID del progetto (partizione della cache dei parametri)
+        
+    Returns:
+        Tupla (indice, immagine preparata, parametri) oppure (indice, None, messaggio di errore)
+    """
+    index, image_path, width_mm, height_mm = row
+    try:
+        context = SignatureImageContext(image_path)
+        if context.gray is None:
+            raise ValueError(f"Impossibile leggere l'immagine: {image_path}")
+        data = analyze_signature_cached(image_path, width_mm, height_mm, project_id, context)
+        if not data or "error" in data:
+            raise ValueError(data.get("error") if data else "Analisi fallita")
+        return index, get_ssim_backend().prepare(context.processed), data
+    except Exception as e:
+        return index, None, str(e)
+
+def prepare_signature_rows(rows, workers=None, project_id=None):
+    """
+    Analizza e prepara per l'SSIM più firme con un pool di processi (in linea nei processi
+    daemon o con un solo processo)
+    
+    Args:
+        rows: Lista di tuple (indice, image_path, width_mm, height_mm)
+        workers: Numero di processi (default: numero di CPU)
+        project_id: ID del progetto (partizione della cache dei parametri)
+        
+    Returns:
+        Lista di tuple restituite da prepare_matrix_row, nell'ordine delle righe
+    """
+    import multiprocessing
+    from functools import partial
+    
+    workers = max(1, min(workers or os.cpu_count() or 1, len(rows) or 1))
+    if multiprocessing.current_process().daemon:
+        workers = 1
+    prepare_row = partial(prepare_matrix_row, project_id=project_id)
+    if workers == 1:
+        return [prepare_row(row) for row in rows]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(prepare_row, rows)
+
+def score_matrix_pair(pair):
+    """
+    Punteggio di una coppia (i, j) della matrice con la stessa logica del confronto singolo
+    
+    Returns:
+        Tupla (i, j, SSIM, punteggio parametri, similarità finale, naturalezza, verdetto, compatibilità)
+    """
+    i, j = pair
+    (prepared_i, data_i), (prepared_j, data_j) = _matrix_signatures[i], _matrix_signatures[j]
+    ssim_value = get_ssim_backend().score_prepared(prepared_i, prepared_j)
+    score = score_signature_pair(ssim_value, data_i, data_j)
+    return (i, j, ssim_value, score["parameters_score"], score["similarity"], score["naturalness"],
+            score["verdict"], score["compatibilities"])
+
+def similarity_matrix(references, workers=None, project_id=None, progress_every=None):
+    """
+    Matrice di similarità N×N tra firme di riferimento (concordanza degli esemplari):
+    ogni firma è analizzata e preparata per l'SSIM una sola volta, e le N(N-1)/2 coppie
+    (la matrice è simmetrica) sono distribuite su un pool di processi
+    
+    Args:
+        references: Firme nel formato accettato da read_reference_list
+        workers: Numero di processi (default: numero di CPU)
+        project_id: ID del progetto (partizione della cache dei parametri)
+        progress_every: Coppie tra due messaggi di avanzamento (default: circa il 5%)
+        
+    Returns:
+        Dizionario di array NumPy: similarity, ssim, parameters_score, naturalness (N×N,
+        NaN sulla diagonale e per le firme non analizzabili), compatibilities (N×N×P, in
+        percentuale), verdict_codes (N×N, -1 se assente) con verdict_labels, e inoltre
+        parameters, image_paths, dimensions ed errors
+    """
+    import multiprocessing
+    
+    rows = read_reference_list(references)
+    n = len(rows)
+    workers = max(1, min(workers or os.cpu_count() or 1, n or 1))
+    if multiprocessing.current_process().daemon:
+        workers = 1
+    
+    # Fase 1: analisi e preparazione SSIM di ogni firma, una sola volta
+    prepared = prepare_signature_rows(rows, workers, project_id)
+    
+    signatures = [None] * n
+    errors = []
+    for index, prepared_ssim, data in prepared:
+        if prepared_ssim is None:
+            errors.append({"index": index, "image_path": rows[index][1], "error": data})
+        else:
+            signatures[index] = (prepared_ssim, data)
+    
+    # Fase 2: solo il triangolo superiore, poi specchiato
+    valid = [index for index in range(n) if signatures[index] is not None]
+    pairs = [(valid[a], valid[b]) for a in range(len(valid)) for b in range(a + 1, len(valid))]
+    parameter_names = [name for name, _ in KEY_PARAMETERS]
+    parameter_index = {name: p for p, name in enumerate(parameter_names)}
+    
+    similarity = np.full((n, n), np.nan)
+    ssim = np.full((n, n), np.nan)
+    parameters_score = np.full((n, n), np.nan)
+    naturalness = np.full((n, n), np.nan)
+    compatibilities = np.full((n, n, len(parameter_names)), np.nan, dtype=np.float32)
+    verdicts = {}
+    verdict_codes = np.full((n, n), -1, dtype=np.int8)
+    
+    print(f"[MATRIX] {len(valid)} firme, {len(pairs)} coppie con {workers} processi", file=sys.stderr)
+    progress_every = progress_every or max(1, len(pairs) // 20)
+    
+    def collect(results):
+        for done, (i, j, ssim_value, params_value, final_value, natural_value, verdict, compat) in enumerate(results, start=1):
+            ssim[i, j] = ssim[j, i] = ssim_value
+            parameters_score[i, j] = parameters_score[j, i] = params_value
+            similarity[i, j] = similarity[j, i] = final_value
+            naturalness[i, j] = naturalness[j, i] = natural_value
+            verdict_codes[i, j] = verdict_codes[j, i] = verdicts.setdefault(verdict, len(verdicts))
+            for name, value in compat.items():
+                compatibilities[i, j, parameter_index[name]] = compatibilities[j, i, parameter_index[name]] = value
+            if done % progress_every == 0 or done == len(pairs):
+                print(f"[MATRIX] {done}/{len(pairs)} coppie", file=sys.stderr)
+    
+    if workers == 1 or len(pairs) < 2:
+        _init_matrix_worker(signatures)
+        collect(score_matrix_pair(pair) for pair in pairs)
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_matrix_worker, initargs=(signatures,)) as pool:
+            chunksize = max(1, len(pairs) // (workers * 16))
+            collect(pool.imap_unordered(score_matrix_pair, pairs, chunksize=chunksize))
+    
+    print(f"[MATRIX] Completato: {len(pairs)} coppie, {len(errors)} errori", file=sys.stderr)
+    return {
+        "similarity": similarity,
+        "ssim": ssim,
+        "parameters_score": parameters_score,
+        "naturalness": naturalness,
+        "compatibilities": compatibilities,
+        "verdict_codes": verdict_codes,
+        "verdict_labels": np.array(list(verdicts), dtype=str),
+        "parameters": np.array(parameter_names, dtype=str),
+        "image_paths": np.array([row[1] for row in rows], dtype=str),
+        "dimensions": np.array([row[2:] for row in rows], dtype=float).reshape(n, 2),
+        "errors": errors
+    }
+
+def write_similarity_matrix(matrix, output_path):
+    """
+    Salva la matrice di similarità come artefatto compatto: archivio NumPy (.npz) con tutti
+    gli array e CSV con una riga per coppia (triangolo superiore)
+    
+    Args:
+        matrix: Dizionario restituito da similarity_matrix
+        output_path: Percorso di output, con o senza estensione
+        
+    Returns:
+        Tupla (percorso .npz, percorso .csv)
+    """
+    import csv
+    
+    base = os.path.splitext(output_path)[0]
+    npz_path, csv_path = base + ".npz", base + ".csv"
+    np.savez_compressed(npz_path, **{name: value for name, value in matrix.items() if name != "errors"})
+    
+    paths, labels = matrix["image_paths"], matrix["verdict_labels"]
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["i", "j", "image_path_i", "image_path_j", "ssim", "parameters_score", "similarity", "naturalness", "verdict"])
+        for i, j in zip(*np.triu_indices(len(paths), k=1)):
+            if matrix["verdict_codes"][i, j] < 0:
+                continue
+            writer.writerow([i, j, paths[i], paths[j],
+                             f"{matrix['ssim'][i, j]:.6f}", f"{matrix['parameters_score'][i, j]:.6f}",
+                             f"{matrix['similarity'][i, j]:.6f}", f"{matrix['naturalness'][i, j]:.2f}",
+                             labels[matrix["verdict_codes"][i, j]]])
+    return npz_path, csv_path
+
+def rescore_comparisons(records, config=None):
+    """
+    Ricalcola similarità finale, compatibilità, verdetto, confidenza e spiegazione di
+    confronti salvati, senza rianalizzare le immagini: i parametri salvati sono confrontati
+    in blocco dal motore vettoriale con la configurazione di punteggio indicata
+    
+    Args:
+        records: Lista di dizionari con verifica_parameters, reference_parameters e ssim
+            (per i confronti salvati senza ssim, il valore è ricavato da similarity invertendo
+            la combinazione della configurazione predefinita); id è riportato nel risultato
+        config: compatibility_engine.ScoringConfig (default: configurazione predefinita)
+        
+    Returns:
+        Lista di risultati nell'ordine dei record, con {"error": ...} per i record non validi
+    """
+    config = config or compatibility_engine.DEFAULT_SCORING_CONFIG
+    default_config = compatibility_engine.DEFAULT_SCORING_CONFIG
+    fingerprint = config.fingerprint()
+    results = [None] * len(records)
+    
+    rows, verifica_rows, reference_rows, ssim, similarity = [], [], [], [], []
+    for index, record in enumerate(records):
+        try:
+            # Ingresso dei parametri salvati: unica normalizzazione dei nomi
+            verifica_data = normalize_parameters(record["verifica_parameters"])
+            comp_data = normalize_parameters(record["reference_parameters"])
+            if not isinstance(verifica_data, dict) or not isinstance(comp_data, dict):
+                raise ValueError("Parametri salvati non validi")
+            if record.get("ssim") is None and record.get("similarity") is None:
+                raise ValueError("SSIM e similarità assenti")
+            rows.append(index)
+            verifica_rows.append(verifica_data)
+            reference_rows.append(comp_data)
+            ssim.append(np.nan if record.get("ssim") is None else float(record["ssim"]))
+            similarity.append(np.nan if record.get("similarity") is None else float(record["similarity"]))
+        except KeyError as e:
+            results[index] = {"id": record.get("id"), "error": f"Campo mancante: {e.args[0]}"}
+        except Exception as e:
+            results[index] = {"id": record.get("id"), "error": str(e)}
+    
+    if rows:
+        questioned = compatibility_engine.encode_parameter_matrix(verifica_rows)
+        references = compatibility_engine.encode_parameter_matrix(reference_rows)
+        ssim = np.array(ssim)
+        
+        # Confronti salvati senza SSIM: inverte la combinazione della configurazione predefinita
+        derived = np.isnan(ssim)
+        if derived.any():
+            legacy = compatibility_engine.score_candidates(questioned[derived], references[derived], config=default_config)
+            ssim[derived] = (np.array(similarity)[derived] - legacy["parameters_score"] * default_config.parameters_weight) / default_config.ssim_weight
+        
+        score = compatibility_engine.score_candidates(questioned, references, ssim, config)
+        for row, index in enumerate(rows):
+            final_similarity = float(score["similarity"][row])
+            avg_naturalness = (verifica_rows[row].get('NaturalnessIndex', 50.0) + reference_rows[row].get('NaturalnessIndex', 50.0)) / 2.0
+            verdict, confidence, explanation = classify_signature_intelligent(final_similarity, avg_naturalness, config.thresholds)
+            results[index] = {
+                "id": records[index].get("id"),
+                "similarity": final_similarity,
+                "ssim": float(ssim[row]),
+                "ssim_derived": bool(derived[row]),
+                "parameters_score": float(score["parameters_score"][row]),
+                "naturalness": avg_naturalness / 100.0,
+                "verdict": verdict,
+                "confidence": confidence,
+                "explanation": explanation,
+                "previous_verdict": records[index].get("verdict"),
+                "compatibilities": {
+                    name: round(float(value) * 100, 1)
+                    for name, value in zip(compatibility_engine.PARAMETER_NAMES, score["compatibilities"][row])
+                    if not np.isnan(value)
+                },
+                "scoring_version": config.version,
+                "scoring_fingerprint": fingerprint
+            }
+    return results
+
+def rescore_jsonl(input_path, config=None, output_stream=None):
+    """
+    Ricalcola in blocco i confronti salvati in un file JSONL (un confronto per riga)
+    
+    Args:
+        input_path: Percorso del file JSONL ("-" per stdin)
+        config: compatibility_engine.ScoringConfig (default: configurazione predefinita)
+        output_stream: Stream di output JSONL (default stdout)
+        
+    Returns:
+        Numero di record non ricalcolabili
+    """
+    output_stream = output_stream or sys.stdout
+    config = config or compatibility_engine.DEFAULT_SCORING_CONFIG
+    start_time = time.perf_counter()
+    
+    stream = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    try:
+        records = [json.loads(line) for line in stream if line.strip()]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    
+    results = rescore_comparisons(records, config)
+    errors = changed = 0
+    for result in results:
+        if "error" in result:
+            errors += 1
+        elif result["previous_verdict"] is not None and result["previous_verdict"] != result["verdict"]:
+            changed += 1
+        output_stream.write(json.dumps(result) + "\n")
+    output_stream.flush()
+    
+    print(f"[RESCORE] {len(records)} confronti ricalcolati con la configurazione {config.version} "
+          f"({config.fingerprint()}) in {time.perf_counter() - start_time:.2f}s: "
+          f"{changed} verdetti cambiati, {errors} errori", file=sys.stderr)
+    return errors
+
+def get_profile_directory(writer_id, project_id=None):
+    """
+    Directory del profilo di riferimento di uno scrivente (radice configurabile con
+    SIGNATURE_PROFILE_DIR; deve appartenere all'utente corrente e non essere scrivibile da altri)
+    
+    Raises:
+        PermissionError: Se la radice dei profili non è privata
+    """
+    root = os.environ.get("SIGNATURE_PROFILE_DIR") or reference_profiles.default_profile_root()
+    ensure_private_directory(root)
+    return reference_profiles.profile_directory(root, project_id, writer_id)
+
+def describe_reference_profile(profile, writer_id, project_id=None):
+    """Riepilogo JSON di un profilo: esemplari, variabilità dei parametri e naturalezza"""
+    return {
+        "writer_id": writer_id,
+        "project_id": project_id,
+        "directory": profile.directory,
+        "exemplars": [{"image_path": exemplar["image_path"], "dimensions": exemplar["dimensions"]} for exemplar in profile.exemplars],
+        "statistics": profile.statistics,
+        "naturalness": profile.naturalness_statistics
+    }
+
+def build_reference_profile(writer_id, references, project_id=None, workers=None):
+    """
+    Costruisce o aggiorna il profilo di riferimento di uno scrivente: matrice dei parametri
+    degli esemplari, variabilità per parametro, distribuzione del NaturalnessIndex e dati
+    SSIM preparati; solo gli esemplari nuovi o modificati vengono analizzati
+    
+    Args:
+        writer_id: Identificativo dello scrivente
+        references: Esemplari nel formato accettato da read_reference_list (elenco completo:
+            quelli non più presenti sono rimossi dal profilo)
+        project_id: ID del progetto (partizione dei profili e della cache dei parametri)
+        workers: Numero di processi per l'analisi degli esemplari
+        
+    Returns:
+        Riepilogo del profilo con i conteggi dell'aggiornamento (reused, analyzed, removed)
+        e gli esemplari non analizzabili in "errors"
+    """
+    try:
+        rows = read_reference_list(references)
+        directory = get_profile_directory(writer_id, project_id)
+        profile, update = reference_profiles.update_profile(
+            directory,
+            rows,
+            lambda pending: prepare_signature_rows(pending, workers, project_id),
+            get_feature_algorithm_version(),
+            get_ssim_backend().settings()
+        )
+        print(f"[PROFILE] Scrivente {writer_id}: {update['reused']} esemplari riutilizzati, "
+              f"{update['analyzed']} analizzati, {update['removed']} rimossi, {len(update['errors'])} errori", file=sys.stderr)
+        if profile is None:
+            raise ValueError("Nessun esemplare valido per il profilo")
+        summary = describe_reference_profile(profile, writer_id, project_id)
+        summary.update(update)
+        return summary
+    
+    except Exception as e:
+        print(f"Errore durante la costruzione del profilo: {str(e)}", file=sys.stderr)
+        return {"error": str(e)}
+
+def compare_against_profile(verifica_path, verifica_dims, writer_id, project_id=None, config=None):
+    """
+    Confronta una firma in verifica con il profilo di riferimento di uno scrivente: il
+    profilo è aperto in memory-map, l'SSIM è calcolato sulla pila già preparata e i
+    parametri sono confrontati con tutti gli esemplari in un'unica passata vettoriale
+    
+    Args:
+        verifica_path: Percorso della firma da verificare
+        verifica_dims: Tupla (width_mm, height_mm) della firma da verificare
+        writer_id: Identificativo dello scrivente
+        project_id: ID del progetto (partizione dei profili e della cache dei parametri)
+        config: compatibility_engine.ScoringConfig (default: configurazione predefinita)
+        
+    Returns:
+        Dizionario con i risultati per esemplare (per similarità decrescente), il riepilogo,
+        lo scostamento di ogni parametro dalla variabilità dello scrivente e la
+        distribuzione della naturalezza degli esemplari
+    """
+    try:
+        config = config or compatibility_engine.DEFAULT_SCORING_CONFIG
+        backend = get_ssim_backend()
+        directory = get_profile_directory(writer_id, project_id)
+        profile = reference_profiles.ReferenceProfile.load(directory)
+        if profile is None:
+            raise ValueError(f"Profilo di riferimento non trovato per lo scrivente {writer_id}")
+        if not profile.is_current(get_feature_algorithm_version(), backend.settings()):
+            # Algoritmi cambiati: il profilo è ricostruito dagli esemplari registrati
+            rebuilt = build_reference_profile(
+                writer_id,
+                [{"image_path": exemplar["image_path"], "width_mm": exemplar["dimensions"][0], "height_mm": exemplar["dimensions"][1]}
+                 for exemplar in profile.exemplars],
+                project_id
+            )
+            if "error" in rebuilt:
+                raise ValueError(rebuilt["error"])
+            profile = reference_profiles.ReferenceProfile.load(directory)
+        
+        verifica_context = SignatureImageContext(verifica_path)
+        if verifica_context.gray is None:
+            raise ValueError(f"Impossibile leggere l'immagine: {verifica_path}")
+        verifica_data = analyze_signature_cached(verifica_path, verifica_dims[0], verifica_dims[1], project_id, verifica_context)
+        if not verifica_data or "error" in verifica_data:
+            raise ValueError(verifica_data.get("error") if verifica_data else "Errore nell'analisi della firma da verificare")
+        
+        ssim = backend.score_stack(verifica_context.processed, profile.ssim)
+        score = compatibility_engine.score_candidates(verifica_data, profile.scoring_features(), ssim, config)
+        verifica_naturalness = verifica_data.get('NaturalnessIndex', reference_profiles.DEFAULT_NATURALNESS)
+        naturalness = (verifica_naturalness + np.asarray(profile.naturalness, dtype=float)) / 2.0
+        
+        results = []
+        for index, exemplar in enumerate(profile.exemplars):
+            verdict, confidence, explanation = classify_signature_intelligent(float(score["similarity"][index]), float(naturalness[index]), config.thresholds)
+            results.append({
+                "index": index,
+                "image_path": exemplar["image_path"],
+                "dimensions": exemplar["dimensions"],
+                "similarity": float(score["similarity"][index]),
+                "ssim": float(ssim[index]),
+                "parameters_score": float(score["parameters_score"][index]),
+                "naturalness": float(naturalness[index]) / 100.0,
+                "verdict": verdict,
+                "confidence": confidence,
+                "explanation": explanation,
+                "compatibilities": {
+                    name: round(float(value) * 100, 1)
+                    for name, value in zip(compatibility_engine.PARAMETER_NAMES, score["compatibilities"][index])
+                    if not np.isnan(value)
+                }
+            })
+        results.sort(key=lambda result: (-result["similarity"], result["index"]))
+        for rank, result in enumerate(results, start=1):
+            result["rank"] = rank
+        
+        # Scostamento dei parametri della firma in verifica dalla variabilità dello scrivente
+        deviation = {}
+        for name, statistics in profile.statistics.items():
+            value = verifica_data.get(name)
+            if value is None:
+                continue
+            value = float(value)
+            deviation[name] = {
+                "value": value,
+                "mean": statistics["mean"],
+                "std": statistics["std"],
+                "z_score": (value - statistics["mean"]) / statistics["std"] if statistics["std"] > 0 else None,
+                "within_range": statistics["min"] <= value <= statistics["max"]
+            }
+        
+        similarity = np.array([result["similarity"] for result in results])
+        print(f"[PROFILE] Firma confrontata con {len(results)} esemplari dello scrivente {writer_id}", file=sys.stderr)
+        return {
+            "writer_id": writer_id,
+            "verifica_parameters": adapt_parameters_for_json(verifica_data),
+            "exemplars": len(results),
+            "best_similarity": float(similarity.max()),
+            "mean_similarity": float(similarity.mean()),
+            "results": results,
+            "parameter_deviation": deviation,
+            "naturalness_profile": profile.naturalness_statistics,
+            "scoring_version": config.version
+        }
+    
+    except Exception as e:
+        print(f"Errore durante il confronto con il profilo: {str(e)}", file=sys.stderr)
+        return {"error": str(e)}
+
+def handle_worker_request(request):
+    """
+    Esegue una singola richiesta del worker persistente
+    
+    I comandi accettano gli stessi argomenti dei rami della CLI:
+        analyze / analyze-dimensions: image_path, width_mm, height_mm, features (opzionale)
+        compare / report: verifica_path, comp_path, verifica_dimensions,
+            reference_dimensions, case_info, project_id, chart_renderer, chart_output
+        compare-many: verifica_path, verifica_dimensions, references, top_k, workers, project_id,
+            chart_renderer, chart_output
+        rescore: records, config (configurazione di punteggio opzionale)
+        feature-scan: ranges ({parametro: [minimo, massimo]}), project_id, limit, all_versions
+        profile-build: writer_id, references, project_id, workers
+        compare-profile: verifica_path, verifica_dimensions, writer_id, project_id
+    
+    Args:
+        request: Dizionario della richiesta (già decodificato dal JSON)
+        
+    Returns:
+        Dizionario con il risultato, nello stesso formato della CLI
+    """
+    command = request.get("command")
+    
+    if command in ("analyze", "analyze-dimensions"):
+        result = analyze_signature_cached(
+            request["image_path"],
+            float(request["width_mm"]),
+            float(request["height_mm"]),
+            request.get("project_id"),
+            features=request.get("features")
+        )
+        if isinstance(result, SignatureFeatures):
+            result = result.to_dict()
+        # Il ramo --analyze-dimensions incapsula il risultato per il bridge TypeScript
+        if command == "analyze-dimensions" and result and "error" not in result:
+            return {"verifica_parameters": result}
+        return result
+    
+    if command in ("compare", "report"):
+        case_info = request.get("case_info")
+        if isinstance(case_info, str):
+            case_info = json.loads(case_info)
+        project_id = request.get("project_id")
+        return compare_signatures_for_json(
+            request["verifica_path"],
+            request["comp_path"],
+            parse_dimensions(request.get("verifica_dimensions")),
+            parse_dimensions(request.get("reference_dimensions")),
+            command == "report" or bool(request.get("report")),
+            case_info,
+            int(project_id) if project_id is not None else None,
+            request.get("chart_renderer"),
+            request.get("chart_output")
+        )
+    
+    if command == "compare-many":
+        project_id = request.get("project_id")
+        return compare_against_references(
+            request["verifica_path"],
+            parse_dimensions(request["verifica_dimensions"]),
+            request["references"],
+            int(request.get("top_k", 3)),
+            request.get("workers"),
+            int(project_id) if project_id is not None else None,
+            request.get("chart_renderer"),
+            request.get("chart_output")
+        )
+    
+    if command == "feature-scan":
+        project_id = request.get("project_id")
+        limit = request.get("limit")
+        return scan_signature_features(
+            request["ranges"],
+            int(project_id) if project_id is not None else None,
+            int(limit) if limit else None,
+            bool(request.get("all_versions"))
+        )
+    
+    if command in ("profile-build", "compare-profile"):
+        project_id = request.get("project_id")
+        project_id = int(project_id) if project_id is not None else None
+        if command == "profile-build":
+            return build_reference_profile(request["writer_id"], request["references"], project_id, request.get("workers"))
+        return compare_against_profile(
+            request["verifica_path"],
+            parse_dimensions(request["verifica_dimensions"]),
+            request["writer_id"],
+            project_id
+        )
+    
+    if command == "rescore":
+        config = request.get("config")
+        config = compatibility_engine.ScoringConfig.from_dict(config) if config else None
+        return {"results": rescore_comparisons(request["records"], config)}
+    
+    if command == "cache-stats":
+        return FeatureCache.stats()
+    
+    if command == "ping":
+        return {"status": "ok", "pid": os.getpid()}
+    
+    raise ValueError(f"Comando sconosciuto: {command}")
+
+def serve_worker(input_stream=None, output_stream=None):
+    """
+    Modalità worker persistente (--serve): legge una richiesta JSON per riga e scrive
+    una risposta JSON per riga con lo stesso id, riusando l'interprete e i moduli già caricati
+    
+    Richiesta:  {"id": 1, "command": "analyze", "image_path": "...", "width_mm": 80, "height_mm": 30}
+    Risposta:   {"id": 1, "result": {...}}  oppure  {"id": 1, "error": "..."}
+    
+    Args:
+        input_stream: Stream delle richieste (default stdin)
+        output_stream: Stream delle risposte (default stdout)
+    """
+    input_stream = input_stream or sys.stdin
+    output_stream = output_stream or sys.stdout
+    
+    # Lo stdout è riservato al protocollo: eventuali print accidentali finiscono su stderr
+    sys.stdout = sys.stderr
+    warm_up_worker()
+    print(f"[WORKER] Worker pronto (pid {os.getpid()})", file=sys.stderr)
+    
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+        
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request.get("command") == "shutdown":
+                output_stream.write(json.dumps({"id": request_id, "result": {"status": "shutdown"}}) + "\n")
+                output_stream.flush()
+                break
+            response = json.dumps({"id": request_id, "result": handle_worker_request(request)})
+        except Exception as e:
+            print(f"[WORKER] Errore nella richiesta {request_id}: {str(e)}", file=sys.stderr)
+            response = json.dumps({"id": request_id, "error": str(e)})
+        
+        output_stream.write(response + "\n")
+        output_stream.flush()
+    
+    print("[WORKER] Worker terminato", file=sys.stderr)
+
+# Funzione principale per l'esecuzione come script
+if __name__ == "__main__":
+    # Profilo dei tempi di import all'avvio (costo di ogni gruppo su richiesta); con
+    # analyze / --analyze-dimensions il flag profila invece l'avvio a freddo del comando
+    if len(sys.argv) >= 2 and sys.argv[1] == "--startup-profile":
+        print_startup_profile()
+        sys.exit(0)
+    
+    # Servizio multi-core su socket Unix: pool di worker, coda limitata, deadline ed equità tra progetti
+    if len(sys.argv) >= 3 and sys.argv[1] == "--service":
+        from signature_service import run_service, DEFAULT_BACKLOG, DEFAULT_DEADLINE_SECONDS
+        workers = get_cli_option("--workers")
+        project_backlog = get_cli_option("--project-backlog")
+        run_service(
+            handle_worker_request,
+            sys.argv[2],
+            workers=int(workers) if workers else None,
+            backlog=int(get_cli_option("--backlog", DEFAULT_BACKLOG)),
+            deadline=float(get_cli_option("--deadline", DEFAULT_DEADLINE_SECONDS)),
+            warmup=warm_up_worker,
+            project_backlog=int(project_backlog) if project_backlog else None
+        )
+        sys.exit(0)
+    
+    # Analisi batch da manifest con output JSONL in streaming
+    if len(sys.argv) >= 3 and sys.argv[1] == "batch-analyze":
+        workers = get_cli_option("--workers")
+        project_id = get_cli_option("--project-id")
+        errors = batch_analyze(sys.argv[2], int(workers) if workers else None, "--ordered" in sys.argv,
+                               project_id=int(project_id) if project_id else None)
+        sys.exit(1 if errors else 0)
+    
+    # Confronto di una firma con molti riferimenti (manifest nello stesso formato di batch-analyze)
+    if len(sys.argv) >= 5 and sys.argv[1] == "compare-many":
+        top_k = get_cli_option("--top-k")
+        workers = get_cli_option("--workers")
+        project_id = get_cli_option("--project-id")
+        result = compare_against_references(
+            sys.argv[2],
+            parse_dimensions(sys.argv[3]),
+            [(path, width_mm, height_mm) for _, path, width_mm, height_mm in read_batch_manifest(sys.argv[4])],
+            int(top_k) if top_k else 3,
+            int(workers) if workers else None,
+            int(project_id) if project_id else None,
+            get_cli_option("--chart-renderer"),
+            get_cli_option("--chart-output")
+        )
+        print(json.dumps(result))
+        sys.exit(1 if "error" in result else 0)
+    
+    # Matrice di similarità N×N tra le firme del manifest
+    if len(sys.argv) >= 3 and sys.argv[1] == "similarity-matrix":
+        workers = get_cli_option("--workers")
+        project_id = get_cli_option("--project-id")
+        matrix = similarity_matrix(
+            [(path, width_mm, height_mm) for _, path, width_mm, height_mm in read_batch_manifest(sys.argv[2])],
+            int(workers) if workers else None,
+            int(project_id) if project_id else None
+        )
+        npz_path, csv_path = write_similarity_matrix(matrix, get_cli_option("--output") or "similarity_matrix")
+        similarity = matrix["similarity"]
+        pairs = similarity[np.triu_indices(len(similarity), k=1)]
+        pairs = pairs[~np.isnan(pairs)]
+        print(json.dumps({
+            "signatures": len(similarity),
+            "pairs": int(pairs.size),
+            "mean_similarity": float(pairs.mean()) if pairs.size else None,
+            "min_similarity": float(pairs.min()) if pairs.size else None,
+            "npz_path": npz_path,
+            "csv_path": csv_path,
+            "errors": matrix["errors"]
+        }))
+        sys.exit(1 if matrix["errors"] else 0)
+    
+    # Ricerca per intervalli di parametri nell'archivio delle firme analizzate
+    if len(sys.argv) >= 3 and sys.argv[1] == "feature-scan":
+        project_id = get_cli_option("--project-id")
+        limit = get_cli_option("--limit")
+        result = scan_signature_features(
+            parse_scan_ranges(sys.argv[2]),
+            int(project_id) if project_id else None,
+            int(limit) if limit else None,
+            "--all-versions" in sys.argv
+        )
+        print(json.dumps(result))
+        sys.exit(1 if "error" in result else 0)
+    
+    # Profilo di riferimento di uno scrivente (costruzione o aggiornamento incrementale)
+    if len(sys.argv) >= 4 and sys.argv[1] == "profile-build":
+        workers = get_cli_option("--workers")
+        project_id = get_cli_option("--project-id")
+        result = build_reference_profile(
+            sys.argv[2],
+            [(path, width_mm, height_mm) for _, path, width_mm, height_mm in read_batch_manifest(sys.argv[3])],
+            int(project_id) if project_id else None,
+            int(workers) if workers else None
+        )
+        print(json.dumps(result))
+        sys.exit(1 if "error" in result else 0)
+    
+    # Confronto di una firma con il profilo di riferimento di uno scrivente
+    if len(sys.argv) >= 5 and sys.argv[1] == "compare-profile":
+        project_id = get_cli_option("--project-id")
+        result = compare_against_profile(sys.argv[2], parse_dimensions(sys.argv[3]), sys.argv[4],
+                                         int(project_id) if project_id else None)
+        print(json.dumps(result))
+        sys.exit(1 if "error" in result else 0)
+    
+    # Ricalcolo dei confronti salvati con una configurazione di punteggio versionata
+    if len(sys.argv) >= 3 and sys.argv[1] == "rescore":
+        config_path = get_cli_option("--config")
+        config = compatibility_engine.ScoringConfig.load(config_path) if config_path else None
+        sys.exit(1 if rescore_jsonl(sys.argv[2], config) else 0)
+    
+    # Worker persistente: una richiesta JSON per riga su stdin, una risposta per riga su stdout
+    if len(sys.argv) >= 2 and sys.argv[1] == "--serve":
+        serve_worker()
+        sys.exit(0)
+    
+    # Supporto per analisi singola chiamata dal TypeScript
+    if len(sys.argv) >= 4 and sys.argv[1] == "analyze":
+        if "--startup-profile" in sys.argv:
+            start_command_profile("analyze")
+        try:
+            image_path = sys.argv[2]
+            width_mm = float(sys.argv[3])
+            height_mm = float(sys.argv[4])
+            
+            # Sottoinsieme opzionale di parametri: --features Inclination,PressureMean
+            features = get_cli_option("--features")
+            features = [name.strip() for name in features.split(",") if name.strip()] if features else None
+            
+            print(f"[PYTHON] Analisi: {image_path} -> {width_mm}x{height_mm}mm", file=sys.stderr)
+            result = analyze_signature_with_dimensions(image_path, width_mm, height_mm, features=features)
+            
+            print(f"[PYTHON] Analisi completata con {len(result) if result and 'error' not in result else 0} parametri", file=sys.stderr)
+            print(json.dumps(result.to_dict() if isinstance(result, SignatureFeatures) else result))
+            sys.exit(0)
+        except Exception as e:
+            print(f"[ERROR] Errore nell'analisi: {str(e)}", file=sys.stderr)
+            print(f"[ERROR] Stack trace: {repr(e)}", file=sys.stderr)
+            # Invece di uscire, restituisco un errore JSON
+            print(json.dumps({"error": str(e)}))
+            sys.exit(1)
+    
+    # Supporto per test di analisi singola con dimensioni
+    if len(sys.argv) >= 4 and sys.argv[1] == "--analyze-dimensions":
+        if "--startup-profile" in sys.argv:
+            start_command_profile("--analyze-dimensions")
+        try:
+            image_path = sys.argv[2]
+            width_mm = float(sys.argv[3])
             height_mm = float(sys.argv[4])
             
             print(f"Test analisi singola: {image_path} con dimensioni {width_mm}x{height_mm}mm", file=sys.stderr)
@@ -2265,7 +3659,7 @@ if __name__ == "__main__":
             # Formatta il risultato nel formato che il bridge TypeScript si aspetta
             if result and "error" not in result:
                 formatted_result = {
-                    "verifica_parameters": result
+                    "verifica_parameters": result.to_dict()
                 }
                 print(json.dumps(formatted_result))
             else:
@@ -2276,8 +3670,19 @@ if __name__ == "__main__":
             sys.exit(1)
     
     if len(sys.argv) < 3:
-        print("Uso: python advanced-signature-analyzer.py <firma_verifica> <firma_comp> [--report] [--case-info <json>] [--project-id <id>]", file=sys.stderr)
-        print("      python advanced-signature-analyzer.py --analyze-dimensions <immagine> <larghezza_mm> <altezza_mm>", file=sys.stderr)
+        print("Uso: python advanced-signature-analyzer.py <firma_verifica> <firma_comp> [--report] [--case-info <json>] [--project-id <id>] [--chart-renderer matplotlib|opencv] [--chart-output png|data]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py --analyze-dimensions <immagine> <larghezza_mm> <altezza_mm> [--startup-profile]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py analyze <immagine> <larghezza_mm> <altezza_mm> [--features <nome,nome,...>] [--startup-profile]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py batch-analyze <manifest|-> [--workers N] [--ordered] [--project-id <id>]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py compare-many <firma_verifica> <larghezza>x<altezza> <manifest|-> [--top-k N] [--workers N] [--project-id <id>] [--chart-renderer matplotlib|opencv] [--chart-output png|data]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py similarity-matrix <manifest|-> [--output <percorso>] [--workers N] [--project-id <id>]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py feature-scan <Parametro=minimo:massimo,...> [--project-id <id>] [--limit N] [--all-versions]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py profile-build <scrivente> <manifest|-> [--workers N] [--project-id <id>]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py compare-profile <firma_verifica> <larghezza>x<altezza> <scrivente> [--project-id <id>]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py rescore <confronti.jsonl|-> [--config <configurazione.json>]", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py --serve", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py --startup-profile", file=sys.stderr)
+        print("      python advanced-signature-analyzer.py --service <socket> [--workers N] [--backlog N] [--project-backlog N] [--deadline secondi]", file=sys.stderr)
         sys.exit(1)
     
     verifica_path = sys.argv[1]
@@ -2332,19 +3737,8 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"Errore nel parsing delle dimensioni reference: {e}", file=sys.stderr)
     
-    # Solo dimensioni reali sono supportate - no fallback ai DPI
-    if verifica_dimensions and reference_dimensions:
-        print(f"Confronto tra firme con dimensioni reali - verifica={verifica_dimensions[0]}x{verifica_dimensions[1]}mm, reference={reference_dimensions[0]}x{reference_dimensions[1]}mm", file=sys.stderr)
-        result = compare_signatures_with_dimensions(verifica_path, comp_path, verifica_dimensions, reference_dimensions, generate_report, case_info, project_id)
-    else:
-        print(f"ERRORE: Dimensioni reali obbligatorie per entrambe le firme - no DPI fallback", file=sys.stderr)
-        result = {"error": "Dimensioni reali obbligatorie per entrambe le firme"}
-    
-    # Adatta i parametri per JSON
-    if "verifica_parameters" in result:
-        result["verifica_parameters"] = adapt_parameters_for_json(result["verifica_parameters"])
-    if "reference_parameters" in result:
-        result["reference_parameters"] = adapt_parameters_for_json(result["reference_parameters"])
+    result = compare_signatures_for_json(verifica_path, comp_path, verifica_dimensions, reference_dimensions, generate_report, case_info, project_id,
+                                         get_cli_option("--chart-renderer"), get_cli_option("--chart-output"))
     
     # Stampa il risultato come JSON
     print(json.dumps(result))
\ No newline at end of file
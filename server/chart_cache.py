@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache dei grafici renderizzati per GrapholexInsight
+I grafici di confronto e di naturalezza dipendono solo dalle serie mostrate: la chiave è
+l'hash delle serie arrotondate alla precisione di visualizzazione (un decimale, come le
+etichette) più nome e versione del renderer, e il valore sono i byte del PNG. Livello in
+memoria LRU limitato per numero di voci e byte, più un livello su disco opzionale con
+evizione per dimensione/TTL come la cache dei parametri
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+# Limiti di default del livello in memoria
+DEFAULT_CHART_ENTRIES = 64
+DEFAULT_CHART_MAX_BYTES = 32 * 1024 * 1024
+
+# Limiti di default del livello su disco
+DEFAULT_CHART_DISK_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_CHART_TTL_SECONDS = 7 * 24 * 3600
+
+# Decimali mostrati nelle etichette dei grafici: valori che differiscono oltre questa
+# precisione producono lo stesso grafico
+DISPLAY_DECIMALS = 1
+
+# Campi numerici delle serie di ciascun tipo di grafico
+SERIES_VALUES = {
+    "comparison": ("compatibilities",),
+    "naturalness": ("verifica_values", "reference_values"),
+}
+
+
+def normalize_series(kind, series):
+    """
+    Serie ridotte a ciò che il grafico mostra, con i valori alla precisione di visualizzazione
+
+    Args:
+        kind: "comparison" o "naturalness"
+        series: Serie restituite da comparison_chart_series / naturalness_chart_series
+
+    Returns:
+        Dizionario con labels e i valori arrotondati, da passare al renderer
+    """
+    normalized = {"labels": [str(label) for label in series["labels"]]}
+    for field in SERIES_VALUES[kind]:
+        normalized[field] = [round(float(value), DISPLAY_DECIMALS) for value in series[field]]
+    return normalized
+
+
+def chart_key(kind, normalized, renderer):
+    """Chiave del grafico: hash delle serie normalizzate, del tipo e del renderer"""
+    material = json.dumps([kind, renderer.name, renderer.version, normalized], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    """Cache dei PNG dei grafici: LRU in memoria più livello su disco opzionale"""
+
+    def __init__(self, max_entries=DEFAULT_CHART_ENTRIES, max_bytes=DEFAULT_CHART_MAX_BYTES, directory=None,
+                 disk_max_bytes=DEFAULT_CHART_DISK_MAX_BYTES, ttl_seconds=DEFAULT_CHART_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._entries = OrderedDict()
+        self._bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, png):
+        """Inserisce in memoria e rimuove le voci meno usate oltre i limiti"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = png
+        self._bytes += len(png)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.counters["evictions"] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key):
+        """Restituisce i byte del PNG in cache oppure None"""
+        png = self._entries.get(key)
+        if png is not None:
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return png
+        if self.directory:
+            path = self._path(key)
+            try:
+                info = os.stat(path)
+                if time.time() - info.st_mtime <= self.ttl_seconds:
+                    with open(path, "rb") as f:
+                        png = f.read()
+                    # Solo l'ultimo accesso: mtime resta l'ora di scrittura su cui si misura il TTL
+                    os.utime(path, (time.time(), info.st_mtime))
+            except OSError:
+                png = None
+            if png:
+                self._remember(key, png)
+                self.counters["disk_hits"] += 1
+                return png
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, key, png):
+        """Salva il PNG in memoria e, se configurato, su disco (scrittura atomica)"""
+        self._remember(key, png)
+        self.counters["stores"] += 1
+        if not self.directory:
+            return
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(png)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"[CHART-CACHE] Errore nel salvataggio del grafico {key[:12]}: {str(e)}", file=sys.stderr)
+            return
+        self.evict_disk()
+
+    def evict_disk(self):
+        """
+        Rimuove dal disco i grafici scaduti (mtime = scrittura) e, oltre il limite, i meno
+        usati di recente (atime = ultimo hit)
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".png"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._remove(entry.path)
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+            total += stat.st_size
+        if total <= self.disk_max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            self.counters["evictions"] += 1
+        except OSError:
+            pass
+
+    def render(self, renderer, kind, series):
+        """
+        PNG del grafico, dalla cache oppure renderizzato e salvato
+
+        Args:
+            renderer: Istanza di ChartRenderer
+            kind: "comparison" o "naturalness"
+            series: Serie del grafico (vengono normalizzate prima del rendering, così a
+                chiave uguale corrisponde sempre lo stesso PNG)
+
+        Returns:
+            Byte del PNG
+        """
+        normalized = normalize_series(kind, series)
+        key = chart_key(kind, normalized, renderer)
+        png = self.get(key)
+        if png is None:
+            png = getattr(renderer, f"render_{kind}")(normalized)
+            self.put(key, png)
+        return png
+
+    def stats(self):
+        """Contatori del processo corrente, con hit rate e occupazione in memoria"""
+        lookups = self.counters["hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = self.counters["hits"] + self.counters["disk_hits"]
+        return {**self.counters, "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self._entries), "bytes": self._bytes}
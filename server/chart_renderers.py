@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Renderer dei grafici di confronto per GrapholexInsight
+Interfaccia comune per disegnare il grafico di compatibilità dei parametri e il grafico di
+naturalezza a partire dalle serie già calcolate: implementazione di riferimento con
+matplotlib e implementazione leggera che disegna le stesse barre con PIL su una tela
+preallocata e codifica il PNG con OpenCV, senza importare matplotlib. Selezionabile per
+richiesta oppure con SIGNATURE_CHART_RENDERER. Le stesse serie possono essere restituite
+come dati strutturati (comparison_chart_data, naturalness_chart_data), disegnati dal client
+"""
+
+import functools
+import importlib.util
+import io
+import os
+
+import cv2
+import numpy as np
+
+# Risoluzione dei PNG (come savefig(dpi=150))
+CHART_DPI = 150
+
+# Margine del ritaglio bbox_inches='tight' di matplotlib (0.1 pollici)
+TIGHT_PAD = round(0.1 * CHART_DPI)
+
+# Colori dei grafici
+COMPARISON_BAR_COLOR = "skyblue"
+VERIFICA_COLOR = "#3b82f6"
+REFERENCE_COLOR = "#10b981"
+BAR_ALPHA = 0.8
+
+# Etichette dei parametri di naturalezza
+NATURALNESS_LABELS = {
+    "FluidityScore": "🧠 Fluidità",
+    "PressureConsistency": "🔄 Consistenza",
+    "CoordinationIndex": "🎯 Coordinazione",
+}
+
+# Testi fissi dei grafici
+COMPARISON_TITLE = "Grafico Compatibilità Parametri Firma"
+COMPARISON_XLABEL = "Compatibilità (%)"
+NATURALNESS_TITLE = "🧠 Analisi Naturalezza (Anti-Dissimulazione)"
+NATURALNESS_XLABEL = "Parametri di Naturalezza"
+NATURALNESS_YLABEL = "Punteggio (%)"
+NATURALNESS_LEGEND = ("Firma in Verifica", "Firma di Riferimento")
+NATURALNESS_EMPTY = "Dati di naturalezza non disponibili"
+
+# Renderer usato se SIGNATURE_CHART_RENDERER non è impostata
+DEFAULT_RENDERER = "matplotlib"
+
+# Classi di colore delle barre di compatibilità per i grafici disegnati dal client:
+# (soglia minima in %, classe), come le soglie verde/giallo/rosso dell'interfaccia
+COMPATIBILITY_CLASSES = ((80, "high"), (60, "medium"))
+LOW_COMPATIBILITY_CLASS = "low"
+
+
+def comparison_figure_size(count):
+    """Dimensioni in pollici del grafico di compatibilità con count parametri"""
+    return 14, max(10, count * 0.6)
+
+
+def compatibility_class(value):
+    """Classe di colore di una compatibilità (%): high, medium o low"""
+    for threshold, name in COMPATIBILITY_CLASSES:
+        if value >= threshold:
+            return name
+    return LOW_COMPATIBILITY_CLASS
+
+
+def comparison_chart_data(series):
+    """
+    Grafico di compatibilità come dati strutturati, al posto del PNG
+
+    Args:
+        series: Serie restituite da comparison_chart_series dell'analizzatore
+
+    Returns:
+        Dizionario serializzabile in JSON con titoli, intervallo dell'asse, etichette, valori
+        delle due firme, compatibilità e classi di colore delle barre
+    """
+    compatibilities = [float(value) for value in series["compatibilities"]]
+    return {
+        "type": "comparison",
+        "title": COMPARISON_TITLE,
+        "x_label": COMPARISON_XLABEL,
+        "range": [0, 100],
+        "color": COMPARISON_BAR_COLOR,
+        "parameters": list(series["parameters"]),
+        "labels": list(series["labels"]),
+        "verifica_values": [float(value) for value in series["verifica_values"]],
+        "reference_values": [float(value) for value in series["reference_values"]],
+        "compatibilities": compatibilities,
+        "classes": [compatibility_class(value) for value in compatibilities],
+    }
+
+
+def naturalness_chart_data(series):
+    """
+    Grafico di naturalezza come dati strutturati, al posto del PNG
+
+    Args:
+        series: Serie restituite da naturalness_chart_series dell'analizzatore (liste
+            vuote se i dati di naturalezza non sono disponibili)
+
+    Returns:
+        Dizionario serializzabile in JSON con titoli, intervallo dell'asse, etichette e
+        valori delle due firme con nome e colore di ciascuna serie
+    """
+    return {
+        "type": "naturalness",
+        "title": NATURALNESS_TITLE,
+        "x_label": NATURALNESS_XLABEL,
+        "y_label": NATURALNESS_YLABEL,
+        "range": [0, 100],
+        "parameters": list(series["parameters"]),
+        "labels": list(series["labels"]),
+        "verifica_values": [float(value) for value in series["verifica_values"]],
+        "reference_values": [float(value) for value in series["reference_values"]],
+        "series": [
+            {"key": "verifica", "name": NATURALNESS_LEGEND[0], "color": VERIFICA_COLOR, "alpha": BAR_ALPHA},
+            {"key": "reference", "name": NATURALNESS_LEGEND[1], "color": REFERENCE_COLOR, "alpha": BAR_ALPHA},
+        ],
+        "empty_message": None if series["labels"] else NATURALNESS_EMPTY,
+    }
+
+
+class ChartRenderer:
+    """Interfaccia dei renderer dei grafici: ogni metodo restituisce i byte del PNG"""
+
+    name = None
+
+    # Versione del disegno: cambia quando cambia l'aspetto dei PNG prodotti
+    version = "1"
+
+    # Moduli importati su richiesta dal renderer (per il warm-up dei worker)
+    modules = ()
+
+    def render_comparison(self, series):
+        """
+        Grafico a barre orizzontali delle compatibilità dei parametri
+
+        Args:
+            series: Dizionario con labels (etichette delle barre) e compatibilities (%)
+
+        Returns:
+            Byte del PNG
+        """
+        raise NotImplementedError
+
+    def render_naturalness(self, series):
+        """
+        Grafico a barre affiancate dei parametri di naturalezza delle due firme
+
+        Args:
+            series: Dizionario con labels, verifica_values e reference_values (%); senza
+                etichette viene disegnato il messaggio di dati non disponibili
+
+        Returns:
+            Byte del PNG
+        """
+        raise NotImplementedError
+
+    def render_message(self, text, error=False):
+        """Immagine con un solo messaggio centrato (in rosso se error)"""
+        raise NotImplementedError
+
+
+class MatplotlibChartRenderer(ChartRenderer):
+    """Renderer di riferimento: Figure di matplotlib salvate con bbox_inches='tight'"""
+
+    name = "matplotlib"
+    modules = ("matplotlib", "matplotlib.figure")
+
+    @staticmethod
+    def _save(fig, **options):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=CHART_DPI, bbox_inches='tight', **options)
+        return buffer.getvalue()
+
+    def render_comparison(self, series):
+        from matplotlib.figure import Figure
+
+        labels, compatibilities = series["labels"], series["compatibilities"]
+        fig = Figure(figsize=comparison_figure_size(len(labels)))
+        ax = fig.add_subplot(111)
+
+        bars = ax.barh(labels, compatibilities, color=COMPARISON_BAR_COLOR)
+        ax.set_xlabel(COMPARISON_XLABEL)
+        ax.set_title(COMPARISON_TITLE)
+        ax.set_xlim(0, 100)
+        ax.grid(axis='x')
+        fig.tight_layout()
+
+        for i, bar in enumerate(bars):
+            ax.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2,
+                    f'{compatibilities[i]:.1f}%',
+                    va='center')
+
+        return self._save(fig, facecolor='white')
+
+    def render_naturalness(self, series):
+        from matplotlib.figure import Figure
+
+        labels = series["labels"]
+        if not labels:
+            fig = Figure(figsize=(10, 6))
+            ax = fig.add_subplot(111)
+            ax.text(0.5, 0.5, NATURALNESS_EMPTY,
+                    ha='center', va='center', fontsize=16)
+            ax.set_xlim(0, 1)
+            ax.set_ylim(0, 1)
+            ax.axis('off')
+            return self._save(fig)
+
+        fig = Figure(figsize=(12, 7))
+        ax = fig.add_subplot(111)
+
+        x = np.arange(len(labels))
+        width = 0.35
+
+        bars1 = ax.bar(x - width/2, series["verifica_values"], width,
+                       label=NATURALNESS_LEGEND[0], color=VERIFICA_COLOR, alpha=BAR_ALPHA)
+        bars2 = ax.bar(x + width/2, series["reference_values"], width,
+                       label=NATURALNESS_LEGEND[1], color=REFERENCE_COLOR, alpha=BAR_ALPHA)
+
+        ax.set_xlabel(NATURALNESS_XLABEL, fontweight='bold', fontsize=12)
+        ax.set_ylabel(NATURALNESS_YLABEL, fontweight='bold', fontsize=12)
+        ax.set_title(NATURALNESS_TITLE, fontweight='bold', fontsize=14)
+        ax.set_xticks(x)
+        ax.set_xticklabels(labels, fontsize=10)
+        ax.legend()
+        ax.grid(True, alpha=0.3, axis='y')
+        ax.set_ylim(0, 100)
+
+        for bars in (bars1, bars2):
+            for bar in bars:
+                height = bar.get_height()
+                ax.annotate(f'{height:.1f}%',
+                            xy=(bar.get_x() + bar.get_width() / 2, height),
+                            xytext=(0, 3),
+                            textcoords="offset points",
+                            ha='center', va='bottom', fontsize=9)
+
+        return self._save(fig)
+
+    def render_message(self, text, error=False):
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot(111)
+        ax.text(0.5, 0.5, text, ha='center', va='center',
+                fontsize=14 if error else 16, color='red' if error else 'black')
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.axis('off')
+        return self._save(fig, facecolor='white')
+
+
+def _points(size):
+    """Punti tipografici -> pixel alla risoluzione dei grafici"""
+    return size * CHART_DPI / 72
+
+
+def _rgb(color, alpha=1.0):
+    """Colore esadecimale (o skyblue) composto su sfondo bianco"""
+    if color == "skyblue":
+        color = "#87ceeb"
+    channels = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+    return tuple(round(alpha * channel + (1 - alpha) * 255) for channel in channels)
+
+
+def _font_directories():
+    """Directory in cui cercare DejaVu Sans (il font di default di matplotlib)"""
+    directories = []
+    spec = importlib.util.find_spec("matplotlib")
+    if spec is not None and spec.submodule_search_locations:
+        for location in spec.submodule_search_locations:
+            directories.append(os.path.join(location, "mpl-data", "fonts", "ttf"))
+    directories += ["/usr/share/fonts/truetype/dejavu", "/usr/share/fonts/dejavu",
+                    "/usr/share/fonts/TTF", "/usr/local/share/fonts", "/Library/Fonts"]
+    return directories
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(size, bold=False):
+    """
+    Font TrueType per i grafici, come quello di matplotlib quando disponibile
+
+    Args:
+        size: Corpo in punti tipografici
+        bold: Se True, variante grassetto
+
+    Returns:
+        Font PIL (il font di default di PIL se DejaVu Sans non è installato)
+    """
+    from PIL import ImageFont
+
+    pixels = max(1, round(_points(size)))
+    filename = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    for directory in _font_directories():
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            return ImageFont.truetype(path, pixels)
+    return ImageFont.load_default(pixels)
+
+
+class _Canvas:
+    """
+    Tela bianca preallocata con un margine: tiene traccia del riquadro occupato da ciò che
+    viene disegnato, per ritagliare sul contenuto come bbox_inches='tight' senza
+    esaminare i pixel
+    """
+
+    def __init__(self, width, height, margin):
+        from PIL import Image, ImageDraw
+
+        self.margin = margin
+        self.image = Image.new("RGB", (int(width) + 2 * margin, int(height) + 2 * margin), "white")
+        self.draw = ImageDraw.Draw(self.image)
+        self.bounds = None
+
+    def _extend(self, left, top, right, bottom):
+        if self.bounds is None:
+            self.bounds = [left, top, right, bottom]
+        else:
+            bounds = self.bounds
+            bounds[0], bounds[1] = min(bounds[0], left), min(bounds[1], top)
+            bounds[2], bounds[3] = max(bounds[2], right), max(bounds[3], bottom)
+
+    def rectangle(self, x0, y0, x1, y1, fill=None, outline=None, width=1):
+        m = self.margin
+        box = (round(x0) + m, round(y0) + m, round(x1) + m - 1, round(y1) + m - 1)
+        if box[2] < box[0] or box[3] < box[1]:
+            return
+        self.draw.rectangle(box, fill=fill, outline=outline, width=width)
+        self._extend(box[0], box[1], box[2] + 1, box[3] + 1)
+
+    def line(self, x0, y0, x1, y1, fill, width):
+        m = self.margin
+        points = (round(x0) + m, round(y0) + m, round(x1) + m, round(y1) + m)
+        self.draw.line(points, fill=fill, width=width)
+        half = width // 2
+        self._extend(min(points[0], points[2]) - half, min(points[1], points[3]) - half,
+                     max(points[0], points[2]) + half + 1, max(points[1], points[3]) + half + 1)
+
+    @staticmethod
+    def measure(text, font):
+        """Larghezza e altezza del testo (anche su più righe)"""
+        left, top, right, bottom = _MEASURE.draw.multiline_textbbox((0, 0), text, font=font)
+        return right - left, bottom - top
+
+    def text(self, x, y, text, font, fill=(0, 0, 0), ha="left", va="top", rotate=False):
+        """
+        Scrive un testo allineato al punto (x, y) come in matplotlib
+
+        Args:
+            ha: "left", "center" o "right"
+            va: "top", "center" o "bottom"
+            rotate: Se True, testo ruotato di 90° (etichetta dell'asse y)
+        """
+        from PIL import Image, ImageDraw
+
+        left, top, right, bottom = self.draw.multiline_textbbox((0, 0), text, font=font, align="center")
+        width, height = right - left, bottom - top
+        if rotate:
+            label = Image.new("RGB", (width, height), "white")
+            ImageDraw.Draw(label).multiline_text((-left, -top), text, font=font, fill=fill, align="center")
+            label = label.transpose(Image.Transpose.ROTATE_90)
+            width, height = label.size
+        x -= {"left": 0, "center": width / 2, "right": width}[ha]
+        y -= {"top": 0, "center": height / 2, "bottom": height}[va]
+        x, y = round(x) + self.margin, round(y) + self.margin
+        if rotate:
+            self.image.paste(label, (x, y))
+        else:
+            self.draw.multiline_text((x - left, y - top), text, font=font, fill=fill, align="center")
+        self._extend(x, y, x + width, y + height)
+
+    def png(self):
+        """Ritaglia sul contenuto con il margine di bbox_inches='tight' e codifica in PNG"""
+        image = self.image
+        if self.bounds is not None:
+            left, top, right, bottom = self.bounds
+            image = image.crop((max(0, left - TIGHT_PAD), max(0, top - TIGHT_PAD),
+                                min(image.width, right + TIGHT_PAD), min(image.height, bottom + TIGHT_PAD)))
+        pixels = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+        ok, encoded = cv2.imencode(".png", pixels)
+        if not ok:
+            raise ValueError("Codifica PNG del grafico non riuscita")
+        return encoded.tobytes()
+
+
+class _Measure:
+    """Superficie di disegno minima usata solo per misurare i testi"""
+
+    @functools.cached_property
+    def draw(self):
+        from PIL import Image, ImageDraw
+
+        return ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+
+_MEASURE = _Measure()
+
+
+def _data_to_pixels(low, high, start, end):
+    """Trasformazione lineare dai valori dei dati alle coordinate della tela"""
+    scale = (end - start) / (high - low)
+    return lambda value: start + (value - low) * scale
+
+
+class OpenCVChartRenderer(ChartRenderer):
+    """
+    Renderer leggero: stessa impaginazione del renderer matplotlib (dimensioni della figura
+    a 150 DPI, margini, assi, griglia, etichette e ritaglio 'tight'), disegnata con PIL su
+    una tela preallocata e codificata con cv2.imencode
+    """
+
+    name = "opencv"
+    modules = ("PIL.Image", "PIL.ImageDraw", "PIL.ImageFont")
+
+    # Lunghezza e distanza delle tacche degli assi (3.5 punti ciascuna) e spessore delle linee
+    TICK = _points(3.5)
+    LINE = max(1, round(_points(0.8)))
+
+    # Margine di tight_layout (1.08 volte il corpo di 10 punti) e distanza del titolo (6 punti)
+    LAYOUT_PAD = _points(1.08 * 10)
+    TITLE_PAD = _points(6)
+    LABEL_PAD = _points(4)
+
+    GRID_COLOR = _rgb("#b0b0b0")
+
+    def _x_ticks(self, canvas, to_x, bottom, values, font):
+        for value in values:
+            x = to_x(value)
+            canvas.line(x, bottom, x, bottom + self.TICK, fill=(0, 0, 0), width=self.LINE)
+            canvas.text(x, bottom + 2 * self.TICK, f"{value:g}", font, ha="center", va="top")
+
+    def _y_ticks(self, canvas, to_y, left, values, labels, font):
+        for value, label in zip(values, labels):
+            y = to_y(value)
+            canvas.line(left - self.TICK, y, left, y, fill=(0, 0, 0), width=self.LINE)
+            canvas.text(left - 2 * self.TICK, y, label, font, ha="right", va="center")
+
+    def render_comparison(self, series):
+        labels, compatibilities = series["labels"], series["compatibilities"]
+        width, height = (size * CHART_DPI for size in comparison_figure_size(len(labels)))
+        font, title_font = load_font(10), load_font(12)
+        canvas = _Canvas(width, height, margin=round(_points(72)))
+
+        # Area degli assi come dopo tight_layout: le etichette delle barre a sinistra,
+        # titolo sopra, valori ed etichetta dell'asse x sotto
+        label_width = max((canvas.measure(label, font)[0] for label in labels), default=0)
+        tick_height = canvas.measure("0123456789", font)[1]
+        left = self.LAYOUT_PAD + label_width + 2 * self.TICK
+        right = width - self.LAYOUT_PAD
+        top = self.LAYOUT_PAD + canvas.measure(COMPARISON_TITLE, title_font)[1] + self.TITLE_PAD
+        bottom = (height - self.LAYOUT_PAD - canvas.measure(COMPARISON_XLABEL, font)[1]
+                  - self.LABEL_PAD - tick_height - 2 * self.TICK)
+
+        # Limiti dell'asse y come l'autoscale di barh (barre alte 0.8, margine del 5%)
+        span = max(len(labels) - 0.2, 1)
+        to_x = _data_to_pixels(0, 100, left, right)
+        to_y = _data_to_pixels(-0.4 - 0.05 * span, len(labels) - 0.6 + 0.05 * span, bottom, top)
+
+        for position, value in enumerate(compatibilities):
+            if value > 0:
+                canvas.rectangle(to_x(0), to_y(position + 0.4), to_x(value), to_y(position - 0.4),
+                                 fill=_rgb(COMPARISON_BAR_COLOR))
+        # Griglia verticale sopra le barre, come in matplotlib (axisbelow='line')
+        for value in range(0, 101, 20):
+            canvas.line(to_x(value), top, to_x(value), bottom, fill=self.GRID_COLOR, width=self.LINE)
+        canvas.rectangle(left, top, right, bottom, outline=(0, 0, 0), width=self.LINE)
+
+        self._x_ticks(canvas, to_x, bottom, range(0, 101, 20), font)
+        self._y_ticks(canvas, to_y, left, range(len(labels)), labels, font)
+        for position, value in enumerate(compatibilities):
+            canvas.text(to_x(value + 1), to_y(position), f"{value:.1f}%", font, va="center")
+
+        canvas.text((left + right) / 2, bottom + 2 * self.TICK + tick_height + self.LABEL_PAD,
+                    COMPARISON_XLABEL, font, ha="center")
+        canvas.text((left + right) / 2, top - self.TITLE_PAD, COMPARISON_TITLE, title_font, ha="center", va="bottom")
+        return canvas.png()
+
+    def render_naturalness(self, series):
+        labels = series["labels"]
+        if not labels:
+            return self.render_message(NATURALNESS_EMPTY)
+
+        width, height = 12 * CHART_DPI, 7 * CHART_DPI
+        canvas = _Canvas(width, height, margin=round(_points(72)))
+        font, value_font = load_font(10), load_font(9)
+        label_font, title_font = load_font(12, bold=True), load_font(14, bold=True)
+
+        # Parametri di default di subplot (nessun tight_layout in questo grafico)
+        left, right = 0.125 * width, 0.9 * width
+        top, bottom = (1 - 0.88) * height, (1 - 0.11) * height
+
+        bar_width = 0.35
+        span = len(labels) - 1 + 2 * bar_width
+        to_x = _data_to_pixels(-bar_width - 0.05 * span, len(labels) - 1 + bar_width + 0.05 * span, left, right)
+        to_y = _data_to_pixels(0, 100, bottom, top)
+
+        # Griglia orizzontale trasparente (alpha 0.3): sulle barre è quasi invisibile,
+        # quindi viene disegnata sotto di esse
+        grid = _rgb("#b0b0b0", 0.3)
+        for value in range(20, 100, 20):
+            canvas.line(left, to_y(value), right, to_y(value), fill=grid, width=self.LINE)
+        groups = ((series["verifica_values"], -bar_width / 2, VERIFICA_COLOR),
+                  (series["reference_values"], bar_width / 2, REFERENCE_COLOR))
+        for values, offset, color in groups:
+            for position, value in enumerate(values):
+                center = position + offset
+                canvas.rectangle(to_x(center - bar_width / 2), to_y(min(value, 100)),
+                                 to_x(center + bar_width / 2), to_y(0), fill=_rgb(color, BAR_ALPHA))
+        canvas.rectangle(left, top, right, bottom, outline=(0, 0, 0), width=self.LINE)
+
+        for values, offset, _ in groups:
+            for position, value in enumerate(values):
+                canvas.text(to_x(position + offset), to_y(value) - _points(3), f"{value:.1f}%", value_font,
+                            ha="center", va="bottom")
+
+        tick_labels = [f"{value:g}" for value in range(0, 101, 20)]
+        self._y_ticks(canvas, to_y, left, range(0, 101, 20), tick_labels, font)
+        for position, label in enumerate(labels):
+            x = to_x(position)
+            canvas.line(x, bottom, x, bottom + self.TICK, fill=(0, 0, 0), width=self.LINE)
+            canvas.text(x, bottom + 2 * self.TICK, label, font, ha="center")
+
+        tick_height = canvas.measure("".join(labels), font)[1]
+        tick_width = max(canvas.measure(label, font)[0] for label in tick_labels)
+        canvas.text((left + right) / 2, bottom + 2 * self.TICK + tick_height + self.LABEL_PAD,
+                    NATURALNESS_XLABEL, label_font, ha="center")
+        canvas.text(left - 2 * self.TICK - tick_width - self.LABEL_PAD, (top + bottom) / 2,
+                    NATURALNESS_YLABEL, label_font, ha="right", va="center", rotate=True)
+        canvas.text((left + right) / 2, top - self.TITLE_PAD, NATURALNESS_TITLE, title_font, ha="center", va="bottom")
+        self._legend(canvas, left, top, right, to_x, to_y, groups, font)
+        return canvas.png()
+
+    def _legend(self, canvas, left, top, right, to_x, to_y, groups, font):
+        """Legenda nell'angolo superiore più libero (come loc='best' per queste barre)"""
+        pad = _points(0.4 * 10)
+        handle_width, handle_height = _points(2.0 * 10), _points(0.7 * 10)
+        line_height = canvas.measure("Ag", font)[1]
+        spacing = _points(0.5 * 10)
+        text_width = max(canvas.measure(label, font)[0] for label in NATURALNESS_LEGEND)
+        box_width = pad + handle_width + _points(0.8 * 10) + text_width + pad
+        box_height = 2 * pad + 2 * line_height + spacing
+
+        # Angolo sinistro solo se le barre del primo gruppo sono più basse dell'ultimo
+        first = max(values[0] for values, _, _ in groups)
+        last = max(values[-1] for values, _, _ in groups)
+        border = _points(0.5 * 10)
+        x0 = left + border if first < last else right - border - box_width
+        y0 = top + border
+        canvas.rectangle(x0, y0, x0 + box_width, y0 + box_height, fill=(255, 255, 255),
+                         outline=_rgb("#cccccc"), width=self.LINE)
+        for row, ((_, _, color), label) in enumerate(zip(groups, NATURALNESS_LEGEND)):
+            y = y0 + pad + row * (line_height + spacing) + line_height / 2
+            canvas.rectangle(x0 + pad, y - handle_height / 2, x0 + pad + handle_width, y + handle_height / 2,
+                             fill=_rgb(color, BAR_ALPHA))
+            canvas.text(x0 + pad + handle_width + _points(0.8 * 10), y, label, font, va="center")
+
+    def render_message(self, text, error=False):
+        canvas = _Canvas(10 * CHART_DPI, 6 * CHART_DPI, margin=0)
+        font = load_font(14 if error else 16)
+        canvas.text(5 * CHART_DPI, 3 * CHART_DPI, text, font, fill=(255, 0, 0) if error else (0, 0, 0),
+                    ha="center", va="center")
+        return canvas.png()
+
+
+CHART_RENDERERS = {
+    "matplotlib": MatplotlibChartRenderer,
+    "opencv": OpenCVChartRenderer,
+}
+
+
+def get_chart_renderer(name=None):
+    """
+    Restituisce il renderer dei grafici richiesto
+
+    Args:
+        name: "matplotlib" o "opencv" (default: SIGNATURE_CHART_RENDERER oppure matplotlib)
+
+    Returns:
+        Istanza di ChartRenderer
+    """
+    if isinstance(name, ChartRenderer):
+        return name
+    name = (name or os.environ.get("SIGNATURE_CHART_RENDERER") or DEFAULT_RENDERER).strip().lower()
+    if name not in CHART_RENDERERS:
+        raise ValueError(f"Renderer dei grafici sconosciuto: {name} (disponibili: {', '.join(CHART_RENDERERS)})")
+    return CHART_RENDERERS[name]()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Motore vettoriale di compatibilità dei parametri per GrapholexInsight
+Confronta il vettore dei parametri di una firma in verifica con una matrice M×P di
+riferimenti in un'unica passata NumPy: le fasce di soglia di calculate_parameter_compatibility
+diventano ricerche in tabelle di soglie, i parametri qualitativi (WritingStyle, Readability)
+sono codificati come piccoli interi e il punteggio pesato segue lo stesso ordine di somma
+del calcolo coppia per coppia, così i risultati coincidono esattamente
+
+Pesi, combinazione SSIM/parametri e soglie del verdetto formano una configurazione
+versionata (ScoringConfig), così i confronti salvati si possono ricalcolare senza
+rianalizzare le immagini
+"""
+
+import hashlib
+import json
+from collections.abc import Mapping
+
+import numpy as np
+
+# Parametri chiave e pesi per il punteggio pesato - usa TUTTI i parametri disponibili
+KEY_PARAMETERS = [
+    ('PressureMean', 0.16),     # 16% - pressione media (molto stabile)
+    ('AvgCurvature', 0.14),     # 14% - curvatura (caratteristica distintiva)
+    ('Proportion', 0.12),       # 12% - proporzioni (aspect ratio)
+    ('Velocity', 0.10),         # 10% - velocità
+    ('PressureStd', 0.08),      # 8%  - variazione pressione (importante!)
+    ('AvgAsolaSize', 0.08),     # 8%  - dimensione asole
+    ('AvgSpacing', 0.06),       # 6%  - spaziatura
+    ('Inclination', 0.05),      # 5%  - inclinazione
+    ('OverlapRatio', 0.05),     # 5%  - sovrapposizioni
+    ('LetterConnections', 0.05), # 5%  - connessioni
+    ('BaselineStdMm', 0.04),    # 4%  - baseline
+    ('StrokeComplexity', 0.04), # 4%  - complessità del tratto
+    ('ConnectedComponents', 0.02), # 2%  - numero componenti
+    ('WritingStyle', 0.01),     # 1%  - stile (qualitativo)
+    ('Readability', 0.00),      # 0%  - leggibilità (qualitativo, rimosso per spazio)
+]
+
+PARAMETER_NAMES = tuple(name for name, _ in KEY_PARAMETERS)
+PARAMETER_WEIGHTS = tuple(weight for _, weight in KEY_PARAMETERS)
+
+# Combinazione finale: SSIM (60%) + parametri (40%)
+SSIM_WEIGHT = 0.6
+PARAMETERS_WEIGHT = 0.4
+
+# Punteggio dei parametri se nessun parametro è disponibile per la coppia
+PARAMETERS_FALLBACK = 0.5
+
+# Soglie della classificazione a matrice 2D (similarità e naturalezza in percentuale)
+CLASSIFICATION_THRESHOLDS = {
+    'identical_similarity': 98,     # similarità quasi perfetta = autentica
+    'high_similarity': 85,          # alta similarità
+    'probable_similarity': 75,      # alta similarità con naturalezza intermedia
+    'medium_similarity': 65,        # limite inferiore della similarità media
+    'dissimulated_similarity': 55,  # limite inferiore dell'autentica dissimulata
+    'high_naturalness': 80,         # movimenti naturali
+    'accepted_naturalness': 75,     # naturalezza accettabile con similarità media
+    'low_naturalness': 60,          # movimenti innaturali
+    'poor_naturalness': 50,         # movimenti innaturali con similarità media
+}
+
+# Versione della configurazione di punteggio predefinita
+DEFAULT_SCORING_VERSION = "1"
+
+# Parametri qualitativi e vocabolario iniziale dei codici (valori in minuscolo);
+# valori sconosciuti ricevono il primo codice libero nel processo corrente
+QUALITATIVE_VOCABULARY = {
+    'WritingStyle': ['corsivo', 'stampatello', 'misto'],
+    'Readability': ['alta', 'media', 'bassa'],
+}
+
+# Livelli di leggibilità per la compatibilità graduale (sconosciuto = media)
+READABILITY_LEVELS = {'alta': 3, 'media': 2, 'bassa': 1}
+
+# Codice dei valori qualitativi presenti ma non testuali (compatibilità neutra)
+NON_TEXT_CODE = -1
+
+# Parametri con valori molto piccoli (asole, baseline): soglie assolute sulla differenza
+ABSOLUTE_PARAMETERS = ('AvgAsolaSize', 'BaselineStdMm')
+ABSOLUTE_THRESHOLDS = np.array([0.05, 0.1, 0.2])
+ABSOLUTE_TIERS = np.array([0.95, 0.80, 0.60])
+
+# Altri parametri numerici: soglie sulla differenza relativa
+RELATIVE_THRESHOLDS = np.array([0.05, 0.1, 0.15, 0.25, 0.50])
+RELATIVE_TIERS = np.array([0.98, 0.90, 0.80, 0.60, 0.30])
+
+# Inclinazione: normalizzazione forense su 45°, minimo 10%
+INCLINATION_RANGE = 45.0
+INCLINATION_MINIMUM = 0.1
+
+# Riferimenti elaborati per blocco: gli intermedi di un blocco restano nella cache della CPU
+BLOCK_SIZE = 8192
+
+_INDEX = {name: index for index, name in enumerate(PARAMETER_NAMES)}
+_QUALITATIVE_COLUMNS = [_INDEX[name] for name in QUALITATIVE_VOCABULARY]
+_ABSOLUTE_COLUMNS = [_INDEX[name] for name in ABSOLUTE_PARAMETERS]
+_INCLINATION_COLUMN = _INDEX['Inclination']
+_RELATIVE_COLUMNS = [index for index, name in enumerate(PARAMETER_NAMES)
+                     if index not in _QUALITATIVE_COLUMNS + _ABSOLUTE_COLUMNS + [_INCLINATION_COLUMN]]
+
+
+class ScoringConfig:
+    """
+    Configurazione versionata del punteggio: pesi dei parametri chiave, combinazione
+    SSIM/parametri e soglie della classificazione; i valori non specificati restano
+    quelli predefiniti
+    """
+
+    __slots__ = ("version", "weights", "ssim_weight", "parameters_weight", "thresholds")
+
+    def __init__(self, version=DEFAULT_SCORING_VERSION, weights=None, ssim_weight=SSIM_WEIGHT,
+                 parameters_weight=PARAMETERS_WEIGHT, thresholds=None):
+        weights = dict(KEY_PARAMETERS, **(weights or {}))
+        thresholds = dict(CLASSIFICATION_THRESHOLDS, **(thresholds or {}))
+        unknown = [name for name in weights if name not in _INDEX] + \
+                  [name for name in thresholds if name not in CLASSIFICATION_THRESHOLDS]
+        if unknown:
+            raise ValueError(f"Voci sconosciute nella configurazione di punteggio: {', '.join(unknown)}")
+        self.version = str(version)
+        self.weights = tuple(float(weights[name]) for name in PARAMETER_NAMES)
+        self.ssim_weight = float(ssim_weight)
+        self.parameters_weight = float(parameters_weight)
+        self.thresholds = thresholds
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("version", DEFAULT_SCORING_VERSION), data.get("weights"),
+                   data.get("ssim_weight", SSIM_WEIGHT), data.get("parameters_weight", PARAMETERS_WEIGHT),
+                   data.get("thresholds"))
+
+    @classmethod
+    def load(cls, path):
+        """Carica una configurazione da file JSON"""
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "weights": dict(zip(PARAMETER_NAMES, self.weights)),
+            "ssim_weight": self.ssim_weight,
+            "parameters_weight": self.parameters_weight,
+            "thresholds": dict(self.thresholds),
+        }
+
+    def fingerprint(self):
+        """Impronta dei valori effettivi (rileva modifiche senza cambio di versione)"""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()[:16]
+
+
+DEFAULT_SCORING_CONFIG = ScoringConfig()
+
+
+def encode_value(name, value):
+    """
+    Codifica il valore di un parametro come float: NaN se assente, codice intero per i
+    parametri qualitativi (NON_TEXT_CODE se il valore non è una stringa)
+    """
+    if value is None:
+        return np.nan
+    vocabulary = QUALITATIVE_VOCABULARY.get(name)
+    if vocabulary is None:
+        return float(value)
+    if not isinstance(value, str):
+        return float(NON_TEXT_CODE)
+    key = value.lower()
+    if key not in vocabulary:
+        vocabulary.append(key)
+    return float(vocabulary.index(key))
+
+
+def encode_parameters(data):
+    """
+    Vettore (P,) dei parametri chiave di una firma, nell'ordine di PARAMETER_NAMES
+
+    Args:
+        data: Dizionario dei parametri restituito dall'analisi
+
+    Returns:
+        Array float64 con NaN per i parametri mancanti
+    """
+    return np.array([encode_value(name, data.get(name)) for name in PARAMETER_NAMES])
+
+
+def encode_parameter_matrix(rows):
+    """Matrice (M, P) dei parametri chiave di più firme"""
+    matrix = np.empty((len(rows), len(PARAMETER_NAMES)))
+    for index, data in enumerate(rows):
+        matrix[index] = encode_parameters(data)
+    return matrix
+
+
+def _tiers(values, thresholds, tiers, fallback):
+    """Valore della prima fascia con values <= soglia, altrimenti fallback (NaN resta NaN)"""
+    # Indice della fascia = soglie non soddisfatte (senza rami: NaN non soddisfa nessuna soglia)
+    tier = np.zeros(values.shape, dtype=np.uint8)
+    outside = np.empty(values.shape, dtype=bool)
+    for threshold in thresholds:
+        np.less_equal(values, threshold, out=outside)
+        np.logical_not(outside, out=outside)
+        tier += outside.view(np.uint8)
+    table = np.append(tiers, np.nan)
+    return np.where(tier < len(tiers), table[tier], fallback)
+
+
+def compatibility_matrix(questioned, references):
+    """
+    Compatibilità di ogni parametro tra la firma in verifica e ciascun riferimento
+
+    Args:
+        questioned: Vettore (P,) restituito da encode_parameters, confrontato con tutti i
+            riferimenti, oppure matrice (M, P) confrontata riga per riga (coppie salvate)
+        references: Matrice (M, P) restituita da encode_parameter_matrix
+
+    Returns:
+        Matrice float64 (M, P) di compatibilità 0-1, NaN dove il parametro manca
+    """
+    questioned = np.atleast_2d(np.asarray(questioned, dtype=float))
+    references = np.atleast_2d(np.asarray(references, dtype=float))
+    paired = len(questioned) > 1
+    if paired and len(questioned) != len(references):
+        raise ValueError("Firme in verifica e riferimenti devono avere lo stesso numero di righe")
+    # Calcolo per righe contigue (P, M): ogni parametro è una riga della trasposta
+    result = np.empty(references.shape[::-1])
+    for start in range(0, len(references), BLOCK_SIZE):
+        block = np.ascontiguousarray(references[start:start + BLOCK_SIZE].T)
+        questioned_block = np.ascontiguousarray(questioned[start:start + BLOCK_SIZE].T) if paired else questioned.T
+        _compatibility_block(questioned_block, block, result[:, start:start + BLOCK_SIZE])
+    return result.T
+
+
+def _compatibility_block(questioned, references, result):
+    """
+    Compatibilità di un blocco di riferimenti trasposto (P, B), scritta in result (P, B);
+    questioned è (P, 1) per un solo vettore oppure (P, B) per coppie riga per riga
+    """
+    # I parametri assenti in tutte le firme in verifica sono NaN per tutti i riferimenti
+    result[:] = np.nan
+    available = ~np.isnan(questioned).all(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = [column for column in _RELATIVE_COLUMNS if available[column]]
+        values = references[columns]
+        max_val = np.abs(values)
+        np.maximum(max_val, np.abs(questioned[columns]), out=max_val)
+        values -= questioned[columns]
+        relative_diff = np.abs(values, out=values)
+        relative_diff /= max_val
+        fallback = 1 - relative_diff
+        np.maximum(fallback, 0.10, out=fallback)
+        compatibility = _tiers(relative_diff, RELATIVE_THRESHOLDS, RELATIVE_TIERS, fallback)
+        # Entrambi zero = perfetta compatibilità
+        result[columns] = np.where(max_val == 0, 1.0, compatibility)
+
+        columns = [column for column in _ABSOLUTE_COLUMNS if available[column]]
+        diff = np.abs(references[columns] - questioned[columns])
+        result[columns] = _tiers(diff, ABSOLUTE_THRESHOLDS, ABSOLUTE_TIERS, np.maximum(0, 1 - (diff * 2)))
+
+        column = _INCLINATION_COLUMN
+        if available[column]:
+            inclination_diff = np.abs(references[column] - questioned[column])
+            result[column] = np.maximum(INCLINATION_MINIMUM, 1 - np.minimum(1, inclination_diff / INCLINATION_RANGE))
+
+    for name, column in zip(QUALITATIVE_VOCABULARY, _QUALITATIVE_COLUMNS):
+        if not available[column]:
+            continue
+        reference_codes, questioned_codes = references[column], questioned[column]
+        missing = np.isnan(reference_codes) | np.isnan(questioned_codes)
+        text = (reference_codes >= 0) & (questioned_codes >= 0)
+        different = 0.5
+        if name == 'Readability':
+            # Alta-Media-Bassa: compatibilità graduale (65% se diff=1, 30% se diff=2)
+            levels = np.array([READABILITY_LEVELS.get(value, 2) for value in QUALITATIVE_VOCABULARY[name]])
+            reference_levels = levels[np.where(text, reference_codes, 0).astype(np.intp)]
+            questioned_levels = levels[np.where(text, questioned_codes, 0).astype(np.intp)]
+            different = np.where(text, np.maximum(0.3, 1 - (np.abs(reference_levels - questioned_levels) * 0.35)), 0.5)
+        compatibility = np.where(text & (reference_codes == questioned_codes), 1.0, different)
+        result[column] = np.where(missing, np.nan, compatibility)
+
+
+def weighted_parameter_scores(compatibilities, weights=PARAMETER_WEIGHTS):
+    """
+    Punteggio pesato dei parametri per ogni riferimento, ignorando i parametri mancanti
+
+    Le somme procedono parametro per parametro nell'ordine di KEY_PARAMETERS, come nel
+    calcolo coppia per coppia, così il risultato coincide bit per bit
+
+    Args:
+        compatibilities: Matrice (M, P) restituita da compatibility_matrix
+        weights: Pesi dei parametri nell'ordine di PARAMETER_NAMES
+
+    Returns:
+        Array (M,) dei punteggi 0-1 (PARAMETERS_FALLBACK se nessun parametro è disponibile)
+    """
+    # Un parametro per riga contigua (la trasposta di compatibility_matrix non richiede copie)
+    columns = np.atleast_2d(compatibilities).T
+    weighted_score = np.zeros(columns.shape[1])
+    total_weight = np.zeros(columns.shape[1])
+    for column, weight in zip(columns, weights):
+        available = column == column
+        weighted_score += np.where(available, column * weight, 0.0)
+        total_weight += np.where(available, weight, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total_weight > 0, weighted_score / total_weight, PARAMETERS_FALLBACK)
+
+
+def score_candidates(questioned, references, ssim=None, config=None):
+    """
+    Compatibilità e punteggi di una firma in verifica rispetto a M riferimenti
+
+    Args:
+        questioned: Dizionario dei parametri oppure vettore (P,) già codificato; una lista di
+            dizionari o una matrice (M, P) confronta le firme riga per riga
+        references: Lista di dizionari oppure matrice (M, P) già codificata
+        ssim: SSIM per riferimento (scalare o array (M,)); se assente manca la similarità finale
+        config: ScoringConfig (default: DEFAULT_SCORING_CONFIG)
+
+    Returns:
+        Dizionario con compatibilities (M, P), parameters_score (M,) e, se ssim è fornito,
+        similarity (M,) = SSIM * ssim_weight + parametri * parameters_weight
+    """
+    config = config or DEFAULT_SCORING_CONFIG
+    if isinstance(questioned, Mapping):
+        questioned = encode_parameters(questioned)
+    elif len(questioned) and isinstance(questioned[0], Mapping):
+        questioned = encode_parameter_matrix(questioned)
+    if len(references) and isinstance(references[0], Mapping):
+        references = encode_parameter_matrix(references)
+    compatibilities = compatibility_matrix(questioned, references)
+    parameters_score = weighted_parameter_scores(compatibilities, config.weights)
+    result = {"compatibilities": compatibilities, "parameters_score": parameters_score}
+    if ssim is not None:
+        result["similarity"] = (np.asarray(ssim, dtype=float) * config.ssim_weight) + (parameters_score * config.parameters_weight)
+    return result
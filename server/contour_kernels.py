@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kernel vettorizzati di geometria dei contorni per GrapholexInsight
+Tutti i contorni vengono concatenati in un unico array di punti più gli offset di
+ciascun contorno: angoli di curvatura, derivate seconde e lunghezze d'arco sono
+calcolati in NumPy senza cicli Python per punto, poi ridotti per contorno
+"""
+
+import numpy as np
+
+
+class ContourBatch:
+    """
+    Insieme di contorni concatenati
+
+    Attributi:
+        points: Array (N, 2) float64 con tutti i punti
+        lengths: Numero di punti di ciascun contorno
+        offsets: Indice del primo punto di ciascun contorno in points
+        contour_ids: Indice del contorno di appartenenza di ogni punto
+        local_index: Posizione di ogni punto all'interno del proprio contorno
+    """
+
+    def __init__(self, contours, min_points=0):
+        selected = [contour.reshape(-1, 2) for contour in contours if len(contour) >= min_points]
+        self.count = len(selected)
+        self.lengths = np.array([len(points) for points in selected], dtype=np.int64)
+        if self.count:
+            self.points = np.concatenate(selected).astype(np.float64)
+        else:
+            self.points = np.empty((0, 2), dtype=np.float64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.lengths)[:-1])).astype(np.int64) if self.count else self.lengths
+        self.contour_ids = np.repeat(np.arange(self.count), self.lengths)
+        self.local_index = np.arange(len(self.points)) - self.offsets[self.contour_ids] if self.count else self.contour_ids
+
+    def segment_sum(self, values, ids):
+        """Somma per contorno dei valori associati agli indici di contorno ids"""
+        return np.bincount(ids, weights=values, minlength=self.count)
+
+    def segment_mean_std(self, values, ids):
+        """
+        Media e deviazione standard (popolazione, due passate come np.std) per contorno
+
+        Returns:
+            Tupla (medie, deviazioni, conteggi)
+        """
+        counts = np.bincount(ids, minlength=self.count)
+        safe_counts = np.maximum(counts, 1)
+        means = self.segment_sum(values, ids) / safe_counts
+        deviations = values - means[ids]
+        stds = np.sqrt(self.segment_sum(deviations * deviations, ids) / safe_counts)
+        return means, stds, counts
+
+    def turning_angles(self, step, epsilon):
+        """
+        Angoli (radianti) tra i vettori p[i-step]-p[i] e p[i+step]-p[i] per ogni punto
+        con almeno step punti prima e dopo nello stesso contorno
+
+        Args:
+            step: Distanza in punti dei due vicini
+            epsilon: Termine aggiunto al prodotto delle norme (come nel calcolo originale)
+
+        Returns:
+            Tupla (angoli, indice del contorno di ciascun angolo)
+        """
+        valid = (self.local_index >= step) & (self.local_index < self.lengths[self.contour_ids] - step)
+        centers = np.nonzero(valid)[0]
+        v1 = self.points[centers - step] - self.points[centers]
+        v2 = self.points[centers + step] - self.points[centers]
+        dot = v1[:, 0] * v2[:, 0] + v1[:, 1] * v2[:, 1]
+        norms = np.sqrt(v1[:, 0] * v1[:, 0] + v1[:, 1] * v1[:, 1]) * np.sqrt(v2[:, 0] * v2[:, 0] + v2[:, 1] * v2[:, 1])
+        cos_angle = np.clip(dot / (norms + epsilon), -1.0, 1.0)
+        return np.arccos(cos_angle), self.contour_ids[centers]
+
+    def second_differences(self):
+        """
+        Modulo della derivata seconda discreta (accelerazione) lungo ogni contorno
+
+        Returns:
+            Tupla (accelerazioni, indice del contorno di ciascun valore)
+        """
+        valid = self.local_index < self.lengths[self.contour_ids] - 2
+        starts = np.nonzero(valid)[0]
+        second = self.points[starts + 2] - 2 * self.points[starts + 1] + self.points[starts]
+        return np.sqrt(second[:, 0] * second[:, 0] + second[:, 1] * second[:, 1]), self.contour_ids[starts]
+
+    def open_arc_lengths(self):
+        """
+        Lunghezza d'arco aperta di ogni contorno, equivalente a cv2.arcLength(contour, False):
+        lunghezze dei segmenti in float32 come OpenCV, somma in float64
+        """
+        valid = self.local_index < self.lengths[self.contour_ids] - 1
+        starts = np.nonzero(valid)[0]
+        delta = (self.points[starts + 1] - self.points[starts]).astype(np.float32)
+        segments = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1]).astype(np.float64)
+        return self.segment_sum(segments, self.contour_ids[starts])
+
+
+def mean_turning_angle_degrees(contour):
+    """
+    Angolo medio (gradi) tra punti consecutivi p[i-2], p[i-1], p[i] di un contorno
+
+    Returns:
+        Media degli angoli, 0 se il contorno ha meno di 3 punti
+    """
+    batch = ContourBatch([contour])
+    angles, _ = batch.turning_angles(step=1, epsilon=1e-5)
+    return float(np.mean(np.degrees(angles))) if len(angles) else 0
+
+
+def coordination_statistics(contours, min_points=20, step=2):
+    """
+    Statistiche per contorno degli angoli di curvatura p[i-2], p[i], p[i+2]
+
+    Returns:
+        Tupla (media angoli, deviazione angoli, numero angoli, lunghezza d'arco aperta)
+        con un elemento per ogni contorno di almeno min_points punti
+    """
+    batch = ContourBatch(contours, min_points)
+    angles, ids = batch.turning_angles(step=step, epsilon=1e-6)
+    means, stds, counts = batch.segment_mean_std(angles, ids)
+    return means, stds, counts, batch.open_arc_lengths()
+
+
+def fluidity_statistics(contours, min_points=10):
+    """
+    Statistiche per contorno della derivata seconda (accelerazione) del tracciato
+
+    Returns:
+        Tupla (deviazione accelerazione, numero valori, lunghezza d'arco aperta)
+        con un elemento per ogni contorno di almeno min_points punti
+    """
+    batch = ContourBatch(contours, min_points)
+    acceleration, ids = batch.second_differences()
+    _, stds, counts = batch.segment_mean_std(acceleration, ids)
+    return stds, counts, batch.open_arc_lengths()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache su disco dei parametri estratti dalle firme per GrapholexInsight
+Chiave content-addressed: hash dei byte dell'immagine + dimensioni reali + versione
+dell'algoritmo, con una partizione per progetto, evizione per dimensione/TTL e contatori.
+Le voci sono JSON (SignatureFeatures.to_record), mai pickle: un file piantato nella
+directory non può eseguire codice, e la directory deve essere privata dell'utente.
+Il TTL parte dalla scrittura della voce (mtime, mai aggiornato); l'ordine LRU
+dell'evizione per dimensione usa l'ultimo accesso (atime, aggiornato a ogni hit).
+L'evizione scandisce tutta la partizione, quindi non avviene a ogni scrittura: al più
+una volta per intervallo (marcatore su disco, condiviso tra i processi) oppure quando
+il processo ha scritto una frazione del limite dall'ultima scansione
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from signature_features import SignatureFeatures
+
+# Dimensione massima di default di una partizione di progetto
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Validità di default di una voce (30 giorni)
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+
+# Intervallo minimo di default tra due scansioni di evizione della stessa partizione
+DEFAULT_EVICT_INTERVAL_SECONDS = 60
+
+# Frazione del limite di dimensione che un processo può scrivere prima di una nuova scansione
+EVICT_WRITE_FRACTION = 0.1
+
+# File della partizione il cui mtime è l'ora dell'ultima scansione di evizione
+EVICT_MARKER = ".last-eviction"
+
+# Partizione usata quando non è indicato un progetto
+DEFAULT_PARTITION = "default"
+
+# Estensione delle voci (le voci ".pkl" delle versioni precedenti vengono rimosse)
+ENTRY_SUFFIX = ".json"
+LEGACY_SUFFIX = ".pkl"
+
+
+def ensure_private_directory(path):
+    """
+    Crea la directory con permessi 0o700 e rifiuta quelle di un altro utente o scrivibili
+    da altri (ad es. pre-create in /tmp)
+
+    Raises:
+        PermissionError: Se la directory non è sicura
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o022):
+        raise PermissionError(f"Directory non sicura (proprietario o permessi): {path}")
+
+
+def _json_value(value):
+    """Valori numpy nei campi extra: convertiti nel tipo Python equivalente"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Valore non serializzabile: {type(value).__name__}")
+
+
+def hash_bytes(data):
+    """Hash SHA-256 esadecimale dei byte di un'immagine"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def source_fingerprint(sources):
+    """
+    Impronta del codice che produce i parametri: cambia ogni volta che cambia
+    il sorgente di una delle funzioni di estrazione, invalidando la cache
+
+    Args:
+        sources: Lista di stringhe di codice sorgente
+
+    Returns:
+        Impronta esadecimale (16 caratteri)
+    """
+    digest = hashlib.sha256()
+    for source in sources:
+        digest.update(source.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class FeatureCache:
+    """Cache su disco di una singola partizione di progetto"""
+
+    # Contatori condivisi dal processo, per tutte le partizioni
+    counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "scans": 0}
+
+    # Byte scritti dal processo in ogni partizione dall'ultima scansione di evizione
+    _written = {}
+
+    def __init__(self, root, algorithm_version, project_id=None,
+                 max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 evict_interval=DEFAULT_EVICT_INTERVAL_SECONDS):
+        self.algorithm_version = algorithm_version
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evict_interval = evict_interval
+        partition = f"project_{project_id}" if project_id is not None else DEFAULT_PARTITION
+        self.directory = os.path.join(root, partition)
+        ensure_private_directory(root)
+        ensure_private_directory(self.directory)
+
+    def make_key(self, image_hash, real_width_mm, real_height_mm):
+        """Chiave della voce: immagine + dimensioni reali + versione algoritmo"""
+        material = f"{image_hash}|{float(real_width_mm):.6f}x{float(real_height_mm):.6f}|{self.algorithm_version}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{ENTRY_SUFFIX}")
+
+    def get(self, key):
+        """Restituisce il risultato in cache oppure None (voce assente, scaduta o illeggibile)"""
+        path = self._path(key)
+        try:
+            info = os.stat(path)
+        except OSError:
+            FeatureCache.counters["misses"] += 1
+            return None
+        if time.time() - info.st_mtime > self.ttl_seconds:
+            self._remove(path)
+            FeatureCache.counters["misses"] += 1
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = SignatureFeatures.from_record(json.load(f))
+            # Solo l'ultimo accesso: mtime resta l'ora di scrittura su cui si misura il TTL
+            os.utime(path, (time.time(), info.st_mtime))
+        except OSError:
+            FeatureCache.counters["misses"] += 1
+            return None
+        except Exception as e:
+            # Voce troncata o di un formato precedente: vale come assente
+            print(f"[CACHE] Voce non valida {key[:12]}: {str(e)}", file=sys.stderr)
+            self._remove(path)
+            FeatureCache.counters["misses"] += 1
+            return None
+        FeatureCache.counters["hits"] += 1
+        return value
+
+    def put(self, key, value):
+        """Salva un risultato in modo atomico e, se è il momento, applica il limite di dimensione"""
+        if not isinstance(value, SignatureFeatures):
+            value = SignatureFeatures.from_parameters(value)
+        try:
+            data = json.dumps(value.to_record(), default=_json_value)
+        except (TypeError, ValueError) as e:
+            print(f"[CACHE] Voce {key[:12]} non salvata: {str(e)}", file=sys.stderr)
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"[CACHE] Errore nel salvataggio della voce {key[:12]}: {str(e)}", file=sys.stderr)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        FeatureCache.counters["stores"] += 1
+        written = FeatureCache._written.get(self.directory, 0) + len(data)
+        FeatureCache._written[self.directory] = written
+        if self._eviction_due(written):
+            self.evict()
+
+    def _eviction_due(self, written):
+        """Scansione necessaria: scritta una frazione del limite o intervallo trascorso"""
+        if written > self.max_bytes * EVICT_WRITE_FRACTION:
+            return True
+        try:
+            last_scan = os.stat(os.path.join(self.directory, EVICT_MARKER)).st_mtime
+        except OSError:
+            return True
+        return time.time() - last_scan >= self.evict_interval
+
+    def evict(self):
+        """
+        Rimuove le voci scadute (mtime = scrittura) e, oltre il limite di dimensione, le
+        meno usate di recente (atime = ultimo hit); scandisce tutta la partizione
+        """
+        FeatureCache.counters["scans"] += 1
+        FeatureCache._written[self.directory] = 0
+        marker = os.path.join(self.directory, EVICT_MARKER)
+        try:
+            with open(marker, "a"):
+                pass
+            os.utime(marker)
+        except OSError:
+            pass
+        now = time.time()
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(LEGACY_SUFFIX):
+                self._remove(entry.path)
+                continue
+            if not entry.name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._remove(entry.path)
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            FeatureCache.counters["evictions"] += 1
+        except OSError:
+            pass
+
+    @classmethod
+    def stats(cls):
+        """Contatori di hit/miss del processo corrente"""
+        lookups = cls.counters["hits"] + cls.counters["misses"]
+        return {**cls.counters, "hit_rate": cls.counters["hits"] / lookups if lookups else 0.0}
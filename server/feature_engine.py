@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Motore di estrazione dei parametri delle firme per GrapholexInsight
+Ogni parametro e ogni intermedio (binaria, scheletro, componenti connesse, contorni,
+gerarchia...) è un nodo che dichiara i nodi da cui dipende: l'esecutore calcola ogni
+intermedio una sola volta e solo se serve ai parametri richiesti
+"""
+
+
+class FeatureNode:
+    """Nodo del grafo: nome, dipendenze e funzione di calcolo"""
+
+    __slots__ = ("name", "requires", "compute", "public")
+
+    def __init__(self, name, requires, compute, public):
+        self.name = name
+        self.requires = tuple(requires)
+        self.compute = compute
+        self.public = public
+
+
+class FeatureGraph:
+    """
+    Registro di intermedi e parametri con le relative dipendenze
+
+    Gli input (es. immagine, dimensioni reali) sono forniti dal chiamante a ogni esecuzione;
+    intermedi e parametri si registrano con i decoratori intermediate() e feature(), e la
+    funzione decorata riceve i valori delle dipendenze nell'ordine dichiarato
+    """
+
+    def __init__(self, inputs=()):
+        self.inputs = tuple(inputs)
+        self._nodes = {}
+        self.features = []
+
+    def _register(self, name, requires, public):
+        def decorator(compute):
+            if name in self._nodes or name in self.inputs:
+                raise ValueError(f"Nodo già registrato: {name}")
+            for dependency in requires:
+                if dependency not in self._nodes and dependency not in self.inputs:
+                    raise ValueError(f"Dipendenza sconosciuta per {name}: {dependency}")
+            self._nodes[name] = FeatureNode(name, requires, compute, public)
+            if public:
+                self.features.append(name)
+            return compute
+        return decorator
+
+    def intermediate(self, name, *requires):
+        """Registra un intermedio condiviso (non incluso nei risultati)"""
+        return self._register(name, requires, public=False)
+
+    def feature(self, name, *requires):
+        """Registra un parametro pubblico; può dipendere anche da altri parametri"""
+        return self._register(name, requires, public=True)
+
+    def functions(self):
+        """Funzioni di calcolo registrate (per l'impronta della versione dell'algoritmo)"""
+        return [node.compute for node in self._nodes.values()]
+
+    def plan(self, features=None):
+        """
+        Ordine di calcolo dei nodi necessari ai parametri richiesti
+
+        Args:
+            features: Lista di nomi di parametri (None = tutti)
+
+        Returns:
+            Lista di nomi di nodi in ordine topologico, senza gli input
+        """
+        requested = self.features if features is None else list(features)
+        unknown = [name for name in requested if name not in self._nodes or not self._nodes[name].public]
+        if unknown:
+            raise ValueError(f"Parametri sconosciuti: {', '.join(unknown)}")
+
+        order = []
+        visited = set()
+
+        def visit(name):
+            if name in visited or name in self.inputs:
+                return
+            visited.add(name)
+            for dependency in self._nodes[name].requires:
+                visit(dependency)
+            order.append(name)
+
+        for name in requested:
+            visit(name)
+        return order
+
+    def run(self, inputs, features=None):
+        """
+        Calcola i parametri richiesti
+
+        Args:
+            inputs: Dizionario con i valori degli input del grafo
+            features: Lista di nomi di parametri (None = tutti)
+
+        Returns:
+            Dizionario {parametro: valore} nell'ordine di registrazione dei parametri
+        """
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Input mancanti: {', '.join(missing)}")
+
+        values = dict(inputs)
+        for name in self.plan(features):
+            node = self._nodes[name]
+            values[name] = node.compute(*(values[dependency] for dependency in node.requires))
+
+        requested = set(self.features if features is None else features)
+        return {name: values[name] for name in self.features if name in requested}
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Archivio dei parametri numerici delle firme per GrapholexInsight
+Archivio append-only con un ordine fisso delle colonne: i valori sono una matrice float32
+su disco aperta in memory-map, affiancata da un indice binario a record fissi (id, hash
+dell'immagine, dimensioni reali, versione dell'algoritmo, progetto). Le ricerche per
+intervalli ("Inclination entro ±5° e PressureMean entro 10") sono confronti vettoriali
+sulle colonne mappate, senza deserializzare JSON. Un indice secondario a bucket (id delle
+righe raggruppati per i primi due caratteri dell'hash dell'immagine) rende la ricerca di
+una firma già registrata indipendente dalla dimensione dell'archivio
+"""
+
+import fcntl
+import json
+import os
+
+import numpy as np
+
+# Parametri numerici di analyze_signature_with_dimensions, nell'ordine delle colonne;
+# Dimensions (larghezza e altezza della firma in mm) occupa due colonne
+STORE_COLUMNS = (
+    "pixels_per_mm",
+    "original_width",
+    "original_height",
+    "Proportion",
+    "Inclination",
+    "PressureMean",
+    "PressureStd",
+    "AvgCurvature",
+    "AvgAsolaSize",
+    "AvgSpacing",
+    "Velocity",
+    "OverlapRatio",
+    "LetterConnections",
+    "BaselineStdMm",
+    "StrokeComplexity",
+    "ConnectedComponents",
+    "DimensionsWidthMm",
+    "DimensionsHeightMm",
+    "FluidityScore",
+    "PressureConsistency",
+    "CoordinationIndex",
+    "NaturalnessIndex",
+)
+
+# Colonne ricavate dalla coppia Dimensions (larghezza, altezza)
+DIMENSION_COLUMNS = ("DimensionsWidthMm", "DimensionsHeightMm")
+
+# Record dell'indice affiancato alla matrice, uno per riga
+INDEX_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("image_hash", "S64"),
+    ("width_mm", "<f4"),
+    ("height_mm", "<f4"),
+    ("algorithm_version", "S24"),
+    ("project_id", "<i8"),
+])
+
+# Progetto registrato per le firme analizzate senza progetto
+NO_PROJECT = -1
+
+# Formato dei file: cambia se cambiano colonne o record dell'indice
+STORE_FORMAT = 1
+
+VALUES_FILE = "features.f32"
+INDEX_FILE = "index.bin"
+HEADER_FILE = "store.json"
+LOCK_FILE = "store.lock"
+
+# Indice secondario: un file di id int64 per bucket, più il numero di righe già indicizzate
+BUCKET_DIR = "buckets"
+BUCKET_COUNT = 256
+BUCKET_ROWS_FILE = "rows"
+
+
+def hash_buckets(image_hashes):
+    """
+    Bucket (0-255) delle firme: i primi due caratteri esadecimali dell'hash dell'immagine
+    (0 per gli hash non esadecimali)
+
+    Args:
+        image_hashes: Array di hash (campo image_hash dell'indice)
+
+    Returns:
+        Array int64 dei bucket
+    """
+    raw = np.frombuffer(np.ascontiguousarray(image_hashes, dtype="S64").tobytes(), dtype=np.uint8)
+    raw = raw.reshape(-1, 64)[:, :2].astype(np.int64)
+    digits = np.where(raw >= ord("a"), raw - ord("a") + 10, raw - ord("0"))
+    valid = ((digits >= 0) & (digits < 16)).all(axis=1)
+    return np.where(valid, digits[:, 0] * 16 + digits[:, 1], 0)
+
+
+def parameter_row(parameters):
+    """
+    Riga float32 dei parametri di una firma, nell'ordine di STORE_COLUMNS
+
+    Args:
+        parameters: Parametri restituiti da analyze_signature_with_dimensions (dizionario o
+            SignatureFeatures)
+
+    Returns:
+        Array (C,) con NaN per i parametri assenti
+    """
+    dimensions = parameters.get("Dimensions") or (None, None)
+    row = np.full(len(STORE_COLUMNS), np.nan, dtype=np.float32)
+    for position, name in enumerate(STORE_COLUMNS):
+        value = dimensions[DIMENSION_COLUMNS.index(name)] if name in DIMENSION_COLUMNS else parameters.get(name)
+        if value is not None:
+            row[position] = value
+    return row
+
+
+class FeatureStore:
+    """Archivio in una directory: matrice dei valori, indice e intestazione con le colonne"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.columns = STORE_COLUMNS
+        header_path = os.path.join(directory, HEADER_FILE)
+        if os.path.exists(header_path):
+            with open(header_path, encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("format") != STORE_FORMAT or tuple(header.get("columns", ())) != STORE_COLUMNS:
+                raise ValueError(f"Archivio dei parametri in {directory} con un formato diverso")
+        else:
+            with open(header_path, "w", encoding="utf-8") as f:
+                json.dump({"format": STORE_FORMAT, "columns": list(STORE_COLUMNS)}, f)
+        self._column = {name: position for position, name in enumerate(STORE_COLUMNS)}
+        self._values_path = os.path.join(directory, VALUES_FILE)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        self._bucket_dir = os.path.join(directory, BUCKET_DIR)
+        os.makedirs(self._bucket_dir, exist_ok=True)
+
+    def __len__(self):
+        """Righe complete: l'indice è scritto dopo i valori, quindi è lui a fare fede"""
+        try:
+            return os.path.getsize(self._index_path) // INDEX_DTYPE.itemsize
+        except OSError:
+            return 0
+
+    def open(self):
+        """
+        Mappa in memoria i valori e l'indice (sola lettura)
+
+        Returns:
+            Tupla (matrice float32 (N, C), array strutturato (N,) con INDEX_DTYPE)
+        """
+        rows = len(self)
+        if rows == 0:
+            return np.empty((0, len(self.columns)), dtype=np.float32), np.empty(0, dtype=INDEX_DTYPE)
+        values = np.memmap(self._values_path, dtype=np.float32, mode="r", shape=(rows, len(self.columns)))
+        index = np.memmap(self._index_path, dtype=INDEX_DTYPE, mode="r", shape=(rows,))
+        return values, index
+
+    def _bucket_path(self, bucket):
+        return os.path.join(self._bucket_dir, f"{bucket:02x}.i64")
+
+    def _indexed_rows(self):
+        """Righe già presenti nei bucket (le successive sono cercate direttamente nell'indice)"""
+        try:
+            with open(os.path.join(self._bucket_dir, BUCKET_ROWS_FILE), "rb") as f:
+                return int(np.frombuffer(f.read(8), dtype="<i8")[0])
+        except (OSError, IndexError):
+            return 0
+
+    def _index_buckets(self, records, start):
+        """
+        Aggiunge ai bucket le righe dell'indice con id da start in poi (solo con il lock di
+        scrittura). Una scrittura interrotta può ripetere un id in un bucket: è innocuo
+
+        Args:
+            records: Record dell'indice delle righe start, start + 1, ...
+            start: Id del primo record
+        """
+        if len(records) == 0:
+            return
+        rows = start + len(records)
+        ids = np.arange(start, rows, dtype="<i8")
+        buckets = hash_buckets(records["image_hash"])
+        order = np.argsort(buckets, kind="stable")
+        boundaries = np.flatnonzero(np.diff(buckets[order])) + 1
+        for group in np.split(order, boundaries):
+            with open(self._bucket_path(int(buckets[group[0]])), "ab") as f:
+                f.write(ids[group].tobytes())
+        temp_path = os.path.join(self._bucket_dir, f"{BUCKET_ROWS_FILE}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(np.int64(rows).astype("<i8").tobytes())
+        os.replace(temp_path, os.path.join(self._bucket_dir, BUCKET_ROWS_FILE))
+
+    def _lookup(self, index, rows, record):
+        """
+        Id della riga con la stessa chiave del record (hash, dimensioni, versione, progetto)
+        tra le prime `rows` righe, oppure None: legge un solo bucket più le righe non
+        ancora indicizzate
+        """
+        indexed = min(self._indexed_rows(), rows)
+        try:
+            candidates = np.fromfile(self._bucket_path(int(hash_buckets(record["image_hash"])[0])), dtype="<i8")
+        except OSError:
+            candidates = np.empty(0, dtype="<i8")
+        candidates = np.concatenate([candidates[candidates < indexed], np.arange(indexed, rows)])
+        if candidates.size == 0:
+            return None
+        entries = index[candidates]
+        matches = candidates[
+            (entries["image_hash"] == record["image_hash"])
+            & (entries["width_mm"] == record["width_mm"])
+            & (entries["height_mm"] == record["height_mm"])
+            & (entries["algorithm_version"] == record["algorithm_version"])
+            & (entries["project_id"] == record["project_id"])
+        ]
+        return int(matches.min()) if matches.size else None
+
+    def append_rows(self, values, index, unique=False):
+        """
+        Aggiunge righe in blocco (scrittori serializzati con un lock sul file)
+
+        Args:
+            values: Matrice (N, C) dei valori nell'ordine di STORE_COLUMNS
+            index: Array strutturato (N,) con INDEX_DTYPE (il campo id è assegnato qui)
+            unique: Se True, le righe con una chiave già registrata (anche nello stesso
+                blocco) non vengono aggiunte e restituiscono l'id esistente; il controllo
+                avviene sotto il lock, quindi scrittori concorrenti non creano duplicati
+
+        Returns:
+            Array (N,) degli id assegnati (o esistenti)
+        """
+        values = np.ascontiguousarray(values, dtype=np.float32)
+        index = np.array(index, dtype=INDEX_DTYPE)
+        if values.shape != (len(index), len(self.columns)):
+            raise ValueError("Valori e indice non corrispondono alle colonne dell'archivio")
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            rows = len(self)
+            # Completa i bucket se una scrittura precedente si è interrotta dopo l'indice
+            _, stored = self.open()
+            indexed = min(self._indexed_rows(), rows)
+            self._index_buckets(stored[indexed:rows], indexed)
+
+            ids = np.full(len(index), -1, dtype=np.int64)
+            if unique:
+                batch = {}
+                for position, record in enumerate(index):
+                    key = record.tobytes()[INDEX_DTYPE.fields["image_hash"][1]:]
+                    existing = batch.get(key)
+                    if existing is None:
+                        existing = self._lookup(stored, rows, record)
+                    if existing is not None:
+                        ids[position] = existing
+                    else:
+                        batch[key] = rows + int((ids[:position] == -1).sum())
+            new = ids == -1
+            ids[new] = np.arange(rows, rows + int(new.sum()))
+            index = index[new]
+            index["id"] = ids[new]
+
+            # Scarta le righe incomplete di una scrittura interrotta
+            with open(self._values_path, "ab") as f:
+                f.truncate(rows * len(self.columns) * 4)
+                f.write(values[new].tobytes())
+            with open(self._index_path, "ab") as f:
+                f.truncate(rows * INDEX_DTYPE.itemsize)
+                f.write(index.tobytes())
+            # I bucket seguono l'indice: non puntano mai a righe non ancora scritte
+            self._index_buckets(index, rows)
+        return ids
+
+    def append(self, parameters, image_hash, width_mm, height_mm, algorithm_version, project_id=None):
+        """Registra una firma analizzata (se non è già presente) e ne restituisce l'id"""
+        index = np.array([(0, image_hash, width_mm, height_mm, algorithm_version,
+                           NO_PROJECT if project_id is None else project_id)], dtype=INDEX_DTYPE)
+        return int(self.append_rows(parameter_row(parameters)[None, :], index, unique=True)[0])
+
+    def find(self, image_hash, width_mm, height_mm, algorithm_version, project_id=None):
+        """Id della firma già registrata con la stessa chiave, oppure None"""
+        record = np.array([(0, image_hash, width_mm, height_mm, algorithm_version,
+                            NO_PROJECT if project_id is None else project_id)], dtype=INDEX_DTYPE)[0]
+        _, index = self.open()
+        return self._lookup(index, len(index), record)
+
+    def scan(self, ranges, project_id=None, algorithm_version=None):
+        """
+        Righe con ogni parametro indicato entro il proprio intervallo (estremi inclusi;
+        i parametri mancanti non soddisfano nessun intervallo)
+
+        Args:
+            ranges: Dizionario {parametro: (minimo, massimo)}
+            project_id: Se indicato, solo le firme del progetto
+            algorithm_version: Se indicata, solo le firme analizzate con quella versione
+
+        Returns:
+            Array degli id delle righe trovate, in ordine di inserimento
+        """
+        unknown = [name for name in ranges if name not in self._column]
+        if unknown:
+            raise ValueError(f"Parametri non presenti nell'archivio: {', '.join(unknown)}")
+        values, index = self.open()
+        mask = np.ones(len(index), dtype=bool)
+        selected = np.empty(len(index), dtype=bool)
+        for name, (low, high) in ranges.items():
+            column = values[:, self._column[name]]
+            np.greater_equal(column, np.float32(low), out=selected)
+            mask &= selected
+            np.less_equal(column, np.float32(high), out=selected)
+            mask &= selected
+        if project_id is not None:
+            mask &= index["project_id"] == project_id
+        if algorithm_version is not None:
+            mask &= index["algorithm_version"] == algorithm_version.encode("ascii")
+        return np.flatnonzero(mask)
+
+    def records(self, ids):
+        """
+        Righe dell'archivio come dizionari (per l'output JSON)
+
+        Args:
+            ids: Id delle righe, ad esempio restituiti da scan()
+
+        Returns:
+            Lista di {id, image_hash, width_mm, height_mm, algorithm_version, project_id, parameters}
+        """
+        values, index = self.open()
+        records = []
+        for row in ids:
+            entry = index[row]
+            records.append({
+                "id": int(entry["id"]),
+                "image_hash": entry["image_hash"].decode("ascii"),
+                "width_mm": float(entry["width_mm"]),
+                "height_mm": float(entry["height_mm"]),
+                "algorithm_version": entry["algorithm_version"].decode("ascii"),
+                "project_id": None if entry["project_id"] == NO_PROJECT else int(entry["project_id"]),
+                "parameters": {name: float(value) for name, value in zip(self.columns, values[row]) if not np.isnan(value)},
+            })
+        return records
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Schema canonico dei nomi dei parametri per GrapholexInsight
+I parametri salvati nel database o inviati dal frontend possono usare nomi in camelCase o
+snake_case; qui ci sono le tabelle precalcolate alias -> nome canonico e nome canonico ->
+alias, e la normalizzazione da eseguire una sola volta, quando i dati entrano nel
+sistema. I risultati dell'analisi (SignatureFeatures) usano già i nomi canonici
+"""
+
+# Nome canonico -> nomi accettati, compreso il canonico (nell'ordine in cui gli alias sono
+# aggiunti al dizionario normalizzato, per retrocompatibilità)
+PARAMETER_ALIASES = {
+    'Inclination': ('inclination', 'Inclination'),
+    'PressureMean': ('pressureMean', 'pressure_mean', 'PressureMean'),
+    'PressureStd': ('pressureStd', 'pressure_std', 'PressureStd'),
+    'Proportion': ('proportion', 'Proportion'),
+    'AvgSpacing': ('avgSpacing', 'avg_spacing', 'AvgSpacing'),
+    'Velocity': ('velocity', 'Velocity'),
+    'AvgCurvature': ('avgCurvature', 'avg_curvature', 'AvgCurvature'),
+    'Curvature': ('curvature', 'Curvature'),
+    'AvgAsolaSize': ('avgAsolaSize', 'avg_asola_size', 'AvgAsolaSize'),
+    'OverlapRatio': ('overlapRatio', 'overlap_ratio', 'OverlapRatio'),
+    'LetterConnections': ('letterConnections', 'letter_connections', 'LetterConnections'),
+    'BaselineStd': ('baselineStd', 'baseline_std', 'BaselineStd'),
+    'BaselineStdMm': ('baselineStdMm', 'baseline_std_mm', 'BaselineStdMm'),
+}
+
+# Alias -> nome canonico
+CANONICAL_NAMES = {alias: canonical for canonical, aliases in PARAMETER_ALIASES.items() for alias in aliases}
+
+
+class CanonicalParameters(dict):
+    """Dizionario di parametri già normalizzato: normalize_parameters lo restituisce invariato"""
+
+    __slots__ = ()
+
+
+def canonical_name(name):
+    """Nome canonico di un parametro (il nome stesso se non ha alias)"""
+    return CANONICAL_NAMES.get(name, name)
+
+
+def normalize_parameters(data):
+    """
+    Normalizza le chiavi dei parametri per garantire compatibilità tra versioni database/Python:
+    ogni chiave diventa il nome canonico e, per retrocompatibilità, il valore è ripetuto
+    sotto tutti gli alias dello stesso parametro
+
+    Args:
+        data: Dizionario con parametri della firma (altri tipi, come SignatureFeatures che ha
+            già i nomi canonici, sono restituiti invariati)
+
+    Returns:
+        CanonicalParameters con chiavi normalizzate
+    """
+    if not isinstance(data, dict) or isinstance(data, CanonicalParameters):
+        return data
+
+    normalized = CanonicalParameters()
+    for key, value in data.items():
+        canonical = CANONICAL_NAMES.get(key, key)
+        normalized[canonical] = value
+        for alias in PARAMETER_ALIASES.get(canonical, ()):
+            if alias != key:
+                normalized[alias] = value
+    return normalized
@@ -4,13 +4,16 @@
  */
 
 import { promises as fs } from 'fs';
-import { spawn } from 'child_process';
+import { ChildProcess, spawn } from 'child_process';
 import path from 'path';
+import net from 'net';
 import { log } from './vite';
 
 interface ComparisonResult {
   similarity: number;
   verdict: string;
+  ssim?: number;               // SSIM grezzo, conservato per il ricalcolo senza rianalisi (rescore)
+  scoring_version?: string;    // Versione della configurazione di punteggio usata
   
   // === NUOVI CAMPI PER INDICE DI NATURALEZZA ===
   naturalness?: number;        // Indice di naturalezza 0-1 (fluidità + coordinazione)
@@ -31,12 +34,120 @@ interface ComparisonResult {
   reference_parameters: any;
   verifica_data?: any;  // Parametri Python della firma da verificare
   comp_data?: any;      // Parametri Python della firma di riferimento
-  comparison_chart: string;  // Base64-encoded image
+  comparison_chart?: string;  // Base64-encoded image (chart_output "png", default)
+  naturalness_chart?: string; // Base64-encoded image (chart_output "png", default)
+  comparison_chart_data?: ComparisonChartData;    // Solo con chart_output "data"
+  naturalness_chart_data?: NaturalnessChartData;  // Solo con chart_output "data"
   description: string;
   report_path?: string;
   error?: string;
 }
 
+// Grafico di compatibilità come dati (chart_output "data"): il client disegna le barre
+interface ComparisonChartData {
+  type: 'comparison';
+  title: string;
+  x_label: string;
+  range: [number, number];
+  color: string;
+  parameters: string[];
+  labels: string[];
+  verifica_values: number[];
+  reference_values: number[];
+  compatibilities: number[];
+  classes: ('high' | 'medium' | 'low')[];  // Classe di colore di ciascuna barra
+}
+
+// Grafico di naturalezza come dati (chart_output "data")
+interface NaturalnessChartData {
+  type: 'naturalness';
+  title: string;
+  x_label: string;
+  y_label: string;
+  range: [number, number];
+  parameters: string[];
+  labels: string[];
+  verifica_values: number[];
+  reference_values: number[];
+  series: { key: 'verifica' | 'reference'; name: string; color: string; alpha: number }[];
+  empty_message: string | null;  // Messaggio da mostrare se non ci sono dati di naturalezza
+}
+
+interface RankedReference {
+  rank: number;
+  index: number;
+  image_path: string;
+  dimensions: [number, number];
+  similarity: number;
+  ssim: number;
+  naturalness: number;
+  verdict: string;
+  confidence: number;
+  explanation: string;
+  compatibilities: Record<string, number>;
+  reference_parameters: any;
+  comparison_chart?: string;   // Solo per i primi topK riferimenti
+  naturalness_chart?: string;  // Solo per i primi topK riferimenti
+  comparison_chart_data?: ComparisonChartData;    // Al posto dei PNG con chart_output "data"
+  naturalness_chart_data?: NaturalnessChartData;  // Al posto dei PNG con chart_output "data"
+}
+
+interface MultiComparisonResult {
+  verifica_parameters: any;
+  references: number;
+  top_k: number;
+  results: RankedReference[];
+  errors: { index: number; image_path: string; error: string }[];
+  error?: string;
+}
+
+interface ReferenceProfileSummary {
+  writer_id: string;
+  project_id: number | null;
+  directory: string;
+  exemplars: { image_path: string; dimensions: [number, number] }[];
+  statistics: Record<string, { count: number; mean: number; std: number; min: number; max: number }>;
+  naturalness: any;
+  reused: number;
+  analyzed: number;
+  removed: number;
+  errors: { index: number; image_path: string; error: string }[];
+  error?: string;
+}
+
+interface ProfileComparisonResult {
+  writer_id: string;
+  verifica_parameters: any;
+  exemplars: number;
+  best_similarity: number;
+  mean_similarity: number;
+  results: Omit<RankedReference, 'reference_parameters' | 'comparison_chart' | 'naturalness_chart'>[];
+  parameter_deviation: Record<string, { value: number; mean: number; std: number; z_score: number | null; within_range: boolean }>;
+  naturalness_profile: any;
+  scoring_version: string;
+  error?: string;
+}
+
+// Renderer dei grafici di confronto: matplotlib (default) oppure opencv (più veloce, stessa impaginazione)
+type ChartRenderer = 'matplotlib' | 'opencv';
+
+// Formato dei grafici: immagini PNG base64 (default) oppure solo le serie, disegnate dal client
+type ChartOutput = 'png' | 'data';
+
+// Campi con le immagini base64, esclusi dai log
+const CHART_IMAGE_FIELDS = new Set(['comparison_chart', 'naturalness_chart']);
+
+/**
+ * Riassunto di un risultato per i log, senza le immagini base64 (centinaia di KB)
+ * @param result Risultato restituito dallo script Python
+ * @returns JSON del risultato con la sola lunghezza delle immagini
+ */
+function summarizeForLog(result: any): string {
+  return JSON.stringify(result, (key, value) =>
+    CHART_IMAGE_FIELDS.has(key) && typeof value === 'string' ? `<PNG base64, ${value.length} caratteri>` : value
+  );
+}
+
 interface CaseInfo {
   caseName?: string;
   subject?: string;
@@ -45,6 +156,260 @@ interface CaseInfo {
   notes?: string;
 }
 
+interface WorkerRequest {
+  id: number;
+  command: string;
+  line: string;        // Riga JSON inviata al worker
+  timeoutMs: number;
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+  timer?: NodeJS.Timeout;
+}
+
+/**
+ * Processo --serve del pool locale: esegue una richiesta alla volta
+ */
+interface PoolWorker {
+  process: ChildProcess;
+  buffer: string;
+  current: WorkerRequest | null;
+}
+
+// Numero di worker --serve locali (sovrascrivibile con SIGNATURE_WORKERS)
+const DEFAULT_POOL_SIZE = 2;
+
+// Timeout di ogni richiesta ai worker, uguale alla deadline di default del servizio
+// multi-core (sovrascrivibile con SIGNATURE_WORKER_TIMEOUT_MS)
+const DEFAULT_WORKER_TIMEOUT_MS = 60000;
+
+/**
+ * Divide l'output ricevuto in righe complete, conservando nel buffer la riga parziale
+ * @param holder Oggetto con il buffer dell'output già ricevuto
+ * @param chunk Porzione di output ricevuta
+ * @returns Righe JSON non vuote
+ */
+function takeLines(holder: { buffer: string }, chunk: string): string[] {
+  holder.buffer += chunk;
+  const lines = holder.buffer.split('\n');
+  holder.buffer = lines.pop() ?? '';
+  return lines.map((line) => line.trim()).filter((line) => line);
+}
+
+/**
+ * Worker Python persistenti (modalità --serve dello script di analisi)
+ * Un piccolo pool di processi con cv2/skimage/matplotlib già importati: ognuno scambia
+ * una richiesta JSON per riga su stdin e una risposta JSON per riga su stdout, una alla
+ * volta. Le richieste attendono in coda qui un worker libero e il timeout parte solo
+ * quando la richiesta viene affidata al worker. Se SIGNATURE_ANALYSIS_SOCKET è impostata,
+ * usa invece il servizio multi-core (modalità --service) sullo stesso protocollo, via
+ * socket Unix: coda, deadline e cancellazione sono gestite dal servizio
+ */
+export class SignatureWorker {
+  private static readonly pythonScript = path.join(process.cwd(), 'server', 'advanced-signature-analyzer.py');
+  private static readonly poolSize = Math.max(1, parseInt(process.env.SIGNATURE_WORKERS || '', 10) || DEFAULT_POOL_SIZE);
+  public static readonly timeoutMs = parseInt(process.env.SIGNATURE_WORKER_TIMEOUT_MS || '', 10) || DEFAULT_WORKER_TIMEOUT_MS;
+  private static nextId = 1;
+
+  // Pool locale
+  private static workers: PoolWorker[] = [];
+  private static queue: WorkerRequest[] = [];
+
+  // Connessione al servizio multi-core
+  private static socket: net.Socket | null = null;
+  private static socketOutput = { buffer: '' };
+  private static pending = new Map<number, WorkerRequest>();
+
+  /**
+   * Conclude una richiesta con la risposta del worker
+   * @param request Richiesta da concludere
+   * @param response Risposta JSON con result oppure error
+   */
+  private static settle(request: WorkerRequest, response: any): void {
+    if (request.timer) clearTimeout(request.timer);
+    if (response.error) {
+      request.reject(new Error(response.error));
+    } else {
+      request.resolve(response.result);
+    }
+  }
+
+  /**
+   * Avvia un nuovo worker --serve e lo aggiunge al pool
+   * @returns Il worker avviato (libero)
+   */
+  private static spawnWorker(): PoolWorker {
+    console.log(`[PYTHON WORKER] Avvio worker persistente: ${this.pythonScript}`);
+    const child = spawn('python3', [this.pythonScript, '--serve']);
+    const worker: PoolWorker = { process: child, buffer: '', current: null };
+
+    child.stdout!.on('data', (data) => {
+      for (const line of takeLines(worker, data.toString())) {
+        try {
+          const response = JSON.parse(line);
+          const request = worker.current;
+          if (!request || response.id !== request.id) continue;
+          worker.current = null;
+          this.settle(request, response);
+        } catch (error: any) {
+          log(`Risposta non valida dal worker Python: ${error.message}`, 'python-bridge');
+        }
+      }
+      this.dispatch();
+    });
+
+    child.stderr!.on('data', (data) => {
+      log(`Python worker ${child.pid}: ${data}`, 'python-bridge');
+    });
+
+    // Scritture verso un worker appena terminato: la chiusura è gestita da 'close'
+    child.stdin!.on('error', () => {});
+
+    child.on('close', (code) => {
+      this.removeWorker(worker, `Worker Python terminato con codice ${code}`);
+    });
+
+    child.on('error', (error) => {
+      this.removeWorker(worker, `Errore del worker Python: ${error.message}`);
+    });
+
+    this.workers.push(worker);
+    return worker;
+  }
+
+  /**
+   * Toglie dal pool un worker terminato e rifiuta solo la richiesta che stava eseguendo;
+   * le richieste in coda passano agli altri worker o a uno nuovo
+   * @param worker Worker da rimuovere
+   * @param reason Motivo dell'errore per la richiesta in esecuzione
+   */
+  private static removeWorker(worker: PoolWorker, reason: string): void {
+    const position = this.workers.indexOf(worker);
+    if (position < 0) return;
+
+    log(reason, 'python-bridge');
+    this.workers.splice(position, 1);
+    const request = worker.current;
+    worker.current = null;
+    if (request) {
+      this.settle(request, { error: reason });
+    }
+    this.dispatch();
+  }
+
+  /**
+   * Affida le richieste in coda ai worker liberi, avviandone di nuovi fino a poolSize;
+   * il timeout di ogni richiesta parte da qui, non dall'accodamento
+   */
+  private static dispatch(): void {
+    while (this.queue.length > 0) {
+      let worker = this.workers.find((candidate) => !candidate.current);
+      if (!worker) {
+        if (this.workers.length >= this.poolSize) return;
+        worker = this.spawnWorker();
+      }
+
+      const request = this.queue.shift()!;
+      const assigned = worker;
+      assigned.current = request;
+      request.timer = setTimeout(() => this.expire(assigned, request), request.timeoutMs);
+      assigned.process.stdin!.write(request.line);
+    }
+  }
+
+  /**
+   * Termina il worker bloccato su una richiesta scaduta: il processo --serve ignora
+   * deadline_ms e senza kill resterebbe occupato. Viene rifiutata solo la richiesta
+   * scaduta; il worker è sostituito al prossimo dispatch
+   * @param worker Worker che esegue la richiesta
+   * @param request Richiesta scaduta
+   */
+  private static expire(worker: PoolWorker, request: WorkerRequest): void {
+    if (worker.current !== request) return;
+    const reason = `Timeout del worker Python dopo ${request.timeoutMs}ms (comando ${request.command})`;
+    this.removeWorker(worker, reason);
+    worker.process.kill('SIGKILL');
+  }
+
+  /**
+   * Apre la connessione al servizio multi-core se non è già attiva
+   * @param socketPath Percorso del socket Unix del servizio
+   * @returns Il socket su cui scrivere le richieste
+   */
+  private static ensureServiceConnection(socketPath: string): net.Socket {
+    if (this.socket && this.socket.writable) {
+      return this.socket;
+    }
+
+    console.log(`[PYTHON WORKER] Connessione al servizio di analisi: ${socketPath}`);
+    const socket = net.createConnection(socketPath);
+    this.socketOutput = { buffer: '' };
+    const output = this.socketOutput;
+
+    // Solo la connessione corrente chiude le richieste in attesa
+    const terminate = (reason: string) => {
+      if (this.socket !== socket) return;
+      log(reason, 'python-bridge');
+      this.socket = null;
+      this.pending.forEach((request) => this.settle(request, { error: reason }));
+      this.pending.clear();
+    };
+
+    socket.on('data', (data) => {
+      for (const line of takeLines(output, data.toString())) {
+        try {
+          const response = JSON.parse(line);
+          const request = this.pending.get(response.id);
+          if (!request) continue;
+          this.pending.delete(response.id);
+          this.settle(request, response);
+        } catch (error: any) {
+          log(`Risposta non valida dal servizio di analisi: ${error.message}`, 'python-bridge');
+        }
+      }
+    });
+
+    socket.on('close', () => terminate(`Connessione al servizio di analisi chiusa`));
+    socket.on('error', (error) => terminate(`Errore del servizio di analisi: ${error.message}`));
+
+    this.socket = socket;
+    return socket;
+  }
+
+  /**
+   * Invia una richiesta a un worker persistente (o al servizio multi-core)
+   * @param command Comando (analyze, analyze-dimensions, compare, compare-many, report)
+   * @param args Argomenti del comando, con gli stessi nomi della CLI Python
+   * @param timeoutMs Timeout in millisecondi dall'inizio dell'esecuzione (default: lo stesso
+   *   per tutti i comandi, SignatureWorker.timeoutMs)
+   * @returns Promise con il risultato restituito dallo script Python
+   */
+  public static request(command: string, args: Record<string, any>, timeoutMs: number = SignatureWorker.timeoutMs): Promise<any> {
+    const id = this.nextId++;
+    // Il servizio multi-core usa deadline_ms per cancellare il lavoro scaduto
+    const payload = { id, command, deadline_ms: timeoutMs, ...args };
+
+    return new Promise((resolve, reject) => {
+      const request: WorkerRequest = { id, command, line: JSON.stringify(payload) + '\n', timeoutMs, resolve, reject };
+
+      const socketPath = process.env.SIGNATURE_ANALYSIS_SOCKET;
+      if (!socketPath) {
+        this.queue.push(request);
+        this.dispatch();
+        return;
+      }
+
+      const socket = this.ensureServiceConnection(socketPath);
+      // Il servizio cancella da sé il lavoro scaduto: qui basta smettere di attendere
+      request.timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Timeout del servizio di analisi dopo ${timeoutMs}ms (comando ${command})`));
+      }, timeoutMs);
+      this.pending.set(id, request);
+      socket.write(request.line);
+    });
+  }
+}
+
 /**
  * Classe per l'interazione con lo script Python di analisi avanzata delle firme
  */
@@ -73,51 +438,29 @@ export class SignaturePythonAnalyzer {
    * @param signaturePath Percorso del file dell'immagine della firma
    * @param realWidthMm Larghezza reale della firma in millimetri
    * @param realHeightMm Altezza reale della firma in millimetri
+   * @param features Sottoinsieme opzionale di parametri da calcolare (es. ['Inclination', 'PressureMean'])
    * @returns Promise con i parametri estratti dalla firma
    */
-  public static async analyzeSignature(signaturePath: string, realWidthMm: number, realHeightMm: number): Promise<any> {
-    return new Promise((resolve, reject) => {
-      const process = spawn('python3', [
-        this.pythonScript,
-        '--analyze-dimensions',  // Usa la funzione con dimensioni reali
-        signaturePath,
-        realWidthMm.toString(),
-        realHeightMm.toString()
-      ]);
-
-      let outputData = '';
-      let errorData = '';
-
-      process.stdout.on('data', (data) => {
-        outputData += data.toString();
-      });
-
-      process.stderr.on('data', (data) => {
-        errorData += data.toString();
-        log(`Python error: ${data}`, 'python-bridge');
+  public static async analyzeSignature(signaturePath: string, realWidthMm: number, realHeightMm: number, features?: string[]): Promise<any> {
+    let result: any;
+    try {
+      // Usa la funzione con dimensioni reali tramite il worker persistente
+      result = await SignatureWorker.request('analyze-dimensions', {
+        image_path: signaturePath,
+        width_mm: realWidthMm,
+        height_mm: realHeightMm,
+        ...(features ? { features } : {})
       });
+    } catch (error: any) {
+      throw new Error(`Errore nell'analisi della firma: ${error.message}`);
+    }
 
-      process.on('close', (code) => {
-        if (code !== 0) {
-          log(`Processo Python terminato con codice ${code}`, 'python-bridge');
-          reject(new Error(`Errore nell'analisi della firma: ${errorData}`));
-          return;
-        }
-
-        try {
-          const result = JSON.parse(outputData);
-          if (result.error) {
-            reject(new Error(result.error));
-          } else if (result.verifica_parameters) {
-            resolve(result.verifica_parameters);
-          } else {
-            reject(new Error('Formato di risposta non valido dallo script Python'));
-          }
-        } catch (error: any) {
-          reject(new Error(`Errore nel parsing del risultato: ${error.message}`));
-        }
-      });
-    });
+    if (result.error) {
+      throw new Error(result.error);
+    } else if (result.verifica_parameters) {
+      return result.verifica_parameters;
+    }
+    throw new Error('Formato di risposta non valido dallo script Python');
   }
 
   /**
@@ -129,6 +472,8 @@ export class SignaturePythonAnalyzer {
    * @param generateReport Se true, genera un report PDF
    * @param caseInfo Informazioni opzionali sul caso per il report
    * @param projectId ID opzionale del progetto per assicurare l'isolamento dei dati
+   * @param chartRenderer Renderer opzionale dei grafici (default: quello del servizio Python)
+   * @param chartOutput Formato dei grafici: 'data' restituisce solo le serie, senza PNG (default: 'png')
    * @returns Promise con i risultati del confronto
    */
   public static async compareSignatures(
@@ -138,91 +483,199 @@ export class SignaturePythonAnalyzer {
     referenceDimensions: { widthMm: number; heightMm: number },
     generateReport: boolean = false,
     caseInfo?: CaseInfo,
-    projectId?: number
+    projectId?: number,
+    chartRenderer?: ChartRenderer,
+    chartOutput?: ChartOutput
   ): Promise<ComparisonResult> {
-    return new Promise((resolve, reject) => {
-      const args = [
-        this.pythonScript,
-        verificaPath,
-        referencePath
-      ];
-
-      if (generateReport) {
-        args.push('--report');
-      }
-
-      // Se ci sono informazioni sul caso, le passiamo come JSON
-      if (caseInfo) {
-        args.push('--case-info');
-        args.push(JSON.stringify(caseInfo));
-      }
-      
-      // Se c'è l'ID del progetto, lo passiamo per isolamento dati
-      if (projectId) {
-        args.push('--project-id');
-        args.push(projectId.toString());
-        console.log(`[PYTHON BRIDGE] Passaggio del project ID ${projectId} allo script Python per isolamento dati`);
-      }
-      
+    const args: Record<string, any> = {
+      verifica_path: verificaPath,
+      comp_path: referencePath,
+      report: generateReport,
       // Passiamo le dimensioni reali di ciascuna firma invece del DPI generico
-      args.push('--verifica-dimensions');
-      args.push(`${verificaDimensions.widthMm}x${verificaDimensions.heightMm}`);
-      args.push('--reference-dimensions');
-      args.push(`${referenceDimensions.widthMm}x${referenceDimensions.heightMm}`);
-      log(`Usando dimensioni reali: verifica=${verificaDimensions.widthMm}x${verificaDimensions.heightMm}mm, reference=${referenceDimensions.widthMm}x${referenceDimensions.heightMm}mm`, 'python-bridge');
+      verifica_dimensions: `${verificaDimensions.widthMm}x${verificaDimensions.heightMm}`,
+      reference_dimensions: `${referenceDimensions.widthMm}x${referenceDimensions.heightMm}`
+    };
 
-      // Debug comando completo
-      console.error(`\n===== COMANDO PYTHON COMPLETO =====`);
-      console.error(`python3 ${args.join(' ')}`);
-      console.error(`===================================\n`);
+    // Se ci sono informazioni sul caso, le passiamo come JSON
+    if (caseInfo) {
+      args.case_info = caseInfo;
+    }
 
-      const process = spawn('python3', args);
+    // Se c'è l'ID del progetto, lo passiamo per isolamento dati
+    if (projectId) {
+      args.project_id = projectId;
+      console.log(`[PYTHON BRIDGE] Passaggio del project ID ${projectId} allo script Python per isolamento dati`);
+    }
 
-      let outputData = '';
-      let errorData = '';
+    if (chartRenderer) {
+      args.chart_renderer = chartRenderer;
+    }
 
-      process.stdout.on('data', (data) => {
-        outputData += data.toString();
-      });
+    if (chartOutput) {
+      args.chart_output = chartOutput;
+    }
 
-      process.stderr.on('data', (data) => {
-        errorData += data.toString();
-        log(`Python error: ${data}`, 'python-bridge');
-      });
+    log(`Usando dimensioni reali: verifica=${verificaDimensions.widthMm}x${verificaDimensions.heightMm}mm, reference=${referenceDimensions.widthMm}x${referenceDimensions.heightMm}mm`, 'python-bridge');
 
-      process.on('close', (code) => {
-        if (code !== 0) {
-          log(`Processo Python terminato con codice ${code}`, 'python-bridge');
-          reject(new Error(`Errore nel confronto delle firme: ${errorData}`));
-          return;
-        }
+    let result: ComparisonResult;
+    try {
+      result = await SignatureWorker.request(generateReport ? 'report' : 'compare', args) as ComparisonResult;
+    } catch (error: any) {
+      throw new Error(`Errore nel confronto delle firme: ${error.message}`);
+    }
 
-        try {
-          console.log(`[PYTHON BRIDGE] Output ricevuto:`, outputData);
-          const result = JSON.parse(outputData) as ComparisonResult;
-          
-          // DEBUG INCLINAZIONE: Controlla valori dal Python
-          if (result.verifica_data && result.verifica_data.Inclination !== undefined) {
-            console.error(`\n===== DEBUG INCLINAZIONE PYTHON =====`);
-            console.error(`PYTHON VERIFICA INCLINATION: ${result.verifica_data.Inclination}`);
-            console.error(`PYTHON COMP INCLINATION: ${result.comp_data?.Inclination || 'N/A'}`);
-            console.error(`=====================================\n`);
-          }
-          
-          // Verifica che report_path sia una stringa
-          if (result.report_path && typeof result.report_path !== 'string') {
-            console.log(`[PYTHON BRIDGE] Correzione report_path da ${result.report_path} a stringa`);
-            // Se non è una stringa, ma è presente, lo convertiamo in stringa
-            result.report_path = String(result.report_path);
-          }
-          
-          resolve(result);
-        } catch (error: any) {
-          console.error(`[PYTHON BRIDGE] Errore nel parsing JSON:`, error, `Output raw:`, outputData);
-          reject(new Error(`Errore nel parsing del risultato: ${error.message}`));
-        }
-      });
-    });
+    // DEBUG INCLINAZIONE: Controlla valori dal Python
+    if (result.verifica_data && result.verifica_data.Inclination !== undefined) {
+      console.error(`\n===== DEBUG INCLINAZIONE PYTHON =====`);
+      console.error(`PYTHON VERIFICA INCLINATION: ${result.verifica_data.Inclination}`);
+      console.error(`PYTHON COMP INCLINATION: ${result.comp_data?.Inclination || 'N/A'}`);
+      console.error(`=====================================\n`);
+    }
+
+    // Verifica che report_path sia una stringa
+    if (result.report_path && typeof result.report_path !== 'string') {
+      console.log(`[PYTHON BRIDGE] Correzione report_path da ${result.report_path} a stringa`);
+      // Se non è una stringa, ma è presente, lo convertiamo in stringa
+      result.report_path = String(result.report_path);
+    }
+
+    return result;
+  }
+
+  /**
+   * Confronta una firma da verificare con molti riferimenti in una sola richiesta:
+   * la firma in verifica è analizzata una volta e i riferimenti in parallelo
+   * @param verificaPath Percorso della firma da verificare
+   * @param verificaDimensions Dimensioni reali della firma da verificare {widthMm, heightMm}
+   * @param references Riferimenti con percorso e dimensioni reali
+   * @param topK Numero di migliori riferimenti per cui generare i grafici
+   * @param projectId ID opzionale del progetto per assicurare l'isolamento dei dati
+   * @param chartRenderer Renderer opzionale dei grafici (default: quello del servizio Python)
+   * @param chartOutput Formato dei grafici: 'data' restituisce solo le serie, senza PNG (default: 'png')
+   * @returns Promise con la classifica dei riferimenti per similarità decrescente
+   */
+  public static async compareAgainstReferences(
+    verificaPath: string,
+    verificaDimensions: { widthMm: number; heightMm: number },
+    references: { path: string; widthMm: number; heightMm: number }[],
+    topK: number = 3,
+    projectId?: number,
+    chartRenderer?: ChartRenderer,
+    chartOutput?: ChartOutput
+  ): Promise<MultiComparisonResult> {
+    const args: Record<string, any> = {
+      verifica_path: verificaPath,
+      verifica_dimensions: `${verificaDimensions.widthMm}x${verificaDimensions.heightMm}`,
+      references: references.map((reference) => ({
+        image_path: reference.path,
+        width_mm: reference.widthMm,
+        height_mm: reference.heightMm
+      })),
+      top_k: topK
+    };
+
+    if (projectId) {
+      args.project_id = projectId;
+    }
+
+    if (chartRenderer) {
+      args.chart_renderer = chartRenderer;
+    }
+
+    if (chartOutput) {
+      args.chart_output = chartOutput;
+    }
+
+    log(`Confronto con ${references.length} riferimenti (grafici per i primi ${topK})`, 'python-bridge');
+
+    let result: MultiComparisonResult;
+    try {
+      result = await SignatureWorker.request('compare-many', args) as MultiComparisonResult;
+    } catch (error: any) {
+      throw new Error(`Errore nel confronto con i riferimenti: ${error.message}`);
+    }
+
+    if (result.error) {
+      throw new Error(result.error);
+    }
+    return result;
+  }
+
+  /**
+   * Costruisce o aggiorna il profilo di riferimento di uno scrivente: solo gli esemplari
+   * nuovi o modificati vengono analizzati, quelli non più elencati sono rimossi
+   * @param writerId Identificativo dello scrivente
+   * @param references Elenco completo degli esemplari con percorso e dimensioni reali
+   * @param projectId ID opzionale del progetto per assicurare l'isolamento dei dati
+   * @returns Promise con il riepilogo del profilo
+   */
+  public static async buildReferenceProfile(
+    writerId: string,
+    references: { path: string; widthMm: number; heightMm: number }[],
+    projectId?: number
+  ): Promise<ReferenceProfileSummary> {
+    const args: Record<string, any> = {
+      writer_id: writerId,
+      references: references.map((reference) => ({
+        image_path: reference.path,
+        width_mm: reference.widthMm,
+        height_mm: reference.heightMm
+      }))
+    };
+
+    if (projectId) {
+      args.project_id = projectId;
+    }
+
+    let result: ReferenceProfileSummary;
+    try {
+      result = await SignatureWorker.request('profile-build', args) as ReferenceProfileSummary;
+    } catch (error: any) {
+      throw new Error(`Errore nella costruzione del profilo: ${error.message}`);
+    }
+
+    if (result.error) {
+      throw new Error(result.error);
+    }
+    log(`Profilo ${writerId}: ${result.reused} esemplari riutilizzati, ${result.analyzed} analizzati, ${result.removed} rimossi`, 'python-bridge');
+    return result;
+  }
+
+  /**
+   * Confronta una firma da verificare con il profilo di riferimento di uno scrivente
+   * @param verificaPath Percorso della firma da verificare
+   * @param verificaDimensions Dimensioni reali della firma da verificare {widthMm, heightMm}
+   * @param writerId Identificativo dello scrivente
+   * @param projectId ID opzionale del progetto per assicurare l'isolamento dei dati
+   * @returns Promise con i risultati per esemplare e lo scostamento dalla variabilità dello scrivente
+   */
+  public static async compareAgainstProfile(
+    verificaPath: string,
+    verificaDimensions: { widthMm: number; heightMm: number },
+    writerId: string,
+    projectId?: number
+  ): Promise<ProfileComparisonResult> {
+    const args: Record<string, any> = {
+      verifica_path: verificaPath,
+      verifica_dimensions: `${verificaDimensions.widthMm}x${verificaDimensions.heightMm}`,
+      writer_id: writerId
+    };
+
+    if (projectId) {
+      args.project_id = projectId;
+    }
+
+    let result: ProfileComparisonResult;
+    try {
+      result = await SignatureWorker.request('compare-profile', args) as ProfileComparisonResult;
+    } catch (error: any) {
+      throw new Error(`Errore nel confronto con il profilo: ${error.message}`);
+    }
+
+    if (result.error) {
+      throw new Error(result.error);
+    }
+    return result;
   }
 
   /**
@@ -260,8 +713,8 @@ export class SignaturePythonAnalyzer {
       // Forziamo la generazione del report, assicurandoci che il flag sia impostato a true
       const result = await this.compareSignatures(referencePath, verificaPath, referenceDimensions, verificaDimensions, true, caseInfo, projectId);
       
-      // Verifica approfondita del risultato
-      console.log(`[PYTHON BRIDGE] Risultato completo:`, JSON.stringify(result, null, 2));
+      // Verifica approfondita del risultato (senza le immagini base64 dei grafici)
+      console.log(`[PYTHON BRIDGE] Risultato completo: ${summarizeForLog(result)}`);
       
       if (!result.report_path) {
         console.log('[PYTHON BRIDGE] Report generato ma percorso non presente nel risultato');
@@ -272,7 +725,7 @@ export class SignaturePythonAnalyzer {
         }
         
         // Gestione speciale per il caso del report mancante ma con altre informazioni valide
-        if (result.similarity !== undefined && result.comparison_chart) {
+        if (result.similarity !== undefined && (result.comparison_chart || result.comparison_chart_data)) {
           console.log('[PYTHON BRIDGE] Tentativo di recupero: creando un percorso temporaneo per il report');
           
           // Creiamo un percorso fittizio che verrà sostituito più tardi nella chiamata API reale
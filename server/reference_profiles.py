@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Profili di riferimento degli scriventi per GrapholexInsight
+Per ogni scrivente (progetto + writer) un profilo precompilato con la matrice dei parametri
+degli esemplari, le statistiche di variabilità per parametro, la distribuzione del
+NaturalnessIndex e i dati SSIM preparati. Gli array sono file .npy aperti in memory-map,
+quindi il caricamento non dipende dal numero di esemplari, e il profilo si aggiorna in modo
+incrementale: solo gli esemplari aggiunti o modificati vengono letti e analizzati
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from compatibility_engine import PARAMETER_NAMES, QUALITATIVE_VOCABULARY, encode_parameter_matrix, encode_value
+from ssim_backends import PreparedSSIMStack
+
+# Indice JSON del profilo: esemplari, parametri, statistiche, versioni e generazione dei file
+INDEX_FILE = "profile.json"
+
+# Array del profilo, salvati come "<nome>.<generazione>.npy"
+ARRAY_NAMES = ("features", "naturalness", "ssim_pixels", "ssim_mean", "ssim_variance")
+
+# NaturalnessIndex usato per gli esemplari che non lo riportano (come nel confronto singolo)
+DEFAULT_NATURALNESS = 50.0
+
+# Identificativi di scrivente e progetto ammessi nei nomi delle directory dei profili
+PROFILE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+# Parametri numerici descritti dalle statistiche di variabilità
+NUMERIC_PARAMETERS = tuple(name for name in PARAMETER_NAMES if name not in QUALITATIVE_VOCABULARY)
+
+
+def default_profile_root():
+    """
+    Directory di default dei profili (sovrascrivibile con SIGNATURE_PROFILE_DIR), distinta
+    per utente: va creata privata con feature_cache.ensure_private_directory
+    """
+    user = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "default")
+    return os.path.join(tempfile.gettempdir(), f"grapholex-reference-profiles-{user}")
+
+
+def profile_directory(root, project_id, writer_id):
+    """
+    Directory del profilo di uno scrivente: <root>/project_<id>/writer_<id>
+
+    Raises:
+        ValueError: Se un identificativo contiene caratteri diversi da lettere, cifre, "_" e "-"
+            (ad es. "../x", che porterebbe il profilo fuori dalla radice)
+    """
+    for label, value in (("scrivente", writer_id), ("progetto", project_id)):
+        if value is not None and not PROFILE_ID_PATTERN.fullmatch(str(value)):
+            raise ValueError(f"Identificativo {label} non valido: {value!r}")
+    partition = f"project_{project_id}" if project_id is not None else "default"
+    return os.path.join(root, partition, f"writer_{writer_id}")
+
+
+def exemplar_key(image_path, width_mm, height_mm):
+    """
+    Identità di un esemplare senza leggerne i byte: percorso, dimensione e data di modifica
+    del file più dimensioni reali; un file sostituito o ridimensionato cambia chiave
+    """
+    stat = os.stat(image_path)
+    return f"{os.path.abspath(image_path)}|{stat.st_size}|{stat.st_mtime_ns}|{float(width_mm):.6f}x{float(height_mm):.6f}"
+
+
+def distribution(values):
+    """Statistiche descrittive di un vettore, ignorando i NaN (None se vuoto)"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return None
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "std": float(values.std(ddof=1)) if values.size > 1 else 0.0,
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+def parameter_statistics(features):
+    """
+    Variabilità di ciascun parametro numerico tra gli esemplari
+
+    Args:
+        features: Matrice (K, P) degli esemplari, colonne nell'ordine di PARAMETER_NAMES
+
+    Returns:
+        Dizionario {parametro: {count, mean, std, min, max}} per i parametri presenti
+    """
+    statistics = {}
+    for name in NUMERIC_PARAMETERS:
+        values = distribution(features[:, PARAMETER_NAMES.index(name)])
+        if values is not None:
+            statistics[name] = values
+    return statistics
+
+
+def naturalness_distribution(naturalness):
+    """Distribuzione del NaturalnessIndex degli esemplari, con i quartili"""
+    summary = distribution(naturalness)
+    if summary is not None:
+        q1, median, q3 = np.percentile(naturalness, [25, 50, 75])
+        summary.update({"q1": float(q1), "median": float(median), "q3": float(q3), "values": [float(value) for value in naturalness]})
+    return summary
+
+
+class ReferenceProfile:
+    """
+    Profilo di uno scrivente aperto da disco: array in memory-map e indice JSON
+
+    Attributi:
+        exemplars: Lista di {key, image_path, dimensions, parameters}
+        features: Matrice (K, P) dei parametri codificati (compatibility_engine)
+        naturalness: Vettore (K,) del NaturalnessIndex degli esemplari
+        ssim: PreparedSSIMStack degli esemplari
+        statistics / naturalness_statistics: Variabilità per parametro e della naturalezza
+    """
+
+    def __init__(self, directory, index, arrays):
+        self.directory = directory
+        self.index = index
+        self.exemplars = index["exemplars"]
+        self.statistics = index["statistics"]
+        self.naturalness_statistics = index["naturalness"]
+        self.features = arrays["features"]
+        self.naturalness = arrays["naturalness"]
+        ssim = index["ssim"]
+        self.ssim = PreparedSSIMStack(arrays["ssim_pixels"], arrays.get("ssim_mean"), arrays.get("ssim_variance"),
+                                      ssim.get("gaussian"), ssim.get("window"), ssim["data_range"])
+
+    def __len__(self):
+        return len(self.exemplars)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """
+        Apre il profilo salvato nella directory (None se non esiste)
+
+        Args:
+            directory: Directory del profilo
+            mmap_mode: Modalità di np.load ("r" = memory-map in sola lettura, None = in memoria)
+        """
+        try:
+            with open(os.path.join(directory, INDEX_FILE), encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        generation = index["generation"]
+        arrays = {}
+        for name in ARRAY_NAMES:
+            path = os.path.join(directory, f"{name}.{generation}.npy")
+            if os.path.exists(path):
+                arrays[name] = np.load(path, mmap_mode=mmap_mode)
+        return cls(directory, index, arrays)
+
+    def scoring_features(self):
+        """
+        Matrice dei parametri pronta per compatibility_engine: i codici dei valori qualitativi
+        dipendono dal vocabolario del processo che ha salvato il profilo, quindi se il
+        vocabolario corrente non lo estende le colonne qualitative sono ricodificate
+        """
+        saved = self.index.get("vocabulary", {})
+        if all(QUALITATIVE_VOCABULARY[name][:len(saved.get(name, ()))] == saved.get(name) for name in QUALITATIVE_VOCABULARY):
+            return self.features
+        features = np.array(self.features)
+        for name in QUALITATIVE_VOCABULARY:
+            column = PARAMETER_NAMES.index(name)
+            features[:, column] = [encode_value(name, exemplar["parameters"].get(name)) for exemplar in self.exemplars]
+        return features
+
+    def is_current(self, algorithm_version, ssim_settings):
+        """True se il profilo è stato costruito con gli stessi algoritmi di estrazione e SSIM"""
+        return (self.index.get("algorithm_version") == algorithm_version
+                and self.index.get("ssim", {}).get("settings") == ssim_settings)
+
+
+def save_profile(directory, exemplars, features, naturalness, stack, algorithm_version, ssim_settings):
+    """
+    Scrive un profilo: gli array della nuova generazione prima, poi l'indice con una
+    sostituzione atomica, infine i file della generazione precedente (i lettori che li
+    hanno già mappati continuano a usarli)
+
+    Returns:
+        ReferenceProfile riaperto da disco
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = ReferenceProfile.load(directory)
+    generation = (previous.index["generation"] + 1) if previous is not None else 1
+
+    arrays = {"features": features, "naturalness": naturalness, "ssim_pixels": stack.pixels}
+    if stack.mean is not None:
+        arrays.update({"ssim_mean": stack.mean, "ssim_variance": stack.variance})
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.{generation}.npy"), np.ascontiguousarray(array))
+
+    index = {
+        "generation": generation,
+        "updated_at": time.time(),
+        "algorithm_version": algorithm_version,
+        "ssim": {"settings": ssim_settings, "gaussian": stack.gaussian, "window": stack.window, "data_range": stack.data_range},
+        "parameter_names": list(PARAMETER_NAMES),
+        "vocabulary": {name: list(values) for name, values in QUALITATIVE_VOCABULARY.items()},
+        "exemplars": exemplars,
+        "statistics": parameter_statistics(features),
+        "naturalness": naturalness_distribution(naturalness),
+    }
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(temp_path, os.path.join(directory, INDEX_FILE))
+
+    if previous is not None:
+        _remove_arrays(directory, previous.index["generation"])
+    return ReferenceProfile.load(directory)
+
+
+def _remove_arrays(directory, generation):
+    for name in ARRAY_NAMES:
+        try:
+            os.remove(os.path.join(directory, f"{name}.{generation}.npy"))
+        except OSError:
+            pass
+
+
+def delete_profile(directory):
+    """Elimina il profilo salvato nella directory (se esiste)"""
+    profile = ReferenceProfile.load(directory)
+    if profile is not None:
+        os.remove(os.path.join(directory, INDEX_FILE))
+        _remove_arrays(directory, profile.index["generation"])
+
+
+def update_profile(directory, rows, prepare_rows, algorithm_version, ssim_settings):
+    """
+    Costruisce o aggiorna il profilo con l'elenco corrente degli esemplari: gli esemplari
+    già presenti e invariati sono copiati dal profilo esistente, solo quelli nuovi o
+    modificati passano da prepare_rows; quelli non più elencati sono rimossi
+
+    Args:
+        directory: Directory del profilo
+        rows: Lista di tuple (indice, image_path, width_mm, height_mm)
+        prepare_rows: Funzione che riceve le righe da analizzare e restituisce tuple
+            (indice, immagine SSIM preparata, parametri) oppure (indice, None, errore)
+        algorithm_version: Versione dell'algoritmo di estrazione dei parametri
+        ssim_settings: Impostazioni del backend SSIM (SSIMBackend.settings())
+
+    Returns:
+        Tupla (ReferenceProfile oppure None se nessun esemplare è valido, statistiche
+        dell'aggiornamento {reused, analyzed, removed, errors})
+    """
+    existing = ReferenceProfile.load(directory)
+    if existing is not None and not existing.is_current(algorithm_version, ssim_settings):
+        print(f"[PROFILE] Profilo {directory} costruito con algoritmi diversi: ricostruzione completa", file=sys.stderr)
+        existing = None
+    previous = {exemplar["key"]: position for position, exemplar in enumerate(existing.exemplars)} if existing else {}
+    existing_features = existing.scoring_features() if existing else None
+
+    keys, errors = {}, []
+    for index, image_path, width_mm, height_mm in rows:
+        try:
+            keys[index] = exemplar_key(image_path, width_mm, height_mm)
+        except OSError as e:
+            errors.append({"index": index, "image_path": image_path, "error": str(e)})
+
+    pending = [row for row in rows if row[0] in keys and keys[row[0]] not in previous]
+    analyzed = {}
+    for index, prepared, data in (prepare_rows(pending) if pending else []):
+        if prepared is None:
+            errors.append({"index": index, "image_path": rows[index][1], "error": data})
+        else:
+            analyzed[index] = (prepared, data)
+
+    exemplars, features, naturalness, images = [], [], [], []
+    reused = 0
+    for index, image_path, width_mm, height_mm in rows:
+        key = keys.get(index)
+        if key in previous:
+            position = previous[key]
+            exemplars.append(existing.exemplars[position])
+            features.append(np.asarray(existing_features[position]))
+            naturalness.append(float(existing.naturalness[position]))
+            images.append(existing.ssim[position])
+            reused += 1
+        elif index in analyzed:
+            prepared, data = analyzed[index]
+            parameters = {name: data[name] if isinstance(data[name], str) else float(data[name])
+                          for name in PARAMETER_NAMES + ("NaturalnessIndex",) if data.get(name) is not None}
+            exemplars.append({"key": key, "image_path": image_path, "dimensions": [width_mm, height_mm], "parameters": parameters})
+            features.append(encode_parameter_matrix([data])[0])
+            naturalness.append(float(data.get("NaturalnessIndex", DEFAULT_NATURALNESS)))
+            images.append(prepared)
+
+    current = {exemplar["key"] for exemplar in exemplars}
+    summary = {
+        "reused": reused,
+        "analyzed": len(analyzed),
+        "removed": sum(1 for key in previous if key not in current),
+        "errors": errors,
+    }
+    if existing is not None and [exemplar["key"] for exemplar in exemplars] == [exemplar["key"] for exemplar in existing.exemplars]:
+        # Nessuna modifica: il profilo su disco resta quello corrente
+        return existing, summary
+    if not exemplars:
+        # Nessun esemplare valido: un profilo vuoto non deve restare utilizzabile
+        delete_profile(directory)
+        return None, summary
+    profile = save_profile(directory, exemplars, np.array(features), np.array(naturalness),
+                           PreparedSSIMStack.from_images(images), algorithm_version, ssim_settings)
+    return profile, summary
@@ -1,7 +1,7 @@
 import { promises as fs } from 'fs';
 import path from 'path';
 import { SignatureParameters } from '../shared/schema';
-import { execSync } from 'child_process';
+import { SignatureWorker } from './python-bridge';
 import sharp from 'sharp';
 
 /**
@@ -79,14 +79,11 @@ export class SignatureAnalyzer {
       let advancedAnalysis: any = {};
       
       try {
-        const pythonCommand = `python3 server/advanced-signature-analyzer.py analyze "${imagePath}" ${realWidthMm} ${realHeightMm}`;
-        const result = execSync(pythonCommand, { 
-          encoding: 'utf-8',
-          timeout: 30000, // 30 secondi timeout
-          cwd: process.cwd()
-        });
-        
-        advancedAnalysis = JSON.parse(result);
+        advancedAnalysis = await SignatureWorker.request('analyze', {
+          image_path: imagePath,
+          width_mm: realWidthMm,
+          height_mm: realHeightMm
+        }); // Timeout comune a tutte le richieste ai worker (SignatureWorker.timeoutMs)
         console.log(`[ANALYZER] Parametri avanzati estratti con successo`);
         
       } catch (error) {
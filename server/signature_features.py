@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Risultato compatto dell'analisi di una firma per GrapholexInsight
+I parametri numerici stanno in un unico array float64 con un ordine fisso dei campi, i
+parametri qualitativi in una tupla e le stringhe di visualizzazione ("display") sono
+formattate solo quando vengono lette. Il record si usa in sola lettura come un dizionario
+(get, in, items, ...): la copia in un dict vero avviene solo alla serializzazione (to_dict)
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+# Campi del risultato di analyze_signature_with_dimensions, nell'ordine del dizionario
+# originale: "float"/"int" occupano una posizione dell'array, "pair" due, "text" la tupla
+FIELDS = (
+    ("real_width_mm", "float"),
+    ("real_height_mm", "float"),
+    ("pixels_per_mm", "float"),
+    ("original_width", "int"),
+    ("original_height", "int"),
+    ("Proportion", "float"),
+    ("Inclination", "float"),
+    ("PressureMean", "float"),
+    ("PressureStd", "float"),
+    ("AvgCurvature", "float"),
+    ("Readability", "text"),
+    ("WritingStyle", "text"),
+    ("AvgAsolaSize", "float"),
+    ("AvgSpacing", "float"),
+    ("Velocity", "float"),
+    ("OverlapRatio", "float"),
+    ("LetterConnections", "int"),
+    ("BaselineStdMm", "float"),
+    ("StrokeComplexity", "float"),
+    ("ConnectedComponents", "int"),
+    ("Dimensions", "pair"),
+    ("FluidityScore", "float"),
+    ("PressureConsistency", "float"),
+    ("CoordinationIndex", "float"),
+    ("NaturalnessIndex", "float"),
+)
+
+# Stringhe di visualizzazione: (chiave in display, parametro, formattatore)
+DISPLAY_FORMATS = [
+    ('pressure_mean', 'PressureMean', lambda v: f"{v:.1f}"),
+    ('pressure_std', 'PressureStd', lambda v: f"{v:.2f}"),
+    ('proportion', 'Proportion', lambda v: f"{v:.3f}"),
+    ('inclination', 'Inclination', lambda v: f"{v:.1f}°"),
+    ('curvature', 'AvgCurvature', lambda v: f"{v:.3f}"),
+    ('velocity', 'Velocity', lambda v: f"{v:.2f}/5"),
+    ('asola_size', 'AvgAsolaSize', lambda v: f"{v:.2f} mm²"),
+    ('spacing', 'AvgSpacing', lambda v: f"{v:.2f} mm"),
+    ('overlap_ratio', 'OverlapRatio', lambda v: f"{v * 100:.1f}%"),
+    ('letter_connections', 'LetterConnections', lambda v: f"{v:.2f}"),
+    ('baseline_std', 'BaselineStdMm', lambda v: f"{v:.2f} mm"),
+    ('fluidity_score', 'FluidityScore', lambda v: f"{v:.1f}%"),
+    ('pressure_consistency', 'PressureConsistency', lambda v: f"{v:.1f}%"),
+    ('coordination_index', 'CoordinationIndex', lambda v: f"{v:.1f}%"),
+    ('naturalness_index', 'NaturalnessIndex', lambda v: f"{v:.1f}%"),
+]
+
+# Nome -> (tipo, posizione nell'array o nella tupla, bit di presenza)
+_LAYOUT = {}
+_numbers, _texts = 0, 0
+for _bit, (_name, _kind) in enumerate(FIELDS):
+    if _kind == "text":
+        _LAYOUT[_name] = (_kind, _texts, 1 << _bit)
+        _texts += 1
+    else:
+        _LAYOUT[_name] = (_kind, _numbers, 1 << _bit)
+        _numbers += 2 if _kind == "pair" else 1
+NUMBER_COUNT, TEXT_COUNT = _numbers, _texts
+del _bit, _name, _kind, _numbers, _texts
+
+
+def _is_number(value, integer=False):
+    types = (int, np.integer) if integer else (int, float, np.integer, np.floating)
+    return isinstance(value, types) and not isinstance(value, (bool, np.bool_))
+
+
+class SignatureFeatures(Mapping):
+    """
+    Parametri di una firma analizzata, in sola lettura con l'interfaccia di un dizionario
+
+    Attributi:
+        numbers: Array float64 dei campi numerici (NaN dove assenti)
+        text: Tupla dei campi qualitativi
+        present: Maschera di bit dei campi di FIELDS presenti
+        integers: Maschera di bit dei campi numerici ricevuti come interi (restituiti come int)
+        extra: Dizionario dei valori fuori schema (None se non ce ne sono)
+    """
+
+    __slots__ = ("numbers", "text", "present", "integers", "extra")
+
+    def __init__(self, numbers, text, present, integers=0, extra=None):
+        self.numbers = numbers
+        self.text = text
+        self.present = present
+        self.integers = integers
+        self.extra = extra
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        """
+        Costruisce il record da un dizionario di parametri (il display viene ricalcolato)
+
+        Args:
+            parameters: Dizionario nel formato di analyze_signature_with_dimensions
+
+        Returns:
+            SignatureFeatures
+        """
+        numbers = np.full(NUMBER_COUNT, np.nan)
+        text = [None] * TEXT_COUNT
+        present = integers = 0
+        extra = {}
+        for name, value in parameters.items():
+            if name == "display":
+                continue
+            field = _LAYOUT.get(name)
+            if field is None:
+                extra[name] = value
+                continue
+            kind, position, bit = field
+            if kind == "text":
+                text[position] = value
+            elif kind == "pair" and isinstance(value, (tuple, list)) and len(value) == 2 and all(map(_is_number, value)):
+                numbers[position:position + 2] = value
+                if all(_is_number(item, integer=True) for item in value):
+                    integers |= bit
+            elif kind != "pair" and _is_number(value, kind == "int"):
+                numbers[position] = value
+                if _is_number(value, integer=True):
+                    integers |= bit
+            else:
+                # Valore di tipo inatteso: conservato così com'è
+                extra[name] = value
+                continue
+            present |= bit
+        return cls(numbers, tuple(text), present, integers, extra or None)
+
+    def to_record(self):
+        """
+        Dati del record con soli tipi JSON (usato dalla cache su disco al posto di pickle)
+
+        Returns:
+            Dizionario con numbers (NaN dove assenti), text, present, integers ed extra
+        """
+        return {"numbers": self.numbers.tolist(), "text": list(self.text), "present": self.present,
+                "integers": self.integers, "extra": self.extra}
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Ricostruisce il record da to_record
+
+        Raises:
+            ValueError: Se i dati non corrispondono al layout corrente dei campi
+        """
+        numbers = np.asarray(record["numbers"], dtype=np.float64)
+        if numbers.shape != (NUMBER_COUNT,) or len(record["text"]) != TEXT_COUNT:
+            raise ValueError("Record non compatibile con il layout dei campi")
+        extra = record["extra"]
+        if extra is not None and not isinstance(extra, dict):
+            raise ValueError("Campo extra non valido")
+        return cls(numbers, tuple(record["text"]), int(record["present"]), int(record["integers"]), extra)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name in self.__slots__:
+            setattr(self, name, state[name])
+
+    def __getitem__(self, name):
+        field = _LAYOUT.get(name)
+        if field is not None and self.present & field[2]:
+            kind, position, bit = field
+            if kind == "text":
+                return self.text[position]
+            if kind == "pair":
+                convert = int if self.integers & bit else float
+                return (convert(self.numbers[position]), convert(self.numbers[position + 1]))
+            return int(self.numbers[position]) if self.integers & bit else float(self.numbers[position])
+        if self.extra is not None and name in self.extra:
+            return self.extra[name]
+        if name == "display":
+            return self.display
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        field = _LAYOUT.get(name)
+        if field is not None and self.present & field[2]:
+            return True
+        return name == "display" or (self.extra is not None and name in self.extra)
+
+    def __iter__(self):
+        extra = self.extra or {}
+        for name, (_, _, bit) in _LAYOUT.items():
+            if self.present & bit or name in extra:
+                yield name
+        for name in extra:
+            if name not in _LAYOUT:
+                yield name
+        yield "display"
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"SignatureFeatures({self.to_dict()!r})"
+
+    @property
+    def display(self):
+        """Stringhe formattate per la visualizzazione, calcolate a ogni lettura"""
+        display = {}
+        if "original_width" in self and "original_height" in self:
+            display['dimensions_px'] = f"{self['original_width']}x{self['original_height']} px"
+        if "real_width_mm" in self and "real_height_mm" in self:
+            display['dimensions_mm'] = f"{self['real_width_mm']:.1f}x{self['real_height_mm']:.1f} mm"
+        for key, name, formatter in DISPLAY_FORMATS:
+            if name in self:
+                display[key] = formatter(self[name])
+        return display
+
+    def to_dict(self):
+        """Dizionario equivalente al risultato originale (per JSON e per le modifiche)"""
+        return dict(self.items())
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Servizio locale di analisi firme per GrapholexInsight
+Pool di N processi worker pre-avviati esposto su socket Unix, con coda limitata,
+rifiuto delle richieste oltre il backlog, deadline per richiesta ed equità tra progetti
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Richieste in coda oltre le quali il servizio rifiuta nuovo lavoro
+DEFAULT_BACKLOG = 64
+
+# Quota massima del backlog occupabile da un singolo progetto: il resto resta
+# disponibile per le richieste degli altri progetti
+DEFAULT_PROJECT_SHARE = 0.5
+
+# Deadline di default per richiesta (secondi dall'arrivo)
+DEFAULT_DEADLINE_SECONDS = 60.0
+
+# Coda usata per le richieste senza project_id
+DEFAULT_PROJECT = "default"
+
+
+class DeadlineExceeded(Exception):
+    """La richiesta ha superato la propria deadline"""
+
+
+class WorkerCrashed(Exception):
+    """Il processo worker è terminato durante l'esecuzione della richiesta"""
+
+
+class Job:
+    """Richiesta in attesa o in esecuzione nel servizio"""
+
+    __slots__ = ("request", "project", "deadline", "future", "enqueued_at")
+
+    def __init__(self, request, deadline_seconds):
+        self.request = request
+        project = request.get("project_id")
+        self.project = str(project) if project is not None else DEFAULT_PROJECT
+        self.enqueued_at = time.monotonic()
+        self.deadline = self.enqueued_at + deadline_seconds
+        self.future = asyncio.get_running_loop().create_future()
+
+    def finish(self, payload):
+        if not self.future.done():
+            self.future.set_result(payload)
+
+
+class FairQueue:
+    """
+    Coda limitata con round-robin tra progetti: ogni progetto ha la propria FIFO
+    e i worker servono a turno un job per progetto, così un batch numeroso di un
+    progetto non blocca le richieste interattive degli altri. Anche l'ammissione è
+    per progetto: nessun progetto può occupare più di project_capacity posti, così
+    un batch non riempie il backlog e non fa rifiutare le richieste degli altri
+    """
+
+    def __init__(self, capacity, project_capacity=None):
+        self.capacity = capacity
+        self.project_capacity = project_capacity or max(1, int(capacity * DEFAULT_PROJECT_SHARE))
+        self.size = 0
+        self._queues = OrderedDict()
+        self._condition = asyncio.Condition()
+
+    def admits(self, project):
+        """True se un nuovo job del progetto rientra nel backlog e nella quota del progetto"""
+        queue = self._queues.get(project)
+        return self.size < self.capacity and (queue is None or len(queue) < self.project_capacity)
+
+    async def put(self, job):
+        """Accoda il job; restituisce False se il backlog o la quota del progetto sono pieni"""
+        if not self.admits(job.project):
+            return False
+        self._queues.setdefault(job.project, deque()).append(job)
+        self.size += 1
+        async with self._condition:
+            self._condition.notify()
+        return True
+
+    async def get(self):
+        """Estrae il prossimo job, alternando i progetti"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.size > 0)
+            project, queue = next(iter(self._queues.items()))
+            job = queue.popleft()
+            self.size -= 1
+            if queue:
+                # Il progetto torna in fondo al giro
+                self._queues.move_to_end(project)
+            else:
+                del self._queues[project]
+            return job
+
+    def discard(self, job):
+        """Rimuove un job non ancora estratto (es. client disconnesso)"""
+        queue = self._queues.get(job.project)
+        if queue is None:
+            return
+        try:
+            queue.remove(job)
+        except ValueError:
+            return
+        self.size -= 1
+        if not queue:
+            del self._queues[job.project]
+
+    def snapshot(self):
+        """Numero di job in coda per progetto"""
+        return {project: len(queue) for project, queue in self._queues.items()}
+
+
+def _worker_main(conn, handler, warmup):
+    """Ciclo del processo worker: riceve richieste dalla pipe ed esegue l'handler"""
+    # Lo stdout non appartiene al worker: i log dell'analizzatore vanno su stderr
+    sys.stdout = sys.stderr
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if warmup:
+        warmup()
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            reply = {"result": handler(request)}
+        except Exception as e:
+            print(f"[SERVICE] Errore nel worker {os.getpid()}: {str(e)}", file=sys.stderr)
+            reply = {"error": str(e)}
+        conn.send(reply)
+
+
+class WorkerSlot:
+    """Processo worker pre-avviato con la relativa pipe di comunicazione"""
+
+    def __init__(self, context, handler, warmup, executor):
+        self._context = context
+        self._handler = handler
+        self._warmup = warmup
+        self._executor = executor
+        self.busy = False
+        self.restarts = 0
+        self._start()
+
+    def _start(self):
+        parent_conn, child_conn = self._context.Pipe()
+        self.process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self._handler, self._warmup),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def _restart(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.restarts += 1
+        self._start()
+
+    async def run(self, request, timeout):
+        """
+        Esegue una richiesta nel worker entro il tempo indicato; alla scadenza
+        il processo viene terminato (cancellazione effettiva) e sostituito
+        """
+        loop = asyncio.get_running_loop()
+        self.busy = True
+        try:
+            self.conn.send(request)
+            pending = loop.run_in_executor(self._executor, self.conn.recv)
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                self.process.kill()
+                await asyncio.wait({pending})
+                pending.exception()
+                self._restart()
+                raise DeadlineExceeded()
+            try:
+                return pending.result()
+            except (EOFError, OSError):
+                self._restart()
+                raise WorkerCrashed()
+        finally:
+            self.busy = False
+
+    def stop(self):
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+
+
+class AnalysisService:
+    """Servizio su socket Unix che distribuisce le richieste JSON-lines sul pool di worker"""
+
+    def __init__(self, handler, workers=None, backlog=DEFAULT_BACKLOG,
+                 deadline=DEFAULT_DEADLINE_SECONDS, warmup=None, project_backlog=None):
+        self.handler = handler
+        self.workers = workers or os.cpu_count() or 1
+        self.backlog = backlog
+        self.project_backlog = project_backlog
+        self.deadline = deadline
+        self.warmup = warmup
+        self.counters = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0, "expired": 0}
+        self._slots = []
+        self._queue = None
+
+    def _start_workers(self):
+        # I worker (e i riavvii dopo una deadline) nascono mentre il loop asyncio e i thread
+        # dell'executor sono attivi: fork da qui copierebbe lock tenuti da altri thread.
+        # Il forkserver è un processo a thread singolo che importa il modulo principale una
+        # volta sola e da cui ogni worker viene poi generato già con i moduli di base caricati
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="signature-worker")
+        self._slots = [WorkerSlot(context, self.handler, self.warmup, executor) for _ in range(self.workers)]
+
+    async def _dispatch(self, slot):
+        while True:
+            job = await self._queue.get()
+            if job.future.done():
+                continue
+
+            remaining = job.deadline - time.monotonic()
+            if remaining <= 0:
+                self.counters["expired"] += 1
+                job.finish({"error": "Deadline superata prima dell'esecuzione", "deadline_exceeded": True})
+                continue
+
+            try:
+                reply = await slot.run(job.request, remaining)
+                self.counters["completed" if "result" in reply else "failed"] += 1
+                job.finish(reply)
+            except DeadlineExceeded:
+                self.counters["expired"] += 1
+                print(f"[SERVICE] Deadline superata, worker riavviato (progetto {job.project})", file=sys.stderr)
+                job.finish({"error": "Deadline superata durante l'esecuzione", "deadline_exceeded": True})
+            except WorkerCrashed:
+                self.counters["failed"] += 1
+                job.finish({"error": "Worker terminato inaspettatamente"})
+
+    def stats(self):
+        """Stato del servizio per il comando stats"""
+        return {
+            "workers": self.workers,
+            "busy": sum(1 for slot in self._slots if slot.busy),
+            "restarts": sum(slot.restarts for slot in self._slots),
+            "backlog": self.backlog,
+            "project_backlog": self._queue.project_capacity,
+            "queued": self._queue.size,
+            "queued_by_project": self._queue.snapshot(),
+            **self.counters
+        }
+
+    async def _reply(self, writer, request_id, job):
+        payload = await job.future
+        try:
+            writer.write((json.dumps({"id": request_id, **payload}) + "\n").encode("utf-8"))
+            await writer.drain()
+        except (ConnectionError, RuntimeError):
+            pass
+
+    async def _handle_connection(self, reader, writer):
+        jobs = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get("id")
+                except Exception as e:
+                    writer.write((json.dumps({"id": None, "error": str(e)}) + "\n").encode("utf-8"))
+                    continue
+
+                if request.get("command") == "stats":
+                    writer.write((json.dumps({"id": request_id, "result": self.stats()}) + "\n").encode("utf-8"))
+                    continue
+
+                deadline_ms = request.get("deadline_ms")
+                job = Job(request, deadline_ms / 1000.0 if deadline_ms else self.deadline)
+
+                # Controllo di ammissione: oltre il backlog o la quota del progetto la
+                # richiesta viene rifiutata subito, senza toccare gli altri progetti
+                if not await self._queue.put(job):
+                    self.counters["rejected"] += 1
+                    if self._queue.size >= self._queue.capacity:
+                        error = f"Servizio saturo: {self._queue.size} richieste in coda"
+                    else:
+                        error = (f"Progetto {job.project} saturo: "
+                                 f"{self._queue.project_capacity} richieste in coda")
+                    writer.write((json.dumps({
+                        "id": request_id,
+                        "error": error,
+                        "rejected": True
+                    }) + "\n").encode("utf-8"))
+                    continue
+
+                self.counters["accepted"] += 1
+                jobs.add(job)
+                job.future.add_done_callback(lambda _, job=job: jobs.discard(job))
+                asyncio.create_task(self._reply(writer, request_id, job))
+        finally:
+            # Le richieste ancora in coda di un client disconnesso vengono cancellate
+            for job in list(jobs):
+                self._queue.discard(job)
+                job.future.cancel()
+            writer.close()
+
+    async def serve(self, socket_path, stop=None):
+        """
+        Avvia il servizio e resta in ascolto fino a SIGTERM/SIGINT
+
+        Args:
+            socket_path: Percorso del socket Unix
+            stop: Evento asyncio opzionale che termina il servizio al posto dei segnali
+        """
+        self._queue = FairQueue(self.backlog, self.project_backlog)
+        self._start_workers()
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self._handle_connection, path=socket_path)
+        dispatchers = [asyncio.create_task(self._dispatch(slot)) for slot in self._slots]
+
+        if stop is None:
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, stop.set)
+
+        print(f"[SERVICE] In ascolto su {socket_path} con {self.workers} worker, backlog {self.backlog} "
+              f"({self._queue.project_capacity} per progetto)", file=sys.stderr)
+        try:
+            await stop.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            for task in dispatchers:
+                task.cancel()
+            for slot in self._slots:
+                slot.stop()
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            print("[SERVICE] Servizio terminato", file=sys.stderr)
+
+
+def run_service(handler, socket_path, workers=None, backlog=DEFAULT_BACKLOG,
+                deadline=DEFAULT_DEADLINE_SECONDS, warmup=None, project_backlog=None):
+    """
+    Avvia il servizio di analisi su socket Unix
+
+    Args:
+        handler: Funzione che esegue una richiesta (dict) e restituisce il risultato
+        socket_path: Percorso del socket Unix
+        workers: Numero di processi worker (default: numero di CPU)
+        backlog: Numero massimo di richieste in coda
+        deadline: Deadline di default per richiesta in secondi
+        warmup: Funzione opzionale eseguita in ogni worker all'avvio
+        project_backlog: Numero massimo di richieste in coda per progetto
+            (default: DEFAULT_PROJECT_SHARE del backlog)
+    """
+    service = AnalysisService(handler, workers, backlog, deadline, warmup, project_backlog)
+    asyncio.run(service.serve(socket_path))
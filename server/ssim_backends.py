@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Backend SSIM per GrapholexInsight
+Interfaccia comune per l'indice di similarità strutturale tra due immagini in scala di
+grigi: implementazione di riferimento con skimage e implementazione veloce con filtri
+separabili OpenCV in float32, selezionabile con SIGNATURE_SSIM_BACKEND
+"""
+
+import importlib
+import os
+
+import cv2
+import numpy as np
+
+# Costanti di stabilità dell'SSIM (Wang et al.), come in skimage
+K1 = 0.01
+K2 = 0.03
+
+# Finestra uniforme di default di skimage.metrics.structural_similarity
+DEFAULT_WINDOW = 7
+
+# Finestra gaussiana di skimage (gaussian_weights=True): sigma 1.5 troncata a 3.5 sigma
+GAUSSIAN_SIGMA = 1.5
+GAUSSIAN_TRUNCATE = 3.5
+
+# Backend usato se SIGNATURE_SSIM_BACKEND non è impostata
+DEFAULT_BACKEND = "opencv"
+
+
+def data_range_for(image):
+    """Intervallo dei valori dell'immagine, dedotto dal tipo come fa skimage"""
+    if image.dtype == np.uint8:
+        return 255.0
+    if image.dtype == np.uint16:
+        return 65535.0
+    return 2.0 if image.min() < 0 else 1.0
+
+
+class PreparedSSIMImage:
+    """
+    Immagine preparata per confronti SSIM ripetuti (es. un riferimento confrontato con
+    molte firme): pixel in float32 e mappe locali di media e varianza (sigma²) già
+    filtrate, così ogni confronto calcola solo i termini incrociati
+
+    Serializzabile con save()/load() (formato .npz) oppure con pickle
+    """
+
+    __slots__ = ("pixels", "mean", "variance", "gaussian", "window", "data_range")
+
+    def __init__(self, pixels, mean, variance, gaussian, window, data_range):
+        self.pixels = pixels
+        self.mean = mean
+        self.variance = variance
+        self.gaussian = gaussian
+        self.window = window
+        self.data_range = data_range
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name in self.__slots__:
+            setattr(self, name, state[name])
+
+    @property
+    def shape(self):
+        return self.pixels.shape
+
+    def save(self, file):
+        """Salva l'immagine preparata (percorso o file binario) in formato .npz"""
+        np.savez(
+            file,
+            pixels=self.pixels,
+            mean=self.mean,
+            variance=self.variance,
+            parameters=np.array([float(self.gaussian), float(self.window), float(self.data_range)])
+        )
+
+    @classmethod
+    def load(cls, file):
+        """Carica un'immagine preparata salvata con save()"""
+        with np.load(file) as data:
+            gaussian, window, data_range = data["parameters"].tolist()
+            return cls(data["pixels"], data["mean"], data["variance"], bool(gaussian), int(window), data_range)
+
+
+class PreparedSSIMStack:
+    """
+    K immagini preparate impilate sul primo asse (K, H, W): ogni immagine resta contigua,
+    quindi stack[k] è una vista senza copie anche quando gli array sono memory-mapped
+    (np.load(..., mmap_mode="r")); mean e variance sono None se la pila contiene immagini
+    non preparate (backend skimage)
+    """
+
+    __slots__ = ("pixels", "mean", "variance", "gaussian", "window", "data_range")
+
+    def __init__(self, pixels, mean, variance, gaussian, window, data_range):
+        self.pixels = pixels
+        self.mean = mean
+        self.variance = variance
+        self.gaussian = gaussian
+        self.window = window
+        self.data_range = data_range
+
+    @classmethod
+    def from_images(cls, images):
+        """
+        Impila immagini restituite da prepare() (PreparedSSIMImage o immagini grezze)
+
+        Args:
+            images: Lista non vuota di immagini della stessa dimensione
+
+        Returns:
+            PreparedSSIMStack
+        """
+        first = images[0]
+        if not isinstance(first, PreparedSSIMImage):
+            return cls(np.stack(images), None, None, None, None, data_range_for(first))
+        return cls(
+            np.stack([image.pixels for image in images]),
+            np.stack([image.mean for image in images]),
+            np.stack([image.variance for image in images]),
+            first.gaussian, first.window, first.data_range
+        )
+
+    def __len__(self):
+        return len(self.pixels)
+
+    def __getitem__(self, index):
+        """Immagine index della pila, nella forma restituita da prepare()"""
+        if self.mean is None:
+            return self.pixels[index]
+        return PreparedSSIMImage(self.pixels[index], self.mean[index], self.variance[index],
+                                 self.gaussian, self.window, self.data_range)
+
+    @property
+    def shape(self):
+        return self.pixels.shape[1:]
+
+
+class SSIMBackend:
+    """Interfaccia dei backend SSIM"""
+
+    name = None
+
+    # Moduli importati su richiesta dal backend (per il warm-up dei worker)
+    modules = ()
+
+    def warm_up(self):
+        for module in self.modules:
+            importlib.import_module(module)
+
+    def compare(self, image1, image2, full=False):
+        """
+        Calcola l'SSIM medio tra due immagini della stessa dimensione
+
+        Args:
+            image1, image2: Immagini in scala di grigi
+            full: Se True restituisce anche la mappa SSIM
+
+        Returns:
+            Tupla (SSIM medio, mappa SSIM oppure None)
+        """
+        raise NotImplementedError
+
+    def score(self, image1, image2):
+        """SSIM medio, senza costruire né restituire la mappa completa"""
+        return self.compare(image1, image2, full=False)[0]
+
+    def prepare(self, image):
+        """Prepara un'immagine per confronti ripetuti (di default l'immagine stessa)"""
+        return image
+
+    def score_prepared(self, prepared1, prepared2):
+        """SSIM medio tra due immagini restituite da prepare()"""
+        return self.score(prepared1, prepared2)
+
+    def score_many(self, image, references):
+        """
+        SSIM medio di un'immagine rispetto a molti riferimenti
+
+        Args:
+            image: Immagine da confrontare (o già preparata)
+            references: Riferimenti, preferibilmente già preparati con prepare()
+
+        Returns:
+            Lista degli SSIM medi, nell'ordine dei riferimenti
+        """
+        prepared = self.prepare(image)
+        return [self.score_prepared(prepared, self.prepare(reference)) for reference in references]
+
+    def settings(self):
+        """Impostazioni che determinano i dati preparati (per invalidare quelli salvati)"""
+        return {"backend": self.name, "gaussian": bool(getattr(self, "gaussian", False)),
+                "window": int(getattr(self, "window", DEFAULT_WINDOW))}
+
+    def prepare_stack(self, images):
+        """Prepara e impila più immagini per score_stack()"""
+        return PreparedSSIMStack.from_images([self.prepare(image) for image in images])
+
+    def score_stack(self, image, stack):
+        """
+        SSIM medio di un'immagine rispetto a ogni immagine di una pila
+
+        Args:
+            image: Immagine da confrontare (o già preparata)
+            stack: PreparedSSIMStack restituito da prepare_stack()
+
+        Returns:
+            Array (K,) degli SSIM medi, nell'ordine della pila
+        """
+        prepared = self.prepare(image)
+        return np.array([self.score_prepared(prepared, stack[index]) for index in range(len(stack))])
+
+
+class SkimageSSIM(SSIMBackend):
+    """Implementazione di riferimento: skimage.metrics.structural_similarity (float64)"""
+
+    name = "skimage"
+    modules = ("skimage.metrics",)
+
+    def __init__(self, gaussian=False):
+        self.gaussian = gaussian
+
+    def compare(self, image1, image2, full=False):
+        from skimage.metrics import structural_similarity
+        options = {"gaussian_weights": True, "sigma": GAUSSIAN_SIGMA, "use_sample_covariance": False} if self.gaussian else {}
+        if full:
+            return structural_similarity(image1, image2, full=True, **options)
+        return structural_similarity(image1, image2, **options), None
+
+
+class OpenCVSSIM(SSIMBackend):
+    """
+    SSIM con filtri separabili OpenCV in float32, stesse formule e stessa finestra di skimage
+    (uniforme 7x7 con covarianza campionaria, oppure gaussiana 11x11 con sigma 1.5);
+    la media è calcolata sulla regione interna, esclusi i bordi di mezza finestra
+    """
+
+    name = "opencv"
+
+    def __init__(self, gaussian=False, window=DEFAULT_WINDOW):
+        self.gaussian = gaussian
+        if gaussian:
+            radius = int(GAUSSIAN_TRUNCATE * GAUSSIAN_SIGMA + 0.5)
+            self.window = 2 * radius + 1
+            kernel = cv2.getGaussianKernel(self.window, GAUSSIAN_SIGMA, cv2.CV_32F)
+            self._kernel = kernel
+            self._covariance_norm = 1.0
+        else:
+            self.window = window
+            self._kernel = None
+            points = window * window
+            self._covariance_norm = points / (points - 1.0)
+
+    def _filter(self, image):
+        if self._kernel is None:
+            return cv2.boxFilter(image, cv2.CV_32F, (self.window, self.window), normalize=True,
+                                 borderType=cv2.BORDER_REFLECT)
+        return cv2.sepFilter2D(image, cv2.CV_32F, self._kernel, self._kernel, borderType=cv2.BORDER_REFLECT)
+
+    def prepare(self, image):
+        """
+        Calcola una sola volta pixel float32, media locale e varianza locale dell'immagine
+
+        Args:
+            image: Immagine in scala di grigi oppure PreparedSSIMImage (restituita invariata)
+
+        Returns:
+            PreparedSSIMImage
+        """
+        if isinstance(image, PreparedSSIMImage):
+            return image
+        pixels = image.astype(np.float32)
+        mean = self._filter(pixels)
+        variance = self._filter(pixels * pixels)
+        variance -= mean * mean
+        if self._covariance_norm != 1.0:
+            variance *= self._covariance_norm
+        return PreparedSSIMImage(pixels, mean, variance, self.gaussian, self.window, data_range_for(image))
+
+    def compare_prepared(self, first, second, full=False):
+        """
+        SSIM tra due immagini preparate: calcola solo la covarianza locale incrociata
+
+        Returns:
+            Tupla (SSIM medio, mappa SSIM oppure None)
+        """
+        if first.shape != second.shape:
+            raise ValueError("Le immagini devono avere le stesse dimensioni")
+        for prepared in (first, second):
+            if prepared.gaussian != self.gaussian or prepared.window != self.window:
+                raise ValueError("Immagine preparata con una finestra SSIM diversa")
+        c1 = (K1 * first.data_range) ** 2
+        c2 = (K2 * first.data_range) ** 2
+
+        # Covarianza locale: E[xy] - E[x]E[y]
+        covariance = self._filter(first.pixels * second.pixels)
+        covariance -= first.mean * second.mean
+        if self._covariance_norm != 1.0:
+            covariance *= self._covariance_norm
+
+        # Numeratore (2 ux uy + C1)(2 vxy + C2), denominatore (ux² + uy² + C1)(vx + vy + C2)
+        numerator = first.mean * second.mean
+        numerator *= 2
+        numerator += c1
+        covariance *= 2
+        covariance += c2
+        numerator *= covariance
+
+        denominator = first.mean * first.mean
+        denominator += second.mean * second.mean
+        denominator += c1
+        variances = first.variance + second.variance
+        variances += c2
+        denominator *= variances
+
+        numerator /= denominator
+        pad = (self.window - 1) // 2
+        interior = numerator[pad:numerator.shape[0] - pad, pad:numerator.shape[1] - pad]
+        score = float(interior.mean(dtype=np.float64))
+        return score, (numerator if full else None)
+
+    def compare(self, image1, image2, full=False):
+        return self.compare_prepared(self.prepare(image1), self.prepare(image2), full)
+
+    def score_prepared(self, prepared1, prepared2):
+        return self.compare_prepared(prepared1, prepared2)[0]
+
+
+SSIM_BACKENDS = {
+    "opencv": OpenCVSSIM,
+    "skimage": SkimageSSIM,
+}
+
+
+def get_ssim_backend(name=None):
+    """
+    Restituisce il backend SSIM richiesto
+
+    Args:
+        name: "opencv" o "skimage" (default: SIGNATURE_SSIM_BACKEND oppure opencv)
+
+    Returns:
+        Istanza di SSIMBackend
+    """
+    name = (name or os.environ.get("SIGNATURE_SSIM_BACKEND") or DEFAULT_BACKEND).strip().lower()
+    if name not in SSIM_BACKENDS:
+        raise ValueError(f"Backend SSIM sconosciuto: {name} (disponibili: {', '.join(SSIM_BACKENDS)})")
+    return SSIM_BACKENDS[name]()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Supporto comune dei test: percorso dei moduli in server/, caricamento dello script
+advanced-signature-analyzer.py (il trattino nel nome impedisce un import normale) e
+firme sintetiche. Le funzioni sono importabili anche dai benchmark eseguiti come script
+(from conftest import ...), dove pytest e le sue fixture non sono attivi
+"""
+
+import importlib.util
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server")
+sys.path.insert(0, SERVER_DIR)
+
+ANALYZER_SCRIPT = os.path.join(SERVER_DIR, "advanced-signature-analyzer.py")
+ANALYZER_MODULE = "advanced_signature_analyzer_server"
+
+
+def load_analyzer():
+    """
+    Carica lo script dell'analizzatore una sola volta per processo e lo registra in
+    sys.modules (inspect.getsource, usato per la versione dell'algoritmo, lo richiede)
+    """
+    module = sys.modules.get(ANALYZER_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(ANALYZER_MODULE, ANALYZER_SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[ANALYZER_MODULE] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def binary_signature(seed, height=150, width=300, margin=0.15):
+    """
+    Firma sintetica preprocessata come nel confronto: tratti bianchi su nero, con curve
+    e incroci; margin è la frazione del bordo in cui i tratti non iniziano (0 = ovunque)
+    """
+    rng = np.random.default_rng(seed)
+    image = np.zeros((height, width), dtype=np.uint8)
+    for _ in range(rng.integers(3, 9)):
+        points = np.cumsum(rng.normal(0, 12, size=(rng.integers(8, 30), 2)), axis=0)
+        points += [rng.uniform(width * margin, width * (1 - margin)),
+                   rng.uniform(height * margin, height * (1 - margin))]
+        cv2.polylines(image, [points.astype(np.int32)], False, 255, int(rng.integers(1, 5)))
+    return image
+
+
+def write_signature(path):
+    """Scrive una firma scansionata minima (inchiostro scuro su bianco) e ne restituisce il percorso"""
+    image = np.full((120, 300), 255, dtype=np.uint8)
+    cv2.polylines(image, [np.array([[20, 80], [90, 30], [160, 90], [260, 40]], dtype=np.int32)], False, 0, 4)
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def analyzer():
+    """Modulo advanced-signature-analyzer.py"""
+    return load_analyzer()
+
+
+@pytest.fixture
+def signature_path(tmp_path):
+    """Percorso di una firma scansionata minima in una directory temporanea"""
+    return write_signature(tmp_path / "firma.png")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test dell'analisi batch (batch-analyze): ogni riga JSONL coincide con l'analisi della
+singola firma, righe CSV e JSON del manifest, errori per riga e codice di uscita,
+ordine del manifest con --ordered e tutte le righe anche in ordine di completamento
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+
+from conftest import ANALYZER_SCRIPT, binary_signature, load_analyzer
+
+SIZES = [(80, 30), (60, 25), (95.5, 40)]
+
+
+def write_scans(directory, count=len(SIZES)):
+    """Firme sintetiche scansionate (inchiostro scuro su bianco) con dimensioni diverse"""
+    paths = []
+    for seed in range(count):
+        path = os.path.join(str(directory), f"firma_{seed}.png")
+        cv2.imwrite(path, 255 - binary_signature(seed))
+        paths.append(path)
+    return paths
+
+
+def run_batch(manifest, *options, stdin=None):
+    env = {**os.environ, "SIGNATURE_CACHE_DIR": "off"}
+    output = subprocess.run([sys.executable, ANALYZER_SCRIPT, "batch-analyze", manifest, *options],
+                            input=stdin, capture_output=True, text=True, env=env, timeout=300)
+    return output.returncode, [json.loads(line) for line in output.stdout.splitlines()], output.stderr
+
+
+def single_result(analyzer, path, width_mm, height_mm):
+    """Percorso per singola firma, serializzato come la riga del batch"""
+    result = analyzer.analyze_signature_with_dimensions(path, width_mm, height_mm)
+    return json.loads(json.dumps(analyzer.adapt_parameters_for_json(result)))
+
+
+def test_batch_lines_match_single_analysis(analyzer, tmp_path, monkeypatch):
+    monkeypatch.setenv("SIGNATURE_CACHE_DIR", "off")
+    paths = write_scans(tmp_path)
+    missing = str(tmp_path / "assente.png")
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("\n".join([
+        "image_path,width_mm,height_mm",
+        f"{paths[0]},{SIZES[0][0]},{SIZES[0][1]}",
+        "# commento",
+        json.dumps({"image_path": paths[1], "width_mm": SIZES[1][0], "height_mm": SIZES[1][1]}),
+        f"{missing},80,30",
+        "",
+        f"{paths[2]}, {SIZES[2][0]}, {SIZES[2][1]}",
+    ]) + "\n", encoding="utf-8")
+
+    returncode, entries, stderr = run_batch(str(manifest), "--workers", "2", "--ordered")
+    # Una riga fallita: codice di uscita 1, ma le altre righe sono comunque prodotte
+    assert returncode == 1, stderr
+    assert [entry["index"] for entry in entries] == [0, 1, 2, 3]
+    assert [entry["image_path"] for entry in entries] == [paths[0], paths[1], missing, paths[2]]
+    assert "error" in entries[2] and "result" not in entries[2]
+
+    expected = {path: single_result(analyzer, path, *size) for path, size in zip(paths, SIZES)}
+    for entry in entries[:2] + entries[3:]:
+        assert "error" not in entry
+        assert entry["result"] == expected[entry["image_path"]]
+
+
+def test_unordered_batch_from_stdin(analyzer, tmp_path, monkeypatch):
+    monkeypatch.setenv("SIGNATURE_CACHE_DIR", "off")
+    paths = write_scans(tmp_path)
+    manifest = "".join(f"{path},{width},{height}\n" for path, (width, height) in zip(paths, SIZES))
+
+    returncode, entries, stderr = run_batch("-", "--workers", "3", stdin=manifest)
+    assert returncode == 0, stderr
+    assert sorted(entry["index"] for entry in entries) == [0, 1, 2]
+    for entry in entries:
+        assert entry["result"] == single_result(analyzer, paths[entry["index"]], *SIZES[entry["index"]])
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    analyzer = load_analyzer()
+    os.environ["SIGNATURE_CACHE_DIR"] = "off"
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_scans(directory, 24)
+        manifest = "".join(f"{path},80,30\n" for path in paths)
+
+        start = time.perf_counter()
+        for path in paths:
+            single_result(analyzer, path, 80, 30)
+        sequential_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        returncode, entries, _ = run_batch("-", stdin=manifest)
+        batch_s = time.perf_counter() - start
+        assert returncode == 0 and len(entries) == len(paths)
+        print(f"{len(paths)} firme: una alla volta {sequential_s:.2f} s, batch-analyze {batch_s:.2f} s "
+              f"(avvio del processo incluso)")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test della cache dei grafici: chiave stabile alla precisione di visualizzazione e legata
+alla versione del renderer, LRU limitata, livello su disco, e report PDF che riusa i PNG
+appena renderizzati dal confronto
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+
+from chart_cache import ChartCache, chart_key, normalize_series
+from chart_renderers import OpenCVChartRenderer
+
+COMPARISON = {
+    "parameters": ["Proportion", "Inclination", "Velocity"],
+    "labels": ["Proportion 2.7", "Inclination -7.1", "Velocity 1.3"],
+    "verifica_values": [2.7, -7.1, 1.3],
+    "reference_values": [2.6, -5.0, 1.3],
+    "compatibilities": [98.01, 70.04, 100],
+}
+NATURALNESS = {
+    "parameters": ["FluidityScore"],
+    "labels": ["🧠 Fluidità"],
+    "verifica_values": [80.02],
+    "reference_values": [75.0],
+}
+
+
+class CountingRenderer(OpenCVChartRenderer):
+    """Renderer che conta i grafici effettivamente disegnati"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def render_comparison(self, series):
+        self.calls += 1
+        return super().render_comparison(series)
+
+    def render_naturalness(self, series):
+        self.calls += 1
+        return super().render_naturalness(series)
+
+
+def test_key_uses_display_precision_and_renderer_version():
+    renderer = OpenCVChartRenderer()
+    key = chart_key("comparison", normalize_series("comparison", COMPARISON), renderer)
+    close = {**COMPARISON, "compatibilities": [98.04, 69.96, 100.0]}
+    assert chart_key("comparison", normalize_series("comparison", close), renderer) == key
+    different = {**COMPARISON, "compatibilities": [98.1, 70.0, 100.0]}
+    assert chart_key("comparison", normalize_series("comparison", different), renderer) != key
+
+    newer = OpenCVChartRenderer()
+    newer.version = "2"
+    assert chart_key("comparison", normalize_series("comparison", COMPARISON), newer) != key
+    assert chart_key("naturalness", normalize_series("naturalness", NATURALNESS), renderer) != key
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ChartCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    assert cache.get("b") is None and cache.get("a") == b"1" and len(cache) == 2
+
+    cache = ChartCache(max_entries=10, max_bytes=5)
+    cache.put("a", b"123")
+    cache.put("b", b"456")
+    assert cache.get("a") is None and cache.get("b") == b"456"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_render_hits_memory_then_disk(tmp_path):
+    renderer = CountingRenderer()
+    cache = ChartCache(directory=str(tmp_path))
+    png = cache.render(renderer, "comparison", COMPARISON)
+    assert png.startswith(b"\x89PNG") and cache.render(renderer, "comparison", COMPARISON) == png
+    assert renderer.calls == 1 and len(list(tmp_path.glob("*.png"))) == 1
+
+    # Nuovo processo: il livello su disco evita il rendering
+    restarted = ChartCache(directory=str(tmp_path))
+    assert restarted.render(renderer, "comparison", COMPARISON) == png
+    assert renderer.calls == 1 and restarted.stats()["disk_hits"] == 1
+
+
+def test_disk_eviction(tmp_path):
+    cache = ChartCache(directory=str(tmp_path), disk_max_bytes=10)
+    cache.put("old", b"x" * 8)
+    os.utime(tmp_path / "old.png", (time.time() - 60, time.time() - 60))
+    cache.put("new", b"y" * 8)
+    assert [path.name for path in tmp_path.glob("*.png")] == ["new.png"]
+
+    # Il TTL parte dalla scrittura: gli hit non lo prolungano
+    cache = ChartCache(directory=str(tmp_path), ttl_seconds=30)
+    written = time.time() - 20
+    os.utime(tmp_path / "new.png", (written, written))
+    assert cache.get("new") == b"y" * 8
+    cache = ChartCache(directory=str(tmp_path), ttl_seconds=30)
+    os.utime(tmp_path / "new.png", (time.time(), written - 20))
+    assert cache.get("new") is None
+
+
+def test_report_reuses_comparison_charts(analyzer, monkeypatch):
+    monkeypatch.delenv("SIGNATURE_CHART_CACHE", raising=False)
+    monkeypatch.delenv("SIGNATURE_CHART_CACHE_DIR", raising=False)
+    renderer = CountingRenderer()
+    verifica = {"Proportion": 2.0, "Inclination": 10.0, "FluidityScore": 80.0}
+    reference = {"Proportion": 2.1, "Inclination": 30.0, "FluidityScore": 75.0}
+    compatibilities = {"Proportion": 95.0, "Inclination": 65.0}
+
+    charts = analyzer.create_chart_output(verifica, reference, compatibilities, "png", renderer)
+    assert renderer.calls == 2
+    # Come generate_pdf_report dopo il confronto: nessun nuovo rendering
+    assert analyzer.comparison_chart_png(verifica, reference, compatibilities, renderer)
+    assert analyzer.naturalness_chart_png(verifica, reference, renderer)
+    assert renderer.calls == 2
+    assert analyzer.create_chart_output(verifica, reference, compatibilities, "png", renderer) == charts
+    assert renderer.calls == 2
+
+    monkeypatch.setenv("SIGNATURE_CHART_CACHE", "off")
+    assert analyzer.get_chart_cache() is None
+    analyzer.naturalness_chart_png(verifica, reference, renderer)
+    assert renderer.calls == 3
+
+
+if __name__ == "__main__":
+    test_key_uses_display_precision_and_renderer_version()
+    test_lru_eviction_by_entries_and_bytes()
+
+    renderer = OpenCVChartRenderer()
+    cache = ChartCache()
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        renderer.render_comparison(COMPARISON)
+    rendered_ms = (time.perf_counter() - start) / runs * 1000
+    cache.render(renderer, "comparison", COMPARISON)
+    start = time.perf_counter()
+    for _ in range(runs):
+        cache.render(renderer, "comparison", COMPARISON)
+    cached_ms = (time.perf_counter() - start) / runs * 1000
+    print(f"Grafico di confronto: {rendered_ms:.2f} ms renderizzato, {cached_ms:.3f} ms dalla cache")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test del renderer leggero dei grafici: PNG validi con la stessa impaginazione del renderer
+matplotlib (dimensioni dopo il ritaglio 'tight' entro pochi pixel, colori delle barre) e
+nessun import di matplotlib; grafici restituiti come dati strutturati (chart_output "data")
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import ANALYZER_SCRIPT, SERVER_DIR, load_analyzer
+
+import chart_renderers
+from chart_renderers import MatplotlibChartRenderer, OpenCVChartRenderer, get_chart_renderer
+
+# Differenza massima ammessa tra le dimensioni dei due PNG (frazione)
+SIZE_TOLERANCE = 0.03
+
+COMPARISON = {
+    "labels": ["Proportion 2.7", "Inclination -7.1", "PressureMean 247.2", "PressureStd 39.3",
+               "AvgCurvature 133.8", "AvgAsolaSize 2.3", "AvgSpacing 0.0", "Velocity 1.3",
+               "OverlapRatio 0.1", "LetterConnections 25.0", "BaselineStdMm 1.3",
+               "StrokeComplexity 0.0", "ConnectedComponents 1.0"],
+    "compatibilities": [98, 93.1, 98, 60, 98, 0, 10, 90, 80, 60, 60, 98, 10],
+}
+NATURALNESS = {
+    "labels": ["🧠 Fluidità", "🔄 Consistenza", "🎯 Coordinazione"],
+    "verifica_values": [98.8, 73.3, 61.7],
+    "reference_values": [98.3, 25.7, 63.9],
+}
+
+
+def decode(png):
+    image = cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert image is not None
+    return image
+
+
+def assert_same_layout(fast, reference):
+    fast_height, fast_width = fast.shape[:2]
+    height, width = reference.shape[:2]
+    assert abs(fast_width - width) <= width * SIZE_TOLERANCE
+    assert abs(fast_height - height) <= height * SIZE_TOLERANCE
+
+
+def contains_color(image, hex_color, alpha=1.0):
+    blue, green, red = (round(alpha * int(hex_color[i:i + 2], 16) + (1 - alpha) * 255) for i in (5, 3, 1))
+    return bool((np.abs(image.astype(int) - [blue, green, red]).max(axis=2) <= 2).any())
+
+
+@pytest.mark.filterwarnings("ignore:Glyph")
+def test_comparison_layout_matches_matplotlib():
+    fast = decode(OpenCVChartRenderer().render_comparison(COMPARISON))
+    reference = decode(MatplotlibChartRenderer().render_comparison(COMPARISON))
+    assert_same_layout(fast, reference)
+    assert contains_color(fast, "#87ceeb")
+
+
+@pytest.mark.filterwarnings("ignore:Glyph")
+def test_naturalness_layout_matches_matplotlib():
+    fast = decode(OpenCVChartRenderer().render_naturalness(NATURALNESS))
+    reference = decode(MatplotlibChartRenderer().render_naturalness(NATURALNESS))
+    assert_same_layout(fast, reference)
+    assert contains_color(fast, chart_renderers.VERIFICA_COLOR, chart_renderers.BAR_ALPHA)
+    assert contains_color(fast, chart_renderers.REFERENCE_COLOR, chart_renderers.BAR_ALPHA)
+
+
+def test_messages_and_empty_series():
+    renderer = OpenCVChartRenderer()
+    empty = decode(renderer.render_naturalness({"labels": [], "verifica_values": [], "reference_values": []}))
+    error = decode(renderer.render_message("Errore grafico naturalezza:\nprova", error=True))
+    assert empty.shape[1] > empty.shape[0] and error.shape[0] > empty.shape[0]
+    assert contains_color(error, "#ff0000")
+    assert decode(renderer.render_comparison({"labels": [], "compatibilities": []})).size
+
+
+def test_renderer_selection(monkeypatch):
+    monkeypatch.setenv("SIGNATURE_CHART_RENDERER", "opencv")
+    assert isinstance(get_chart_renderer(), OpenCVChartRenderer)
+    assert isinstance(get_chart_renderer("Matplotlib"), MatplotlibChartRenderer)
+    renderer = OpenCVChartRenderer()
+    assert get_chart_renderer(renderer) is renderer
+    with pytest.raises(ValueError):
+        get_chart_renderer("svg")
+
+
+def test_opencv_renderer_does_not_import_matplotlib():
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]); import chart_renderers as c; "
+        "c.OpenCVChartRenderer().render_naturalness({'labels': ['a'], 'verifica_values': [1], 'reference_values': [2]}); "
+        "print('matplotlib' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, "-c", code, SERVER_DIR], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+
+def test_unknown_renderer_does_not_break_analysis(analyzer, signature_path):
+    # Un renderer non valido non impedisce l'import né i comandi che non disegnano grafici
+    env = {**os.environ, "SIGNATURE_CHART_RENDERER": "cairo", "SIGNATURE_CACHE_DIR": "off"}
+    output = subprocess.run([sys.executable, ANALYZER_SCRIPT, "analyze", signature_path, "80", "30"],
+                            capture_output=True, text=True, env=env)
+    assert output.returncode == 0, output.stderr
+    assert "Proportion" in json.loads(output.stdout)
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SIGNATURE_CHART_RENDERER", "cairo")
+        groups = dict(analyzer.lazy_import_groups())
+    assert groups["Grafici"] == list(get_chart_renderer(chart_renderers.DEFAULT_RENDERER).modules)
+
+
+def test_chart_data_output(analyzer):
+    verifica = {"Proportion": 2.0, "Inclination": 10.0, "Velocity": 3, "Dimensions": [70, 20],
+                "FluidityScore": 80.0, "PressureConsistency": 40.0}
+    reference = {"Proportion": 2.1, "Inclination": 30.0, "Velocity": 3, "Dimensions": [72, 21],
+                 "FluidityScore": 75.0, "PressureConsistency": 55.0}
+    compatibilities = {"Proportion": 95.0, "Inclination": 65.0, "Velocity": 100.0, "Width": 40.0}
+
+    charts = analyzer.create_chart_output(verifica, reference, compatibilities, "data")
+    assert set(charts) == {"comparison_chart_data", "naturalness_chart_data"}
+    comparison, naturalness = charts["comparison_chart_data"], charts["naturalness_chart_data"]
+    assert comparison["parameters"] == ["Proportion", "Inclination", "Velocity", "Width", "Height"]
+    assert comparison["labels"][0] == "Proportion 2.0"
+    assert comparison["compatibilities"] == [95.0, 65.0, 100.0, 40.0, 0.0]
+    assert comparison["classes"] == ["high", "medium", "high", "low", "low"]
+    assert comparison["reference_values"][3:] == [72.0, 21.0]
+    assert naturalness["parameters"] == ["FluidityScore", "PressureConsistency"]
+    assert naturalness["verifica_values"] == [80.0, 40.0] and naturalness["reference_values"] == [75.0, 55.0]
+    assert naturalness["empty_message"] is None
+
+    # Le stesse serie del PNG, ma serializzate in pochi KB
+    series = analyzer.comparison_chart_series(verifica, reference, compatibilities)
+    assert series["labels"] == comparison["labels"]
+    assert len(json.dumps(charts)) < 4096
+
+    empty = analyzer.create_chart_output({}, {}, None, "data")["naturalness_chart_data"]
+    assert empty["labels"] == [] and empty["empty_message"] == chart_renderers.NATURALNESS_EMPTY
+    with pytest.raises(ValueError):
+        analyzer.create_chart_output(verifica, reference, compatibilities, "svg")
+
+
+if __name__ == "__main__":
+    import warnings
+
+    warnings.filterwarnings("ignore", "Glyph")
+    test_comparison_layout_matches_matplotlib()
+    test_naturalness_layout_matches_matplotlib()
+    test_messages_and_empty_series()
+    test_chart_data_output(load_analyzer())
+
+    for renderer in (MatplotlibChartRenderer(), OpenCVChartRenderer()):
+        renderer.render_comparison(COMPARISON)
+        runs = 10
+        start = time.perf_counter()
+        for _ in range(runs):
+            renderer.render_comparison(COMPARISON)
+            renderer.render_naturalness(NATURALNESS)
+        elapsed_ms = (time.perf_counter() - start) / runs * 1000
+        print(f"Renderer {renderer.name}: {elapsed_ms:.1f} ms per coppia di grafici")
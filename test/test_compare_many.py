@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test del confronto con molti riferimenti (compare_against_references): ogni risultato
+coincide con il confronto della singola coppia (SSIM, punteggio, verdetto, compatibilità,
+parametri), in linea e con il pool di processi; classifica, grafici solo per i primi
+top_k e riferimenti non leggibili negli errori
+"""
+
+import math
+import os
+import time
+
+import cv2
+import pytest
+
+from conftest import binary_signature, load_analyzer
+
+SIZES = [(80, 30), (70, 28), (90, 35), (75, 30)]
+
+
+def write_scans(directory, count):
+    paths = []
+    for seed in range(count):
+        path = os.path.join(str(directory), f"firma_{seed}.png")
+        cv2.imwrite(path, 255 - binary_signature(seed))
+        paths.append(path)
+    return paths
+
+
+def pairwise(analyzer, questioned, references):
+    """Percorso per singola coppia: compare_signatures_with_dimensions per ogni riferimento"""
+    return [analyzer.compare_signatures_with_dimensions(questioned, path, SIZES[0], (width_mm, height_mm),
+                                                        chart_output="data")
+            for path, width_mm, height_mm in references]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_compare_many_matches_pairwise(analyzer, tmp_path, monkeypatch, workers):
+    monkeypatch.setenv("SIGNATURE_CACHE_DIR", "off")
+    questioned, *paths = write_scans(tmp_path, len(SIZES))
+    references = [(path, *size) for path, size in zip(paths, SIZES[1:])]
+    missing = str(tmp_path / "assente.png")
+
+    result = analyzer.compare_against_references(
+        questioned, SIZES[0], references[:2] + [(missing, 80, 30)] + references[2:],
+        top_k=1, workers=workers, chart_output="data")
+    expected = pairwise(analyzer, questioned, references)
+
+    assert result["references"] == 4
+    assert result["errors"] == [{"index": 2, "image_path": missing,
+                                 "error": f"Impossibile leggere l'immagine: {missing}"}]
+    assert result["verifica_parameters"] == analyzer.adapt_parameters_for_json(expected[0]["verifica_parameters"])
+
+    # Classifica per similarità finale decrescente, con i grafici solo per il primo
+    results = result["results"]
+    assert [entry["rank"] for entry in results] == [1, 2, 3]
+    assert [entry["similarity"] for entry in results] == sorted((pair["similarity"] for pair in expected), reverse=True)
+    assert "comparison_chart_data" in results[0] and "comparison_chart_data" not in results[1]
+
+    for entry in results:
+        pair = expected[paths.index(entry["image_path"])]
+        assert entry["dimensions"] == list(SIZES[1 + paths.index(entry["image_path"])])
+        assert math.isclose(entry["ssim"], pair["ssim"], rel_tol=1e-12)
+        assert math.isclose(entry["similarity"], pair["similarity"], rel_tol=1e-12)
+        assert entry["naturalness"] == pair["naturalness"]
+        assert (entry["verdict"], entry["confidence"], entry["explanation"]) == \
+            (pair["verdict"], pair["confidence"], pair["explanation"])
+        assert entry["compatibilities"] == pair["compatibilities"]
+        assert entry["reference_parameters"] == analyzer.adapt_parameters_for_json(pair["reference_parameters"])
+        if entry["rank"] == 1:
+            assert entry["comparison_chart_data"] == pair["comparison_chart_data"]
+            assert entry["naturalness_chart_data"] == pair["naturalness_chart_data"]
+
+
+def test_unreadable_questioned_signature(analyzer, tmp_path, monkeypatch):
+    monkeypatch.setenv("SIGNATURE_CACHE_DIR", "off")
+    paths = write_scans(tmp_path, 1)
+    missing = str(tmp_path / "assente.png")
+    result = analyzer.compare_against_references(missing, (80, 30), [(paths[0], 80, 30)], workers=1)
+    assert result == {"error": f"Impossibile leggere l'immagine: {missing}"}
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    analyzer = load_analyzer()
+    os.environ["SIGNATURE_CACHE_DIR"] = "off"
+    with tempfile.TemporaryDirectory() as directory:
+        questioned, *paths = write_scans(directory, 33)
+        references = [(path, 80, 30) for path in paths]
+
+        start = time.perf_counter()
+        for path in paths:
+            analyzer.compare_signatures_with_dimensions(questioned, path, (80, 30), (80, 30), chart_output="data")
+        pairwise_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyzer.compare_against_references(questioned, (80, 30), references, workers=1, chart_output="data")
+        many_s = time.perf_counter() - start
+        print(f"{len(paths)} riferimenti: coppia per coppia {pairwise_s:.2f} s, compare-many (1 processo) {many_s:.2f} s")
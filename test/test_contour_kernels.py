@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test di equivalenza dei kernel vettorizzati dei contorni (contour_kernels) rispetto ai
+cicli originali per contorno e per punto: curvatura media, statistiche di coordinazione
+e fluidità e i punteggi che ne derivano, su contorni sintetici di ogni lunghezza
+"""
+
+import math
+import time
+
+import cv2
+import numpy as np
+
+from conftest import binary_signature, load_analyzer
+
+import contour_kernels
+
+# Differenza relativa ammessa (solo arrotondamenti dell'ultima cifra)
+TOLERANCE = 1e-9
+
+
+def synthetic_contours(seed=0):
+    """Contorni di tratti disegnati (cv2.findContours) più percorsi casuali di ogni lunghezza"""
+    rng = np.random.default_rng(seed)
+    image = binary_signature(seed, 300, 600)
+    cv2.ellipse(image, (120, 80), (60, 25), 15, 0, 360, 255, 3)
+    contours = list(cv2.findContours(image, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)[0])
+    for length in (1, 2, 3, 5, 9, 10, 11, 19, 20, 21, 24, 60, 400):
+        walk = np.cumsum(rng.integers(-3, 4, size=(length, 2)), axis=0) + 200
+        contours.append(walk.astype(np.int32).reshape(-1, 1, 2))
+    return contours
+
+
+def reference_curvature(contour):
+    """Calcolo originale di calculate_curvature"""
+    angles = []
+    for i in range(2, len(contour)):
+        pt1 = contour[i - 2][0]
+        pt2 = contour[i - 1][0]
+        pt3 = contour[i][0]
+        v1 = pt1 - pt2
+        v2 = pt3 - pt2
+        angle = math.degrees(math.acos(
+            np.clip(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-5), -1.0, 1.0)
+        ))
+        angles.append(angle)
+    return np.mean(angles) if angles else 0
+
+
+def reference_coordination_angles(points):
+    """Angoli di curvatura originali p[i-2], p[i], p[i+2] di un contorno"""
+    angles = []
+    for i in range(2, len(points) - 2):
+        v1 = points[i - 2] - points[i]
+        v2 = points[i + 2] - points[i]
+        cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
+        angles.append(np.arccos(np.clip(cos_angle, -1, 1)))
+    return np.array(angles)
+
+
+def reference_coordination_index(contours):
+    """Calcolo originale di calculate_coordination_index"""
+    coordination_scores = []
+    for contour in contours:
+        if len(contour) < 20:
+            continue
+        angles = reference_coordination_angles(contour.reshape(-1, 2))
+        if len(angles) < 5:
+            continue
+        angle_std = np.std(angles)
+        angle_mean = np.mean(angles)
+        contour_length = cv2.arcLength(contour, False)
+        if contour_length > 0:
+            normalized_variation = angle_std / (angle_mean + 1e-6)
+            if 0.3 <= normalized_variation <= 0.8:
+                coord_score = 85 + (15 * (1 - abs(normalized_variation - 0.55) / 0.25))
+            elif 0.1 <= normalized_variation <= 1.2:
+                coord_score = 60 + (25 * (1 - abs(normalized_variation - 0.55) / 0.45))
+            else:
+                coord_score = max(0, 40 - (abs(normalized_variation - 0.55) * 50))
+            coordination_scores.append(min(100.0, max(0.0, coord_score)))
+    return float(np.mean(coordination_scores)) if coordination_scores else 50.0
+
+
+def reference_acceleration(points):
+    """Modulo della derivata seconda originale di un contorno"""
+    ddx = np.diff(np.diff(points[:, 0]))
+    ddy = np.diff(np.diff(points[:, 1]))
+    return np.sqrt(ddx ** 2 + ddy ** 2)
+
+
+def reference_fluidity_score(contours):
+    """Calcolo originale di calculate_fluidity_score"""
+    smoothness_scores = []
+    for contour in contours:
+        if len(contour) < 10:
+            continue
+        acceleration = reference_acceleration(contour.reshape(-1, 2))
+        if len(acceleration) > 0:
+            contour_length = cv2.arcLength(contour, False)
+            if contour_length > 0:
+                irregularity = np.std(acceleration) / contour_length
+                smoothness = max(0.0, 100.0 - (irregularity * 1000))
+                smoothness_scores.append(min(100.0, smoothness))
+    return float(np.mean(smoothness_scores)) if smoothness_scores else 50.0
+
+
+def assert_close(actual, expected):
+    assert np.allclose(actual, expected, rtol=TOLERANCE, atol=TOLERANCE), (actual, expected)
+
+
+def test_curvature_matches_loop(analyzer):
+    for contour in synthetic_contours():
+        assert_close(analyzer.calculate_curvature(contour), reference_curvature(contour))
+
+
+def test_coordination_statistics_match_loop():
+    contours = synthetic_contours(1)
+    long_contours = [contour for contour in contours if len(contour) >= 20]
+    means, stds, counts, lengths = contour_kernels.coordination_statistics(contours, min_points=20)
+    assert len(means) == len(long_contours)
+    for position, contour in enumerate(long_contours):
+        angles = reference_coordination_angles(contour.reshape(-1, 2))
+        assert counts[position] == len(angles)
+        assert_close(means[position], np.mean(angles))
+        assert_close(stds[position], np.std(angles))
+        assert_close(lengths[position], cv2.arcLength(contour, False))
+
+
+def test_fluidity_statistics_match_loop():
+    contours = synthetic_contours(2)
+    long_contours = [contour for contour in contours if len(contour) >= 10]
+    stds, counts, lengths = contour_kernels.fluidity_statistics(contours, min_points=10)
+    assert len(stds) == len(long_contours)
+    for position, contour in enumerate(long_contours):
+        acceleration = reference_acceleration(contour.reshape(-1, 2))
+        assert counts[position] == len(acceleration)
+        assert_close(stds[position], np.std(acceleration))
+        assert_close(lengths[position], cv2.arcLength(contour, False))
+
+
+def test_scores_match_loop(analyzer):
+    for seed in range(5):
+        contours = synthetic_contours(seed)
+        assert_close(analyzer.calculate_coordination_index(contours, None), reference_coordination_index(contours))
+        assert_close(analyzer.calculate_fluidity_score(None, contours), reference_fluidity_score(contours))
+    # Nessun contorno abbastanza lungo: valore neutro come nel calcolo originale
+    short = [np.array([[[0, 0]], [[1, 1]], [[2, 0]]], dtype=np.int32)]
+    assert analyzer.calculate_coordination_index(short, None) == reference_coordination_index(short) == 50.0
+    assert analyzer.calculate_fluidity_score(None, short) == reference_fluidity_score(short) == 50.0
+
+
+if __name__ == "__main__":
+    analyzer = load_analyzer()
+    test_curvature_matches_loop(analyzer)
+    test_coordination_statistics_match_loop()
+    test_fluidity_statistics_match_loop()
+    test_scores_match_loop(analyzer)
+
+    contours = synthetic_contours() * 20
+    runs = 5
+    for label, function in (
+        ("cicli originali", lambda: (reference_coordination_index(contours), reference_fluidity_score(contours))),
+        ("kernel vettorizzati", lambda: (analyzer.calculate_coordination_index(contours, None),
+                                         analyzer.calculate_fluidity_score(None, contours))),
+    ):
+        start = time.perf_counter()
+        for _ in range(runs):
+            function()
+        print(f"Coordinazione + fluidità su {len(contours)} contorni, {label}: "
+              f"{(time.perf_counter() - start) / runs * 1000:.1f} ms")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test della cache su disco dei parametri: voci JSON (niente pickle) con lo stesso record
+SignatureFeatures, directory privata dell'utente, TTL misurato dalla scrittura anche per
+le voci usate spesso, voci illeggibili trattate come assenti ed evizione non ripetuta a
+ogni scrittura
+"""
+
+import os
+import pickle
+import stat
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+
+from feature_cache import EVICT_MARKER, FeatureCache, ensure_private_directory
+from signature_features import SignatureFeatures
+
+PARAMETERS = {
+    "real_width_mm": 80.0,
+    "real_height_mm": 30.0,
+    "original_width": 900,
+    "original_height": 400,
+    "Proportion": 2.6666666666666665,
+    "Inclination": -7.083285808563232,
+    "Readability": "Alta",
+    "LetterConnections": 25,
+    "Dimensions": (73.95555555555555, 15.075),
+    "FluidityScore": 98.79941771043826,
+}
+
+
+def make_cache(root, **kwargs):
+    cache = FeatureCache(str(root), "v1", **kwargs)
+    return cache, cache.make_key("a" * 64, 80, 30)
+
+
+def test_round_trip_without_pickle(tmp_path):
+    cache, key = make_cache(tmp_path / "cache")
+    features = SignatureFeatures.from_parameters(PARAMETERS)
+    cache.put(key, features)
+
+    restored = cache.get(key)
+    assert isinstance(restored, SignatureFeatures)
+    assert restored.to_dict() == features.to_dict()
+    assert type(restored["LetterConnections"]) is int
+    with open(cache._path(key), "rb") as f:
+        assert f.read(1) == b"{"
+
+
+def test_private_directory(tmp_path):
+    root = tmp_path / "cache"
+    make_cache(root)
+    assert stat.S_IMODE(os.stat(root).st_mode) & 0o077 == 0
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    with pytest.raises(PermissionError):
+        ensure_private_directory(str(shared))
+
+
+def test_planted_or_truncated_entries_are_misses(tmp_path):
+    cache, key = make_cache(tmp_path / "cache")
+    path = cache._path(key)
+
+    # Un pickle piantato non viene mai deserializzato
+    with open(path, "wb") as f:
+        pickle.dump({"Proportion": 1.0}, f)
+    assert cache.get(key) is None and not os.path.exists(path)
+
+    cache.put(key, SignatureFeatures.from_parameters(PARAMETERS))
+    with open(path, "r+b") as f:
+        f.truncate(20)
+    assert cache.get(key) is None
+
+
+def test_ttl_is_not_extended_by_hits(tmp_path):
+    cache, key = make_cache(tmp_path / "cache", ttl_seconds=30)
+    cache.put(key, SignatureFeatures.from_parameters(PARAMETERS))
+    path = cache._path(key)
+    written = time.time() - 20
+    os.utime(path, (written, written))
+
+    assert cache.get(key) is not None
+    assert os.stat(path).st_mtime == pytest.approx(written)
+    os.utime(path, (time.time(), written - 20))
+    assert cache.get(key) is None and not os.path.exists(path)
+
+
+def test_size_eviction_keeps_recently_used(tmp_path):
+    cache, _ = make_cache(tmp_path / "cache")
+    features = SignatureFeatures.from_parameters(PARAMETERS)
+    keys = [cache.make_key(str(index) * 64, 80, 30) for index in range(3)]
+    for index, key in enumerate(keys):
+        cache.put(key, features)
+        written = time.time() - 100 + index
+        os.utime(cache._path(key), (written, written))
+    # La voce più vecchia è anche l'ultima usata: resta
+    cache.get(keys[0])
+
+    cache.max_bytes = os.path.getsize(cache._path(keys[0])) * 2
+    cache.evict()
+    assert [os.path.exists(cache._path(key)) for key in keys] == [True, False, True]
+
+
+def test_eviction_scans_are_amortized(tmp_path):
+    features = SignatureFeatures.from_parameters(PARAMETERS)
+    cache, key = make_cache(tmp_path / "cache", evict_interval=3600)
+    cache.put(key, features)
+    entry_size = os.path.getsize(cache._path(key))
+    marker = os.path.join(cache.directory, EVICT_MARKER)
+    # Prima scrittura nella partizione: nessuna scansione precedente, il marcatore viene creato
+    assert os.path.exists(marker)
+
+    # Limite da 100 voci: una nuova scansione solo dopo oltre 10 voci scritte dal processo
+    cache.max_bytes = entry_size * 100
+    scans = FeatureCache.counters["scans"]
+    keys = [cache.make_key(f"{index:064x}", 80, 30) for index in range(11)]
+    for key in keys[:10]:
+        cache.put(key, features)
+    assert FeatureCache.counters["scans"] == scans
+    cache.put(keys[10], features)
+    assert FeatureCache.counters["scans"] == scans + 1
+
+    # Un altro processo (contatore azzerato) riscandisce solo a intervallo trascorso
+    def entries():
+        return len([name for name in os.listdir(cache.directory) if name.endswith(".json")])
+
+    cache.max_bytes = entry_size * 11
+    FeatureCache._written.clear()
+    cache.put(keys[0], features)
+    assert FeatureCache.counters["scans"] == scans + 1 and entries() == 12
+    os.utime(marker, (time.time() - 3600, time.time() - 3600))
+    cache.put(keys[1], features)
+    assert FeatureCache.counters["scans"] == scans + 2 and entries() == 11
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache, key = make_cache(os.path.join(directory, "cache"))
+        features = SignatureFeatures.from_parameters(PARAMETERS)
+        cache.put(key, features)
+        runs = 1000
+        start = time.perf_counter()
+        for _ in range(runs):
+            cache.get(key)
+        elapsed_us = (time.perf_counter() - start) / runs * 1e6
+        print(f"Hit della cache dei parametri: {elapsed_us:.0f} µs")
+
+        # Scritture in una partizione già piena: la scansione non avviene a ogni put
+        for index in range(5000):
+            cache.put(cache.make_key(f"{index:064x}", 80, 30), features)
+        start = time.perf_counter()
+        for index in range(runs):
+            cache.put(cache.make_key(f"{index:064x}", 81, 30), features)
+        elapsed_us = (time.perf_counter() - start) / runs * 1e6
+        print(f"Scrittura nella cache con 5000 voci: {elapsed_us:.0f} µs")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test del grafo dei parametri: ordine di calcolo topologico, intermedi condivisi calcolati
+una sola volta e solo se servono, errori per parametri sconosciuti, dipendenze non
+registrate (che impediscono i cicli), nodi duplicati e input mancanti
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+
+from feature_engine import FeatureGraph
+
+
+def counting_graph():
+    """Grafo con un intermedio condiviso e un parametro che dipende da un altro; conta le chiamate"""
+    calls = []
+    graph = FeatureGraph(inputs=("image", "scale"))
+
+    @graph.intermediate("binary", "image")
+    def binary(image):
+        calls.append("binary")
+        return [value > 0 for value in image]
+
+    @graph.intermediate("skeleton", "binary")
+    def skeleton(values):
+        calls.append("skeleton")
+        return sum(values)
+
+    @graph.feature("Ink", "binary", "scale")
+    def ink(values, scale):
+        calls.append("Ink")
+        return sum(values) * scale
+
+    @graph.feature("Length", "skeleton", "scale")
+    def length(pixels, scale):
+        calls.append("Length")
+        return pixels * scale
+
+    @graph.feature("Ratio", "Ink", "Length")
+    def ratio(ink_value, length_value):
+        calls.append("Ratio")
+        return ink_value / length_value
+
+    return graph, calls
+
+
+def test_plan_order():
+    graph, _ = counting_graph()
+    assert graph.features == ["Ink", "Length", "Ratio"]
+    assert graph.plan() == ["binary", "Ink", "skeleton", "Length", "Ratio"]
+    assert graph.plan(["Ink"]) == ["binary", "Ink"]
+    # Ogni nodo compare dopo le proprie dipendenze, anche chiedendo prima il parametro derivato
+    assert graph.plan(["Ratio", "Ink"]) == ["binary", "Ink", "skeleton", "Length", "Ratio"]
+
+
+def test_shared_intermediates_computed_once():
+    graph, calls = counting_graph()
+    result = graph.run({"image": [0, 3, 5, 0], "scale": 2.0})
+    assert result == {"Ink": 4.0, "Length": 4.0, "Ratio": 1.0}
+    assert calls == ["binary", "Ink", "skeleton", "Length", "Ratio"]
+
+    # Un sottoinsieme calcola solo gli intermedi necessari e restituisce solo quanto richiesto
+    calls.clear()
+    assert graph.run({"image": [1, 0], "scale": 1.0}, ["Ink"]) == {"Ink": 1.0}
+    assert calls == ["binary", "Ink"]
+
+    # Risultati nell'ordine di registrazione, non in quello della richiesta
+    assert list(graph.run({"image": [1], "scale": 1.0}, ["Ratio", "Ink"])) == ["Ink", "Ratio"]
+
+
+def test_unknown_features_and_missing_inputs():
+    graph, calls = counting_graph()
+    with pytest.raises(ValueError, match="Parametri sconosciuti: Slant"):
+        graph.plan(["Ink", "Slant"])
+    # Gli intermedi non sono parametri richiedibili
+    with pytest.raises(ValueError, match="Parametri sconosciuti: skeleton"):
+        graph.run({"image": [1], "scale": 1.0}, ["skeleton"])
+    with pytest.raises(ValueError, match="Input mancanti: scale"):
+        graph.run({"image": [1]})
+    assert calls == []
+
+
+def test_registration_rejects_cycles_and_duplicates():
+    graph, _ = counting_graph()
+    # Le dipendenze devono essere già registrate: un nodo non può dipendere da sé stesso
+    # né da un nodo successivo, quindi il grafo è aciclico per costruzione
+    with pytest.raises(ValueError, match="Dipendenza sconosciuta per loop: loop"):
+        graph.feature("loop", "loop")(lambda value: value)
+    with pytest.raises(ValueError, match="Dipendenza sconosciuta per first: second"):
+        graph.intermediate("first", "second")(lambda value: value)
+    with pytest.raises(ValueError, match="Nodo già registrato: binary"):
+        graph.intermediate("binary", "image")(lambda image: image)
+    with pytest.raises(ValueError, match="Nodo già registrato: scale"):
+        graph.feature("scale")(lambda: 1.0)
+    assert "loop" not in graph.features and graph.plan() == ["binary", "Ink", "skeleton", "Length", "Ratio"]
+
+
+def test_analyzer_graph_subsets(analyzer):
+    graph = analyzer.SIGNATURE_FEATURES
+    assert graph.plan(["Proportion"]) == ["Proportion"]
+    plan = graph.plan(["AvgCurvature", "LetterConnections"])
+    assert plan.index("contours") < plan.index("main_contour") < plan.index("AvgCurvature")
+    assert plan.count("contours") == 1 and set(plan) <= set(graph.plan())
+
+
+if __name__ == "__main__":
+    test_plan_order()
+    test_shared_intermediates_computed_once()
+
+    # Costo dell'esecutore su un grafo a catena, senza lavoro nei nodi
+    graph = FeatureGraph(inputs=("image",))
+    previous = "image"
+    for index in range(200):
+        name = f"node{index}"
+        register = graph.feature if index % 2 == 0 else graph.intermediate
+        register(name, previous)(lambda value: value)
+        previous = name
+    runs = 1000
+    start = time.perf_counter()
+    for _ in range(runs):
+        graph.run({"image": 0})
+    elapsed_us = (time.perf_counter() - start) / runs * 1e6
+    print(f"Esecuzione di un grafo di 200 nodi: {elapsed_us:.0f} µs")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test dell'archivio dei parametri: ricerche per intervalli identiche a un filtro riga per
+riga, deduplicazione per chiave (anche tra scrittori concorrenti), indice a bucket,
+recupero dopo una scrittura interrotta e tempo di ricerca su un milione di firme
+"""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+
+import feature_store
+from feature_store import FeatureStore, INDEX_DTYPE, STORE_COLUMNS
+
+
+def random_store(directory, rows, seed=0):
+    """Archivio con parametri casuali e progetti/versioni misti"""
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0, 300, (rows, len(STORE_COLUMNS))).astype(np.float32)
+    values[:, STORE_COLUMNS.index("Inclination")] = rng.uniform(-45, 45, rows)
+    values[rng.random(values.shape) < 0.02] = np.nan
+    index = np.zeros(rows, dtype=INDEX_DTYPE)
+    index["project_id"] = rng.integers(-1, 4, rows)
+    index["algorithm_version"] = np.where(rng.random(rows) < 0.8, b"1-nuova", b"1-vecchia")
+    store = FeatureStore(directory)
+    store.append_rows(values, index)
+    return store, values, index
+
+
+def test_scan_matches_row_filter():
+    with tempfile.TemporaryDirectory() as directory:
+        store, values, index = random_store(directory, 5000)
+        ranges = {"Inclination": (-5, 5), "PressureMean": (100, 200)}
+        for project_id, version in ((None, None), (2, None), (None, "1-nuova"), (-1, "1-vecchia")):
+            expected = [
+                row for row in range(len(values))
+                if all(low <= values[row, STORE_COLUMNS.index(name)] <= high for name, (low, high) in ranges.items())
+                and (project_id is None or index["project_id"][row] == project_id)
+                and (version is None or index["algorithm_version"][row] == version.encode())
+            ]
+            assert store.scan(ranges, project_id, version).tolist() == expected
+
+
+def test_append_and_find():
+    with tempfile.TemporaryDirectory() as directory:
+        store = FeatureStore(directory)
+        parameters = {"Inclination": -7.5, "PressureMean": 247.2, "LetterConnections": 25, "Dimensions": [73.9, 15.1]}
+        first = store.append(parameters, "ab" * 32, 80, 30, "1-nuova", 3)
+        second = store.append(parameters, "cd" * 32, 80, 30, "1-nuova")
+        assert (first, second) == (0, 1)
+        assert store.find("ab" * 32, 80, 30, "1-nuova", 3) == 0
+        assert store.find("ab" * 32, 80, 30, "1-nuova") is None
+        record = store.records([second])[0]
+        assert record["project_id"] is None
+        assert record["parameters"]["DimensionsHeightMm"] == np.float32(15.1)
+        assert "AvgSpacing" not in record["parameters"]
+
+        # Scrittura interrotta dopo i valori: la riga incompleta non è visibile e viene sovrascritta
+        with open(os.path.join(directory, feature_store.VALUES_FILE), "ab") as f:
+            f.write(b"\0" * 10)
+        assert len(FeatureStore(directory)) == 2
+        assert store.append(parameters, "ef" * 32, 80, 30, "1-nuova") == 2
+        assert store.scan({"Inclination": (-8, -7)}).tolist() == [0, 1, 2]
+
+
+def append_same_signature(directory):
+    parameters = {"Inclination": -7.5, "PressureMean": 247.2}
+    return [FeatureStore(directory).append(parameters, "ab" * 32, 80, 30, "1-nuova", 3) for _ in range(20)]
+
+
+def test_concurrent_appends_do_not_duplicate():
+    with tempfile.TemporaryDirectory() as directory:
+        FeatureStore(directory)
+        with multiprocessing.get_context("fork").Pool(4) as pool:
+            results = pool.map(append_same_signature, [directory] * 4)
+        assert {row for rows in results for row in rows} == {0}
+        assert len(FeatureStore(directory)) == 1
+
+
+def test_unique_batch_and_bucket_backfill():
+    with tempfile.TemporaryDirectory() as directory:
+        store, values, index = random_store(directory, 200, seed=3)
+        hashes = [f"{row:02x}".ljust(64, "0") for row in range(200)]
+        index = np.zeros(4, dtype=INDEX_DTYPE)
+        index["image_hash"] = [hashes[5], hashes[6], hashes[5], "ff" * 32]
+        index["project_id"] = feature_store.NO_PROJECT
+        ids = store.append_rows(values[:4], index, unique=True)
+        assert ids.tolist() == [200, 201, 200, 202] and len(store) == 203
+
+        # Archivio senza indice a bucket (versione precedente o scrittura interrotta):
+        # le righe non indicizzate sono cercate nell'indice e indicizzate dal prossimo scrittore
+        shutil.rmtree(os.path.join(directory, feature_store.BUCKET_DIR))
+        store = FeatureStore(directory)
+        assert store.find("ff" * 32, 0, 0, "") == 202
+        assert store.append({}, hashes[6], 0, 0, "") == 201
+        assert store._indexed_rows() == 203
+        assert store.find(hashes[6], 0, 0, "") == 201 and store.find(hashes[7], 0, 0, "") is None
+
+
+def test_cache_hits_are_registered(analyzer, signature_path, tmp_path, monkeypatch):
+    # Cache popolata con l'archivio disattivato: l'hit successivo registra comunque la firma
+    monkeypatch.setenv("SIGNATURE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("SIGNATURE_STORE_DIR", raising=False)
+    analyzer.analyze_signature_cached(signature_path, 80, 30)
+    monkeypatch.setenv("SIGNATURE_STORE_DIR", str(tmp_path / "store"))
+    for _ in range(2):
+        analyzer.analyze_signature_cached(signature_path, 80, 30)
+    assert len(FeatureStore(str(tmp_path / "store"))) == 1
+
+
+def test_column_mismatch_is_rejected():
+    with tempfile.TemporaryDirectory() as directory:
+        FeatureStore(directory)
+        with open(os.path.join(directory, feature_store.HEADER_FILE), "w") as f:
+            f.write('{"format": 1, "columns": ["Inclination"]}')
+        try:
+            FeatureStore(directory)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("archivio con colonne diverse accettato")
+
+
+if __name__ == "__main__":
+    test_scan_matches_row_filter()
+    test_append_and_find()
+    test_concurrent_appends_do_not_duplicate()
+    test_unique_batch_and_bucket_backfill()
+    test_column_mismatch_is_rejected()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        store, _, _ = random_store(directory, 1_000_000)
+        append_ms = (time.perf_counter() - start) * 1000
+        ranges = {"Inclination": (7, 17), "PressureMean": (120, 140)}
+        store.scan(ranges)
+        runs = 10
+        start = time.perf_counter()
+        for _ in range(runs):
+            matches = store.scan(ranges, algorithm_version="1-nuova")
+        scan_ms = (time.perf_counter() - start) / runs * 1000
+        print(f"1M firme: scrittura {append_ms:.0f} ms, ricerca {scan_ms:.1f} ms ({len(matches)} trovate)")
+
+        # Registrazione di una firma nuova: controllo dei duplicati su un solo bucket
+        parameters = {"Inclination": -7.5}
+        start = time.perf_counter()
+        for row in range(runs):
+            store.append(parameters, f"{row + 1:064x}"[::-1], 80, 30, "1-nuova")
+        register_ms = (time.perf_counter() - start) / runs * 1000
+        print(f"1M firme: registrazione con controllo dei duplicati {register_ms:.2f} ms")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test del contesto immagine condiviso (SignatureImageContext): decodifica, sogliature e
+contorni memorizzati coincidono con il calcolo diretto dal file (anche con orientamento
+EXIF), sono calcolati una sola volta, e l'analisi con il contesto coincide con quella che
+riapre il file
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from conftest import binary_signature, load_analyzer
+
+
+def write_rotated_jpeg(path):
+    """JPEG con orientamento EXIF 6 (ruotato di 90°): il file e l'immagine hanno lati scambiati"""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.fromarray(255 - binary_signature(2, height=120, width=260)).save(path, exif=exif.tobytes())
+    return str(path)
+
+
+def image_paths(directory, signature_path):
+    scan = os.path.join(str(directory), "scansione.png")
+    cv2.imwrite(scan, 255 - binary_signature(5, height=400, width=900))
+    return [signature_path, scan, write_rotated_jpeg(os.path.join(str(directory), "ruotata.jpg"))]
+
+
+def same_contours(first, second):
+    return len(first) == len(second) and all(np.array_equal(a, b) for a, b in zip(first, second))
+
+
+def test_context_matches_direct_decode(analyzer, tmp_path, signature_path):
+    for path in image_paths(tmp_path, signature_path):
+        context = analyzer.SignatureImageContext(path)
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        assert np.array_equal(context.gray, gray), path
+
+        processed = analyzer.preprocess_image(gray, resize=True)
+        processed_original = analyzer.preprocess_image(gray, resize=False)
+        assert np.array_equal(context.processed, processed)
+        assert np.array_equal(context.processed_original, processed_original)
+        assert same_contours(context.contours,
+                             cv2.findContours(processed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0])
+        assert same_contours(context.contours_original,
+                             cv2.findContours(processed_original, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0])
+        tree, hierarchy = cv2.findContours(processed, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        assert same_contours(context.contour_tree[0], tree)
+        assert np.array_equal(context.contour_tree[1], hierarchy)
+        with Image.open(path) as image:
+            assert context.file_size == image.size
+
+
+def test_context_reads_and_decodes_once(analyzer, tmp_path, signature_path):
+    path = tmp_path / "copia.png"
+    path.write_bytes(open(signature_path, "rb").read())
+    context = analyzer.SignatureImageContext(str(path))
+    first = (context.gray, context.processed, context.contours)
+    # Il file non viene riletto: gli intermedi restano disponibili anche dopo la rimozione
+    path.unlink()
+    assert all(a is b for a, b in zip(first, (context.gray, context.processed, context.contours)))
+    assert context.data == open(signature_path, "rb").read()
+
+    missing = analyzer.SignatureImageContext(str(tmp_path / "assente.png"))
+    assert missing.data is None and missing.gray is None
+
+
+def test_analysis_with_context_matches_fresh_read(analyzer, tmp_path, signature_path):
+    for path in image_paths(tmp_path, signature_path):
+        context = analyzer.SignatureImageContext(path)
+        # Intermedi già calcolati da una fase precedente (SSIM) e poi riusati
+        context.processed
+        shared = analyzer.analyze_signature_with_dimensions(path, 80, 30, context=context)
+        fresh = analyzer.analyze_signature_with_dimensions(path, 80, 30)
+        assert shared.to_dict() == fresh.to_dict(), path
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    analyzer = load_analyzer()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scansione.png")
+        cv2.imwrite(path, 255 - binary_signature(5, height=1200, width=2700))
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            analyzer.preprocess_image(gray, resize=True)
+            gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            analyzer.preprocess_image(gray, resize=True)
+        separate_ms = (time.perf_counter() - start) / runs * 1000
+        start = time.perf_counter()
+        for _ in range(runs):
+            context = analyzer.SignatureImageContext(path)
+            context.processed
+            context.processed
+        shared_ms = (time.perf_counter() - start) / runs * 1000
+        print(f"Decodifica e sogliatura per due fasi: separate {separate_ms:.1f} ms, contesto condiviso {shared_ms:.1f} ms")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test di equivalenza della stima dell'inclinazione in un'unica passata
+(estimate_signature_inclination) rispetto ai tre metodi originali contorno per contorno
+(PCA, rettangoli di area minima, direzione dei tratti) e alla loro mediana robusta
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from conftest import load_analyzer
+
+# Differenza massima ammessa in gradi (solo arrotondamenti)
+TOLERANCE = 1e-9
+
+
+def reference_methods(contours):
+    """Misure dei tre metodi originali, nell'ordine in cui venivano raccolte"""
+    inclinations = []
+
+    all_points = []
+    for contour in contours:
+        if len(contour) >= 5 and cv2.contourArea(contour) > 50:
+            all_points.extend(contour.reshape(-1, 2))
+    if len(all_points) > 20:
+        all_points = np.array(all_points, dtype=np.float32)
+        centered_points = all_points - np.mean(all_points, axis=0)
+        _, eigenvectors = np.linalg.eigh(np.cov(centered_points.T))
+        principal_direction = eigenvectors[:, -1]
+        angle_deg = np.degrees(np.arccos(np.clip(np.dot(principal_direction, np.array([0, 1])), -1.0, 1.0)))
+        inclination = -angle_deg if principal_direction[0] < 0 else angle_deg
+        inclinations.append(np.clip(inclination, -45, 45))
+
+    for contour in contours:
+        if len(contour) >= 5 and cv2.contourArea(contour) > 100:
+            angle = cv2.minAreaRect(contour)[2]
+            inclination = angle + 90 if angle < -45 else angle
+            inclinations.append(np.clip(inclination, -45, 45))
+
+    for contour in contours:
+        if len(contour) >= 10 and cv2.contourArea(contour) > 50:
+            contour_points = contour.reshape(-1, 2)
+            directions = []
+            step = max(1, len(contour_points) // 20)
+            for i in range(0, len(contour_points) - step, step):
+                dx = contour_points[i + step][0] - contour_points[i][0]
+                dy = contour_points[i + step][1] - contour_points[i][1]
+                if abs(dx) > 2 or abs(dy) > 2:
+                    directions.append(np.clip(np.degrees(np.arctan2(dx, dy)), -45, 45))
+            if directions:
+                directions = np.array(directions)
+                valid_directions = directions[np.abs(directions - np.median(directions)) < 20]
+                if len(valid_directions) > 0:
+                    inclinations.append(np.mean(valid_directions))
+    return inclinations
+
+
+def reference_inclination(contours):
+    """Calcolo originale di calculate_signature_inclination (senza i messaggi di debug)"""
+    if not contours:
+        return 0.0
+    inclinations = np.array(reference_methods(contours))
+    if len(inclinations) == 0:
+        return 0.0
+    valid_inclinations = inclinations[np.abs(inclinations) <= 40]
+    if len(valid_inclinations) == 0:
+        return 0.0
+    return float(np.clip(np.median(valid_inclinations), -45, 45))
+
+
+def random_contours(seed):
+    """Contorni di tratti inclinati di spessore e lunghezza casuali"""
+    rng = np.random.default_rng(seed)
+    image = np.zeros((200, 500), dtype=np.uint8)
+    slant = rng.uniform(-0.6, 0.6)
+    for _ in range(rng.integers(1, 10)):
+        x, y = rng.uniform(30, 470), rng.uniform(40, 160)
+        height = rng.uniform(10, 80)
+        points = np.array([[x, y], [x + slant * height, y - height]]) + rng.normal(0, 3, size=(2, 2))
+        points = np.vstack([points, points[-1] + rng.normal(0, 20, size=2)])
+        cv2.polylines(image, [points.astype(np.int32)], False, 255, int(rng.integers(1, 8)))
+    return list(cv2.findContours(image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[0])
+
+
+def test_matches_original_estimator(analyzer):
+    for seed in range(300):
+        contours = random_contours(seed)
+        inclination, diagnostics = analyzer.estimate_signature_inclination(contours)
+        expected = reference_inclination(contours)
+        assert abs(inclination - expected) <= TOLERANCE, (seed, inclination, expected)
+        assert diagnostics["measurements"] == len(reference_methods(contours))
+        assert analyzer.calculate_signature_inclination(contours) == inclination
+
+
+def test_method_diagnostics_match_original_measurements(analyzer):
+    contours = random_contours(7)
+    _, diagnostics = analyzer.estimate_signature_inclination(contours)
+    measured = ([diagnostics["pca"]] if diagnostics["pca"] is not None else []) \
+        + diagnostics["min_area_rect"] + diagnostics["segment_directions"]
+    assert np.allclose(measured, reference_methods(contours), rtol=0, atol=TOLERANCE)
+    assert sum(diagnostics["direction_histogram"]) > 0
+
+
+def test_degenerate_inputs(analyzer):
+    assert analyzer.estimate_signature_inclination([])[0] == reference_inclination([]) == 0.0
+    tiny = [np.array([[[0, 0]], [[1, 0]], [[1, 1]]], dtype=np.int32)]
+    assert analyzer.estimate_signature_inclination(tiny)[0] == reference_inclination(tiny) == 0.0
+
+
+if __name__ == "__main__":
+    analyzer = load_analyzer()
+    test_matches_original_estimator(analyzer)
+    test_method_diagnostics_match_original_measurements(analyzer)
+    test_degenerate_inputs(analyzer)
+
+    contours = [max(random_contours(3), key=cv2.contourArea)]
+    runs = 500
+    for label, function in (("originale", reference_inclination),
+                            ("passata unica", analyzer.calculate_signature_inclination)):
+        start = time.perf_counter()
+        for _ in range(runs):
+            function(contours)
+        print(f"Inclinazione del contorno principale, {label}: {(time.perf_counter() - start) / runs * 1e6:.0f} µs")
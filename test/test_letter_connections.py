@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test di equivalenza del conteggio dei punti di giunzione vettorizzato (cv2.filter2D)
+rispetto alla scansione pixel per pixel originale di count_letter_connections
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from conftest import binary_signature, load_analyzer
+
+
+def reference_junction_points(binary):
+    """Scansione originale: ogni 3 pixel, vicinato 5x5 e righe/colonne di 5 pixel"""
+    h, w = binary.shape
+    junction_points = 0
+    for y in range(2, h - 2, 3):
+        for x in range(2, w - 2, 3):
+            if binary[y, x] > 0:
+                neighborhood = binary[y - 2:y + 3, x - 2:x + 3]
+                active_pixels = np.sum(neighborhood > 0)
+                if active_pixels > 12:
+                    horizontal_line = np.sum(binary[y, x - 2:x + 3] > 0)
+                    vertical_line = np.sum(binary[y - 2:y + 3, x] > 0)
+                    if horizontal_line < 4 and vertical_line < 4:
+                        junction_points += 1
+    return junction_points
+
+
+def reference_letter_connections(binary):
+    """count_letter_connections prima della vettorizzazione"""
+    kernel = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
+    eroded = cv2.erode(binary, kernel, iterations=1)
+    contours, _ = cv2.findContours(eroded, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    connections = 0
+    for contour in contours:
+        if len(contour) < 10:
+            continue
+        perimeter = cv2.arcLength(contour, True)
+        area = cv2.contourArea(contour)
+        if area > 0:
+            complexity_ratio = perimeter * perimeter / (4 * np.pi * area)
+            if complexity_ratio > 4.0:
+                connections += int(complexity_ratio / 4.0)
+    total_connections = connections + min(reference_junction_points(binary) // 3, 10)
+    return min(max(total_connections, 1), 25)
+
+
+def sample_images():
+    # Tratti anche sui bordi, dove il vicinato 5x5 è troncato
+    images = [binary_signature(seed, margin=0) for seed in range(40)]
+    rng = np.random.default_rng(123)
+    # Rumore casuale a diverse densità e dimensioni non multiple del passo
+    for density in (0.2, 0.5, 0.8):
+        shape = (int(rng.integers(5, 160)), int(rng.integers(5, 320)))
+        images.append(np.where(rng.random(shape) < density, 255, 0).astype(np.uint8))
+    # Casi limite: immagini minime, vuote e piene
+    images.append(np.zeros((4, 4), dtype=np.uint8))
+    images.append(np.full((5, 5), 255, dtype=np.uint8))
+    images.append(np.zeros((150, 300), dtype=np.uint8))
+    images.append(np.full((150, 300), 255, dtype=np.uint8))
+    return images
+
+
+def test_junction_points_match_reference(analyzer):
+    for index, image in enumerate(sample_images()):
+        assert analyzer.count_junction_points(image) == reference_junction_points(image), f"immagine {index}"
+
+
+def test_letter_connections_match_reference(analyzer):
+    for index, image in enumerate(sample_images()):
+        assert analyzer.count_letter_connections(image) == reference_letter_connections(image), f"immagine {index}"
+
+
+if __name__ == "__main__":
+    analyzer = load_analyzer()
+    test_junction_points_match_reference(analyzer)
+    test_letter_connections_match_reference(analyzer)
+
+    image = binary_signature(7)
+    start = time.perf_counter()
+    reference_junction_points(image)
+    reference_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(100):
+        analyzer.count_junction_points(image)
+    vectorized_ms = (time.perf_counter() - start) * 10
+    print(f"Equivalenza verificata; 300x150: scansione {reference_ms:.2f} ms, filter2D {vectorized_ms:.3f} ms")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test dello schema canonico dei parametri: risoluzione degli alias, alias ripetuti per
+retrocompatibilità e normalizzazione eseguita una sola volta
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+
+from parameter_schema import CANONICAL_NAMES, PARAMETER_ALIASES, CanonicalParameters, canonical_name, normalize_parameters
+from signature_features import SignatureFeatures
+
+
+def test_alias_tables_are_consistent():
+    for canonical, aliases in PARAMETER_ALIASES.items():
+        assert canonical in aliases
+        assert all(CANONICAL_NAMES[alias] == canonical for alias in aliases)
+    assert canonical_name("pressure_mean") == "PressureMean"
+    assert canonical_name("NaturalnessIndex") == "NaturalnessIndex"
+
+
+def test_normalization():
+    data = {"inclination": -3.0, "PressureMean": 120.0, "avg_asola_size": 0.4, "NaturalnessIndex": 70.0}
+    normalized = normalize_parameters(data)
+    assert normalized["Inclination"] == -3.0
+    assert normalized["pressureMean"] == normalized["pressure_mean"] == 120.0
+    assert normalized["AvgAsolaSize"] == normalized["avgAsolaSize"] == 0.4
+    assert normalized["NaturalnessIndex"] == 70.0
+    # L'alias usato in ingresso non viene ripetuto (come nella normalizzazione originale)
+    assert "inclination" not in normalized and "avg_asola_size" not in normalized
+    assert isinstance(normalized, CanonicalParameters)
+
+
+def test_normalization_happens_once():
+    normalized = normalize_parameters({"velocity": 2.0})
+    assert normalize_parameters(normalized) is normalized
+    features = SignatureFeatures.from_parameters({"Velocity": 2.0})
+    assert normalize_parameters(features) is features
+    assert normalize_parameters(None) is None
+
+
+if __name__ == "__main__":
+    test_alias_tables_are_consistent()
+    test_normalization()
+    test_normalization_happens_once()
+
+    data = {alias: float(index) for index, alias in enumerate(CANONICAL_NAMES)}
+    runs = 20000
+    start = time.perf_counter()
+    for _ in range(runs):
+        normalize_parameters(data)
+    print(f"Normalizzazione di {len(data)} chiavi: {(time.perf_counter() - start) / runs * 1e6:.1f} µs")
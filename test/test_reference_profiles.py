@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test dei profili di riferimento: aggiornamento incrementale (solo gli esemplari nuovi o
+modificati sono analizzati), punteggi del profilo in memory-map identici a quelli
+calcolati esemplare per esemplare e radice dei profili privata dell'utente
+"""
+
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import binary_signature
+
+import compatibility_engine as engine
+import reference_profiles
+from ssim_backends import OpenCVSSIM
+
+ALGORITHM_VERSION = "test"
+
+
+def signature_parameters(image):
+    """Parametri deterministici ricavati dall'immagine, al posto dell'analisi completa"""
+    ink = image > 0
+    return {
+        "PressureMean": float(ink.mean() * 1000),
+        "Proportion": float(ink.any(axis=0).sum() / max(1, ink.any(axis=1).sum())),
+        "ConnectedComponents": int(cv2.connectedComponents(image)[0] - 1),
+        "WritingStyle": "Corsivo" if ink.mean() > 0.05 else "Grafia mista",
+        "NaturalnessIndex": float(50 + ink.mean() * 300),
+    }
+
+
+class Analyzer:
+    """prepare_rows per update_profile che conta le firme analizzate"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.analyzed = []
+
+    def __call__(self, rows):
+        prepared = []
+        for index, image_path, _, _ in rows:
+            self.analyzed.append(image_path)
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            prepared.append((index, self.backend.prepare(image), signature_parameters(image)))
+        return prepared
+
+
+def write_exemplars(directory, seeds):
+    rows = []
+    for seed in seeds:
+        path = os.path.join(directory, f"sig{seed}.png")
+        if not os.path.exists(path):
+            cv2.imwrite(path, binary_signature(seed))
+        rows.append((len(rows), path, 80.0, 30.0))
+    return rows
+
+
+def test_incremental_update():
+    backend = OpenCVSSIM()
+    with tempfile.TemporaryDirectory() as root:
+        profile_dir = reference_profiles.profile_directory(root, 1, "w")
+        analyzer = Analyzer(backend)
+        rows = write_exemplars(root, range(5))
+        profile, update = reference_profiles.update_profile(profile_dir, rows, analyzer, ALGORITHM_VERSION, backend.settings())
+        assert len(profile) == 5 and update["analyzed"] == 5 and update["reused"] == 0
+
+        # Un esemplare rimosso e uno aggiunto: analizzato solo il nuovo
+        analyzer.analyzed.clear()
+        rows = write_exemplars(root, [0, 1, 2, 4, 5])
+        profile, update = reference_profiles.update_profile(profile_dir, rows, analyzer, ALGORITHM_VERSION, backend.settings())
+        assert analyzer.analyzed == [rows[-1][1]]
+        assert (update["reused"], update["analyzed"], update["removed"]) == (4, 1, 1)
+        assert [exemplar["image_path"] for exemplar in profile.exemplars] == [row[1] for row in rows]
+        assert isinstance(profile.features, np.memmap)
+
+        # Algoritmo cambiato: ricostruzione completa
+        analyzer.analyzed.clear()
+        reference_profiles.update_profile(profile_dir, rows, analyzer, "altro", backend.settings())
+        assert len(analyzer.analyzed) == len(rows)
+
+        # Nessun esemplare valido: il profilo viene eliminato
+        profile, _ = reference_profiles.update_profile(profile_dir, [], analyzer, "altro", backend.settings())
+        assert profile is None and reference_profiles.ReferenceProfile.load(profile_dir) is None
+
+
+def test_profile_scores_match_pairwise():
+    backend = OpenCVSSIM()
+    with tempfile.TemporaryDirectory() as root:
+        profile_dir = reference_profiles.profile_directory(root, None, "w")
+        rows = write_exemplars(root, range(10, 18))
+        reference_profiles.update_profile(profile_dir, rows, Analyzer(backend), ALGORITHM_VERSION, backend.settings())
+        profile = reference_profiles.ReferenceProfile.load(profile_dir)
+
+        questioned = binary_signature(99)
+        verifica_data = signature_parameters(questioned)
+        ssim = backend.score_stack(questioned, profile.ssim)
+        score = engine.score_candidates(verifica_data, profile.scoring_features(), ssim)
+        for index, (_, path, _, _) in enumerate(rows):
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            expected_ssim = backend.score(questioned, image)
+            expected = engine.score_candidates(verifica_data, [signature_parameters(image)], expected_ssim)
+            assert ssim[index] == expected_ssim
+            assert score["similarity"][index] == expected["similarity"][0]
+
+        naturalness = [signature_parameters(cv2.imread(path, cv2.IMREAD_GRAYSCALE))["NaturalnessIndex"] for _, path, _, _ in rows]
+        assert profile.naturalness_statistics["mean"] == float(np.mean(naturalness))
+
+
+def test_unknown_qualitative_values_are_reencoded():
+    backend = OpenCVSSIM()
+    with tempfile.TemporaryDirectory() as root:
+        profile_dir = reference_profiles.profile_directory(root, None, "w")
+        rows = write_exemplars(root, range(20, 24))
+        reference_profiles.update_profile(profile_dir, rows, Analyzer(backend), ALGORITHM_VERSION, backend.settings())
+        profile = reference_profiles.ReferenceProfile.load(profile_dir)
+        # Vocabolario di un altro processo, in cui i valori sconosciuti hanno codici diversi
+        profile.index["vocabulary"]["WritingStyle"] = ["corsivo", "stampatello", "misto", "altro"]
+        expected = engine.encode_parameter_matrix([exemplar["parameters"] for exemplar in profile.exemplars])
+        assert np.array_equal(profile.scoring_features(), expected, equal_nan=True)
+
+
+def test_profile_root_is_private(analyzer, monkeypatch, tmp_path):
+    monkeypatch.delenv("SIGNATURE_PROFILE_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    directory = analyzer.get_profile_directory("w", 1)
+    root = reference_profiles.default_profile_root()
+    assert directory.startswith(root + os.sep) and root.endswith(f"-{os.getuid()}")
+    assert os.stat(root).st_mode & 0o077 == 0
+
+    # Una radice condivisa (ad es. pre-creata da un altro utente in /tmp) viene rifiutata
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    monkeypatch.setenv("SIGNATURE_PROFILE_DIR", str(shared))
+    with pytest.raises(PermissionError):
+        analyzer.get_profile_directory("w", 1)
+    assert "error" in analyzer.build_reference_profile("w", [], 1)
+
+
+def test_ids_cannot_leave_the_root(analyzer, monkeypatch, tmp_path):
+    root = str(tmp_path / "profiles")
+    monkeypatch.setenv("SIGNATURE_PROFILE_DIR", root)
+    assert reference_profiles.profile_directory(root, 7, "Rossi_M-01") == os.path.join(root, "project_7", "writer_Rossi_M-01")
+    for project_id, writer_id in ((None, "../../x"), (None, "a/b"), (None, ""), ("../1", "w"), (None, "w\x00")):
+        with pytest.raises(ValueError):
+            reference_profiles.profile_directory(root, project_id, writer_id)
+
+    # Il comando non scrive né elimina nulla fuori dalla radice
+    outside = tmp_path / "writer_x"
+    outside.mkdir()
+    (outside / reference_profiles.INDEX_FILE).write_text("{}")
+    summary = analyzer.build_reference_profile("../writer_x", [], None)
+    assert "non valido" in summary["error"]
+    assert (outside / reference_profiles.INDEX_FILE).exists()
+
+
+if __name__ == "__main__":
+    test_incremental_update()
+    test_profile_scores_match_pairwise()
+    test_unknown_qualitative_values_are_reencoded()
+
+    backend = OpenCVSSIM()
+    with tempfile.TemporaryDirectory() as root:
+        profile_dir = reference_profiles.profile_directory(root, None, "w")
+        rows = write_exemplars(root, range(200))
+        reference_profiles.update_profile(profile_dir, rows, Analyzer(backend), ALGORITHM_VERSION, backend.settings())
+        questioned = binary_signature(999)
+        verifica_data = signature_parameters(questioned)
+
+        start = time.perf_counter()
+        profile = reference_profiles.ReferenceProfile.load(profile_dir)
+        load_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        ssim = backend.score_stack(questioned, profile.ssim)
+        engine.score_candidates(verifica_data, profile.scoring_features(), ssim)
+        profile_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _, path, _, _ in rows:
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            engine.score_candidates(verifica_data, [signature_parameters(image)], backend.score(questioned, image))
+        pairwise_ms = (time.perf_counter() - start) * 1000
+        print(f"Profilo di 200 esemplari: apertura {load_ms:.1f} ms, confronto {profile_ms:.1f} ms; "
+              f"esemplari riletti uno a uno {pairwise_ms:.1f} ms")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test del record compatto SignatureFeatures: stessa vista a dizionario del risultato
+originale (chiavi, ordine, tipi e stringhe di display), serializzazione con pickle e
+memoria occupata rispetto al dizionario
+"""
+
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+
+import compatibility_engine as engine
+from signature_features import DISPLAY_FORMATS, SignatureFeatures
+
+# Risultato di analyze_signature_with_dimensions nel formato a dizionario
+PARAMETERS = {
+    "real_width_mm": 80.0,
+    "real_height_mm": 30.0,
+    "pixels_per_mm": 12.291666666666668,
+    "original_width": 900,
+    "original_height": 400,
+    "Proportion": 2.6666666666666665,
+    "Inclination": -7.083285808563232,
+    "PressureMean": 247.17227222222223,
+    "PressureStd": 39.296867913830056,
+    "AvgCurvature": 133.76502301425074,
+    "Readability": "Alta",
+    "WritingStyle": "Corsivo",
+    "AvgAsolaSize": 0,
+    "AvgSpacing": np.float64(1.456),
+    "Velocity": 1.276183188711431,
+    "OverlapRatio": np.float64(0.08231046931407943),
+    "LetterConnections": 25,
+    "BaselineStdMm": np.float64(1.311001444059001),
+    "StrokeComplexity": 0.02815884476534296,
+    "ConnectedComponents": 1,
+    "Dimensions": (73.95555555555555, 15.075),
+    "FluidityScore": 98.79941771043826,
+    "PressureConsistency": 73.32785465968104,
+    "CoordinationIndex": 61.65912486031153,
+    "NaturalnessIndex": 80.01586094017307,
+}
+
+
+def expected_result(parameters):
+    """Dizionario prodotto prima del record compatto, con il display già formattato"""
+    display = {
+        "dimensions_px": f"{parameters['original_width']}x{parameters['original_height']} px",
+        "dimensions_mm": f"{parameters['real_width_mm']:.1f}x{parameters['real_height_mm']:.1f} mm",
+    }
+    for key, name, formatter in DISPLAY_FORMATS:
+        if name in parameters:
+            display[key] = formatter(parameters[name])
+    return {**parameters, "display": display}
+
+
+def test_dictionary_view_matches_original_result():
+    features = SignatureFeatures.from_parameters(PARAMETERS)
+    expected = expected_result(PARAMETERS)
+    assert list(features) == list(expected)
+    assert json.dumps(features.to_dict()) == json.dumps(expected, default=float)
+    assert type(features["AvgAsolaSize"]) is int and type(features["Inclination"]) is float
+    assert features.get("Inesistente") is None and "Inesistente" not in features
+    assert "error" not in features
+
+
+def test_partial_and_unexpected_values():
+    parameters = {"real_width_mm": 80.0, "real_height_mm": 30.0, "original_width": 900, "original_height": 400,
+                  "Inclination": 3.5, "Readability": 3, "Dimensions": (80, 30), "Futuro": [1, 2, 3]}
+    features = SignatureFeatures.from_parameters(parameters)
+    assert features.to_dict() == expected_result(parameters)
+    assert "PressureMean" not in features and features["Dimensions"] == (80, 30)
+    assert type(features["Dimensions"][0]) is int and list(features)[-2:] == ["Futuro", "display"]
+
+
+def test_pickle_and_scoring():
+    features = SignatureFeatures.from_parameters(PARAMETERS)
+    restored = pickle.loads(pickle.dumps(features))
+    assert restored == features
+    reference = dict(PARAMETERS, PressureMean=230.0, WritingStyle="Stampatello")
+    by_record = engine.score_candidates(features, [SignatureFeatures.from_parameters(reference)], 0.5)
+    by_dict = engine.score_candidates(PARAMETERS, [reference], 0.5)
+    assert np.array_equal(by_record["compatibilities"], by_dict["compatibilities"], equal_nan=True)
+    assert by_record["similarity"][0] == by_dict["similarity"][0]
+
+
+def retained_bytes(build, count):
+    tracemalloc.start()
+    items = [build() for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return size / count
+
+
+if __name__ == "__main__":
+    test_dictionary_view_matches_original_result()
+    test_partial_and_unexpected_values()
+    test_pickle_and_scoring()
+
+    count = 5000
+    dict_bytes = retained_bytes(lambda: expected_result(dict(PARAMETERS)), count)
+    record_bytes = retained_bytes(lambda: SignatureFeatures.from_parameters(PARAMETERS), count)
+    features = SignatureFeatures.from_parameters(PARAMETERS)
+    start = time.perf_counter()
+    for _ in range(count):
+        pickle.dumps(features)
+    record_pickle_ms = (time.perf_counter() - start) * 1000
+    expected = expected_result(PARAMETERS)
+    start = time.perf_counter()
+    for _ in range(count):
+        pickle.dumps(expected)
+    dict_pickle_ms = (time.perf_counter() - start) * 1000
+    print(f"Per risultato: dizionario {dict_bytes:.0f} B, record {record_bytes:.0f} B; "
+          f"pickle di {count} risultati: dizionario {dict_pickle_ms:.0f} ms, record {record_pickle_ms:.0f} ms")
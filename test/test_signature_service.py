@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test del servizio di analisi su socket Unix: round-robin tra progetti, rifiuto oltre il
+backlog globale o la quota del progetto, deadline con worker terminato e riavviato, e
+protocollo JSON-lines (id restituiti, righe malformate, stats)
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+
+from signature_service import AnalysisService, FairQueue, Job
+
+
+def echo_handler(request):
+    """Handler dei worker di test: risponde con il proprio pid, dopo un'attesa opzionale"""
+    if request.get("sleep"):
+        time.sleep(request["sleep"])
+    if request.get("fail"):
+        raise ValueError("richiesta non valida")
+    return {"pid": os.getpid(), "value": request.get("value")}
+
+
+def make_job(project, value=None):
+    return Job({"project_id": project, "value": value}, 60)
+
+
+def test_round_robin_across_projects():
+    async def scenario():
+        queue = FairQueue(10)
+        for job in [make_job("batch", index) for index in range(3)] + [make_job("a", "a"), make_job("b", "b")]:
+            assert await queue.put(job)
+        return [(await queue.get()).request["value"] for _ in range(5)]
+
+    # Il batch accodato per primo non blocca i progetti arrivati dopo
+    assert asyncio.run(scenario()) == [0, "a", "b", 1, 2]
+
+
+def test_backlog_rejection_is_per_project():
+    async def scenario():
+        queue = FairQueue(4, project_capacity=2)
+        admitted = [await queue.put(make_job("batch")) for _ in range(3)]
+        admitted += [await queue.put(make_job("a")) for _ in range(2)]
+        # Backlog globale pieno: rifiutato anche un progetto senza richieste in coda
+        admitted.append(await queue.put(make_job("b")))
+        queue.discard(next(iter(queue._queues["batch"])))
+        admitted.append(await queue.put(make_job("b")))
+        return admitted, queue.snapshot()
+
+    admitted, snapshot = asyncio.run(scenario())
+    assert admitted == [True, True, False, True, True, False, True]
+    assert snapshot == {"batch": 1, "a": 2, "b": 1}
+
+
+def test_default_project_share():
+    async def scenario():
+        return FairQueue(3).project_capacity, FairQueue(64).project_capacity
+
+    assert asyncio.run(scenario()) == (1, 32)
+
+
+class Client:
+    """Client JSON-lines del servizio"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, payload):
+        line = payload if isinstance(payload, str) else json.dumps(payload)
+        self.writer.write((line + "\n").encode("utf-8"))
+        await self.writer.drain()
+
+    async def receive(self):
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 30))
+
+    async def call(self, payload):
+        await self.send(payload)
+        return await self.receive()
+
+
+def run_with_service(tmp_path, scenario, **kwargs):
+    """Avvia il servizio con echo_handler, esegue lo scenario con un client e lo arresta"""
+    socket_path = str(tmp_path / "service.sock")
+
+    async def main():
+        service = AnalysisService(echo_handler, **kwargs)
+        stop = asyncio.Event()
+        serving = asyncio.create_task(service.serve(socket_path, stop))
+        while not os.path.exists(socket_path):
+            await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        try:
+            return await scenario(Client(reader, writer), service)
+        finally:
+            writer.close()
+            stop.set()
+            await serving
+
+    result = asyncio.run(main())
+    assert not os.path.exists(socket_path)
+    return result
+
+
+def test_socket_protocol(tmp_path):
+    async def scenario(client, service):
+        reply = await client.call({"id": 7, "command": "echo", "value": "x"})
+        assert reply["id"] == 7 and reply["result"]["value"] == "x"
+        assert reply["result"]["pid"] != os.getpid()
+
+        malformed = await client.call("{non json")
+        assert malformed["id"] is None and "error" in malformed
+
+        failed = await client.call({"id": 8, "command": "echo", "fail": True})
+        assert failed == {"id": 8, "error": "richiesta non valida"}
+
+        stats = (await client.call({"id": 9, "command": "stats"}))["result"]
+        assert stats["accepted"] == 2 and stats["completed"] == 1 and stats["failed"] == 1
+
+        # Le risposte arrivano al completamento, ciascuna con il proprio id
+        await client.send({"id": "lenta", "sleep": 0.3})
+        await client.send({"id": "veloce"})
+        assert [(await client.receive())["id"] for _ in range(2)] == ["veloce", "lenta"]
+
+    run_with_service(tmp_path, scenario, workers=2)
+
+
+def test_deadline_kills_and_respawns_worker(tmp_path):
+    async def scenario(client, service):
+        before = (await client.call({"id": 1}))["result"]["pid"]
+        expired = await client.call({"id": 2, "sleep": 30, "deadline_ms": 300})
+        assert expired["id"] == 2 and expired["deadline_exceeded"]
+
+        after = (await client.call({"id": 3}))["result"]["pid"]
+        stats = (await client.call({"id": 4, "command": "stats"}))["result"]
+        return before, after, stats
+
+    start = time.monotonic()
+    before, after, stats = run_with_service(tmp_path, scenario, workers=1)
+    assert after != before
+    assert stats["restarts"] == 1 and stats["expired"] == 1
+    assert time.monotonic() - start < 20
+
+
+def test_backlog_rejection_over_socket(tmp_path):
+    async def scenario(client, service):
+        await client.send({"id": "in-esecuzione", "project_id": 1, "sleep": 1})
+        while not service.stats()["busy"]:
+            await asyncio.sleep(0.01)
+
+        await client.send({"id": "in-coda", "project_id": 1})
+        rejected = await client.call({"id": "rifiutata", "project_id": 1})
+        assert rejected["id"] == "rifiutata" and rejected["rejected"]
+        assert rejected["error"].startswith("Progetto 1 saturo")
+
+        # Un altro progetto entra comunque nel backlog
+        await client.send({"id": "interattiva", "project_id": 2})
+        replies = [await client.receive() for _ in range(3)]
+        assert sorted(reply["id"] for reply in replies) == ["in-coda", "in-esecuzione", "interattiva"]
+        assert all("result" in reply for reply in replies)
+        return service.stats()
+
+    stats = run_with_service(tmp_path, scenario, workers=1, backlog=3, project_backlog=1)
+    assert stats["rejected"] == 1 and stats["completed"] == 3
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    async def throughput(client, service):
+        runs = 500
+        start = time.perf_counter()
+        for index in range(runs):
+            await client.send({"id": index, "project_id": index % 4})
+        for _ in range(runs):
+            await client.receive()
+        return (time.perf_counter() - start) / runs * 1e6
+
+    with tempfile.TemporaryDirectory() as directory:
+        overhead_us = run_with_service(Path(directory), throughput, workers=4, backlog=1000)
+    print(f"Overhead del servizio per richiesta (4 worker): {overhead_us:.0f} µs")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test della matrice di similarità tra esemplari (similarity_matrix): ogni cella coincide
+con il confronto della singola coppia (SSIM, similarità finale, naturalezza, verdetto,
+compatibilità), in linea e con il pool di processi; matrice simmetrica, NaN sulla
+diagonale e per le firme non leggibili, artefatti .npz/.csv coerenti
+"""
+
+import csv
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import binary_signature, load_analyzer
+
+SIZES = [(80, 30), (70, 28), (90, 35), (75, 30)]
+
+
+def write_scans(directory, count):
+    paths = []
+    for seed in range(count):
+        path = os.path.join(str(directory), f"firma_{seed}.png")
+        cv2.imwrite(path, 255 - binary_signature(seed))
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_matrix_matches_pairwise(analyzer, tmp_path, monkeypatch, workers):
+    monkeypatch.setenv("SIGNATURE_CACHE_DIR", "off")
+    paths = write_scans(tmp_path, len(SIZES))
+    missing = str(tmp_path / "assente.png")
+    signatures = [(path, *size) for path, size in zip(paths, SIZES)]
+    signatures.insert(1, (missing, 80, 30))
+    valid = [0, 2, 3, 4]
+
+    matrix = analyzer.similarity_matrix(signatures, workers=workers)
+    assert matrix["errors"] == [{"index": 1, "image_path": missing,
+                                 "error": f"Impossibile leggere l'immagine: {missing}"}]
+    assert list(matrix["image_paths"]) == [path for path, _, _ in signatures]
+    similarity = matrix["similarity"]
+    assert similarity.shape == (5, 5)
+    assert np.isnan(np.diag(similarity)).all() and np.isnan(similarity[1]).all() and np.isnan(similarity[:, 1]).all()
+    assert np.array_equal(similarity, similarity.T, equal_nan=True)
+    assert (matrix["verdict_codes"][1] == -1).all()
+
+    parameters = list(matrix["parameters"])
+    for a, i in enumerate(valid):
+        for j in valid[a + 1:]:
+            pair = analyzer.compare_signatures_with_dimensions(signatures[i][0], signatures[j][0], signatures[i][1:],
+                                                               signatures[j][1:], chart_output="data")
+            assert math.isclose(matrix["ssim"][i, j], pair["ssim"], rel_tol=1e-12)
+            assert math.isclose(similarity[j, i], pair["similarity"], rel_tol=1e-12)
+            assert math.isclose(matrix["naturalness"][i, j] / 100.0, pair["naturalness"], rel_tol=1e-12)
+            assert matrix["verdict_labels"][matrix["verdict_codes"][i, j]] == pair["verdict"]
+            compatibilities = {name: float(matrix["compatibilities"][i, j, p]) for p, name in enumerate(parameters)
+                               if not np.isnan(matrix["compatibilities"][i, j, p])}
+            assert compatibilities == pytest.approx(pair["compatibilities"], rel=1e-6)
+
+
+def test_matrix_artifacts(analyzer, tmp_path, monkeypatch):
+    monkeypatch.setenv("SIGNATURE_CACHE_DIR", "off")
+    paths = write_scans(tmp_path, 3)
+    matrix = analyzer.similarity_matrix([(path, 80, 30) for path in paths], workers=1)
+    npz_path, csv_path = analyzer.write_similarity_matrix(matrix, str(tmp_path / "matrice.json"))
+    assert npz_path.endswith("matrice.npz") and csv_path.endswith("matrice.csv")
+
+    with np.load(npz_path) as stored:
+        assert np.array_equal(stored["similarity"], matrix["similarity"], equal_nan=True)
+        assert np.array_equal(stored["compatibilities"], matrix["compatibilities"], equal_nan=True)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(int(row["i"]), int(row["j"])) for row in rows] == [(0, 1), (0, 2), (1, 2)]
+    for row in rows:
+        assert float(row["similarity"]) == pytest.approx(matrix["similarity"][int(row["i"]), int(row["j"])], abs=1e-6)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    analyzer = load_analyzer()
+    os.environ["SIGNATURE_CACHE_DIR"] = "off"
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_scans(directory, 12)
+        signatures = [(path, 80, 30) for path in paths]
+
+        start = time.perf_counter()
+        for a in range(len(paths)):
+            for b in range(a + 1, len(paths)):
+                analyzer.compare_signatures_with_dimensions(paths[a], paths[b], (80, 30), (80, 30), chart_output="data")
+        pairwise_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyzer.similarity_matrix(signatures, workers=1)
+        matrix_s = time.perf_counter() - start
+        pairs = len(paths) * (len(paths) - 1) // 2
+        print(f"{len(paths)} firme ({pairs} coppie): coppia per coppia {pairwise_s:.2f} s, matrice {matrix_s:.2f} s")
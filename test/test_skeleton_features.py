@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test dello scheletro condiviso in advanced_signature_analyzer.py: il thinning è eseguito
+una sola volta per analisi, anche quando non è disponibile (opencv-contrib assente) e il
+risultato condiviso è None; giunzioni (filtro 3x3) e curvatura (vettorizzata) coincidono
+con le scansioni punto per punto originali su piccoli scheletri sintetici
+"""
+
+import math
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import advanced_signature_analyzer as analyzer
+from conftest import binary_signature
+
+SKELETON_FEATURES = ["avgCurvature", "letterConnections", "velocity", "writingStyle"]
+
+
+class CountingThinning:
+    """Sostituto di cv2.ximgproc: conta le chiamate a thinning, che restituisce il tratto
+    assottigliato con un'erosione oppure fallisce come senza opencv-contrib"""
+
+    def __init__(self, available):
+        self.available = available
+        self.calls = 0
+
+    def thinning(self, binary):
+        self.calls += 1
+        if not self.available:
+            raise AttributeError("module 'cv2' has no attribute 'ximgproc'")
+        return cv2.erode(binary, np.ones((3, 3), np.uint8))
+
+
+def reference_junctions(skeleton):
+    """count_letter_connections originale: vicini contati pixel per pixel"""
+    connections = 0
+    h, w = skeleton.shape
+    for y in range(1, h - 1):
+        for x in range(1, w - 1):
+            if skeleton[y, x] > 0:
+                neighbor_count = np.sum(skeleton[y - 1:y + 2, x - 1:x + 2] > 0) - 1
+                if neighbor_count > 2:
+                    connections += 1
+    return connections
+
+
+def reference_curvature(skeleton, pixels_per_mm):
+    """calculate_average_curvature originale: angolo (p[i-5], p[i], p[i+5]) punto per punto"""
+    contours, _ = cv2.findContours(skeleton, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    total_curvature = 0.0
+    total_points = 0
+    for contour in contours:
+        if len(contour) > 10:
+            for i in range(5, len(contour) - 5):
+                v1 = contour[i - 5][0] - contour[i][0]
+                v2 = contour[i + 5][0] - contour[i][0]
+                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
+                total_curvature += np.arccos(np.clip(cos_angle, -1, 1))
+                total_points += 1
+    if total_points == 0:
+        return 0.0
+    return float(total_curvature / total_points * pixels_per_mm)
+
+
+def synthetic_skeletons():
+    """Scheletri di un pixel: incroci, diramazioni, tratti sui bordi e casi limite"""
+    skeletons = []
+    for seed in range(30):
+        rng = np.random.default_rng(seed)
+        image = np.zeros((int(rng.integers(20, 90)), int(rng.integers(20, 160))), dtype=np.uint8)
+        for _ in range(rng.integers(1, 6)):
+            points = np.cumsum(rng.normal(0, 6, size=(rng.integers(3, 12), 2)), axis=0)
+            points += [rng.uniform(0, image.shape[1]), rng.uniform(0, image.shape[0])]
+            cv2.polylines(image, [points.astype(np.int32)], False, 255, 1)
+        skeletons.append(image)
+    cross = np.zeros((9, 9), dtype=np.uint8)
+    cross[4, :] = cross[:, 4] = 255
+    skeletons += [cross, np.zeros((3, 3), dtype=np.uint8), np.full((3, 3), 255, dtype=np.uint8),
+                  np.full((1, 5), 255, dtype=np.uint8)]
+    return skeletons
+
+
+def test_junctions_match_pixel_loop():
+    for index, skeleton in enumerate(synthetic_skeletons()):
+        assert analyzer.count_skeleton_junctions(skeleton) == reference_junctions(skeleton), f"scheletro {index}"
+    assert analyzer.count_skeleton_junctions(synthetic_skeletons()[-4]) == 5
+
+
+def test_curvature_matches_point_loop():
+    for index, skeleton in enumerate(synthetic_skeletons()):
+        expected = reference_curvature(skeleton, 3.75)
+        assert math.isclose(analyzer.skeleton_curvature(skeleton, 3.75), expected,
+                            rel_tol=1e-9, abs_tol=1e-12), f"scheletro {index}"
+
+
+def graph_inputs(binary):
+    return {"gray": 255 - binary, "binary": binary, "real_width_mm": 80.0,
+            "real_height_mm": 40.0, "pixels_per_mm": 3.75}
+
+
+@pytest.mark.parametrize("available", [True, False])
+def test_skeleton_computed_once(monkeypatch, available):
+    thinning = CountingThinning(available)
+    monkeypatch.setattr(cv2, "ximgproc", thinning, raising=False)
+    binary = binary_signature(4)
+
+    result = analyzer.ADVANCED_FEATURES.run(graph_inputs(binary), SKELETON_FEATURES)
+    assert thinning.calls == 1
+
+    # Stessi valori delle funzioni pubbliche, che calcolano lo scheletro da sole
+    assert result["avgCurvature"] == analyzer.calculate_average_curvature(binary, 3.75)
+    assert result["letterConnections"] == analyzer.count_letter_connections(binary)
+    if not available:
+        assert result["avgCurvature"] == 0.0 and result["letterConnections"] == 0
+
+
+if __name__ == "__main__":
+    test_junctions_match_pixel_loop()
+    test_curvature_matches_point_loop()
+
+    skeleton = np.zeros((600, 1500), dtype=np.uint8)
+    for index in range(40):
+        cv2.line(skeleton, (index * 37, 0), (1499 - index * 37, 599), 255, 1)
+    start = time.perf_counter()
+    expected = reference_junctions(skeleton)
+    loop_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    assert analyzer.count_skeleton_junctions(skeleton) == expected
+    filter_ms = (time.perf_counter() - start) * 1000
+    print(f"Giunzioni su 600x1500: pixel per pixel {loop_ms:.0f} ms, filtro 3x3 {filter_ms:.2f} ms")
+
+    binary = binary_signature(4)
+    thinning = CountingThinning(False)
+    cv2.ximgproc = thinning
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        analyzer.ADVANCED_FEATURES.run(graph_inputs(binary), SKELETON_FEATURES)
+    elapsed_ms = (time.perf_counter() - start) / runs * 1000
+    print(f"Parametri dello scheletro senza thinning: {elapsed_ms:.2f} ms, "
+          f"tentativi di thinning per analisi: {thinning.calls / runs:.0f}")
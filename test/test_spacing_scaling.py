@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test della spaziatura in advanced_signature_analyzer.py: le distanze tra componenti
+consecutive coincidono con un calcolo di riferimento punto per punto anche su decine di
+migliaia di componenti, e la media su tutte le coppie (metrica predefinita di avgSpacing)
+con il calcolo originale coppia per coppia. La scalabilità sub-quadratica è verificata
+contando gli elementi prodotti dalle operazioni numpy, indipendenti dal carico della
+macchina; i tempi misurati sono stampati dal benchmark eseguito come script
+"""
+
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import advanced_signature_analyzer as analyzer
+
+SIZES = [1000, 2000, 4000, 8000, 16000]
+
+
+class CountingArray(np.ndarray):
+    """Array che conta gli elementi prodotti dalle ufunc e dalle funzioni numpy (lavoro svolto)"""
+
+    elements = 0
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = [value.view(np.ndarray) if isinstance(value, CountingArray) else value for value in inputs]
+        if "out" in kwargs:
+            kwargs["out"] = tuple(value.view(np.ndarray) if isinstance(value, CountingArray) else value
+                                  for value in kwargs["out"])
+        result = getattr(ufunc, method)(*inputs, **kwargs)
+        CountingArray.elements += int(np.size(result))
+        return result.view(CountingArray) if isinstance(result, np.ndarray) else result
+
+    def __array_function__(self, func, types, args, kwargs):
+        result = super().__array_function__(func, types, args, kwargs)
+        if isinstance(result, np.ndarray):
+            CountingArray.elements += result.size
+        return result
+
+
+def speckled_image(components, seed=0):
+    """Scansione rumorosa: components macchioline 2x2 separate su una griglia"""
+    rng = np.random.default_rng(seed)
+    side = int(math.ceil(math.sqrt(components))) * 4
+    image = np.zeros((side, side * 2), dtype=np.uint8)
+    cells = rng.choice((side // 4) * (side // 2), size=components, replace=False)
+    for cell in cells:
+        y, x = divmod(int(cell), side // 2)
+        image[y * 4:y * 4 + 2, x * 4:x * 4 + 2] = 255
+    return image
+
+
+def reference_neighbor_gaps(points):
+    """Riferimento: asse principale con SVD, ordinamento e distanze punto per punto"""
+    centered = points - points.mean(axis=0)
+    direction = np.linalg.svd(centered, full_matrices=False)[2][0]
+    if direction[0] < 0:
+        direction = -direction
+    projections = [float(x * direction[0] + y * direction[1]) for x, y in centered]
+    order = sorted(range(len(points)), key=projections.__getitem__)
+    return [math.dist(points[a], points[b]) for a, b in zip(order, order[1:])]
+
+
+def reference_all_pairs(centroids):
+    """Calcolo originale: distanza di ogni coppia con np.linalg.norm"""
+    distances = []
+    for i in range(len(centroids)):
+        for j in range(i + 1, len(centroids)):
+            distances.append(np.linalg.norm(centroids[i] - centroids[j]))
+    return np.mean(distances)
+
+
+def best_time(function, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_scaling(sizes=SIZES):
+    """Tempi della spaziatura tra vicini per ciascun numero di componenti"""
+    timings = []
+    for size in sizes:
+        components = cv2.connectedComponentsWithStats(speckled_image(size))
+        assert components[0] - 1 == size
+        timings.append(best_time(lambda: analyzer.calculate_spacing(None, 10.0, components, method="neighbors")))
+    return timings
+
+
+def spacing_work(centroids, method):
+    """Spaziatura ed elementi prodotti dalle operazioni numpy per calcolarla"""
+    components = (len(centroids) + 1, None, None, np.vstack([[0.0, 0.0], centroids]).view(CountingArray))
+    CountingArray.elements = 0
+    spacing = analyzer.calculate_spacing(None, 10.0, components, method=method)
+    return float(spacing), CountingArray.elements
+
+
+def scaling_exponent(sizes, timings):
+    """Pendenza della retta log(tempo) / log(n): 1 lineare, 2 quadratica"""
+    return float(np.polyfit(np.log(sizes), np.log(timings), 1)[0])
+
+
+def test_all_pairs_matches_reference():
+    rng = np.random.default_rng(1)
+    for n in (2, 3, 17, 256, 257, 700):
+        centroids = rng.uniform(0, 900, size=(n, 2))
+        expected = reference_all_pairs(centroids)
+        assert math.isclose(analyzer.mean_pairwise_distance(centroids), expected, rel_tol=1e-12)
+
+
+def test_neighbor_gaps_follow_writing_direction():
+    # Componenti su una linea inclinata, fornite in ordine sparso
+    t = np.array([3.0, 0.0, 4.0, 1.0, 2.0])
+    centroids = np.stack([100 + 50 * t, 40 + 10 * t], axis=1)
+    gaps = analyzer.neighbor_gaps(centroids)
+    assert np.allclose(gaps, math.hypot(50, 10))
+
+
+def test_neighbor_gaps_match_reference_on_large_input():
+    rng = np.random.default_rng(2)
+    n = SIZES[-1]
+    # Nuvola allungata e inclinata, come una riga di scrittura (proiezioni senza pareggi)
+    points = rng.normal(0, 1, size=(n, 2)) * [400, 30] @ np.array([[0.96, 0.28], [-0.28, 0.96]]) + [500, 200]
+    gaps = analyzer.neighbor_gaps(points)
+    assert gaps.shape == (n - 1,)
+    assert np.allclose(gaps, reference_neighbor_gaps(points), rtol=1e-9, atol=1e-9)
+
+    components = cv2.connectedComponentsWithStats(speckled_image(n))
+    expected = float(np.mean(analyzer.neighbor_gaps(components[3][1:]))) / 10.0
+    assert analyzer.calculate_spacing(None, 10.0, components, method="neighbors") == expected
+
+
+def test_default_spacing_is_all_pairs():
+    # avgSpacing e la velocità restano sulla metrica originale: i vicini sono opzionali
+    components = cv2.connectedComponentsWithStats(speckled_image(300))
+    expected = reference_all_pairs(components[3][1:]) / 10.0
+    assert math.isclose(analyzer.calculate_spacing(None, 10.0, components), expected, rel_tol=1e-12)
+    assert analyzer.calculate_spacing(None, 10.0, components, method="neighbors") < expected / 2
+
+
+def test_neighbor_spacing_work_is_linear():
+    rng = np.random.default_rng(3)
+    small, large = (rng.uniform(0, 900, size=(n, 2)) for n in (500, 4000))
+    works = {}
+    for method in ("neighbors", "all_pairs"):
+        for centroids in (small, large):
+            spacing, work = spacing_work(centroids, method)
+            plain = analyzer.calculate_spacing(None, 10.0, (len(centroids) + 1, None, None,
+                                                            np.vstack([[0.0, 0.0], centroids])), method=method)
+            assert math.isclose(spacing, plain, rel_tol=1e-12)
+            works.setdefault(method, []).append(work)
+
+    # Componenti x8: lavoro circa x8 per i vicini, circa x64 per tutte le coppie
+    assert works["neighbors"][1] / works["neighbors"][0] < 12
+    assert works["all_pairs"][1] / works["all_pairs"][0] > 40
+
+
+if __name__ == "__main__":
+    test_all_pairs_matches_reference()
+    test_neighbor_gaps_follow_writing_direction()
+    test_neighbor_gaps_match_reference_on_large_input()
+    test_default_spacing_is_all_pairs()
+    test_neighbor_spacing_work_is_linear()
+
+    timings = measure_scaling()
+    print(f"{'componenti':>10} {'vicini (ms)':>12}")
+    for size, timing in zip(SIZES, timings):
+        print(f"{size:>10} {timing * 1000:>12.3f}")
+    exponent = scaling_exponent(SIZES, timings)
+    print(f"Esponente di scalabilità: {exponent:.2f} ({'sub-quadratico' if exponent < 1.5 else 'ATTENZIONE: >= 1.5'})")
+
+    components = cv2.connectedComponentsWithStats(speckled_image(2000))
+    centroids = components[3][1:]
+    print(f"2000 componenti, tutte le coppie: originale {best_time(lambda: reference_all_pairs(centroids), 1):.2f} s, "
+          f"a blocchi {best_time(lambda: analyzer.mean_pairwise_distance(centroids), 1) * 1000:.1f} ms")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test di equivalenza del backend SSIM OpenCV (filtri separabili float32) rispetto
+a skimage.metrics.structural_similarity, entro una tolleranza numerica
+"""
+
+import io
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from conftest import SERVER_DIR, binary_signature
+
+from ssim_backends import OpenCVSSIM, PreparedSSIMImage, SkimageSSIM, get_ssim_backend
+
+# Differenza massima ammessa sull'SSIM medio e sulla mappa (float32 contro float64)
+SCORE_TOLERANCE = 1e-5
+MAP_TOLERANCE = 1e-4
+
+
+def image_pairs():
+    rng = np.random.default_rng(42)
+    pairs = [(binary_signature(seed), binary_signature(seed + 100)) for seed in range(10)]
+    pairs.append((binary_signature(3), binary_signature(3)))
+    pairs.append((binary_signature(4), 255 - binary_signature(4)))
+    pairs.append((np.zeros((150, 300), np.uint8), np.zeros((150, 300), np.uint8)))
+    pairs.append((rng.integers(0, 256, (150, 300)).astype(np.uint8), rng.integers(0, 256, (150, 300)).astype(np.uint8)))
+    pairs.append((rng.integers(0, 256, (37, 53)).astype(np.uint8), rng.integers(0, 256, (37, 53)).astype(np.uint8)))
+    return pairs
+
+
+def test_opencv_matches_skimage():
+    for gaussian in (False, True):
+        fast, reference = OpenCVSSIM(gaussian=gaussian), SkimageSSIM(gaussian=gaussian)
+        for index, (image1, image2) in enumerate(image_pairs()):
+            expected = reference.score(image1, image2)
+            assert abs(fast.score(image1, image2) - expected) < SCORE_TOLERANCE, f"coppia {index}, gaussiana={gaussian}"
+
+
+def test_full_map_matches_skimage():
+    image1, image2 = binary_signature(1), binary_signature(2)
+    for gaussian in (False, True):
+        fast, reference = OpenCVSSIM(gaussian=gaussian), SkimageSSIM(gaussian=gaussian)
+        score, ssim_map = fast.compare(image1, image2, full=True)
+        expected_score, expected_map = reference.compare(image1, image2, full=True)
+        pad = (fast.window - 1) // 2
+        interior = (slice(pad, -pad), slice(pad, -pad))
+        assert abs(score - expected_score) < SCORE_TOLERANCE
+        assert np.abs(ssim_map[interior] - expected_map[interior]).max() < MAP_TOLERANCE
+
+
+def test_prepared_references_match_direct_scores():
+    backend = OpenCVSSIM()
+    questioned = binary_signature(7)
+    references = [binary_signature(seed) for seed in range(20, 30)]
+    prepared = [backend.prepare(reference) for reference in references]
+
+    # Serializzazione: .npz e pickle restituiscono gli stessi dati
+    buffer = io.BytesIO()
+    prepared[0].save(buffer)
+    buffer.seek(0)
+    prepared[0] = PreparedSSIMImage.load(buffer)
+    prepared[1] = pickle.loads(pickle.dumps(prepared[1]))
+
+    expected = [backend.score(questioned, reference) for reference in references]
+    assert backend.score_many(questioned, prepared) == expected
+
+
+def test_stack_matches_prepared_scores():
+    questioned = binary_signature(8)
+    references = [binary_signature(seed) for seed in range(40, 46)]
+    for backend in (OpenCVSSIM(), OpenCVSSIM(gaussian=True), SkimageSSIM()):
+        stack = backend.prepare_stack(references)
+        assert len(stack) == len(references) and stack.shape == references[0].shape
+        expected = [backend.score(questioned, reference) for reference in references]
+        assert backend.score_stack(questioned, stack).tolist() == expected
+
+
+def test_prepared_window_mismatch_is_rejected():
+    prepared = OpenCVSSIM(gaussian=True).prepare(binary_signature(1))
+    try:
+        OpenCVSSIM().score_prepared(OpenCVSSIM().prepare(binary_signature(2)), prepared)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("finestra diversa accettata")
+
+
+def test_backend_switch():
+    assert get_ssim_backend("skimage").name == "skimage"
+    assert get_ssim_backend("opencv").name == "opencv"
+    try:
+        get_ssim_backend("inesistente")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("backend sconosciuto accettato")
+
+
+def test_unknown_backend_does_not_break_import():
+    # Un valore non valido fa fallire solo il confronto, non l'import né il warm-up del worker
+    code = (
+        "import importlib.util, sys; sys.path.insert(0, sys.argv[1]); "
+        "spec = importlib.util.spec_from_file_location('analyzer', sys.argv[1] + '/advanced-signature-analyzer.py'); "
+        "module = importlib.util.module_from_spec(spec); spec.loader.exec_module(module); "
+        "module.warm_up_worker(); print('skimage' in sys.modules)"
+    )
+    env = {**os.environ, "SIGNATURE_SSIM_BACKEND": "inesistente"}
+    output = subprocess.run([sys.executable, "-c", code, SERVER_DIR], capture_output=True, text=True, env=env, check=True)
+    assert output.stdout.strip().endswith("False")
+    assert "Backend SSIM sconosciuto" in output.stderr
+
+
+if __name__ == "__main__":
+    test_opencv_matches_skimage()
+    test_full_map_matches_skimage()
+    test_prepared_references_match_direct_scores()
+    test_stack_matches_prepared_scores()
+    test_prepared_window_mismatch_is_rejected()
+    test_backend_switch()
+
+    from skimage.metrics import structural_similarity
+    image1, image2 = binary_signature(1), binary_signature(2)
+    fast = OpenCVSSIM()
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        structural_similarity(image1, image2, full=True)
+    reference_ms = (time.perf_counter() - start) / runs * 1000
+    start = time.perf_counter()
+    for _ in range(runs):
+        fast.score(image1, image2)
+    fast_ms = (time.perf_counter() - start) / runs * 1000
+    print(f"Equivalenza verificata; 300x150: skimage {reference_ms:.2f} ms, OpenCV {fast_ms:.2f} ms")
+
+    # Una firma contro un archivio di 200 riferimenti già preparati
+    images = [binary_signature(seed) for seed in range(200)]
+    archive = [fast.prepare(image) for image in images]
+    start = time.perf_counter()
+    for image in images:
+        structural_similarity(image1, image)
+    independent_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    fast.score_many(image1, archive)
+    prepared_ms = (time.perf_counter() - start) * 1000
+    print(f"1 contro 200: ssim() indipendenti {independent_ms:.1f} ms, riferimenti preparati {prepared_ms:.1f} ms")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test del profilo di avvio: --startup-profile su analyze / --analyze-dimensions stampa i
+tempi su stderr ed esegue comunque il comando, con lo stesso JSON su stdout; da solo
+stampa il costo di import di ogni gruppo caricato su richiesta
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from conftest import ANALYZER_SCRIPT, write_signature
+
+
+def run_analyzer(*args):
+    env = {**os.environ, "SIGNATURE_CACHE_DIR": "off"}
+    output = subprocess.run([sys.executable, ANALYZER_SCRIPT, *args], capture_output=True, text=True, env=env)
+    assert output.returncode == 0, output.stderr
+    return output
+
+
+def test_flag_profiles_and_runs_analyze(signature_path):
+    plain = run_analyzer("analyze", signature_path, "80", "30")
+    profiled = run_analyzer("analyze", signature_path, "80", "30", "--startup-profile")
+    assert json.loads(profiled.stdout) == json.loads(plain.stdout)
+    assert "[STARTUP]" not in plain.stderr
+    for line in ("Import di base (cv2, numpy)", "Comando analyze:", "Totale (import + comando)"):
+        assert f"[STARTUP] {line}" in profiled.stderr
+    # L'analisi da sola non carica nessun gruppo su richiesta (grafici, report)
+    assert "[STARTUP] Moduli caricati su richiesta dal comando: nessuno" in profiled.stderr
+
+
+def test_flag_on_analyze_dimensions(signature_path):
+    profiled = run_analyzer("--analyze-dimensions", signature_path, "80", "30", "--startup-profile")
+    assert "verifica_parameters" in json.loads(profiled.stdout)
+    assert "[STARTUP] Comando --analyze-dimensions:" in profiled.stderr
+
+
+def test_standalone_mode_lists_groups():
+    output = run_analyzer("--startup-profile")
+    assert output.stdout == ""
+    assert "[STARTUP] Totale con tutti i moduli" in output.stderr
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = write_signature(os.path.join(directory, "firma.png"))
+        runs = 5
+        start = time.perf_counter()
+        for _ in range(runs):
+            run_analyzer("analyze", image_path, "80", "30")
+        print(f"analyze a freddo (processo nuovo): {(time.perf_counter() - start) / runs * 1000:.0f} ms")
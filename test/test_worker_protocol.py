@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test del protocollo JSON-lines del worker persistente (--serve): id restituiti in ogni
+risposta, errori per righe malformate e comandi sconosciuti, ping/shutdown e stdout
+riservato alle sole righe del protocollo
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+from conftest import ANALYZER_SCRIPT, write_signature
+
+
+def serve(analyzer, monkeypatch, lines):
+    """Esegue serve_worker in-process sulle righe indicate e restituisce le risposte"""
+    # serve_worker sposta sys.stdout su stderr: il monkeypatch lo ripristina a fine test
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    monkeypatch.setattr(analyzer, "warm_up_worker", lambda: None)
+    output = io.StringIO()
+    analyzer.serve_worker(io.StringIO("".join(line + "\n" for line in lines)), output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_ids_errors_and_shutdown(analyzer, monkeypatch):
+    replies = serve(analyzer, monkeypatch, [
+        json.dumps({"id": 1, "command": "ping"}),
+        "",
+        "{non json",
+        json.dumps({"id": "x", "command": "inesistente"}),
+        json.dumps({"id": 3, "command": "analyze"}),
+        json.dumps({"id": 4, "command": "shutdown"}),
+        json.dumps({"id": 5, "command": "ping"}),
+    ])
+    assert [reply["id"] for reply in replies] == [1, None, "x", 3, 4]
+    assert replies[0]["result"] == {"status": "ok", "pid": os.getpid()}
+    assert "error" in replies[1]
+    assert replies[2]["error"] == "Comando sconosciuto: inesistente"
+    # Argomenti mancanti: errore della sola richiesta, il worker continua
+    assert "image_path" in replies[3]["error"]
+    assert replies[4]["result"] == {"status": "shutdown"}
+
+
+def test_stray_prints_do_not_reach_the_protocol(analyzer, monkeypatch, signature_path):
+    def noisy(*args, **kwargs):
+        print("messaggio di debug")
+        return {"Proportion": 1.0}
+
+    monkeypatch.setattr(analyzer, "analyze_signature_cached", noisy)
+    replies = serve(analyzer, monkeypatch, [
+        json.dumps({"id": 1, "command": "analyze", "image_path": signature_path, "width_mm": 80, "height_mm": 30}),
+        json.dumps({"id": 2, "command": "analyze-dimensions", "image_path": signature_path, "width_mm": 80, "height_mm": 30}),
+    ])
+    assert replies == [
+        {"id": 1, "result": {"Proportion": 1.0}},
+        {"id": 2, "result": {"verifica_parameters": {"Proportion": 1.0}}},
+    ]
+
+
+def test_serve_process_matches_cli(signature_path):
+    env = {**os.environ, "SIGNATURE_CACHE_DIR": "off"}
+    cli = subprocess.run([sys.executable, ANALYZER_SCRIPT, "analyze", signature_path, "80", "30"],
+                         capture_output=True, text=True, env=env, check=True)
+    requests = [
+        {"id": 1, "command": "analyze", "image_path": signature_path, "width_mm": 80, "height_mm": 30},
+        {"id": 2, "command": "compare", "verifica_path": signature_path, "comp_path": signature_path,
+         "verifica_dimensions": "80x30", "reference_dimensions": "80x30", "chart_output": "data"},
+        {"id": 3, "command": "shutdown"},
+    ]
+    worker = subprocess.run([sys.executable, ANALYZER_SCRIPT, "--serve"], capture_output=True, text=True, env=env,
+                            input="".join(json.dumps(request) + "\n" for request in requests), timeout=120)
+    assert worker.returncode == 0, worker.stderr
+
+    # Ogni riga di stdout è una risposta del protocollo, i log restano su stderr
+    replies = [json.loads(line) for line in worker.stdout.splitlines()]
+    assert [reply["id"] for reply in replies] == [1, 2, 3]
+    assert replies[0]["result"] == json.loads(cli.stdout)
+    assert replies[1]["result"]["similarity"] > 0.99
+    assert "[WORKER] Worker pronto" in worker.stderr
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = write_signature(os.path.join(directory, "firma.png"))
+        env = {**os.environ, "SIGNATURE_CACHE_DIR": "off"}
+        runs = 20
+        request = json.dumps({"command": "analyze", "image_path": image_path, "width_mm": 80, "height_mm": 30})
+        worker = subprocess.Popen([sys.executable, ANALYZER_SCRIPT, "--serve"], stdin=subprocess.PIPE,
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+        worker.stdin.write(request + "\n")
+        worker.stdin.flush()
+        worker.stdout.readline()
+        start = time.perf_counter()
+        for _ in range(runs):
+            worker.stdin.write(request + "\n")
+            worker.stdin.flush()
+            worker.stdout.readline()
+        warm_ms = (time.perf_counter() - start) / runs * 1000
+        worker.stdin.close()
+        worker.wait()
+
+        start = time.perf_counter()
+        for _ in range(5):
+            subprocess.run([sys.executable, ANALYZER_SCRIPT, "analyze", image_path, "80", "30"],
+                           capture_output=True, env=env, check=True)
+        cold_ms = (time.perf_counter() - start) / 5 * 1000
+        print(f"analyze: worker caldo {warm_ms:.1f} ms, processo nuovo {cold_ms:.0f} ms")